@@ -18,22 +18,24 @@ import uuid
 import logging
 import re
 import os
-from typing import Dict, List, Any, Optional, Union, Tuple, Callable
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Union, Tuple, Callable, Iterable
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime
 from enum import Enum
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import hashlib
 import random
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from backend.config import REWRITE_SEARCH_BUDGET
+from backend.utils.textdiff import diff_texts
 
 # AI Integration imports
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    logging.warning("OpenAI not available - using fallback rewriting")
+from backend.services.llm_router import NoProviderAvailable, ProviderRouter, llm_router, providers_from_env
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -89,6 +91,28 @@ class RewriteIntensity(Enum):
 # OPTIREWRITE DATA STRUCTURES
 # ============================================================================
 
+# Optional RewriteResult components, selectable with RewriteConfig.fields
+RESULT_FIELDS = ('quality_scores', 'improvement_metrics', 'change_summary', 'recommendations', 'confidence_score')
+
+# Components each optional component is computed from
+RESULT_FIELD_DEPENDENCIES = {
+    'improvement_metrics': ('quality_scores',),
+    'recommendations': ('quality_scores', 'improvement_metrics'),
+    'confidence_score': ('quality_scores', 'improvement_metrics'),
+}
+
+def expand_result_fields(fields: Optional[Iterable[str]]) -> frozenset:
+    """Requested result components plus what they depend on; None means all of them"""
+    if fields is None:
+        return frozenset(RESULT_FIELDS)
+    requested = set(fields)
+    unknown = requested.difference(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown result fields: {', '.join(sorted(unknown))} (available: {', '.join(RESULT_FIELDS)})")
+    for name in list(requested):
+        requested.update(RESULT_FIELD_DEPENDENCIES.get(name, ()))
+    return frozenset(requested)
+
 @dataclass
 class RewriteConfig:
     """Configuration for rewriting operations"""
@@ -99,28 +123,90 @@ class RewriteConfig:
     preserve_structure: bool = False
     target_readability: Optional[float] = None
     target_length_ratio: Optional[float] = None  # Target length as ratio of original
+    search_budget: Optional[float] = None  # Seconds a rule-based search for the targets may take; None uses SEARCH_BUDGET
     custom_instructions: List[str] = field(default_factory=list)
     forbidden_words: List[str] = field(default_factory=list)
     required_keywords: List[str] = field(default_factory=list)
     style_guide: Optional[str] = None
+    fields: Optional[List[str]] = None  # RESULT_FIELDS to compute; None computes all
 
-@dataclass
+class ScoreVector(Mapping):
+    """A fixed set of float scores in one ``array('d')``, readable as a dict
+
+    Subclasses list their keys in ``KEYS``; a key's position there is its
+    index in the array. Every key is always present (unset scores read 0.0),
+    so iteration, ``len`` and equality cover all of ``KEYS`` in order.
+    Assigning to a key outside ``KEYS`` raises KeyError.
+    """
+    __slots__ = ('vector',)
+    KEYS: Tuple = ()
+    INDEX: Dict[Any, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.INDEX = {key: index for index, key in enumerate(cls.KEYS)}
+
+    def __init__(self, scores: Optional[Mapping] = None):
+        self.vector = array('d', [0.0]) * len(self.KEYS)  # exact size; frombytes over-allocates
+        for key, score in (scores or {}).items():
+            self[key] = score
+
+    def __getitem__(self, key) -> float:
+        return self.vector[self.INDEX[key]]
+
+    def __setitem__(self, key, score: float):
+        self.vector[self.INDEX[key]] = score
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+class QualityScores(ScoreVector):
+    """Quality scores indexed by QualityMetric"""
+    __slots__ = ()
+    KEYS = tuple(QualityMetric)
+
+class ImprovementMetrics(ScoreVector):
+    """Before/after deltas computed by OptiRewriteEngine._calculate_improvements"""
+    __slots__ = ()
+    KEYS = (
+        'readability_improvement',
+        'complexity_reduction',
+        'length_change_ratio',
+        'sentence_length_improvement',
+        'style_consistency_improvement',
+        'overall_quality_score',
+    )
+
+# Slotted: results are cached and queued by the thousand
+@dataclass(slots=True)
 class RewriteResult:
-    """Result of a rewriting operation"""
+    """Result of a rewriting operation
+
+    Components left out of ``config.fields`` are None until
+    ``OptiRewriteEngine.complete_result`` computes them.
+    """
     rewrite_id: str
     original_text: str
     rewritten_text: str
     config: RewriteConfig
     strategies_applied: List[RewriteStrategy]
-    quality_scores: Dict[QualityMetric, float]
-    improvement_metrics: Dict[str, float]
+    quality_scores: Optional[QualityScores]
+    improvement_metrics: Optional[ImprovementMetrics]
     processing_time: float
-    confidence_score: float
-    change_summary: Dict[str, Any]
-    recommendations: List[str]
+    confidence_score: Optional[float]
+    change_summary: Optional[Dict[str, Any]]
+    recommendations: Optional[List[str]]
     timestamp: datetime
+    strategy_costs: Optional[Dict[RewriteStrategy, 'StrategyCost']] = None
+    target_search: Optional['TargetSearch'] = None  # set when the rewrite searched for config targets
 
-@dataclass
+@dataclass(slots=True)
 class RewriteAnalysis:
     """Analysis of text for rewriting optimization"""
     text_length: int
@@ -134,6 +220,202 @@ class RewriteAnalysis:
     improvement_opportunities: List[str]
     recommended_strategies: List[RewriteStrategy]
 
+# ============================================================================
+# TEXT SCANNING
+# ============================================================================
+#
+# Every detection rule runs over one tokenization of the text instead of its
+# own regex pass. Python's ``re`` backtracks, so rules of the form
+# ``(\w+)\s+...`` or ``\bx\b.*\bx\b`` can go quadratic on long tokens or long
+# lines; the scan below visits each word once and answers all of them.
+# Substitution rules that still use regexes are anchored at word boundaries
+# (``\b``) so a failed match costs at most one pass over the current word.
+
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+WORD_PATTERN = re.compile(r'\w+')
+VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+
+PASSIVE_AUXILIARIES = frozenset(['was', 'were', 'been', 'being'])
+HEDGE_WORDS = frozenset(['somewhat', 'rather', 'quite', 'fairly', 'relatively', 'possibly'])
+NOMINALIZATION_SUFFIXES = ('tion', 'sion', 'ment', 'ness', 'ity', 'ism')
+CLAUSE_PUNCTUATION = frozenset(',;:')
+ASCII_DIGITS = frozenset('0123456789')
+
+# scan_text keeps its last SCAN_CACHE_SIZE scans, holding at most SCAN_CACHE_MAX_CHARS of text in all.
+# A scan holds several tuples the size of its text, so a text over the budget is scanned on every call
+# rather than pinned in memory after its request is done.
+SCAN_CACHE_SIZE = 16
+SCAN_CACHE_MAX_CHARS = 1_000_000
+
+# Sentences with more words than this count as long
+LONG_SENTENCE_WORDS = 25
+
+# Order matches the complexity features averaged by TextAnalyzer._calculate_complexity
+COMPLEXITY_FEATURES = (
+    'passive_voice',
+    'complex_sentences',
+    'long_words',
+    'technical_terms',
+    'nominalizations',
+    'hedge_words',
+)
+
+@dataclass(frozen=True)
+class TextScan:
+    """Single-pass tokenization of a text and the counts derived from it"""
+    pieces: Tuple[str, ...]           # re.split(r'[.!?]+', text), empty pieces included
+    sentences: Tuple[str, ...]        # stripped, non-empty pieces
+    words: Tuple[str, ...]            # whitespace-separated words (text.split())
+    tokens: Tuple[str, ...]           # lowercased \w+ runs
+    syllables: int
+    complexity_counts: Dict[str, int]
+
+def _is_nominalization(token: str) -> bool:
+    # \b\w+(tion|sion|...)\b: the suffix must follow at least one word character
+    for suffix in NOMINALIZATION_SUFFIXES:
+        if token.endswith(suffix) and len(token) > len(suffix):
+            return True
+    return False
+
+def _word_syllables(word: str) -> int:
+    syllables = max(1, len(VOWEL_GROUPS.findall(word)))
+    if word.endswith('e') and syllables > 1:
+        syllables -= 1
+    return syllables
+
+class _ScanCache:
+    """LRU of TextScans bounded by entry count and by the total length of their texts"""
+
+    def __init__(self, max_entries: int, max_chars: int):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._scans: "OrderedDict[str, TextScan]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[TextScan]:
+        with self._lock:
+            scan = self._scans.get(text)
+            if scan is not None:
+                self._scans.move_to_end(text)
+            return scan
+
+    def put(self, text: str, scan: TextScan) -> None:
+        if len(text) > self.max_chars:
+            return
+        with self._lock:
+            if text in self._scans:
+                return
+            self._scans[text] = scan
+            self._chars += len(text)
+            while len(self._scans) > self.max_entries or self._chars > self.max_chars:
+                evicted, _ = self._scans.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scans.clear()
+            self._chars = 0
+
+_scan_cache = _ScanCache(SCAN_CACHE_SIZE, SCAN_CACHE_MAX_CHARS)
+
+def scan_text(text: str) -> TextScan:
+    """Tokenize ``text`` once; repeated calls for the same text are cached (see SCAN_CACHE_MAX_CHARS)"""
+    scan = _scan_cache.get(text)
+    if scan is None:
+        scan = _scan(text)
+        _scan_cache.put(text, scan)
+    return scan
+
+scan_text.cache_clear = _scan_cache.clear
+
+def _scan(text: str) -> TextScan:
+    pieces = SENTENCE_BOUNDARY.split(text)
+    counts = dict.fromkeys(COMPLEXITY_FEATURES, 0)
+    tokens = []
+    syllable_memo: Dict[str, int] = {}
+    syllables = 0
+    previous = None
+    previous_end = 0
+
+    for match in WORD_PATTERN.finditer(text):
+        word = match.group()
+        token = word.lower()
+        start = match.start()
+        gap = text[previous_end:start]
+        tokens.append(token)
+
+        # [,;:]\s*\w+ -> clause punctuation, optional whitespace, then this word
+        stripped = gap.rstrip()
+        if stripped and stripped[-1] in CLAUSE_PUNCTUATION:
+            counts['complex_sentences'] += 1
+
+        # \b(was|were|been|being)\s+\w+ed\b
+        if (previous in PASSIVE_AUXILIARIES and gap and gap.isspace()
+                and len(token) > 2 and token.endswith('ed')):
+            counts['passive_voice'] += 1
+            previous = None  # the participle can't start another match
+        else:
+            previous = token
+
+        if len(word) >= 8:
+            counts['long_words'] += 1
+        # \b[A-Z]{2,}\b|\b\w*[0-9]+\w*\b
+        if ((len(word) >= 2 and word.isascii() and word.isalpha() and word.isupper())
+                or not ASCII_DIGITS.isdisjoint(word)):
+            counts['technical_terms'] += 1
+        if _is_nominalization(token):
+            counts['nominalizations'] += 1
+        if token in HEDGE_WORDS:
+            counts['hedge_words'] += 1
+
+        count = syllable_memo.get(token)
+        if count is None:
+            count = syllable_memo[token] = _word_syllables(token)
+        syllables += count
+        previous_end = match.end()
+
+    return TextScan(
+        pieces=tuple(pieces),
+        sentences=tuple(s.strip() for s in pieces if s.strip()),
+        words=tuple(text.split()),
+        tokens=tuple(tokens),
+        syllables=syllables,
+        complexity_counts=counts,
+    )
+
+def repeats_on_a_line(pattern: re.Pattern, text: str) -> bool:
+    """True if ``pattern`` matches twice with no newline in between.
+
+    Linear replacement for ``re.search(r'\\b(a|b)\\b.*\\b(a|b)\\b', text)``, which
+    rescans the rest of the line from every candidate first match.
+    """
+    previous_end = None
+    for match in pattern.finditer(text):
+        if previous_end is not None and text.find('\n', previous_end, match.start()) == -1:
+            return True
+        previous_end = match.end()
+    return False
+
+# Word-boundary anchored literal alternations: one bounded attempt per position
+CONFUSABLE_WORDS = (
+    re.compile(r"\b(?:there|their|they're)\b", re.IGNORECASE),
+    re.compile(r"\b(?:your|you're)\b", re.IGNORECASE),
+)
+
+# Leading \b keeps (\w+) from being retried at every offset inside a long word,
+# which made the unanchored form quadratic in token length
+PASSIVE_REWRITES = (
+    (re.compile(r'\b(\w+)\s+was\s+(\w+ed)\s+by\s+(\w+)', re.IGNORECASE), r'\3 \2 \1'),
+    (re.compile(r'\b(\w+)\s+were\s+(\w+ed)\s+by\s+(\w+)', re.IGNORECASE), r'\3 \2 \1'),
+    (re.compile(r'\b(\w+)\s+is\s+(\w+ed)\s+by\s+(\w+)', re.IGNORECASE), r'\3 \2s \1'),
+    (re.compile(r'\b(\w+)\s+are\s+(\w+ed)\s+by\s+(\w+)', re.IGNORECASE), r'\3 \2 \1'),
+)
+
+WHITESPACE_RUN = re.compile(r'\s+')
+# Runs after WHITESPACE_RUN, so the \s+ here never spans more than one character
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([.!?])')
+
 # ============================================================================
 # TEXT ANALYSIS ENGINE
 # ============================================================================
@@ -143,7 +425,7 @@ class TextAnalyzer:
     
     def __init__(self):
         self.tone_keywords = self._init_tone_keywords()
-        self.complexity_patterns = self._init_complexity_patterns()
+        self._tone_sets = {tone: frozenset(words) for tone, words in self.tone_keywords.items()}
         
     def _init_tone_keywords(self) -> Dict[str, List[str]]:
         """Initialize tone analysis keywords"""
@@ -157,21 +439,11 @@ class TextAnalyzer:
             'uncertain': ['maybe', 'perhaps', 'possibly', 'might', 'could', 'seems', 'appears']
         }
     
-    def _init_complexity_patterns(self) -> Dict[str, re.Pattern]:
-        """Initialize complexity detection patterns"""
-        return {
-            'passive_voice': re.compile(r'\b(was|were|been|being)\s+\w+ed\b', re.IGNORECASE),
-            'complex_sentences': re.compile(r'[,;:]\s*\w+'),
-            'long_words': re.compile(r'\b\w{8,}\b'),
-            'technical_terms': re.compile(r'\b[A-Z]{2,}\b|\b\w*[0-9]+\w*\b'),
-            'nominalizations': re.compile(r'\b\w+(tion|sion|ment|ness|ity|ism)\b', re.IGNORECASE),
-            'hedge_words': re.compile(r'\b(somewhat|rather|quite|fairly|relatively|possibly)\b', re.IGNORECASE)
-        }
-    
     def analyze_text(self, text: str) -> RewriteAnalysis:
         """Perform comprehensive text analysis"""
-        sentences = self._split_sentences(text)
-        words = text.split()
+        scan = scan_text(text)
+        sentences = list(scan.sentences)
+        words = scan.words
         
         analysis = RewriteAnalysis(
             text_length=len(text),
@@ -190,19 +462,19 @@ class TextAnalyzer:
     
     def _split_sentences(self, text: str) -> List[str]:
         """Split text into sentences"""
-        sentences = re.split(r'[.!?]+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        return list(scan_text(text).sentences)
     
     def _calculate_readability(self, text: str) -> float:
         """Calculate readability score (Flesch Reading Ease approximation)"""
-        sentences = self._split_sentences(text)
-        words = text.split()
-        
-        if not sentences or not words:
+        scan = scan_text(text)
+        return self._readability_from_counts(len(scan.words), len(scan.sentences), scan.syllables)
+    
+    def _readability_from_counts(self, word_count: int, sentence_count: int, syllables: int) -> float:
+        if not sentence_count or not word_count:
             return 0.0
         
-        avg_sentence_length = len(words) / len(sentences)
-        avg_syllables = self._estimate_syllables(text) / len(words)
+        avg_sentence_length = word_count / sentence_count
+        avg_syllables = syllables / word_count
         
         # Simplified Flesch formula
         score = 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables)
@@ -210,28 +482,22 @@ class TextAnalyzer:
     
     def _estimate_syllables(self, text: str) -> int:
         """Estimate syllable count"""
-        words = re.findall(r'\b\w+\b', text.lower())
-        total_syllables = 0
-        
-        for word in words:
-            syllables = max(1, len(re.findall(r'[aeiouy]+', word)))
-            if word.endswith('e') and syllables > 1:
-                syllables -= 1
-            total_syllables += syllables
-        
-        return total_syllables
+        return scan_text(text).syllables
     
     def _calculate_complexity(self, text: str) -> float:
         """Calculate text complexity score"""
+        scan = scan_text(text)
+        return self._complexity_from_counts(len(scan.words), scan.complexity_counts)
+    
+    def _complexity_from_counts(self, word_count: int, counts: Dict[str, int]) -> float:
         complexity_factors = []
-        word_count = len(text.split())
         
         if word_count == 0:
             return 0.0
         
         # Pattern-based complexity
-        for pattern_name, pattern in self.complexity_patterns.items():
-            matches = len(pattern.findall(text))
+        for feature in COMPLEXITY_FEATURES:
+            matches = counts[feature]
             factor = min(1.0, matches / max(1, word_count / 10))
             complexity_factors.append(factor)
         
@@ -247,7 +513,7 @@ class TextAnalyzer:
             return {tone: 0.0 for tone in self.tone_keywords.keys()}
         
         tone_scores = {}
-        for tone, keywords in self.tone_keywords.items():
+        for tone, keywords in self._tone_sets.items():
             matches = sum(1 for word in words if word in keywords)
             tone_scores[tone] = matches / word_count
         
@@ -272,48 +538,123 @@ class TextAnalyzer:
         if tone_scores:
             for tone in self.tone_keywords.keys():
                 tone_values = [scores.get(tone, 0) for scores in tone_scores]
-                tone_variance = sum((value - sum(tone_values) / len(tone_values)) ** 2 for value in tone_values) / len(tone_values)
+                tone_mean = sum(tone_values) / len(tone_values)
+                tone_variance = sum((value - tone_mean) ** 2 for value in tone_values) / len(tone_values)
                 tone_consistency = 1.0 / (1.0 + tone_variance * 10)
                 consistency_factors.append(tone_consistency)
         
         return sum(consistency_factors) / len(consistency_factors)
     
+    def _consistency_from_moments(self, sentence_count: int, length_sum: int, length_sq_sum: int,
+                                  tone_sums: Dict[str, float], tone_sq_sums: Dict[str, float]) -> float:
+        """_calculate_style_consistency from per-sentence sums and sums of squares"""
+        if sentence_count < 2:
+            return 1.0
+        
+        avg_length = length_sum / sentence_count
+        length_variance = max(0.0, length_sq_sum / sentence_count - avg_length ** 2)
+        consistency_factors = [1.0 / (1.0 + length_variance / avg_length) if avg_length > 0 else 0.0]
+        
+        for tone in self.tone_keywords.keys():
+            tone_mean = tone_sums[tone] / sentence_count
+            tone_variance = max(0.0, tone_sq_sums[tone] / sentence_count - tone_mean ** 2)
+            consistency_factors.append(1.0 / (1.0 + tone_variance * 10))
+        
+        return sum(consistency_factors) / len(consistency_factors)
+    
     def _identify_improvement_opportunities(self, text: str) -> List[str]:
         """Identify specific improvement opportunities"""
+        scan = scan_text(text)
+        long_sentences = sum(1 for s in scan.sentences if len(s.split()) > LONG_SENTENCE_WORDS)
+        return self._opportunities_from_counts(
+            len(scan.words), len(scan.sentences), long_sentences,
+            scan.complexity_counts, self._calculate_readability(text)
+        )
+    
+    def _opportunities_from_counts(self, word_count: int, sentence_count: int, long_sentences: int,
+                                   counts: Dict[str, int], readability: float) -> List[str]:
         opportunities = []
         
         # Check for passive voice
-        passive_matches = self.complexity_patterns['passive_voice'].findall(text)
-        if len(passive_matches) > len(text.split()) * 0.1:
+        if counts['passive_voice'] > word_count * 0.1:
             opportunities.append("Reduce passive voice usage")
         
         # Check for long sentences
-        sentences = self._split_sentences(text)
-        long_sentences = [s for s in sentences if len(s.split()) > 25]
-        if len(long_sentences) > len(sentences) * 0.3:
+        if long_sentences > sentence_count * 0.3:
             opportunities.append("Break up long sentences")
         
         # Check for complex words
-        complex_words = self.complexity_patterns['long_words'].findall(text)
-        if len(complex_words) > len(text.split()) * 0.2:
+        if counts['long_words'] > word_count * 0.2:
             opportunities.append("Simplify vocabulary")
         
         # Check for nominalizations
-        nominalizations = self.complexity_patterns['nominalizations'].findall(text)
-        if len(nominalizations) > len(text.split()) * 0.1:
+        if counts['nominalizations'] > word_count * 0.1:
             opportunities.append("Convert nominalizations to verbs")
         
         # Check readability
-        readability = self._calculate_readability(text)
         if readability < 0.6:
             opportunities.append("Improve overall readability")
         
         return opportunities
     
+    def annotate_sentences(self, text: str) -> List[Dict[str, Any]]:
+        """Per-sentence spans and issues for highlighting in an editor
+        
+        Sentences are the non-blank pieces between sentence punctuation (the
+        same split as ``TextScan.sentences``), trimmed, with the closing
+        punctuation included. Offsets are string indexes into ``text``. Issues
+        are ``passive_voice`` (auxiliary through participle), ``hedge_word`` and
+        ``nominalization`` spans, and ``long_sentence`` covering a sentence of
+        more than ``LONG_SENTENCE_WORDS`` words.
+        """
+        annotations = []
+        position = 0
+        boundaries = list(SENTENCE_BOUNDARY.finditer(text))
+        
+        for index in range(len(boundaries) + 1):
+            piece_end, closing_end = boundaries[index].span() if index < len(boundaries) else (len(text), len(text))
+            piece = text[position:piece_end]
+            stripped = piece.strip()
+            if stripped:
+                start = position + len(piece) - len(piece.lstrip())
+                # Through the closing punctuation; an unterminated last sentence ends at its last non-space
+                end = closing_end if piece_end < closing_end else position + len(piece.rstrip())
+                word_count = len(stripped.split())
+                issues = []
+                previous = None
+                previous_end = start
+                for match in WORD_PATTERN.finditer(text, start, piece_end):
+                    token = match.group().lower()
+                    gap = text[previous_end:match.start()]
+                    if (previous is not None and previous[0] in PASSIVE_AUXILIARIES and gap.isspace()
+                            and len(token) > 2 and token.endswith('ed')):
+                        issues.append({'type': 'passive_voice', 'start': previous[1], 'end': match.end()})
+                        previous = None  # same rule as scan_text: no overlapping matches
+                    else:
+                        previous = (token, match.start())
+                    if token in HEDGE_WORDS:
+                        issues.append({'type': 'hedge_word', 'start': match.start(), 'end': match.end()})
+                    elif _is_nominalization(token):
+                        issues.append({'type': 'nominalization', 'start': match.start(), 'end': match.end()})
+                    previous_end = match.end()
+                if word_count > LONG_SENTENCE_WORDS:
+                    issues.insert(0, {'type': 'long_sentence', 'start': start, 'end': end})
+                annotations.append({
+                    'start': start,
+                    'end': end,
+                    'word_count': word_count,
+                    'issues': issues,
+                })
+            position = closing_end
+        
+        return annotations
+    
     def _recommend_strategies(self, text: str) -> List[RewriteStrategy]:
         """Recommend rewriting strategies based on analysis"""
+        return self._strategies_for(self._identify_improvement_opportunities(text))
+    
+    def _strategies_for(self, opportunities: List[str]) -> List[RewriteStrategy]:
         strategies = []
-        opportunities = self._identify_improvement_opportunities(text)
         
         if "Reduce passive voice usage" in opportunities:
             strategies.append(RewriteStrategy.SENTENCE_RESTRUCTURE)
@@ -340,11 +681,368 @@ class TextAnalyzer:
         ])
         
         return list(set(strategies))  # Remove duplicates
+    
+    def open_document(self, text: str = "") -> 'IncrementalDocument':
+        """Start an incrementally analyzed editing session on ``text``"""
+        return IncrementalDocument(self, text)
+    
+    def _segment_features(self, segment: str, annotate: bool = True) -> 'SegmentFeatures':
+        scan = scan_text(segment)
+        lengths = [len(sentence.split()) for sentence in scan.sentences]
+        sentence_tones = [self._analyze_tone(sentence) for sentence in scan.sentences]
+        words = segment.lower().split()
+        return SegmentFeatures(
+            text=segment,
+            word_count=len(scan.words),
+            syllables=scan.syllables,
+            complexity_counts=scan.complexity_counts,
+            sentence_count=len(lengths),
+            long_sentences=sum(1 for length in lengths if length > LONG_SENTENCE_WORDS),
+            length_sum=sum(lengths),
+            length_sq_sum=sum(length * length for length in lengths),
+            tone_matches={tone: sum(1 for word in words if word in keywords)
+                          for tone, keywords in self._tone_sets.items()},
+            tone_sums={tone: sum(tones[tone] for tones in sentence_tones) for tone in self._tone_sets},
+            tone_sq_sums={tone: sum(tones[tone] ** 2 for tones in sentence_tones) for tone in self._tone_sets},
+            sentences=self.annotate_sentences(segment) if annotate else None,
+        )
+    
+    def _empty_totals(self) -> Dict[str, Any]:
+        """Zeroed sums of SegmentFeatures counts"""
+        totals: Dict[str, Any] = dict.fromkeys(SEGMENT_COUNTS, 0)
+        totals['complexity_counts'] = dict.fromkeys(COMPLEXITY_FEATURES, 0)
+        totals['tone_matches'] = dict.fromkeys(self._tone_sets, 0)
+        totals['tone_sums'] = dict.fromkeys(self._tone_sets, 0.0)
+        totals['tone_sq_sums'] = dict.fromkeys(self._tone_sets, 0.0)
+        return totals
+    
+    @staticmethod
+    def _add_features(totals: Dict[str, Any], segment: 'SegmentFeatures', sign: int = 1):
+        for name in SEGMENT_COUNTS:
+            totals[name] += sign * getattr(segment, name)
+        for name in SEGMENT_TALLIES:
+            total = totals[name]
+            for key, value in getattr(segment, name).items():
+                total[key] += sign * value
+    
+    def _analysis_from_totals(self, text_length: int, totals: Dict[str, Any]) -> RewriteAnalysis:
+        """analyze_text's result for a text whose segment counts sum to ``totals``"""
+        word_count = totals['word_count']
+        sentence_count = totals['sentence_count']
+        readability = self._readability_from_counts(word_count, sentence_count, totals['syllables'])
+        opportunities = self._opportunities_from_counts(
+            word_count, sentence_count, totals['long_sentences'], totals['complexity_counts'], readability
+        )
+        return RewriteAnalysis(
+            text_length=text_length,
+            sentence_count=sentence_count,
+            word_count=word_count,
+            avg_sentence_length=word_count / sentence_count if sentence_count else 0,
+            readability_score=readability,
+            complexity_score=self._complexity_from_counts(word_count, totals['complexity_counts']),
+            tone_analysis={tone: matches / word_count if word_count else 0.0
+                           for tone, matches in totals['tone_matches'].items()},
+            style_consistency=self._consistency_from_moments(
+                sentence_count, totals['length_sum'], totals['length_sq_sum'],
+                totals['tone_sums'], totals['tone_sq_sums']
+            ),
+            improvement_opportunities=opportunities,
+            recommended_strategies=self._strategies_for(opportunities)
+        )
+
+# ============================================================================
+# INCREMENTAL ANALYSIS
+# ============================================================================
+#
+# An editing session keeps its document as a list of segments, each cut right
+# after a run of sentence punctuation and the whitespace that follows it. No
+# word, ``\w`` run or scan rule crosses such a cut, so every count analyze_text
+# uses is the sum of per-segment counts. An edit re-scans only the segments it
+# touches plus one neighbour on each side (a cut depends on the characters
+# around it), and the document totals are adjusted by the difference.
+
+# Segments end after sentence punctuation plus the whitespace run that follows
+SEGMENT_END = re.compile(r'[.!?]+\s+')
+
+def split_segments(text: str) -> List[str]:
+    """Cut ``text`` into segments; the pieces concatenate back to ``text``"""
+    segments = []
+    position = 0
+    for match in SEGMENT_END.finditer(text):
+        if match.end() < len(text):
+            segments.append(text[position:match.end()])
+            position = match.end()
+    if position < len(text):
+        segments.append(text[position:])
+    return segments
+
+@dataclass(slots=True)
+class SegmentFeatures:
+    """Per-segment counts that add up to the document's analysis"""
+    text: str
+    word_count: int
+    syllables: int
+    complexity_counts: Dict[str, int]
+    sentence_count: int
+    long_sentences: int
+    length_sum: int              # sentence lengths in words, for style consistency
+    length_sq_sum: int
+    tone_matches: Dict[str, int]
+    tone_sums: Dict[str, float]  # per-sentence tone scores, for tone consistency
+    tone_sq_sums: Dict[str, float]
+    sentences: Optional[List[Dict[str, Any]]]  # annotate_sentences, offsets relative to the segment
+
+# SegmentFeatures fields that are summed as numbers and as per-key dicts
+SEGMENT_COUNTS = ('word_count', 'syllables', 'sentence_count', 'long_sentences', 'length_sum', 'length_sq_sum')
+SEGMENT_TALLIES = ('complexity_counts', 'tone_matches', 'tone_sums', 'tone_sq_sums')
+
+# Segments per block of an IncrementalDocument; a block that grows past twice this is split
+SEGMENT_BLOCK = 64
+
+class _Fenwick:
+    """Prefix sums over a fixed number of slots with point updates (a binary indexed tree)"""
+    
+    __slots__ = ('_tree',)
+    
+    def __init__(self, values: Iterable[int] = ()):
+        tree = [0]
+        tree.extend(values)
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+    
+    def add(self, slot: int, delta: int):
+        tree = self._tree
+        i = slot + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+    
+    def prefix(self, slot: int) -> int:
+        """Sum of the slots before ``slot``"""
+        tree = self._tree
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot -= slot & -slot
+        return total
+    
+    def find(self, target: int) -> Tuple[int, int]:
+        """(first slot whose running sum passes ``target``, sum of the slots before it)
+        
+        The slot is the number of slots when the total doesn't pass ``target``.
+        """
+        tree = self._tree
+        slot = total = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            following = slot + step
+            if following < len(tree) and total + tree[following] <= target:
+                slot = following
+                total += tree[following]
+            step >>= 1
+        return slot, total
+
+class IncrementalDocument:
+    """A document under edit whose analysis is updated per touched segment
+    
+    Segments are kept in blocks of about SEGMENT_BLOCK. Two Fenwick trees
+    hold each block's character and segment counts, so finding the segment
+    at an offset, and the index of a segment, costs O(log blocks +
+    SEGMENT_BLOCK). An edit changes the counts of the blocks it touches and
+    never the offsets of the segments after it, so its cost follows the
+    edit's size, not the document's. The exception is splitting an
+    overgrown block, which re-indexes the blocks and happens at most once
+    per SEGMENT_BLOCK inserted segments.
+    """
+    
+    def __init__(self, analyzer: TextAnalyzer, text: str = ""):
+        self.analyzer = analyzer
+        self.version = 0
+        self.text_length = 0
+        self.segment_count = 0
+        self._blocks: List[List[SegmentFeatures]] = [[]]
+        self._block_chars: List[int] = [0]
+        self._chars = _Fenwick([0])
+        self._counts = _Fenwick([0])
+        self._totals = analyzer._empty_totals()
+        self._splice(0, 0, text)
+    
+    @property
+    def segments(self) -> List[SegmentFeatures]:
+        """All segments in order (a new list, built in time linear in the document)"""
+        return [segment for block in self._blocks for segment in block]
+    
+    @property
+    def text(self) -> str:
+        return "".join(segment.text for block in self._blocks for segment in block)
+    
+    def apply(self, ops: List[Tuple[int, int, str]]) -> List[Dict[str, Any]]:
+        """Apply edit ops and return the segment splices, in the order to apply them
+        
+        Ops are ``[start, end, text]`` against the document before the edit,
+        sorted and non-overlapping (the format of ``backend.utils.patch``).
+        Each splice replaces ``remove`` segments at ``index`` with ``insert``.
+        """
+        position = 0
+        for op in ops:
+            start, end, text = op
+            if not (isinstance(start, int) and isinstance(end, int) and isinstance(text, str)
+                    and position <= start <= end <= self.text_length):
+                raise ValueError(f"Invalid edit op at [{start}, {end}]")
+            position = end
+        
+        # Right to left, so each op's offsets are still valid when it is applied
+        splices = [self._splice(start, end, text) for start, end, text in reversed(ops)]
+        self.version += 1
+        return splices
+    
+    def _segment_at(self, offset: int) -> int:
+        """Index of the segment holding character ``offset``; the last segment from the end of the text on"""
+        block, position = self._chars.find(offset)
+        if block >= len(self._blocks):
+            return self.segment_count - 1
+        index = self._counts.prefix(block)
+        for segment in self._blocks[block]:
+            position += len(segment.text)
+            if position > offset:
+                break
+            index += 1
+        return index
+    
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(block, position in the block) of segment ``index``"""
+        block, before = self._counts.find(index)
+        return block, index - before
+    
+    def _splice(self, start: int, end: int, text: str) -> Dict[str, Any]:
+        blocks = self._blocks
+        if self.segment_count:
+            first = self._segment_at(start)
+            last = max(first, self._segment_at(max(start, end - 1)))
+            # A cut depends on the characters on both sides of it, so re-cut one segment further each way
+            first = max(0, first - 1)
+            last = min(self.segment_count - 1, last + 1)
+            first_block, first_position = self._locate(first)
+            last_block, last_position = self._locate(last)
+            region_start = self._chars.prefix(first_block) + sum(
+                len(segment.text) for segment in blocks[first_block][:first_position]
+            )
+        else:
+            first, last, region_start = 0, -1, 0
+            first_block = last_block = len(blocks) - 1
+            first_position, last_position = 0, -1
+        
+        removed = [segment for block in range(first_block, last_block + 1) for segment in blocks[block][
+            first_position if block == first_block else 0:
+            last_position + 1 if block == last_block else len(blocks[block])
+        ]]
+        region = "".join(segment.text for segment in removed)
+        region = region[:start - region_start] + text + region[end - region_start:]
+        inserted = [self.analyzer._segment_features(piece) for piece in split_segments(region)]
+        
+        for segment in removed:
+            self._count(segment, -1)
+        for segment in inserted:
+            self._count(segment, 1)
+        
+        # The first block takes the new segments and the rest of the last; blocks in between are emptied
+        tail = blocks[last_block][last_position + 1:]
+        for block in range(first_block, last_block + 1):
+            kept = blocks[block][:first_position] + inserted if block == first_block else []
+            if block == last_block:
+                kept = kept + tail
+            chars = sum(len(segment.text) for segment in kept)
+            self._chars.add(block, chars - self._block_chars[block])
+            self._counts.add(block, len(kept) - len(blocks[block]))
+            self._block_chars[block] = chars
+            blocks[block] = kept
+        self.segment_count += len(inserted) - len(removed)
+        self.text_length += len(text) - (end - start)
+        if len(blocks[first_block]) > 2 * SEGMENT_BLOCK:
+            self._split_blocks()
+        
+        return {
+            'index': first,
+            'remove': len(removed),
+            'insert': [self.segment_payload(segment) for segment in inserted],
+        }
+    
+    def _split_blocks(self):
+        """Split overgrown blocks, drop empty ones and re-index the block counts"""
+        blocks, block_chars = [], []
+        for block, chars in zip(self._blocks, self._block_chars):
+            if len(block) > 2 * SEGMENT_BLOCK:
+                for i in range(0, len(block), SEGMENT_BLOCK):
+                    blocks.append(block[i:i + SEGMENT_BLOCK])
+                    block_chars.append(sum(len(segment.text) for segment in blocks[-1]))
+            elif block:
+                blocks.append(block)
+                block_chars.append(chars)
+        self._blocks, self._block_chars = blocks or [[]], block_chars or [0]
+        self._chars = _Fenwick(self._block_chars)
+        self._counts = _Fenwick(len(block) for block in self._blocks)
+    
+    def _count(self, segment: SegmentFeatures, sign: int):
+        self.analyzer._add_features(self._totals, segment, sign)
+    
+    @staticmethod
+    def segment_payload(segment: SegmentFeatures) -> Dict[str, Any]:
+        return {'length': len(segment.text), 'sentences': segment.sentences}
+    
+    def analysis(self) -> RewriteAnalysis:
+        """The document's analyze_text result, computed from the running totals"""
+        return self.analyzer._analysis_from_totals(self.text_length, self._totals)
 
 # ============================================================================
 # REWRITING STRATEGIES
 # ============================================================================
 
+# Contraction rewrites per target tone
+TONE_REWRITES = {
+    'formal': (
+        (r"\bcan't\b", "cannot"),
+        (r"\bwon't\b", "will not"),
+        (r"\bdon't\b", "do not"),
+        (r"\bisn't\b", "is not"),
+        (r"\baren't\b", "are not")
+    ),
+    'casual': (
+        (r"\bcannot\b", "can't"),
+        (r"\bwill not\b", "won't"),
+        (r"\bdo not\b", "don't"),
+        (r"\bis not\b", "isn't"),
+        (r"\bare not\b", "aren't")
+    )
+}
+
+CLARITY_REWRITES = (
+    (r'\bthat\s+(?=\w+\s+(?:is|are|was|were))', ''),  # Remove unnecessary "that"
+    (r'\bin order to\b', 'to'),
+    (r'\bdue to the fact that\b', 'because'),
+    (r'\bat this point in time\b', 'now'),
+    (r'\bfor the purpose of\b', 'to'),
+    (r'\bin the event that\b', 'if')
+)
+
+# Applied at heavy and complete intensity only
+REDUNDANCY_REWRITES = (
+    (r'\bvery\s+unique\b', 'unique'),
+    (r'\bcompletely\s+finished\b', 'finished'),
+    (r'\babsolutely\s+perfect\b', 'perfect'),
+    (r'\btotally\s+destroyed\b', 'destroyed')
+)
+
+def _any_of(rewrites) -> re.Pattern:
+    """One case-insensitive pattern matching wherever any of ``rewrites`` would"""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern, _ in rewrites), re.IGNORECASE)
+
+# A strategy whose trigger finds nothing cannot change the text
+TONE_TRIGGERS = {tone: _any_of(rewrites) for tone, rewrites in TONE_REWRITES.items()}
+CLARITY_TRIGGER = _any_of(CLARITY_REWRITES + REDUNDANCY_REWRITES)
+
 class RewritingStrategies:
     """Collection of rewriting strategies"""
     
@@ -401,7 +1099,7 @@ class RewritingStrategies:
     
     def apply_sentence_restructure(self, text: str, intensity: RewriteIntensity) -> str:
         """Apply sentence restructuring strategy"""
-        sentences = re.split(r'[.!?]+', text)
+        sentences = SENTENCE_BOUNDARY.split(text)
         restructured_sentences = []
         
         for sentence in sentences:
@@ -429,16 +1127,11 @@ class RewritingStrategies:
     
     def _convert_passive_to_active(self, sentence: str) -> str:
         """Convert passive voice to active voice"""
-        # Simple passive voice patterns
-        passive_patterns = [
-            (r'(\w+)\s+was\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1'),
-            (r'(\w+)\s+were\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1'),
-            (r'(\w+)\s+is\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2s \1'),
-            (r'(\w+)\s+are\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1')
-        ]
-        
-        for pattern, replacement in passive_patterns:
-            sentence = re.sub(pattern, replacement, sentence, flags=re.IGNORECASE)
+        # Every pattern needs an agent introduced by "by"
+        if 'by' not in sentence.lower():
+            return sentence
+        for pattern, replacement in PASSIVE_REWRITES:
+            sentence = pattern.sub(replacement, sentence)
         
         return sentence
     
@@ -500,6 +1193,11 @@ class RewritingStrategies:
         
         return enhanced_text
     
+    def mentions_vocabulary(self, text: str) -> bool:
+        """False when apply_vocabulary_enhancement has nothing to replace"""
+        text_lower = text.lower()
+        return any(original in text_lower for original in self.vocabulary_replacements)
+    
     def _get_max_replacements(self, text: str, intensity: RewriteIntensity) -> int:
         """Get maximum number of replacements based on intensity"""
         word_count = len(text.split())
@@ -526,86 +1224,47 @@ class RewritingStrategies:
         """Apply tone adjustment strategy"""
         # This is a simplified implementation
         # In a full implementation, this would use more sophisticated NLP
-        
-        tone_adjustments = {
-            'formal': {
-                'patterns': [
-                    (r"\bcan't\b", "cannot"),
-                    (r"\bwon't\b", "will not"),
-                    (r"\bdon't\b", "do not"),
-                    (r"\bisn't\b", "is not"),
-                    (r"\baren't\b", "are not")
-                ]
-            },
-            'casual': {
-                'patterns': [
-                    (r"\bcannot\b", "can't"),
-                    (r"\bwill not\b", "won't"),
-                    (r"\bdo not\b", "don't"),
-                    (r"\bis not\b", "isn't"),
-                    (r"\bare not\b", "aren't")
-                ]
-            }
-        }
-        
-        if target_tone in tone_adjustments:
-            for pattern, replacement in tone_adjustments[target_tone]['patterns']:
-                text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        for pattern, replacement in TONE_REWRITES.get(target_tone, ()):
+            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
         
         return text
     
     def apply_clarity_improvement(self, text: str, intensity: RewriteIntensity) -> str:
         """Apply clarity improvement strategy"""
         # Remove unnecessary words
-        clarity_patterns = [
-            (r'\bthat\s+(?=\w+\s+(?:is|are|was|were))', ''),  # Remove unnecessary "that"
-            (r'\bin order to\b', 'to'),
-            (r'\bdue to the fact that\b', 'because'),
-            (r'\bat this point in time\b', 'now'),
-            (r'\bfor the purpose of\b', 'to'),
-            (r'\bin the event that\b', 'if')
-        ]
-        
-        for pattern, replacement in clarity_patterns:
+        for pattern, replacement in CLARITY_REWRITES:
             text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
         
         # Remove redundant words
         if intensity in [RewriteIntensity.HEAVY, RewriteIntensity.COMPLETE]:
-            redundancy_patterns = [
-                (r'\bvery\s+unique\b', 'unique'),
-                (r'\bcompletely\s+finished\b', 'finished'),
-                (r'\babsolutely\s+perfect\b', 'perfect'),
-                (r'\btotally\s+destroyed\b', 'destroyed')
-            ]
-            
-            for pattern, replacement in redundancy_patterns:
+            for pattern, replacement in REDUNDANCY_REWRITES:
                 text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
         
         return text
     
     def apply_engagement_boost(self, text: str, intensity: RewriteIntensity) -> str:
         """Apply engagement boosting strategy"""
-        sentences = re.split(r'[.!?]+', text)
+        sentences = SENTENCE_BOUNDARY.split(text)
         engaged_sentences = []
         
         for i, sentence in enumerate(sentences):
             if not sentence.strip():
                 continue
             
-            engaged_sentence = sentence.strip()
-            
-            # Add questions occasionally
-            if intensity in [RewriteIntensity.MODERATE, RewriteIntensity.HEAVY, RewriteIntensity.COMPLETE]:
-                if i % 4 == 0 and random.random() < 0.2:  # 20% chance every 4th sentence
-                    engaged_sentence = self._convert_to_question(engaged_sentence)
-            
-            # Use more active language
-            engaged_sentence = self._make_more_active(engaged_sentence)
-            
-            engaged_sentences.append(engaged_sentence)
+            engaged_sentences.append(self._engage_sentence(sentence.strip(), i, intensity))
         
         return '. '.join(engaged_sentences) + '.'
     
+    def _engage_sentence(self, sentence: str, index: int, intensity: RewriteIntensity) -> str:
+        """Engagement boost for the ``index``-th sentence piece"""
+        # Add questions occasionally
+        if intensity in [RewriteIntensity.MODERATE, RewriteIntensity.HEAVY, RewriteIntensity.COMPLETE]:
+            if index % 4 == 0 and random.random() < 0.2:  # 20% chance every 4th sentence
+                sentence = self._convert_to_question(sentence)
+        
+        # Use more active language
+        return self._make_more_active(sentence)
+    
     def _convert_to_question(self, sentence: str) -> str:
         """Convert statement to question when appropriate"""
         question_starters = [
@@ -640,51 +1299,189 @@ class RewritingStrategies:
         
         return sentence
 
+# ============================================================================
+# STRATEGY REGISTRY
+# ============================================================================
+#
+# Rule-based strategies are registered with the unit they rewrite and the
+# config fields they read. 'sentence' strategies take one stripped sentence
+# piece at a time and their results are rejoined with '. ', so consecutive ones
+# share a single split and join; 'text' strategies rewrite the whole text. A
+# trigger is an exact test for "this strategy cannot change this text": the
+# engine runs it first when the recorded no-op rate says that saves time.
+# Strategies run in registry order.
+
+# Invocations recorded before a strategy's statistics decide whether to check its trigger first
+STRATEGY_STATS_WARMUP = 8
+
+@dataclass(frozen=True)
+class StrategySpec:
+    """How a rewriting strategy is applied and what it depends on"""
+    strategy: RewriteStrategy
+    unit: str                    # 'sentence': apply(strategies, sentence, index, config); 'text': apply(strategies, text, config)
+    reads: Tuple[str, ...]       # RewriteConfig fields the output depends on
+    apply: Callable[..., str]
+    trigger: Optional[Callable[[RewritingStrategies, str, RewriteConfig], bool]] = None
+    
+    def stats_key(self, config: RewriteConfig) -> tuple:
+        """Statistics are kept per strategy and per value of the fields it reads"""
+        return (self.strategy,) + tuple(getattr(config, name) for name in self.reads)
+
+@dataclass(slots=True)
+class StrategyCost:
+    """Time spent in a strategy and what it changed, over one or more invocations"""
+    runs: int = 0
+    skips: int = 0               # invocations its trigger ruled out
+    no_ops: int = 0              # runs that changed nothing
+    seconds: float = 0.0         # trigger checks included
+    characters_changed: int = 0
+    trigger_checks: int = 0
+    trigger_seconds: float = 0.0
+    
+    def add(self, other: 'StrategyCost'):
+        self.runs += other.runs
+        self.skips += other.skips
+        self.no_ops += other.no_ops
+        self.seconds += other.seconds
+        self.characters_changed += other.characters_changed
+        self.trigger_checks += other.trigger_checks
+        self.trigger_seconds += other.trigger_seconds
+    
+    def worth_triggering(self) -> bool:
+        """Whether checking the trigger before running is expected to save time"""
+        if self.runs + self.skips < STRATEGY_STATS_WARMUP or not self.runs or not self.trigger_checks:
+            return True
+        no_op_rate = (self.skips + self.no_ops) / (self.runs + self.skips)
+        run_seconds = (self.seconds - self.trigger_seconds) / self.runs
+        return no_op_rate * run_seconds > self.trigger_seconds / self.trigger_checks
+
+STRATEGY_REGISTRY: Dict[RewriteStrategy, StrategySpec] = {}
+
+def register_strategy(spec: StrategySpec) -> StrategySpec:
+    """Add or replace a strategy; new strategies run after the ones already registered"""
+    STRATEGY_REGISTRY[spec.strategy] = spec
+    return spec
+
+def strategy_passes(strategies: Iterable[RewriteStrategy]) -> List[List[StrategySpec]]:
+    """Registered specs for ``strategies`` grouped into passes: runs of sentence strategies share one"""
+    passes: List[List[StrategySpec]] = []
+    for strategy in strategies:
+        spec = STRATEGY_REGISTRY.get(strategy)
+        if spec is None:
+            continue
+        if spec.unit == 'sentence' and passes and passes[-1][0].unit == 'sentence':
+            passes[-1].append(spec)
+        else:
+            passes.append([spec])
+    return passes
+
+def changed_characters(before: str, after: str) -> int:
+    """Characters a rewrite changed, counted per sentence piece
+    
+    Rewrites that keep the sentence punctuation split into aligned pieces, and
+    each differing pair counts its middle between the common prefix and
+    suffix. Otherwise the whole texts are compared that way.
+    """
+    if before == after:
+        return 0
+    before_pieces = SENTENCE_BOUNDARY.split(before)
+    after_pieces = SENTENCE_BOUNDARY.split(after)
+    if len(before_pieces) != len(after_pieces):
+        return _changed_span(before, after)
+    return sum(_changed_span(a, b) for a, b in zip(before_pieces, after_pieces) if a != b)
+
+def _changed_span(before: str, after: str) -> int:
+    """Length of the differing middle once the common prefix and suffix are trimmed"""
+    if before == after:
+        return 0
+    shorter = min(len(before), len(after))
+    # Binary searches over slice comparisons, which run as memcmp
+    low, high = 0, shorter
+    while low < high:
+        middle = (low + high + 1) // 2
+        if before[:middle] == after[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    low, high = 0, shorter - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if before[len(before) - middle:] == after[len(after) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return max(len(before), len(after)) - prefix - low
+
+def _target_tone(config: RewriteConfig) -> str:
+    return 'formal' if config.mode == RewriteMode.FORMALITY else 'casual'
+
+register_strategy(StrategySpec(
+    RewriteStrategy.CLARITY_IMPROVEMENT, 'text', ('intensity',),
+    lambda strategies, text, config: strategies.apply_clarity_improvement(text, config.intensity),
+    lambda strategies, text, config: CLARITY_TRIGGER.search(text) is not None,
+))
+register_strategy(StrategySpec(
+    RewriteStrategy.VOCABULARY_ENHANCEMENT, 'text', ('mode', 'intensity'),
+    lambda strategies, text, config: strategies.apply_vocabulary_enhancement(text, config.mode, config.intensity),
+    lambda strategies, text, config: strategies.mentions_vocabulary(text),
+))
+register_strategy(StrategySpec(
+    RewriteStrategy.TONE_ADJUSTMENT, 'text', ('mode',),
+    lambda strategies, text, config: strategies.apply_tone_adjustment(text, _target_tone(config), config.intensity),
+    lambda strategies, text, config: TONE_TRIGGERS[_target_tone(config)].search(text) is not None,
+))
+# Restructuring first: engagement's weak-verb swaps would hide the "is ... by" passives it rewrites
+register_strategy(StrategySpec(
+    RewriteStrategy.SENTENCE_RESTRUCTURE, 'sentence', ('intensity',),
+    lambda strategies, sentence, index, config: strategies._restructure_sentence(sentence, config.intensity),
+))
+register_strategy(StrategySpec(
+    RewriteStrategy.ENGAGEMENT_BOOST, 'sentence', ('intensity',),
+    lambda strategies, sentence, index, config: strategies._engage_sentence(sentence, index, config.intensity),
+))
+
 # ============================================================================
 # AI INTEGRATION
 # ============================================================================
 
 class AIRewriter:
-    """AI-powered rewriting using OpenAI API"""
+    """AI-powered rewriting through the LLM provider router"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    SYSTEM_PROMPT = "You are an expert content rewriter focused on improving clarity, engagement, and readability."
+    
+    def __init__(self, api_key: Optional[str] = None, router: Optional[ProviderRouter] = None):
+        """``api_key`` routes to OpenAI with that key only; otherwise the shared router is used"""
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        self.client = None
+        if router is None:
+            router = ProviderRouter(providers_from_env(openai_key=api_key)) if api_key else llm_router
+        self.router = router
         
-        if OPENAI_AVAILABLE and self.api_key:
-            try:
-                openai.api_key = self.api_key
-                self.client = openai
-                logger.info("AI rewriter initialized with OpenAI")
-            except Exception as e:
-                logger.warning(f"Failed to initialize OpenAI: {e}")
-                self.client = None
+        if self.client:
+            logger.info(f"AI rewriter routing across {len(router)} provider route(s)")
         else:
-            logger.warning("AI rewriter using fallback mode (no OpenAI)")
+            logger.warning("AI rewriter using fallback mode (no LLM provider configured)")
+    
+    @property
+    def client(self) -> Optional[ProviderRouter]:
+        """The router while it has routes: callers use this as the "AI available" check"""
+        return self.router if len(self.router) else None
     
     async def ai_rewrite(self, text: str, config: RewriteConfig) -> str:
-        """Perform AI-powered rewriting"""
+        """Perform AI-powered rewriting, falling back to rules when no provider answers in time"""
         if not self.client:
             return self._fallback_rewrite(text, config)
         
         try:
             prompt = self._create_rewrite_prompt(text, config)
-            
-            response = await asyncio.to_thread(
-                self.client.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert content rewriter focused on improving clarity, engagement, and readability."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=len(text.split()) * 2,  # Allow for expansion
-                temperature=0.7
+            rewritten_text = await self.router.complete(
+                prompt,
+                self.SYSTEM_PROMPT,
+                max_tokens=len(text.split()) * 2  # Allow for expansion
             )
+            return rewritten_text.strip()
             
-            rewritten_text = response.choices[0].message.content.strip()
-            return rewritten_text
-            
-        except Exception as e:
+        except NoProviderAvailable as e:
             logger.error(f"AI rewriting failed: {e}")
             return self._fallback_rewrite(text, config)
     
@@ -760,18 +1557,36 @@ class AIRewriter:
 # QUALITY ASSESSMENT
 # ============================================================================
 
+# A sentence piece containing one of these counts toward coherence
+COHERENCE_TRANSITIONS = (
+    'however', 'therefore', 'furthermore', 'moreover', 'consequently',
+    'nevertheless', 'additionally', 'similarly', 'conversely', 'meanwhile'
+)
+PERSONAL_PRONOUNS = ('you', 'your', 'we', 'our', 'us')
+
+@dataclass(slots=True)
+class ShardFeatures:
+    """Counts for one shard of a rewritten text that add up to its quality scores"""
+    segment: SegmentFeatures
+    pieces: int                  # len(TextScan.pieces)
+    fragments: int               # pieces of fewer than three words
+    transition_pieces: int
+    question_marks: int
+    pronouns: int
+    confusable_matches: Tuple[int, ...]  # per CONFUSABLE_WORDS pattern, capped at 2
+
 class QualityAssessor:
     """Assesses quality of rewritten content"""
     
     def __init__(self):
         self.analyzer = TextAnalyzer()
     
-    def assess_quality(self, original: str, rewritten: str, config: RewriteConfig) -> Dict[QualityMetric, float]:
+    def assess_quality(self, original: str, rewritten: str, config: RewriteConfig) -> QualityScores:
         """Assess quality of rewritten content"""
         original_analysis = self.analyzer.analyze_text(original)
         rewritten_analysis = self.analyzer.analyze_text(rewritten)
         
-        quality_scores = {}
+        quality_scores = QualityScores()
         
         # Readability assessment
         quality_scores[QualityMetric.READABILITY] = rewritten_analysis.readability_score
@@ -799,56 +1614,105 @@ class QualityAssessor:
         
         return quality_scores
     
+    def assess_shards(self, original_words: int, rewritten: RewriteAnalysis,
+                      shards: List[ShardFeatures], config: RewriteConfig) -> QualityScores:
+        """assess_quality for a rewritten text made of ``shards`` joined by single spaces
+        
+        ``rewritten`` is the joined text's analysis. Every shard but the last
+        must end in sentence punctuation: a join then only merges that
+        shard's empty last piece into the next shard's first one.
+        """
+        joins = len(shards) - 1
+        pieces = sum(shard.pieces for shard in shards) - joins
+        word_count = rewritten.word_count
+        confusable_issues = sum(1 for matches in zip(*(shard.confusable_matches for shard in shards))
+                                if sum(matches) >= 2)
+        
+        quality_scores = QualityScores()
+        quality_scores[QualityMetric.READABILITY] = rewritten.readability_score
+        quality_scores[QualityMetric.CLARITY] = 1.0 - rewritten.complexity_score
+        quality_scores[QualityMetric.ENGAGEMENT] = self._engagement_from_counts(
+            sum(shard.question_marks for shard in shards), word_count,
+            sum(shard.segment.complexity_counts['passive_voice'] for shard in shards), pieces,
+            sum(shard.pronouns for shard in shards)
+        )
+        quality_scores[QualityMetric.COHERENCE] = self._coherence_from_counts(
+            pieces, sum(shard.transition_pieces for shard in shards)
+        )
+        quality_scores[QualityMetric.CONCISENESS] = self._conciseness_from_counts(original_words, word_count)
+        quality_scores[QualityMetric.STYLE_CONSISTENCY] = rewritten.style_consistency
+        quality_scores[QualityMetric.GRAMMAR_ACCURACY] = self._grammar_from_counts(
+            confusable_issues, sum(shard.fragments for shard in shards) - joins, word_count
+        )
+        quality_scores[QualityMetric.TONE_APPROPRIATENESS] = self._tone_fit(rewritten.tone_analysis, config)
+        return quality_scores
+    
+    def shard_features(self, shard: str) -> ShardFeatures:
+        """Counts behind assess_shards for one whitespace-normalized shard"""
+        pieces = scan_text(shard).pieces
+        return ShardFeatures(
+            segment=self.analyzer._segment_features(shard, annotate=False),
+            pieces=len(pieces),
+            fragments=sum(1 for piece in pieces if len(piece.split()) < 3),
+            transition_pieces=sum(1 for piece in pieces if self._has_transition(piece)),
+            question_marks=shard.count('?'),
+            pronouns=self._count_pronouns(shard),
+            # Normalized text has no newlines, so two matches anywhere repeat "on a line"
+            confusable_matches=tuple(min(2, sum(1 for _ in pattern.finditer(shard))) for pattern in CONFUSABLE_WORDS),
+        )
+    
     def _assess_engagement(self, text: str) -> float:
         """Assess engagement level of text"""
+        scan = scan_text(text)
+        return self._engagement_from_counts(
+            text.count('?'), len(text.split()), scan.complexity_counts['passive_voice'],
+            len(scan.pieces), self._count_pronouns(text)
+        )
+    
+    def _engagement_from_counts(self, question_count: int, word_count: int, passive_count: int,
+                                sentence_count: int, pronoun_count: int) -> float:
         engagement_factors = []
         
         # Question count
-        question_count = text.count('?')
-        word_count = len(text.split())
         question_ratio = min(1.0, question_count / max(1, word_count / 50))
         engagement_factors.append(question_ratio)
         
         # Active voice ratio
-        passive_pattern = re.compile(r'\b(was|were|been|being)\s+\w+ed\b', re.IGNORECASE)
-        passive_count = len(passive_pattern.findall(text))
-        sentence_count = len(re.split(r'[.!?]+', text))
         active_ratio = 1.0 - (passive_count / max(1, sentence_count))
         engagement_factors.append(active_ratio)
         
         # Personal pronoun usage
-        personal_pronouns = ['you', 'your', 'we', 'our', 'us']
-        pronoun_count = sum(text.lower().count(pronoun) for pronoun in personal_pronouns)
         pronoun_ratio = min(1.0, pronoun_count / max(1, word_count / 20))
         engagement_factors.append(pronoun_ratio)
         
         return sum(engagement_factors) / len(engagement_factors)
     
+    def _count_pronouns(self, text: str) -> int:
+        text_lower = text.lower()
+        return sum(text_lower.count(pronoun) for pronoun in PERSONAL_PRONOUNS)
+    
     def _assess_coherence(self, text: str) -> float:
         """Assess coherence of text"""
-        sentences = re.split(r'[.!?]+', text)
-        if len(sentences) < 2:
+        sentences = scan_text(text).pieces
+        transition_count = sum(1 for sentence in sentences if self._has_transition(sentence))
+        return self._coherence_from_counts(len(sentences), transition_count)
+    
+    def _has_transition(self, sentence: str) -> bool:
+        sentence_lower = sentence.lower()
+        return any(word in sentence_lower for word in COHERENCE_TRANSITIONS)
+    
+    def _coherence_from_counts(self, sentence_count: int, transition_count: int) -> float:
+        if sentence_count < 2:
             return 1.0
         
-        # Transition word usage
-        transition_words = [
-            'however', 'therefore', 'furthermore', 'moreover', 'consequently',
-            'nevertheless', 'additionally', 'similarly', 'conversely', 'meanwhile'
-        ]
-        
-        transition_count = 0
-        for sentence in sentences:
-            if any(word in sentence.lower() for word in transition_words):
-                transition_count += 1
-        
-        transition_ratio = transition_count / len(sentences)
+        transition_ratio = transition_count / sentence_count
         return min(1.0, transition_ratio * 2)  # Boost transition usage
     
     def _assess_conciseness(self, original: str, rewritten: str) -> float:
         """Assess conciseness improvement"""
-        original_words = len(original.split())
-        rewritten_words = len(rewritten.split())
-        
+        return self._conciseness_from_counts(len(original.split()), len(rewritten.split()))
+    
+    def _conciseness_from_counts(self, original_words: int, rewritten_words: int) -> float:
         if original_words == 0:
             return 1.0
         
@@ -871,34 +1735,31 @@ class QualityAssessor:
         # This is a very simplified grammar assessment
         # In a full implementation, this would use proper grammar checking tools
         
-        grammar_issues = 0
-        
-        # Check for common issues
-        if re.search(r'\b(there|their|they\'re)\b.*\b(there|their|they\'re)\b', text, re.IGNORECASE):
-            grammar_issues += 1
-        
-        if re.search(r'\b(your|you\'re)\b.*\b(your|you\'re)\b', text, re.IGNORECASE):
-            grammar_issues += 1
+        # Check for common issues (commonly confused words used twice on one line)
+        confusable_issues = sum(1 for pattern in CONFUSABLE_WORDS if repeats_on_a_line(pattern, text))
         
         # Check for sentence fragments (very basic)
-        sentences = re.split(r'[.!?]+', text)
-        for sentence in sentences:
-            words = sentence.strip().split()
-            if len(words) < 3:  # Very short sentences might be fragments
-                grammar_issues += 0.5
+        sentences = scan_text(text).pieces
+        fragments = sum(1 for sentence in sentences if len(sentence.split()) < 3)
+        
+        return self._grammar_from_counts(confusable_issues, fragments, len(text.split()))
+    
+    def _grammar_from_counts(self, confusable_issues: int, fragments: int, word_count: int) -> float:
+        # Very short sentences might be fragments
+        grammar_issues = confusable_issues + 0.5 * fragments
         
         # Calculate score
-        word_count = len(text.split())
         error_ratio = grammar_issues / max(1, word_count / 10)
         return max(0.0, 1.0 - error_ratio)
     
     def _assess_tone_appropriateness(self, text: str, config: RewriteConfig) -> float:
         """Assess tone appropriateness for target"""
-        tone_analysis = self.analyzer._analyze_tone(text)
-        
+        return self._tone_fit(self.analyzer._analyze_tone(text), config)
+    
+    def _tone_fit(self, tone_analysis: Dict[str, float], config: RewriteConfig) -> float:
         # Define target tone characteristics based on mode
         target_characteristics = {
-            RewriteMode.FORMAL: {'formal': 0.3, 'confident': 0.2},
+            RewriteMode.FORMALITY: {'formal': 0.3, 'confident': 0.2},
             RewriteMode.CONVERSATIONAL: {'informal': 0.3, 'positive': 0.2},
             RewriteMode.ACADEMIC: {'formal': 0.4, 'neutral': 0.3},
             RewriteMode.PERSUASIVE: {'confident': 0.3, 'positive': 0.2},
@@ -920,6 +1781,235 @@ class QualityAssessor:
         
         return appropriateness_score / len(target)
 
+# ============================================================================
+# PARAGRAPH SHARDING
+# ============================================================================
+#
+# Rule-based strategies work sentence by sentence, so a long input is rewritten
+# as runs of paragraphs in a process pool. Shards are cut at paragraph breaks
+# that follow sentence punctuation -- segment cuts in the incremental-analysis
+# sense -- and rewritten shards are joined with single spaces (post-processing
+# collapses whitespace anyway). The analysis and quality counts of the joined
+# text are then sums of per-shard counts, so the parent never re-scans it.
+
+# Inputs at least this long are rewritten in paragraph shards
+SHARD_MIN_CHARS = 100_000
+# Consecutive paragraphs are grouped into shards of at least this many characters
+SHARD_TARGET_CHARS = 32_000
+
+# Sentence punctuation, then a whitespace run that contains a blank line
+PARAGRAPH_END = re.compile(r'[.!?]+[^\S\n]*\n\s*\n\s*')
+
+def split_shards(text: str, target_chars: Optional[int] = None) -> List[str]:
+    """Cut ``text`` into shards of whole paragraphs; they concatenate back to ``text``"""
+    target_chars = target_chars or SHARD_TARGET_CHARS
+    shards = []
+    position = 0
+    for match in PARAGRAPH_END.finditer(text):
+        if match.end() - position >= target_chars and match.end() < len(text):
+            shards.append(text[position:match.end()])
+            position = match.end()
+    if position < len(text):
+        shards.append(text[position:])
+    return shards
+
+# Engine of a shard or rewrite worker process, created on its first task
+_shard_engine = None
+
+def _worker_engine() -> 'OptiRewriteEngine':
+    global _shard_engine
+    if _shard_engine is None:
+        _shard_engine = OptiRewriteEngine(shard_workers=0)
+    return _shard_engine
+
+def _run_shard_task(method: str, *args):
+    """Process pool entry point: call ``method`` on this worker's engine"""
+    return getattr(_worker_engine(), method)(*args)
+
+def rewrite_in_worker(text: str, config: 'RewriteConfig') -> 'RewriteResult':
+    """Process pool entry point: a whole rewrite on this worker's engine
+    
+    Long inputs are still split into shards, rewritten one after another in
+    this process. Strategy cost stats are learned per worker.
+    """
+    return asyncio.run(_worker_engine().rewrite(text, config))
+
+# ============================================================================
+# TARGET SEARCH
+# ============================================================================
+#
+# With target_readability or target_length_ratio set, a rule-based rewrite is
+# a bounded hill climb over strategy sets and intensities. It starts from the
+# pipeline a plain rewrite would run and moves to the first neighbour that is
+# closer to the targets (one registered strategy added or dropped, or the
+# next intensity up or down) until the targets are met, no neighbour is
+# closer or the time budget is spent: a multiple of what a plain rewrite
+# took (the analysis plus the first candidate), capped in seconds by the
+# config's search_budget. Neighbours share most of their pipeline, so the
+# work is memoized at three levels: the text after every prefix of passes,
+# each sentence's rewrite by a sentence pass, and the counts readability is
+# summed from, per segment. A candidate only rewrites and scans the
+# sentences its strategy set changed.
+
+# Seconds a search may run after its first candidate, unless RewriteConfig.search_budget is set
+SEARCH_BUDGET = REWRITE_SEARCH_BUDGET
+
+# ... and at most this many times as long as the plain rewrite it started from
+SEARCH_BUDGET_MULTIPLE = 4
+
+# A target counts as met within this distance (readability is 0-1, length is a word-count ratio)
+SEARCH_TOLERANCE = 0.05
+
+@dataclass(slots=True)
+class SearchCandidate:
+    """One strategy set and intensity, rewritten, post-processed and measured"""
+    intensity: RewriteIntensity
+    strategies: Tuple[RewriteStrategy, ...]
+    text: str
+    readability: float
+    length_ratio: float          # rewritten words / original words
+    distance: float              # summed distance to the targets that are set
+    targets_met: bool
+
+@dataclass(slots=True)
+class TargetSearch:
+    """Where a target search ended up and what it took"""
+    intensity: RewriteIntensity
+    readability: float
+    length_ratio: float
+    targets_met: bool
+    candidates: int              # distinct candidates rewritten and measured
+    seconds: float
+
+class TargetSearcher:
+    """Bounded search for a rewrite of one text that meets its config's targets"""
+    
+    def __init__(self, engine: 'OptiRewriteEngine', text: str, original_words: int,
+                 config: RewriteConfig, costs: Dict[RewriteStrategy, StrategyCost]):
+        self.engine = engine
+        self.text = text
+        self.original_words = original_words
+        self.config = config
+        self.costs = costs
+        self.budget = SEARCH_BUDGET if config.search_budget is None else config.search_budget
+        self._configs = {intensity: replace(config, intensity=intensity) for intensity in RewriteIntensity}
+        self._prefixes: Dict[tuple, str] = {}          # (intensity, strategies so far) -> rewritten text
+        self._sentences: Dict[tuple, Dict[tuple, str]] = {}  # (intensity, pass strategies) -> sentence memo
+        self._segments: Dict[str, Tuple[int, int, int]] = {}  # segment -> (words, sentences, syllables)
+        self._candidates: Dict[tuple, SearchCandidate] = {}
+        self._costs: Dict[RewriteIntensity, Dict[RewriteStrategy, StrategyCost]] = {}
+    
+    def run(self, strategies: List[RewriteStrategy], spent: float = 0.0) -> Tuple[SearchCandidate, TargetSearch]:
+        """Search from ``strategies`` at the config's intensity; returns the closest candidate found
+        
+        ``spent`` is the time the rewrite took before searching, which with the
+        first candidate is what a plain rewrite costs. Strategy costs of every
+        pass run are added to the engine's statistics and to the ``costs``
+        the searcher was given.
+        """
+        started = time.perf_counter()
+        best = self._evaluate(self.config.intensity, tuple(strategies))
+        plain = spent + time.perf_counter() - started
+        deadline = time.perf_counter() + min(self.budget, plain * SEARCH_BUDGET_MULTIPLE)
+        
+        while not best.targets_met:
+            moved = None
+            for intensity, neighbour in self._neighbours(best):
+                if (intensity, neighbour) not in self._candidates and time.perf_counter() > deadline:
+                    break
+                candidate = self._evaluate(intensity, neighbour)
+                if candidate.targets_met or candidate.distance < best.distance:
+                    moved = candidate
+                    break
+            if moved is None:
+                break
+            best = moved
+        
+        # Statistics are keyed by the intensity each pass ran at; the request sees the totals
+        for intensity, costs in self._costs.items():
+            self.engine._record_strategy_costs(costs, self._configs[intensity])
+            for strategy, cost in costs.items():
+                self.costs.setdefault(strategy, StrategyCost()).add(cost)
+        
+        return best, TargetSearch(
+            intensity=best.intensity,
+            readability=best.readability,
+            length_ratio=best.length_ratio,
+            targets_met=best.targets_met,
+            candidates=len(self._candidates),
+            seconds=time.perf_counter() - started,
+        )
+    
+    def _neighbours(self, candidate: SearchCandidate):
+        """Candidates one step away: each registered strategy toggled, then the adjacent intensities"""
+        current = set(candidate.strategies)
+        for strategy in STRATEGY_REGISTRY:
+            toggled = current ^ {strategy}
+            yield candidate.intensity, tuple(s for s in STRATEGY_REGISTRY if s in toggled)
+        intensities = list(RewriteIntensity)
+        position = intensities.index(candidate.intensity)
+        for step in (-1, 1):
+            if 0 <= position + step < len(intensities):
+                yield intensities[position + step], candidate.strategies
+    
+    def _evaluate(self, intensity: RewriteIntensity, strategies: Tuple[RewriteStrategy, ...]) -> SearchCandidate:
+        key = (intensity, strategies)
+        candidate = self._candidates.get(key)
+        if candidate is not None:
+            return candidate
+        
+        config = self._configs[intensity]
+        text = self.engine._post_process(self._rewrite(intensity, strategies), config)
+        words, sentences, syllables = self._measure(text)
+        readability = self.engine.text_analyzer._readability_from_counts(words, sentences, syllables)
+        length_ratio = words / self.original_words if self.original_words else 1.0
+        
+        distances = []
+        if self.config.target_readability is not None:
+            distances.append(abs(readability - self.config.target_readability))
+        if self.config.target_length_ratio is not None:
+            distances.append(abs(length_ratio - self.config.target_length_ratio))
+        
+        candidate = self._candidates[key] = SearchCandidate(
+            intensity=intensity,
+            strategies=strategies,
+            text=text,
+            readability=readability,
+            length_ratio=length_ratio,
+            distance=sum(distances),
+            targets_met=all(distance <= SEARCH_TOLERANCE for distance in distances),
+        )
+        return candidate
+    
+    def _rewrite(self, intensity: RewriteIntensity, strategies: Tuple[RewriteStrategy, ...]) -> str:
+        """The strategies' rewrite of the text, reusing the longest memoized prefix of passes"""
+        config = self._configs[intensity]
+        costs = self._costs.setdefault(intensity, {})
+        key: tuple = (intensity,)
+        rewritten = self.text
+        for specs in strategy_passes(strategies):
+            names = tuple(spec.strategy for spec in specs)
+            key += names
+            cached = self._prefixes.get(key)
+            if cached is None:
+                memo = self._sentences.setdefault((intensity,) + names, {}) if specs[0].unit == 'sentence' else None
+                cached = self._prefixes[key] = self.engine._apply_pass(rewritten, specs, config, costs, memo)
+            rewritten = cached
+        return rewritten
+    
+    def _measure(self, text: str) -> Tuple[int, int, int]:
+        """Word, sentence and syllable counts of ``text``, summed over cached segment counts"""
+        words = sentences = syllables = 0
+        for segment in split_segments(text):
+            counts = self._segments.get(segment)
+            if counts is None:
+                scan = scan_text(segment)
+                counts = self._segments[segment] = (len(scan.words), len(scan.sentences), scan.syllables)
+            words += counts[0]
+            sentences += counts[1]
+            syllables += counts[2]
+        return words, sentences, syllables
+
 # ============================================================================
 # MAIN OPTIREWRITE ENGINE
 # ============================================================================
@@ -932,12 +2022,20 @@ class OptiRewriteEngine:
     multiple strategies, and comprehensive quality assessment.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize OptiRewrite Engine"""
+    def __init__(self, api_key: Optional[str] = None, shard_workers: Optional[int] = None):
+        """Initialize OptiRewrite Engine
+        
+        ``shard_workers`` sizes the process pool for paragraph-sharded rewrites
+        of long inputs (default: one per CPU); 0 or 1 rewrites shards in-process.
+        """
         self.text_analyzer = TextAnalyzer()
         self.strategies = RewritingStrategies()
         self.ai_rewriter = AIRewriter(api_key)
         self.quality_assessor = QualityAssessor()
+        self.shard_workers = (os.cpu_count() or 1) if shard_workers is None else shard_workers
+        # Cumulative StrategyCost per StrategySpec.stats_key
+        self.strategy_stats: Dict[tuple, StrategyCost] = {}
+        self._shard_pool = None
         self._lock = threading.RLock()
         
         logger.info("OptiRewrite Engine initialized")
@@ -956,6 +2054,7 @@ class OptiRewriteEngine:
         with self._lock:
             if config is None:
                 config = RewriteConfig()
+            fields = expand_result_fields(config.fields)
             
             rewrite_id = f"REWRITE_{uuid.uuid4().hex[:8]}"
             start_time = time.time()
@@ -963,39 +2062,42 @@ class OptiRewriteEngine:
             logger.info(f"Starting rewrite: {rewrite_id} (mode: {config.mode.value})")
             
             try:
-                # 1. Analyze original text
-                original_analysis = self.text_analyzer.analyze_text(text)
+                use_ai = config.intensity == RewriteIntensity.COMPLETE and self.ai_rewriter.client
+                # Rule-based rewrites with targets search for them (the AI rewrite gets them in its prompt)
+                search = not use_ai and (config.target_readability is not None or config.target_length_ratio is not None)
+                shards = split_shards(text) if len(text) >= SHARD_MIN_CHARS and not use_ai and not search else []
+                sharded = None
+                target_search = None
+                strategy_costs: Dict[RewriteStrategy, StrategyCost] = {}
                 
-                # 2. Determine strategies to apply
-                strategies_to_apply = self._determine_strategies(original_analysis, config)
-                
-                # 3. Perform rewriting
-                if config.intensity == RewriteIntensity.COMPLETE and self.ai_rewriter.client:
-                    # Use AI for complete rewrites
-                    rewritten_text = await self.ai_rewriter.ai_rewrite(text, config)
+                if len(shards) > 1:
+                    # 1-4. Analyze, rewrite and post-process paragraph shards in parallel
+                    rewritten_text, strategies_to_apply, sharded = await self._rewrite_sharded(
+                        shards, config, fields, strategy_costs
+                    )
                 else:
-                    # Use rule-based strategies
-                    rewritten_text = self._apply_strategies(text, strategies_to_apply, config)
-                
-                # 4. Post-process rewritten text
-                rewritten_text = self._post_process(rewritten_text, config)
-                
-                # 5. Assess quality
-                quality_scores = self.quality_assessor.assess_quality(text, rewritten_text, config)
-                
-                # 6. Calculate improvement metrics
-                improvement_metrics = self._calculate_improvements(text, rewritten_text, quality_scores)
-                
-                # 7. Generate change summary
-                change_summary = self._generate_change_summary(text, rewritten_text)
-                
-                # 8. Generate recommendations
-                recommendations = self._generate_recommendations(quality_scores, improvement_metrics)
-                
-                # 9. Calculate confidence score
-                confidence_score = self._calculate_confidence(quality_scores, improvement_metrics)
-                
-                processing_time = time.time() - start_time
+                    # 1. Analyze original text
+                    original_analysis = self.text_analyzer.analyze_text(text)
+                    
+                    # 2. Determine strategies to apply
+                    strategies_to_apply = self._determine_strategies(original_analysis, config)
+                    
+                    # 3. Perform rewriting
+                    if search:
+                        # 3-4. Search strategy sets and intensities for the targets; candidates are post-processed
+                        searcher = TargetSearcher(self, text, original_analysis.word_count, config, strategy_costs)
+                        best, target_search = searcher.run(strategies_to_apply, time.time() - start_time)
+                        rewritten_text, strategies_to_apply = best.text, list(best.strategies)
+                    else:
+                        if use_ai:
+                            # Use AI for complete rewrites
+                            rewritten_text = await self.ai_rewriter.ai_rewrite(text, config)
+                        else:
+                            # Use rule-based strategies
+                            rewritten_text = self._apply_strategies(text, strategies_to_apply, config, strategy_costs)
+                        
+                        # 4. Post-process rewritten text
+                        rewritten_text = self._post_process(rewritten_text, config)
                 
                 result = RewriteResult(
                     rewrite_id=rewrite_id,
@@ -1003,17 +2105,39 @@ class OptiRewriteEngine:
                     rewritten_text=rewritten_text,
                     config=config,
                     strategies_applied=strategies_to_apply,
-                    quality_scores=quality_scores,
-                    improvement_metrics=improvement_metrics,
-                    processing_time=processing_time,
-                    confidence_score=confidence_score,
-                    change_summary=change_summary,
-                    recommendations=recommendations,
-                    timestamp=datetime.utcnow()
+                    quality_scores=None,
+                    improvement_metrics=None,
+                    processing_time=0.0,
+                    confidence_score=None,
+                    change_summary=None,
+                    recommendations=None,
+                    timestamp=datetime.utcnow(),
+                    strategy_costs=strategy_costs,
+                    target_search=target_search
                 )
+                if target_search is None:
+                    self._record_strategy_costs(strategy_costs, config)
+                
+                if sharded is not None:
+                    # Quality and improvements from the merged shard counts
+                    original_analysis, rewritten_analysis, shard_features = sharded
+                    if 'quality_scores' in fields:
+                        result.quality_scores = self.quality_assessor.assess_shards(
+                            original_analysis.word_count, rewritten_analysis, shard_features, config
+                        )
+                    if 'improvement_metrics' in fields:
+                        result.improvement_metrics = self._improvements_from_analyses(
+                            original_analysis, rewritten_analysis, result.quality_scores
+                        )
+                
+                # 5-9. Quality, improvements, change summary, recommendations, confidence
+                self._compute_fields(result, fields)
                 
-                logger.info(f"Rewrite completed: {rewrite_id} in {processing_time:.3f}s")
-                logger.info(f"Confidence score: {confidence_score:.2f}")
+                result.processing_time = time.time() - start_time
+                
+                logger.info(f"Rewrite completed: {rewrite_id} in {result.processing_time:.3f}s")
+                if result.confidence_score is not None:
+                    logger.info(f"Confidence score: {result.confidence_score:.2f}")
                 
                 return result
                 
@@ -1021,6 +2145,102 @@ class OptiRewriteEngine:
                 logger.error(f"Rewrite failed: {rewrite_id} - {str(e)}")
                 raise
     
+    async def _rewrite_sharded(self, shards: List[str], config: RewriteConfig, fields: frozenset,
+                               costs: Dict[RewriteStrategy, 'StrategyCost']):
+        """Rewrite a document given as paragraph shards
+        
+        Returns the rewritten text, the strategies applied and, when quality
+        is among ``fields``, the (original analysis, rewritten analysis,
+        rewritten shard features) to score it with; otherwise None. Strategy
+        costs of all shards are added to ``costs``.
+        """
+        logger.info(f"Rewriting in {len(shards)} shards ({self.shard_workers} workers)")
+        
+        # Strategies come from the whole document's analysis, merged from per-shard counts
+        totals = self.text_analyzer._empty_totals()
+        for features in await self._map_shards('_analyze_shard', [(shard,) for shard in shards]):
+            self.text_analyzer._add_features(totals, features)
+        original_analysis = self.text_analyzer._analysis_from_totals(sum(map(len, shards)), totals)
+        strategies = self._determine_strategies(original_analysis, config)
+        
+        assess = 'quality_scores' in fields or 'improvement_metrics' in fields
+        rewritten = []
+        for text, features, shard_costs in await self._map_shards(
+            '_rewrite_shard', [(shard, strategies, config, assess) for shard in shards]
+        ):
+            for strategy, cost in shard_costs.items():
+                costs.setdefault(strategy, StrategyCost()).add(cost)
+            if text:
+                rewritten.append((text, features))
+        rewritten_text = ' '.join(text for text, _ in rewritten)
+        
+        # Keyword insertion looks at the whole text; score the result the usual way if it applies
+        missing = [keyword for keyword in config.required_keywords if keyword.lower() not in rewritten_text.lower()]
+        if missing:
+            rewritten_text = self._clean_up(self._add_required_keywords(rewritten_text, missing))
+        if (missing or not assess or not rewritten
+                or not all(text[-1] in '.!?' for text, _ in rewritten[:-1])):
+            return rewritten_text, strategies, None
+        
+        totals = self.text_analyzer._empty_totals()
+        for _, features in rewritten:
+            self.text_analyzer._add_features(totals, features.segment)
+        rewritten_analysis = self.text_analyzer._analysis_from_totals(len(rewritten_text), totals)
+        return rewritten_text, strategies, (original_analysis, rewritten_analysis, [f for _, f in rewritten])
+    
+    async def _map_shards(self, method: str, tasks: List[tuple]) -> List[Any]:
+        """Run engine ``method`` once per task, in the shard pool when there is one"""
+        if self.shard_workers <= 1:
+            return [getattr(self, method)(*task) for task in tasks]
+        if self._shard_pool is None:
+            # spawn, not fork: the parent runs an event loop and other threads
+            self._shard_pool = ProcessPoolExecutor(self.shard_workers, mp_context=multiprocessing.get_context('spawn'))
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(self._shard_pool, _run_shard_task, method, *task) for task in tasks
+        ))
+    
+    def _analyze_shard(self, shard: str) -> SegmentFeatures:
+        return self.text_analyzer._segment_features(shard, annotate=False)
+    
+    def _rewrite_shard(self, shard: str, strategies: List[RewriteStrategy], config: RewriteConfig,
+                       assess: bool) -> Tuple[str, Optional[ShardFeatures], Dict[RewriteStrategy, 'StrategyCost']]:
+        costs = {}
+        rewritten = self._apply_strategies(shard, strategies, config, costs)
+        rewritten = self._clean_up(self._remove_forbidden_words(rewritten, config))
+        return rewritten, self.quality_assessor.shard_features(rewritten) if assess and rewritten else None, costs
+    
+    def close(self):
+        """Shut down the shard worker processes, if any were started"""
+        if self._shard_pool is not None:
+            self._shard_pool.shutdown()
+            self._shard_pool = None
+    
+    def complete_result(self, result: RewriteResult, fields: Optional[Iterable[str]] = None) -> RewriteResult:
+        """Compute result components skipped by ``config.fields``; all of them by default"""
+        with self._lock:
+            self._compute_fields(result, expand_result_fields(fields))
+        return result
+    
+    def _compute_fields(self, result: RewriteResult, fields: frozenset):
+        """Fill in the missing components named in ``fields`` (dependencies included)"""
+        original, rewritten = result.original_text, result.rewritten_text
+        
+        if 'quality_scores' in fields and result.quality_scores is None:
+            result.quality_scores = self.quality_assessor.assess_quality(original, rewritten, result.config)
+        
+        if 'improvement_metrics' in fields and result.improvement_metrics is None:
+            result.improvement_metrics = self._calculate_improvements(original, rewritten, result.quality_scores)
+        
+        if 'change_summary' in fields and result.change_summary is None:
+            result.change_summary = self._generate_change_summary(original, rewritten)
+        
+        if 'recommendations' in fields and result.recommendations is None:
+            result.recommendations = self._generate_recommendations(result.quality_scores, result.improvement_metrics)
+        
+        if 'confidence_score' in fields and result.confidence_score is None:
+            result.confidence_score = self._calculate_confidence(result.quality_scores, result.improvement_metrics)
+    
     def _determine_strategies(self, analysis: RewriteAnalysis, config: RewriteConfig) -> List[RewriteStrategy]:
         """Determine which strategies to apply"""
         strategies = []
@@ -1044,64 +2264,130 @@ class OptiRewriteEngine:
         # Always include style consistency
         strategies.append(RewriteStrategy.STYLE_CONSISTENCY)
         
-        # Remove duplicates and return
-        return list(set(strategies))
+        # Strategies without a registered implementation would be no-ops; the rest run in registry order
+        selected = set(strategies)
+        return [strategy for strategy in STRATEGY_REGISTRY if strategy in selected]
     
-    def _apply_strategies(self, text: str, strategies: List[RewriteStrategy], config: RewriteConfig) -> str:
-        """Apply rewriting strategies to text"""
+    def _apply_strategies(self, text: str, strategies: List[RewriteStrategy], config: RewriteConfig,
+                          costs: Optional[Dict[RewriteStrategy, 'StrategyCost']] = None) -> str:
+        """Apply rewriting strategies to text, adding each one's cost to ``costs``"""
+        costs = {} if costs is None else costs
         rewritten = text
+        for specs in strategy_passes(strategies):
+            rewritten = self._apply_pass(rewritten, specs, config, costs)
+        return rewritten
+    
+    def _apply_pass(self, text: str, specs: List['StrategySpec'], config: RewriteConfig,
+                    costs: Dict[RewriteStrategy, 'StrategyCost'], sentence_memo: Optional[Dict[tuple, str]] = None) -> str:
+        """Apply one entry of strategy_passes: a text strategy, or sentence strategies fused into one split and join"""
+        if specs[0].unit == 'sentence':
+            return self._apply_sentence_strategies(text, specs, config, costs, sentence_memo)
+        return self._apply_text_strategy(text, specs[0], config, costs)
+    
+    def _apply_text_strategy(self, text: str, spec: 'StrategySpec', config: RewriteConfig,
+                             costs: Dict[RewriteStrategy, 'StrategyCost']) -> str:
+        cost = costs.setdefault(spec.strategy, StrategyCost())
+        stats = self.strategy_stats.get(spec.stats_key(config))
+        
+        started = time.perf_counter()
+        if spec.trigger is not None and (stats is None or stats.worth_triggering()):
+            applies = spec.trigger(self.strategies, text, config)
+            elapsed = time.perf_counter() - started
+            cost.trigger_checks += 1
+            cost.trigger_seconds += elapsed
+            cost.seconds += elapsed
+            if not applies:
+                cost.skips += 1
+                return text
+            started = time.perf_counter()
+        
+        rewritten = spec.apply(self.strategies, text, config)
+        cost.seconds += time.perf_counter() - started
+        changed = changed_characters(text, rewritten)
+        cost.runs += 1
+        cost.no_ops += not changed
+        cost.characters_changed += changed
+        return rewritten
+    
+    def _apply_sentence_strategies(self, text: str, specs: List['StrategySpec'], config: RewriteConfig,
+                                   costs: Dict[RewriteStrategy, 'StrategyCost'],
+                                   memo: Optional[Dict[tuple, str]] = None) -> str:
+        """Run ``specs`` on each sentence piece in turn, as apply_sentence_restructure does for one
         
-        for strategy in strategies:
-            if strategy == RewriteStrategy.SENTENCE_RESTRUCTURE:
-                rewritten = self.strategies.apply_sentence_restructure(rewritten, config.intensity)
-            
-            elif strategy == RewriteStrategy.VOCABULARY_ENHANCEMENT:
-                rewritten = self.strategies.apply_vocabulary_enhancement(rewritten, config.mode, config.intensity)
-            
-            elif strategy == RewriteStrategy.TONE_ADJUSTMENT:
-                target_tone = 'formal' if config.mode == RewriteMode.FORMALITY else 'casual'
-                rewritten = self.strategies.apply_tone_adjustment(rewritten, target_tone, config.intensity)
-            
-            elif strategy == RewriteStrategy.CLARITY_IMPROVEMENT:
-                rewritten = self.strategies.apply_clarity_improvement(rewritten, config.intensity)
-            
-            elif strategy == RewriteStrategy.ENGAGEMENT_BOOST:
-                rewritten = self.strategies.apply_engagement_boost(rewritten, config.intensity)
-            
-            # Additional strategies would be implemented here
+        With a ``memo`` (kept per ``specs`` and config by the caller), a
+        (piece index, sentence) seen before reuses its earlier rewrite.
+        """
+        pass_costs = [costs.setdefault(spec.strategy, StrategyCost()) for spec in specs]
+        changed = [0] * len(specs)
+        sentences = []
         
-        return rewritten
+        for index, piece in enumerate(SENTENCE_BOUNDARY.split(text)):
+            sentence = piece.strip()
+            if not sentence:
+                continue
+            if memo is not None:
+                key = (index, sentence)
+                rewritten = memo.get(key)
+                if rewritten is not None:
+                    sentences.append(rewritten)
+                    continue
+            for position, spec in enumerate(specs):
+                started = time.perf_counter()
+                rewritten = spec.apply(self.strategies, sentence, index, config)
+                pass_costs[position].seconds += time.perf_counter() - started
+                if rewritten != sentence:
+                    changed[position] += _changed_span(sentence, rewritten)
+                sentence = rewritten
+            if memo is not None:
+                memo[key] = sentence
+            sentences.append(sentence)
+        
+        for cost, characters in zip(pass_costs, changed):
+            cost.runs += 1
+            cost.no_ops += not characters
+            cost.characters_changed += characters
+        return '. '.join(sentences) + '.'
+    
+    def _record_strategy_costs(self, costs: Dict[RewriteStrategy, 'StrategyCost'], config: RewriteConfig):
+        for strategy, cost in costs.items():
+            key = STRATEGY_REGISTRY[strategy].stats_key(config)
+            self.strategy_stats.setdefault(key, StrategyCost()).add(cost)
     
     def _post_process(self, text: str, config: RewriteConfig) -> str:
         """Post-process rewritten text"""
-        processed = text
-        
-        # Remove forbidden words
+        processed = self._remove_forbidden_words(text, config)
+        processed = self._add_required_keywords(processed, config.required_keywords)
+        return self._clean_up(processed)
+    
+    def _remove_forbidden_words(self, text: str, config: RewriteConfig) -> str:
         for word in config.forbidden_words:
-            processed = re.sub(r'\b' + re.escape(word) + r'\b', '[REMOVED]', processed, flags=re.IGNORECASE)
-        
-        # Ensure required keywords are present
-        for keyword in config.required_keywords:
-            if keyword.lower() not in processed.lower():
+            text = re.sub(r'\b' + re.escape(word) + r'\b', '[REMOVED]', text, flags=re.IGNORECASE)
+        return text
+    
+    def _add_required_keywords(self, text: str, keywords: List[str]) -> str:
+        for keyword in keywords:
+            if keyword.lower() not in text.lower():
                 # Add keyword naturally (simplified implementation)
-                sentences = processed.split('.')
+                sentences = text.split('.')
                 if sentences:
                     sentences[0] += f" {keyword}"
-                    processed = '.'.join(sentences)
-        
-        # Clean up formatting
-        processed = re.sub(r'\s+', ' ', processed)  # Multiple spaces
-        processed = re.sub(r'\s+([.!?])', r'\1', processed)  # Space before punctuation
-        processed = processed.strip()
-        
-        return processed
+                    text = '.'.join(sentences)
+        return text
     
-    def _calculate_improvements(self, original: str, rewritten: str, quality_scores: Dict[QualityMetric, float]) -> Dict[str, float]:
+    def _clean_up(self, text: str) -> str:
+        text = WHITESPACE_RUN.sub(' ', text)  # Multiple spaces
+        text = SPACE_BEFORE_PUNCTUATION.sub(r'\1', text)  # Space before punctuation
+        return text.strip()
+    
+    def _calculate_improvements(self, original: str, rewritten: str, quality_scores: QualityScores) -> ImprovementMetrics:
         """Calculate improvement metrics"""
-        original_analysis = self.text_analyzer.analyze_text(original)
-        rewritten_analysis = self.text_analyzer.analyze_text(rewritten)
-        
-        improvements = {}
+        return self._improvements_from_analyses(
+            self.text_analyzer.analyze_text(original), self.text_analyzer.analyze_text(rewritten), quality_scores
+        )
+    
+    def _improvements_from_analyses(self, original_analysis: RewriteAnalysis, rewritten_analysis: RewriteAnalysis,
+                                    quality_scores: QualityScores) -> ImprovementMetrics:
+        improvements = ImprovementMetrics()
         
         # Readability improvement
         improvements['readability_improvement'] = rewritten_analysis.readability_score - original_analysis.readability_score
@@ -1110,8 +2396,8 @@ class OptiRewriteEngine:
         improvements['complexity_reduction'] = original_analysis.complexity_score - rewritten_analysis.complexity_score
         
         # Length change
-        original_words = len(original.split())
-        rewritten_words = len(rewritten.split())
+        original_words = original_analysis.word_count
+        rewritten_words = rewritten_analysis.word_count
         improvements['length_change_ratio'] = rewritten_words / original_words if original_words > 0 else 1.0
         
         # Sentence length improvement
@@ -1129,32 +2415,23 @@ class OptiRewriteEngine:
         """Generate summary of changes made"""
         original_words = original.split()
         rewritten_words = rewritten.split()
+        diff = diff_texts(original, rewritten)
         
         return {
             'original_word_count': len(original_words),
             'rewritten_word_count': len(rewritten_words),
             'word_count_change': len(rewritten_words) - len(original_words),
-            'original_sentence_count': len(re.split(r'[.!?]+', original)),
-            'rewritten_sentence_count': len(re.split(r'[.!?]+', rewritten)),
+            'original_sentence_count': len(scan_text(original).pieces),
+            'rewritten_sentence_count': len(scan_text(rewritten).pieces),
             'character_count_change': len(rewritten) - len(original),
-            'similarity_ratio': self._calculate_similarity(original, rewritten)
+            'similarity_ratio': diff.ratio,
+            'change_count': len(diff.spans),
+            'characters_changed': sum(span.a_end - span.a_start for span in diff.spans),
+            'change_spans': diff.spans
         }
     
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """Calculate similarity between two texts"""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 and not words2:
-            return 1.0
-        
-        intersection = words1 & words2
-        union = words1 | words2
-        
-        return len(intersection) / len(union) if union else 0.0
-    
-    def _generate_recommendations(self, quality_scores: Dict[QualityMetric, float], 
-                                improvements: Dict[str, float]) -> List[str]:
+    def _generate_recommendations(self, quality_scores: QualityScores, 
+                                improvements: ImprovementMetrics) -> List[str]:
         """Generate recommendations for further improvement"""
         recommendations = []
         
@@ -1182,8 +2459,8 @@ class OptiRewriteEngine:
         
         return recommendations
     
-    def _calculate_confidence(self, quality_scores: Dict[QualityMetric, float], 
-                            improvements: Dict[str, float]) -> float:
+    def _calculate_confidence(self, quality_scores: QualityScores, 
+                            improvements: ImprovementMetrics) -> float:
         """Calculate confidence in rewriting result"""
         confidence_factors = []
         
@@ -0,0 +1,94 @@
+"""
+/api/analyze latency, cold and warm.
+
+For each text size the route is called in-process over ASGI (no network)
+on a cache miss, then repeatedly on the same text. ``lookup`` is the
+cache's share of a warm call: the digest plus the LRU lookup. Times are
+medians in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_analyze [--sizes 500 5000 50000] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+logging.disable(logging.INFO)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from backend.OptiRewrite_optimized import scan_text  # noqa: E402
+from backend.routes import analysis  # noqa: E402
+
+SENTENCES = [
+    "The draft was reviewed by the editor and it was returned with comments.",
+    "It seems rather long, and the argument is somewhat hard to follow.",
+    "Implementation of the recommendation requires consideration of the budget.",
+    "Keep it short.",
+    "We shipped the feature on Monday!",
+]
+
+
+def _document(rng: random.Random, size: int) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:size]
+
+
+async def _post(client, content):
+    started = time.perf_counter()
+    response = await client.post("/api/analyze", json={'content': content})
+    elapsed = time.perf_counter() - started
+    return response.headers.get('X-Analysis-Cache'), elapsed
+
+
+async def run(sizes, repeat, seed):
+    app = FastAPI()
+    app.include_router(analysis.router)
+    rng = random.Random(seed)
+
+    print(f"{'size':>8}{'sentences':>11}{'cold ms':>10}{'warm ms':>10}{'lookup ms':>11}")
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for size in sizes:
+            content = _document(rng, size)
+            scan_text.cache_clear()
+            status, cold = await _post(client, content)
+            assert status == 'miss', status
+
+            warm = []
+            for _ in range(repeat):
+                status, elapsed = await _post(client, content)
+                assert status == 'hit', status
+                warm.append(elapsed)
+
+            lookups = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                analysis.analysis_cache.get(analysis.analysis_cache.key(content))
+                lookups.append(time.perf_counter() - started)
+
+            sentences = len(scan_text(content).sentences)
+            print(f"{size:>8}{sentences:>11}{cold * 1000:>10.2f}"
+                  f"{statistics.median(warm) * 1000:>10.3f}{statistics.median(lookups) * 1000:>11.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat, args.seed))
+
+
+if __name__ == "__main__":
+    main()
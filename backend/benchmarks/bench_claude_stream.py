@@ -0,0 +1,68 @@
+"""
+Time to first text for /claude, buffered versus streamed.
+
+The mock provider (backend.benchmarks.mock_llm) answers after
+``--first-ms`` and then echoes a ``--tokens`` word prompt back, one word
+every ``--token-ms``. The buffered path is ``call_claude`` (the whole
+reply, then the response); the streamed path is the /claude SSE generator, timed to its first "token"
+event (the first cleaned-up sentence) and to its "done" event. Times are
+medians of ``--repeat`` runs in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_claude_stream [--tokens 400] [--token-ms 5] [--first-ms 300]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+logging.disable(logging.INFO)
+
+from backend import claude_api  # noqa: E402
+from backend.benchmarks.mock_llm import MockLLMConfig, serve, use_mock  # noqa: E402
+from backend.main import _claude_events  # noqa: E402
+
+WORDS = ["The", "plan", "is", "ready", "and", "we", "ship", "on", "Monday.", "Questions", "welcome."]
+
+
+async def _buffered(prompt):
+    started = time.perf_counter()
+    await claude_api.call_claude(prompt)
+    return time.perf_counter() - started
+
+
+async def _streamed(prompt):
+    started = time.perf_counter()
+    first = None
+    async for event in _claude_events(prompt, "bench"):
+        if first is None and event.startswith("event: token"):
+            first = time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--first-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    prompt = " ".join(WORDS[index % len(WORDS)] for index in range(args.tokens))
+    config = MockLLMConfig(latency=f"fixed:{args.first_ms}", tokens_per_second=1000 / args.token_ms)
+    with serve(config) as url:
+        use_mock(url)
+        buffered = [asyncio.run(_buffered(prompt)) for _ in range(args.repeat)]
+        streamed = [asyncio.run(_streamed(prompt)) for _ in range(args.repeat)]
+    first_text = statistics.median(first for first, _ in streamed) * 1000
+    complete = statistics.median(total for _, total in streamed) * 1000
+    waited = statistics.median(buffered) * 1000
+    print(f"buffered: first text {waited:.0f} ms (whole reply)")
+    print(f"streamed: first text {first_text:.0f} ms, done {complete:.0f} ms  "
+          f"({waited / first_text:.1f}x sooner to first text)")
+
+
+if __name__ == "__main__":
+    main()
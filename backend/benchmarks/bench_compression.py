@@ -0,0 +1,108 @@
+"""
+Response compression: bytes saved, and what precompressed cache entries save per hit.
+
+For each document size this encodes a real /api/optimize response (full
+format, so both texts are in it) and reports its size raw, gzipped and
+brotli-compressed, with the time each compression takes. The time is what
+CompressionMiddleware adds to a response it compresses. The documents
+repeat four sentences, so the ratios are far better than real prose gets.
+It then times /api/analyze cache hits for a client that accepts the best
+coding, in two ways:
+
+- ``precompressed``: the hit is sent from the copy stored with the entry.
+- ``per hit``: the same entry with its copies dropped, so the middleware
+  compresses the cached body on every hit.
+
+Times are medians in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_compression [--sizes 2000 20000 200000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+logging.disable(logging.INFO)
+os.environ["LOGIVAULT_DATA_DIR"] = tempfile.mkdtemp(prefix="bench-compression-")
+os.environ["JOB_WORKERS"] = "0"
+
+import httpx  # noqa: E402
+
+from backend.main import app  # noqa: E402
+from backend.routes import analysis  # noqa: E402
+from backend.utils.compression import ENCODINGS, compress  # noqa: E402
+
+SENTENCES = [
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and it was approved by the board.",
+    "In order to achieve success, it is important to note that we need to work hard.",
+    "Data was processed by the system at the end of the day.",
+]
+
+
+def _document(size: int) -> str:
+    text = " ".join(SENTENCES)
+    return ((text + " ") * (size // len(text) + 1))[:size]
+
+
+def _median_ms(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+async def _hit_ms(client, content, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.post("/api/analyze", json={'content': content},
+                                     headers={'Accept-Encoding': ", ".join(ENCODINGS)})
+        times.append(time.perf_counter() - started)
+        assert response.headers['x-analysis-cache'] == 'hit'
+    return statistics.median(times) * 1000, response.headers.get('content-encoding')
+
+
+async def run(sizes, repeat):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        print(f"{'chars':>8}{'coding':>8}{'bytes':>10}{'ratio':>8}{'ms':>9}")
+        for size in sizes:
+            content = _document(size)
+            response = await client.post("/api/optimize", json={'content': content},
+                                         headers={'Accept-Encoding': 'identity'})
+            raw = response.content
+            print(f"{size:>8}{'none':>8}{len(raw):>10}{1:>8.2f}{0:>9.2f}")
+            for encoding in ENCODINGS:
+                compressed = compress(raw, encoding)
+                took = _median_ms(lambda: compress(raw, encoding), repeat)
+                print(f"{size:>8}{encoding:>8}{len(compressed):>10}{len(raw) / len(compressed):>8.2f}{took:>9.2f}")
+
+        print()
+        print(f"{'chars':>8}{'coding':>8}{'precompressed':>15}{'per hit':>10}   (/api/analyze hit, ms)")
+        for size in sizes:
+            content = _document(size)
+            await client.post("/api/analyze", json={'content': content})
+            stored, stored_coding = await _hit_ms(client, content, repeat)
+            analysis.analysis_cache.get(analysis.analysis_cache.key(content)).encoded.clear()
+            per_hit, coding = await _hit_ms(client, content, repeat)
+            assert coding == stored_coding, (coding, stored_coding)
+            print(f"{size:>8}{coding or 'none':>8}{stored:>15.3f}{per_hit:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000, 200000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark for the plan-weighted rewrite scheduler.
+
+The simulation drives ``FairQueue`` with a virtual clock (no real rewrites
+run) under a mixed load: one free-tier user streaming 5 MB documents, many
+free users with ordinary documents, and a handful of Pro users. The same
+arrivals are replayed through a plain FIFO queue for comparison, and latency
+percentiles are printed per tier. It models ``--workers`` rewrites running
+in parallel at a fixed speed each.
+
+``--live`` checks that model against the real one: ``RewriteScheduler``
+running engine rewrites in its worker processes. A free user submits one
+``--bulk-chars`` document, then Pro users submit short documents while it
+runs. It prints the Pro latencies and the event loop's worst lag, which
+stays near the timer tick when rewrites don't run on the loop. With fewer
+CPUs than workers, the processes share cores and Pro latencies grow.
+
+Usage:
+    python -m backend.benchmarks.bench_fair_scheduler [--workers 4] [--seconds 120]
+    python -m backend.benchmarks.bench_fair_scheduler --live [--workers 4] [--bulk-chars 2000000]
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+from collections import defaultdict, deque
+
+from backend.services.rewrite_scheduler import FairQueue, Job, RewriteScheduler
+
+CHARS_PER_SECOND = 1_000_000  # modelled rule-based rewrite throughput per worker
+
+
+def generate_arrivals(seconds: float, seed: int):
+    """(arrival_time, tier, user_id, plan, cost) sorted by time"""
+    rng = random.Random(seed)
+    arrivals = []
+
+    # One free user pushing 5 MB manuscripts back to back
+    t = 0.0
+    while t < seconds:
+        arrivals.append((t, "free-bulk", "free-bulk", "Free", 5_000_000))
+        t += 1.25
+
+    def poisson(tier, plan, users, rate, low, high):
+        t = rng.expovariate(rate)
+        while t < seconds:
+            user = f"{tier}-{rng.randrange(users)}"
+            arrivals.append((t, tier, user, plan, rng.randint(low, high)))
+            t += rng.expovariate(rate)
+
+    poisson("free", "Free", users=20, rate=4.0, low=5_000, high=50_000)
+    poisson("pro", "Pro", users=5, rate=5.0, low=10_000, high=100_000)
+
+    arrivals.sort(key=lambda a: a[0])
+    return arrivals
+
+
+class FifoQueue:
+    """Single shared FIFO, no caps: the baseline"""
+
+    def __init__(self):
+        self._jobs = deque()
+
+    def push(self, job):
+        self._jobs.append(job)
+
+    def pop(self, now):
+        return self._jobs.popleft() if self._jobs else None
+
+    def release(self, job):
+        pass
+
+
+def simulate(queue, arrivals, workers: int):
+    """Event-driven run; returns {tier: [latency, ...]}"""
+    latencies = defaultdict(list)
+    completions = []  # (finish_time, seq, job)
+    free_workers = workers
+    seq = 0
+    i = 0
+    now = 0.0
+
+    def dispatch():
+        nonlocal free_workers, seq
+        while free_workers:
+            job = queue.pop(now)
+            if job is None:
+                return
+            free_workers -= 1
+            seq += 1
+            heapq.heappush(completions, (now + job.cost / CHARS_PER_SECOND, seq, job))
+
+    while i < len(arrivals) or completions:
+        next_arrival = arrivals[i][0] if i < len(arrivals) else float("inf")
+        if completions and completions[0][0] <= next_arrival:
+            now, _, job = heapq.heappop(completions)
+            free_workers += 1
+            queue.release(job)
+            latencies[job.payload].append(now - job.enqueued_at)
+        else:
+            now, tier, user_id, plan, cost = arrivals[i]
+            i += 1
+            queue.push(Job(user_id=user_id, plan=plan, cost=cost, enqueued_at=now, payload=tier))
+        dispatch()
+
+    return latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies):
+    print(f"\n{name}")
+    print(f"{'tier':<12}{'jobs':>7}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}{'max s':>10}")
+    for tier in ("pro", "free", "free-bulk"):
+        values = latencies.get(tier, [])
+        if not values:
+            continue
+        print(f"{tier:<12}{len(values):>7}"
+              f"{percentile(values, 50):>10.3f}{percentile(values, 95):>10.3f}"
+              f"{percentile(values, 99):>10.3f}{max(values):>10.3f}")
+
+
+async def live(workers: int, bulk_chars: int, pro_jobs: int, pro_chars: int, seed: int):
+    """Pro latencies (s) and the worst event loop lag (s) with a bulk free rewrite running"""
+    from backend.OptiRewrite_optimized import RewriteConfig, rewrite_in_worker
+
+    rng = random.Random(seed)
+    sentences = [
+        "The utilization of this methodology will facilitate the implementation of the new process.",
+        "The report was reviewed by the committee and it was approved by the board.",
+        "In order to achieve success, it is important to note that we need to work hard.",
+    ]
+
+    def document(chars):
+        parts = []
+        length = 0
+        while length < chars:
+            parts.append(rng.choice(sentences))
+            length += len(parts[-1]) + 1
+        return " ".join(parts)
+
+    config = RewriteConfig(fields=['confidence_score'])
+    scheduler = RewriteScheduler(max_workers=workers)
+    # Start the workers before timing
+    await asyncio.gather(*(scheduler.submit(f"warm{n}", "Business", 1, rewrite_in_worker, "Warm up.", config)
+                           for n in range(workers)))
+
+    lag = 0.0
+    running = True
+
+    async def watch_loop():
+        nonlocal lag
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - started - 0.01)
+
+    async def pro(n):
+        await asyncio.sleep(n * 0.1)
+        started = time.perf_counter()
+        await scheduler.submit(f"pro-{n % 5}", "Pro", pro_chars, rewrite_in_worker, document(pro_chars), config)
+        return time.perf_counter() - started
+
+    watcher = asyncio.create_task(watch_loop())
+    bulk_started = time.perf_counter()
+    bulk = asyncio.ensure_future(scheduler.submit("free-bulk", "Free", bulk_chars, rewrite_in_worker,
+                                                  document(bulk_chars), config))
+    latencies = await asyncio.gather(*(pro(n) for n in range(pro_jobs)))
+    await bulk
+    bulk_seconds = time.perf_counter() - bulk_started
+    running = False
+    await watcher
+    scheduler.close()
+    return latencies, lag, bulk_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--max-wait", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--live", action="store_true", help="run real rewrites in the scheduler's worker processes")
+    parser.add_argument("--bulk-chars", type=int, default=2_000_000)
+    parser.add_argument("--pro-jobs", type=int, default=20)
+    parser.add_argument("--pro-chars", type=int, default=5_000)
+    args = parser.parse_args()
+
+    if args.live:
+        logging.disable(logging.WARNING)
+        latencies, lag, bulk_seconds = asyncio.run(
+            live(args.workers, args.bulk_chars, args.pro_jobs, args.pro_chars, args.seed)
+        )
+        print(f"{args.workers} worker processes on {os.cpu_count()} CPUs; "
+              f"{args.bulk_chars:,}-char free rewrite took {bulk_seconds:.2f}s")
+        print(f"{'tier':<12}{'jobs':>7}{'p50 s':>10}{'p95 s':>10}{'max s':>10}")
+        print(f"{'pro':<12}{len(latencies):>7}{percentile(latencies, 50):>10.3f}"
+              f"{percentile(latencies, 95):>10.3f}{max(latencies):>10.3f}")
+        print(f"worst event loop lag: {lag * 1000:.1f} ms")
+        return
+
+    arrivals = generate_arrivals(args.seconds, args.seed)
+    print(f"{len(arrivals)} jobs over {args.seconds:.0f}s on {args.workers} workers "
+          f"({CHARS_PER_SECOND:,} chars/s each)")
+
+    report("FIFO (baseline)", simulate(FifoQueue(), arrivals, args.workers))
+    report("Plan-weighted fair queue", simulate(FairQueue(max_wait=args.max_wait), arrivals, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-keystroke cost of incremental analysis versus re-analyzing the document.
+
+A document of ``--words`` words is opened once. Each round applies one edit
+(a single-character insertion, a sentence insertion or a paragraph
+replacement) at a random position and times ``IncrementalDocument.apply``
+plus ``analysis()``. The baseline runs ``analyze_text`` and
+``annotate_sentences`` over the whole edited text, which is what
+/api/analyze does on a cache miss. Times are medians in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_incremental_analysis [--words 10000] [--repeat 200]
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+
+logging.disable(logging.INFO)
+
+from backend.OptiRewrite_optimized import TextAnalyzer, scan_text  # noqa: E402
+
+SENTENCES = [
+    "The draft was reviewed by the editor and it was returned with comments.",
+    "It seems rather long, and the argument is somewhat hard to follow.",
+    "Implementation of the recommendation requires consideration of the budget.",
+    "Keep it short.",
+    "We shipped the feature on Monday!",
+]
+
+
+def _document(rng: random.Random, words: int) -> str:
+    parts = []
+    count = 0
+    while count < words:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        count += len(sentence.split())
+    return " ".join(parts)
+
+
+EDITS = {
+    'keystroke': lambda rng: "e",
+    'sentence': lambda rng: rng.choice(SENTENCES) + " ",
+    'paragraph': lambda rng: " ".join(rng.choice(SENTENCES) for _ in range(8)) + " ",
+}
+
+
+def run(words, repeat, seed):
+    rng = random.Random(seed)
+    analyzer = TextAnalyzer()
+    base = _document(rng, words)
+
+    print(f"{'edit':>10}{'incremental ms':>16}{'full ms':>10}{'speedup':>9}")
+    for name, make_text in EDITS.items():
+        document = analyzer.open_document(base)
+        text = base
+        incremental = []
+        full = []
+        for _ in range(repeat):
+            start = rng.randint(0, len(text))
+            end = min(len(text), start + (0 if name == 'keystroke' else rng.randint(0, 400)))
+            inserted = make_text(rng)
+
+            started = time.perf_counter()
+            document.apply([[start, end, inserted]])
+            document.analysis()
+            incremental.append(time.perf_counter() - started)
+
+            text = text[:start] + inserted + text[end:]
+            scan_text.cache_clear()
+            started = time.perf_counter()
+            analyzer.analyze_text(text)
+            analyzer.annotate_sentences(text)
+            full.append(time.perf_counter() - started)
+
+        incremental_ms = statistics.median(incremental) * 1000
+        full_ms = statistics.median(full) * 1000
+        print(f"{name:>10}{incremental_ms:>16.3f}{full_ms:>10.2f}{full_ms / incremental_ms:>8.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--words", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.words, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
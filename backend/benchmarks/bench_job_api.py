@@ -0,0 +1,70 @@
+"""
+Request latency of POST /api/jobs as the queue grows, against /api/optimize.
+
+Fills a fresh job store with ``--depths`` queued jobs of ``--paragraphs``
+paragraphs each. At each depth it times enqueueing one more job through the
+API. For comparison it times the synchronous /api/optimize on the same
+document, which is what the caller waits for without jobs. Times are
+medians of ``--repeat`` requests in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_job_api [--depths 0,1000,10000] [--paragraphs 200]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+logging.disable(logging.INFO)
+os.environ["LOGIVAULT_DATA_DIR"] = tempfile.mkdtemp(prefix="bench-jobs-")
+os.environ["JOB_WORKERS"] = "0"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.main import app  # noqa: E402
+from backend.services.job_store import job_store  # noqa: E402
+
+PARAGRAPH = ("The utilization of this methodology will facilitate the implementation of the new process. "
+             "Due to the fact that the results were very good, the team is not worried. ")
+
+
+def _median_ms(request, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = request()
+        times.append(time.perf_counter() - started)
+        assert response.status_code < 300, response.text
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--depths", default="0,1000,10000")
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    content = "\n\n".join([PARAGRAPH] * args.paragraphs)
+    body = {'content': content, 'fields': []}
+    print(f"document: {len(content.split())} words")
+
+    with TestClient(app) as client:
+        optimize = _median_ms(lambda: client.post("/api/optimize", json=body), max(1, args.repeat // 5))
+        print(f"/api/optimize (synchronous): {optimize:9.1f} ms")
+
+        queued = 0
+        for depth in (int(depth) for depth in args.depths.split(",")):
+            for _ in range(depth - queued):
+                job_store.enqueue("bench", [body])
+            queued = depth
+            enqueue = _median_ms(lambda: client.post("/api/jobs", json=body), args.repeat)
+            queued += args.repeat
+            print(f"POST /api/jobs, {depth:>6} queued:  {enqueue:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Throughput and memory of /api/optimize/stream as the input grows.
+
+Serves the app with uvicorn and pipes ``--rows`` NDJSON documents through
+one chunked request, reading results as they arrive. The rows are generated
+lazily and the results are only counted, so whatever the process holds
+belongs to the server. Each run prints rows per second and how much the peak
+resident set grew; that growth should stay flat as rows go up tenfold.
+
+Usage:
+    python -m backend.benchmarks.bench_optimize_stream [--rows 1000,10000,50000]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import socket
+import tempfile
+import threading
+import time
+
+logging.disable(logging.INFO)
+os.environ.setdefault("LOGIVAULT_DATA_DIR", tempfile.mkdtemp(prefix="bench-stream-"))
+os.environ["JOB_WORKERS"] = "0"
+os.environ.setdefault("AUTH_SECRET", "bench-secret")
+
+import uvicorn  # noqa: E402
+
+from backend.main import app  # noqa: E402
+from backend.services.plan_store import plan_store  # noqa: E402
+from backend.utils.auth import issue_token  # noqa: E402
+
+# Unmetered, so quotas don't cut the larger runs short
+USER = "bench-stream"
+
+LINE = json.dumps({'content': "The utilization of this methodology will facilitate the implementation "
+                              "of the new process. Due to the fact that the results were very good, "
+                              "the team is not worried.", 'fields': []}).encode() + b"\n"
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _pipe(address, rows):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(b"POST /api/optimize/stream HTTP/1.1\r\nHost: bench\r\nTransfer-Encoding: chunked\r\n"
+                 b"Authorization: Bearer %s\r\nContent-Type: application/x-ndjson\r\n\r\n" % issue_token(USER).encode())
+
+    async def send():
+        batch = LINE * 50
+        for _ in range(rows // 50):
+            writer.write(b"%x\r\n%s\r\n" % (len(batch), batch))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def receive():
+        results = 0
+        tail = b""
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                raise RuntimeError("connection closed early")
+            if not tail and not chunk.startswith(b"HTTP/1.1 200"):
+                raise RuntimeError(chunk.decode(errors="replace"))
+            results += chunk.count(b'"index"')
+            tail = (tail + chunk)[-200:]
+            if b'"done": true' in tail:
+                return results
+
+    _, results = await asyncio.gather(send(), receive())
+    writer.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    plan_store.set_plan(USER, "Enterprise")
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    asyncio.run(_pipe(sock.getsockname(), 100))
+    baseline = _peak_rss_mb()
+    print(f"peak RSS after warm-up: {baseline:.0f} MB")
+    for rows in (int(rows) for rows in args.rows.split(",")):
+        started = time.perf_counter()
+        results = asyncio.run(_pipe(sock.getsockname(), rows))
+        seconds = time.perf_counter() - started
+        assert results == rows, (results, rows)
+        print(f"{rows:>7} rows: {rows / seconds:7.0f} rows/s, peak RSS +{_peak_rss_mb() - baseline:.1f} MB")
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Serialization cost of an /api/optimize response, before and after the
+response model.
+
+A real engine result is built once per document size, then encoded two ways:
+
+- ``encoder``: the old path. The handler's dict, with enum-keyed quality
+  scores, goes through ``jsonable_encoder`` and ``JSONResponse``.
+- ``model``: the route's ``OptimizeResponse`` field validates and dumps the
+  payload in pydantic-core, then ``FastJSONResponse`` (orjson when it is
+  installed) renders it.
+
+The rest of the payload is built once per size, so the timings cover only
+the enum conversion and the encode. For each path the script reports
+microseconds per response and the tracemalloc peak of a single encode.
+
+Usage:
+    python -m backend.benchmarks.bench_response_serialization [--sizes 1024 262144] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+
+logging.disable(logging.INFO)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+# The route's engine and enums: the route module imports the engine top-level, not as backend.*
+from backend.routes import optimization  # noqa: E402
+from backend.utils.responses import ORJSON_AVAILABLE, FastJSONResponse  # noqa: E402
+
+SENTENCES = [
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and it was approved by the board.",
+    "In order to achieve success, it is important to note that we need to work hard.",
+    "Data was processed by the system at the end of the day.",
+]
+
+TIMESTAMP = "2025-01-01T00:00:00.000000"
+
+
+def _document(size: int) -> str:
+    text = " ".join(SENTENCES)
+    return (text + " ") * (size // (len(text) + 1)) + text[:size % (len(text) + 1)]
+
+
+def _payload(content, result):
+    """The full-format response dict the handler builds, minus the enum-derived parts"""
+    return {
+        'success': True,
+        'optimization_id': result.rewrite_id,
+        'original_content': content,
+        'optimized_content': result.rewritten_text,
+        'optimization_summary': {
+            'mode': 'engagement',
+            'intensity': 'moderate',
+            'confidence_score': result.confidence_score,
+            'quality_tier': 'PROFESSIONAL',
+            'processing_time': 0.25,
+        },
+        'metrics': {
+            'original_length': len(content),
+            'optimized_length': len(result.rewritten_text),
+            'length_change_percent': -4.2,
+            'word_count_original': len(content.split()),
+            'word_count_optimized': len(result.rewritten_text.split()),
+            'estimated_value': 12.5,
+        },
+        'recommendations': result.recommendations,
+        'timestamp': TIMESTAMP,
+    }
+
+
+def _response_field():
+    for route in optimization.router.routes:
+        if route.path == "/api/optimize":
+            return route.secure_cloned_response_field
+    raise LookupError("/api/optimize is not registered")
+
+
+def _encoder_path(payload, result):
+    payload = dict(payload, quality_scores=result.quality_scores)
+    payload['optimization_summary'] = dict(
+        payload['optimization_summary'], strategies_applied=[s.value for s in result.strategies_applied]
+    )
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def _model_path(field, loop):
+    def encode(payload, result):
+        payload = dict(payload, quality_scores={
+            optimization.QUALITY_METRIC_NAMES[metric]: score for metric, score in result.quality_scores.items()
+        })
+        payload['optimization_summary'] = dict(
+            payload['optimization_summary'],
+            strategies_applied=[optimization.STRATEGY_NAMES[s] for s in result.strategies_applied],
+        )
+        data = loop.run_until_complete(serialize_response(field=field, response_content=payload, exclude_none=True))
+        return FastJSONResponse(data).body
+    return encode
+
+
+def _measure(encode, payload, result, repeat):
+    body = encode(payload, result)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(payload, result)
+    per_call = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    encode(payload, result)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return body, per_call, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 256 * 1024])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = optimization.optirewrite_engine
+    loop = asyncio.new_event_loop()
+    paths = {'encoder': _encoder_path, 'model': _model_path(_response_field(), loop)}
+
+    print(f"response class: {FastJSONResponse.__name__} (orjson {'available' if ORJSON_AVAILABLE else 'missing'})")
+    print(f"{'size':>8}{'path':>10}{'bytes':>10}{'us/resp':>12}{'peak KiB':>10}")
+    for size in args.sizes:
+        content = _document(size)
+        result = loop.run_until_complete(engine.rewrite(content, optimization.RewriteConfig()))
+        payload = _payload(content, result)
+        # Keep large documents to a similar total run time
+        repeat = max(5, args.repeat * 1024 // max(size, 1024))
+        bodies = {}
+        for name, encode in paths.items():
+            body, per_call, peak = _measure(encode, payload, result, repeat)
+            bodies[name] = json.loads(body)
+            print(f"{size // 1024:>7}K{name:>10}{len(body):>10}{per_call * 1e6:>12.1f}{peak / 1024:>10.1f}")
+        assert bodies['encoder'] == bodies['model'], "the two paths encoded different responses"
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
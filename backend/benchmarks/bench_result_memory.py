@@ -0,0 +1,121 @@
+"""
+Memory held by a large cache of RewriteResult objects.
+
+``--count`` results are built in two layouts and the traced heap size is
+reported for each:
+
+- ``dicts``: the previous layout, a plain dataclass with ``Dict`` quality
+  scores and improvement metrics (reproduced here as ``DictRewriteResult``).
+- ``slots``: the current ``RewriteResult``, a slotted dataclass whose scores
+  are ``QualityScores`` / ``ImprovementMetrics`` float arrays.
+
+Per-result values (ids, scores, change summary, recommendations list,
+timestamp) are distinct; the config and the texts are shared, so the numbers
+are the per-result overhead a cache pays on top of the texts it stores.
+
+Usage:
+    python -m backend.benchmarks.bench_result_memory [--count 1000000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+from backend.OptiRewrite_optimized import (
+    ImprovementMetrics,
+    QualityMetric,
+    QualityScores,
+    RewriteConfig,
+    RewriteResult,
+    RewriteStrategy,
+)
+
+
+@dataclass
+class DictRewriteResult:
+    """RewriteResult as it was before the slotted layout"""
+    rewrite_id: str
+    original_text: str
+    rewritten_text: str
+    config: RewriteConfig
+    strategies_applied: List[RewriteStrategy]
+    quality_scores: Dict[QualityMetric, float]
+    improvement_metrics: Dict[str, float]
+    processing_time: float
+    confidence_score: float
+    change_summary: Dict[str, Any]
+    recommendations: List[str]
+    timestamp: datetime
+
+
+LAYOUTS = {
+    'dicts': (DictRewriteResult, dict, dict),
+    'slots': (RewriteResult, QualityScores, ImprovementMetrics),
+}
+
+RECOMMENDATIONS = [
+    "Add transition words and improve logical flow",
+    "Overall quality could be improved - consider additional revision",
+]
+
+
+def _build(layout: str, count: int, seed: int) -> list:
+    result_type, quality_type, improvement_type = LAYOUTS[layout]
+    rng = random.Random(seed)
+    config = RewriteConfig()
+    original = "The report was reviewed by the committee. " * 25
+    rewritten = "The committee reviewed the report. " * 25
+    strategies = [RewriteStrategy.CLARITY_IMPROVEMENT, RewriteStrategy.CONCISENESS_OPTIMIZATION]
+
+    results = []
+    for index in range(count):
+        results.append(result_type(
+            rewrite_id=f"REWRITE_{index:08x}",
+            original_text=original,
+            rewritten_text=rewritten,
+            config=config,
+            strategies_applied=list(strategies),
+            quality_scores=quality_type({metric: rng.random() for metric in QualityMetric}),
+            improvement_metrics=improvement_type({key: rng.random() for key in ImprovementMetrics.KEYS}),
+            processing_time=rng.random(),
+            confidence_score=rng.random(),
+            change_summary={
+                'original_word_count': 175,
+                'rewritten_word_count': 125,
+                'word_count_change': -50,
+                'similarity_ratio': rng.random(),
+                'change_count': rng.randint(0, 50),
+                'change_spans': [],
+            },
+            recommendations=list(RECOMMENDATIONS),
+            timestamp=datetime.utcnow(),
+        ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'layout':<8}{'results':>10}{'MiB':>10}{'bytes/result':>14}{'build s':>10}")
+    for layout in LAYOUTS:
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        results = _build(layout, args.count, args.seed)
+        elapsed = time.perf_counter() - started
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{layout:<8}{len(results):>10}{size / 2 ** 20:>10.1f}{size / len(results):>14.0f}{elapsed:>10.1f}")
+        del results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Adversarial-input scaling benchmark for the rule-based rewrite engine.
+
+Each generator builds a pathological input of a given size: one MB-sized
+token, a single repeated word with no punctuation, chained passive clauses,
+confusable words on one endless line, thousands of tiny sentences, and seeded
+random junk. Every engine stage (analysis, quality assessment, the rule-based
+strategies, post-processing) is timed at each size and the log-log slope
+between the smallest and largest size is reported. A slope near 1 is linear;
+the run fails if any slope exceeds ``--max-exponent``.
+
+Usage:
+    python -m backend.benchmarks.bench_rule_scaling [--sizes 65536 262144 1048576] [--max-exponent 1.3]
+"""
+
+import argparse
+import logging
+import math
+import random
+import string
+import sys
+import time
+
+logging.disable(logging.INFO)
+
+from backend.OptiRewrite_optimized import (  # noqa: E402
+    OptiRewriteEngine,
+    RewriteConfig,
+    RewriteIntensity,
+    RewriteMode,
+    RewriteStrategy,
+    scan_text,
+)
+
+
+def _repeat(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def _fuzz(size: int) -> str:
+    rng = random.Random(size)
+    alphabet = string.ascii_letters * 4 + string.digits + " " * 12 + ".,;:!?'\n"
+    return "".join(rng.choice(alphabet) for _ in range(size))
+
+
+GENERATORS = {
+    'single-token': lambda size: 'a' * size,
+    'repeated-word': lambda size: _repeat('word ', size),
+    'passive-chain': lambda size: _repeat('data was processed by systems ', size),
+    'confusables': lambda size: _repeat("their there they're your you're ", size),
+    'short-sentences': lambda size: _repeat('Go. ', size),
+    'whitespace-run': lambda size: 'a' + ' ' * (size - 2) + 'b',
+    'random-fuzz': _fuzz,
+}
+
+ALL_STRATEGIES = [
+    RewriteStrategy.SENTENCE_RESTRUCTURE,
+    RewriteStrategy.VOCABULARY_ENHANCEMENT,
+    RewriteStrategy.TONE_ADJUSTMENT,
+    RewriteStrategy.CLARITY_IMPROVEMENT,
+    RewriteStrategy.ENGAGEMENT_BOOST,
+]
+
+
+def _stages(engine: OptiRewriteEngine):
+    config = RewriteConfig(mode=RewriteMode.FORMALITY, intensity=RewriteIntensity.HEAVY)
+    return {
+        'analyze': lambda text: engine.text_analyzer.analyze_text(text),
+        'quality': lambda text: engine.quality_assessor.assess_quality(text, text, config),
+        'strategies': lambda text: engine._apply_strategies(text, ALL_STRATEGIES, config),
+        'post_process': lambda text: engine._post_process(text, config),
+    }
+
+
+def measure(fn, text: str, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        scan_text.cache_clear()
+        random.seed(0)
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64 * 1024, 256 * 1024, 1024 * 1024])
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--max-exponent", type=float, default=1.3)
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    args = parser.parse_args()
+
+    engine = OptiRewriteEngine()
+    stages = _stages(engine)
+    sizes = sorted(args.sizes)
+    failures = []
+
+    header = "".join(f"{size // 1024:>9}K" for size in sizes)
+    print(f"{'input':<17}{'stage':<14}{header}{'slope':>8}")
+    for name in args.generators:
+        texts = [GENERATORS[name](size) for size in sizes]
+        for stage, fn in stages.items():
+            timings = [measure(fn, text, args.repeats) for text in texts]
+            # Floor the smallest timing so sub-millisecond noise can't fake a steep slope
+            slope = math.log(timings[-1] / max(timings[0], 1e-3)) / math.log(sizes[-1] / sizes[0])
+            row = "".join(f"{t * 1000:>9.1f}ms" for t in timings)
+            print(f"{name:<17}{stage:<14}{row}{slope:>8.2f}")
+            if slope > args.max_exponent:
+                failures.append(f"{name}/{stage}: slope {slope:.2f}")
+
+    if failures:
+        print(f"\nsuper-linear scaling (max exponent {args.max_exponent}):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nall stages within exponent {args.max_exponent}")
+
+
+if __name__ == "__main__":
+    main()
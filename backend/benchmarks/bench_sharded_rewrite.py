@@ -0,0 +1,127 @@
+"""
+Paragraph-sharded rewriting of a large manuscript across worker counts.
+
+A ``--size`` character manuscript of short paragraphs is rewritten with
+quality scoring (``fields=['confidence_score']``) once without sharding and
+then sharded over 1 (in-process), 2, 4, ... worker processes. Each pool
+is warmed up before timing.
+
+The ``projected`` columns are not measurements. They are the Amdahl bound
+worked out from the single-process run: the time spent outside shard work
+plus the shard work divided by the worker count. ``measured`` can only
+follow them up to the number of CPUs this machine has. Rows with more
+workers than CPUs are marked ``*``, and their measured times show
+oversubscription rather than scaling. Quote multi-core speedups from a
+machine with at least that many cores, not from the projection. Times are
+medians of ``--repeat`` runs.
+
+Usage:
+    python -m backend.benchmarks.bench_sharded_rewrite [--size 2000000] [--workers 1 2 4 8 16] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import time
+
+logging.disable(logging.INFO)
+
+import backend.OptiRewrite_optimized as engine_module  # noqa: E402
+from backend.OptiRewrite_optimized import OptiRewriteEngine, RewriteConfig, split_shards  # noqa: E402
+
+SENTENCES = [
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and it was approved by the board.",
+    "In order to achieve success, it is important to note that we need to work hard.",
+    "However, the results were somewhat disappointing, and the team was frustrated.",
+    "Data was processed by the system at the end of the day.",
+]
+
+
+def _manuscript(rng: random.Random, size: int) -> str:
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 8)))
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _time(engine, text, config, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(engine.rewrite(text, config))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def _shard_work(engine, text, config):
+    """Seconds spent inside per-shard methods during one in-process rewrite"""
+    spent = [0.0]
+
+    def timed(method):
+        def run(*args):
+            started = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                spent[0] += time.perf_counter() - started
+        return run
+
+    engine._analyze_shard = timed(engine._analyze_shard)
+    engine._rewrite_shard = timed(engine._rewrite_shard)
+    asyncio.run(engine.rewrite(text, config))
+    del engine._analyze_shard, engine._rewrite_shard
+    return spent[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    text = _manuscript(random.Random(args.seed), args.size)
+    config = RewriteConfig(fields=['confidence_score'])
+    print(f"{len(text)} characters, {len(split_shards(text))} shards, {os.cpu_count()} CPUs")
+
+    minimum = engine_module.SHARD_MIN_CHARS
+    engine_module.SHARD_MIN_CHARS = len(text) + 1
+    serial = _time(OptiRewriteEngine(shard_workers=0), text, config, args.repeat)
+    engine_module.SHARD_MIN_CHARS = minimum
+    print(f"unsharded: {serial:.2f}s")
+
+    in_process = OptiRewriteEngine(shard_workers=0)
+    work = _shard_work(in_process, text, config)
+    base = _time(in_process, text, config, args.repeat)
+    overhead = max(0.0, base - work)
+
+    cpus = os.cpu_count() or 1
+    print(f"projected = Amdahl bound from the 1-worker run ({work:.2f}s shard work, "
+          f"{overhead:.2f}s outside it), not measured")
+    print(f"{'workers':>8}{'measured s':>12}{'speedup':>9}{'projected s':>13}{'speedup':>9}")
+    for workers in args.workers:
+        if workers <= 1:
+            measured = base
+        else:
+            engine = OptiRewriteEngine(shard_workers=workers)
+            asyncio.run(engine.rewrite(text, config))  # start the pool
+            measured = _time(engine, text, config, args.repeat)
+            engine.close()
+        projected = overhead + work / max(1, workers)
+        marker = "*" if workers > cpus else ""
+        print(f"{marker + str(workers):>8}{measured:>12.2f}{serial / measured:>8.2f}x"
+              f"{projected:>13.2f}{serial / projected:>8.2f}x")
+    if max(args.workers) > cpus:
+        print(f"* more workers than the {cpus} CPUs here: measured times are oversubscribed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Requests per second of the catalog and probe routes, before and after precomputing them.
+
+``before`` is an app with the old handlers: they return the dicts and the
+response class encodes them on every request, behind the same CORS, quota
+and idempotency middlewares the app registers. ``after`` is the app itself,
+which sends bytes encoded at import and passes these paths around the http
+middlewares. ``after 304`` sends the route's ETag back in If-None-Match, as
+a revalidating cache or probe would. Requests go through httpx's ASGI
+transport, so the numbers are the app's own cost without sockets.
+
+Usage:
+    python -m backend.benchmarks.bench_static_routes [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+logging.disable(logging.INFO)
+os.environ["LOGIVAULT_DATA_DIR"] = tempfile.mkdtemp(prefix="bench-static-")
+os.environ["JOB_WORKERS"] = "0"
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from backend.main import app  # noqa: E402
+from backend.routes.optimization import INTENSITIES, MODES, SAMPLES  # noqa: E402
+from backend.utils.idempotency import idempotency_middleware  # noqa: E402
+from backend.utils.quota import quota_middleware  # noqa: E402
+from backend.utils.responses import FastJSONResponse  # noqa: E402
+
+PATHS = ["/api/modes", "/api/sample/blog_post", "/", "/healthz"]
+
+
+def _before_app():
+    """The routes as they were: a dict built and encoded per request, behind every http middleware"""
+    before = FastAPI(default_response_class=FastJSONResponse)
+    before.add_middleware(CORSMiddleware, allow_origins=["http://localhost:3000"], allow_credentials=True,
+                          allow_methods=["*"], allow_headers=["*"])
+    before.add_middleware(BaseHTTPMiddleware, dispatch=quota_middleware)
+    before.add_middleware(BaseHTTPMiddleware, dispatch=idempotency_middleware)
+
+    @before.get("/api/modes")
+    async def modes():
+        return {'success': True, 'modes': {**MODES}, 'intensities': {**INTENSITIES}}
+
+    @before.get("/api/sample/{sample_type}")
+    async def sample(sample_type: str):
+        samples = {**SAMPLES}
+        if sample_type not in samples:
+            return {'success': False, 'error': 'Invalid sample type'}
+        return {'success': True, 'sample': samples[sample_type]}
+
+    @before.get("/")
+    def root():
+        return {"message": "LogiVault API is running", "version": "1.0.0"}
+
+    @before.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    return before
+
+
+async def _rate(target, path, requests, revalidate=False):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench") as client:
+        first = await client.get(path)
+        headers = {'If-None-Match': first.headers['etag']} if revalidate else {}
+        expected = 304 if revalidate else 200
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == expected, response.status_code
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    before = _before_app()
+    print(f"{'path':<24}{'before':>10}{'after':>10}{'after 304':>12}   (requests/s)")
+    for path in PATHS:
+        rates = [
+            asyncio.run(_rate(before, path, args.requests)),
+            asyncio.run(_rate(app, path, args.requests)),
+            asyncio.run(_rate(app, path, args.requests, revalidate=True)),
+        ]
+        print(f"{path:<24}" + "".join(f"{rate:>10.0f}" for rate in rates[:2]) + f"{rates[2]:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Target search against a single rewrite of the same document.
+
+Documents of each ``--sizes`` character count are rewritten text-only
+(``fields=[]``) once without targets and once per target set below, with
+the default search budget. ``x single`` is the search's time over the
+plain rewrite's; ``naive`` is what rewriting and analyzing every candidate
+the search measured from scratch would cost (candidates times the plain
+rewrite plus one ``analyze_text``). The search stops after
+SEARCH_BUDGET_MULTIPLE plain rewrites' worth of time, so ``x single`` stays
+near that multiple plus one however far off the targets are; the
+unreachable targets show the bound. Times are medians of ``--repeat`` runs
+in milliseconds.
+
+Usage:
+    python -m backend.benchmarks.bench_target_search [--sizes 2000 20000 80000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+logging.disable(logging.INFO)
+
+from backend.OptiRewrite_optimized import OptiRewriteEngine, RewriteConfig, scan_text  # noqa: E402
+
+SENTENCES = [
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and we cannot approve it in order to save time.",
+    "Due to the fact that the results were very good, the team is not worried.",
+    "Our team met on Monday to plan the next release of the product.",
+    "Sales grew in the spring and held steady through the summer.",
+]
+
+TARGETS = {
+    'shorter': {'target_length_ratio': 0.85},
+    'plainer': {'target_readability': 0.7},
+    'both': {'target_readability': 0.7, 'target_length_ratio': 0.9},
+    'unreachable': {'target_readability': 1.0, 'target_length_ratio': 0.5},
+}
+
+
+def _document(rng: random.Random, size: int) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def _time(engine, text, config, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        scan_text.cache_clear()
+        started = time.perf_counter()
+        result = asyncio.run(engine.rewrite(text, config))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000, 80000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=19)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = OptiRewriteEngine(shard_workers=0)
+    print(f"{'chars':>7}{'target':>13}{'single ms':>11}{'search ms':>11}{'x single':>10}"
+          f"{'candidates':>12}{'naive ms':>10}{'met':>5}")
+    for size in args.sizes:
+        text = _document(rng, size)
+        _time(engine, text, RewriteConfig(fields=[], **TARGETS['unreachable']), 1)  # warm up strategy stats
+        single, _ = _time(engine, text, RewriteConfig(fields=[]), args.repeat)
+        started = time.perf_counter()
+        engine.text_analyzer.analyze_text(text)
+        analyze = time.perf_counter() - started
+        for name, targets in TARGETS.items():
+            searched, result = _time(engine, text, RewriteConfig(fields=[], **targets), args.repeat)
+            search = result.target_search
+            naive = search.candidates * (single + analyze)
+            print(f"{len(text):>7}{name:>13}{single * 1000:>11.1f}{searched * 1000:>11.1f}{searched / single:>9.1f}x"
+                  f"{search.candidates:>12}{naive * 1000:>10.0f}{'yes' if search.targets_met else 'no':>5}")
+
+
+if __name__ == "__main__":
+    main()
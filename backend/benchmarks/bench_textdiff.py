@@ -0,0 +1,99 @@
+"""
+Token diff vs difflib.SequenceMatcher on documents up to 1 MB.
+
+Documents are generated from a fixed vocabulary and then edited: a light
+edit substitutes 5% of the words, a heavy edit rewrites 30% and drops or
+inserts sentences, and a shuffle keeps the words but loses their order.
+Each pair is diffed with ``diff_texts`` at every size. SequenceMatcher on
+the full character strings (what ``compute_metrics`` used to run) is only
+timed up to ``--sm-max-size`` because it goes quadratic beyond that.
+
+Usage:
+    python -m backend.benchmarks.bench_textdiff [--sizes 16384 65536 262144 1048576] [--sm-max-size 65536]
+"""
+
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from backend.utils.textdiff import diff_texts
+
+
+def _vocabulary(rng: random.Random, size: int = 20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(2, 10))) for _ in range(size)]
+
+
+def _document(rng: random.Random, vocabulary, size: int):
+    sentences = []
+    length = 0
+    while length < size:
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(6, 24))]
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return sentences
+
+
+def light_edit(rng, vocabulary, sentences):
+    return [
+        " ".join(w if rng.random() > 0.05 else rng.choice(vocabulary) for w in s.split())
+        for s in sentences
+    ]
+
+
+def heavy_edit(rng, vocabulary, sentences):
+    edited = []
+    for sentence in sentences:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        if roll < 0.10:
+            edited.append(" ".join(rng.choice(vocabulary) for _ in range(10)).capitalize() + ".")
+        edited.append(" ".join(w if rng.random() > 0.3 else rng.choice(vocabulary) for w in sentence.split()))
+    return edited
+
+
+def shuffle(rng, vocabulary, sentences):
+    words = " ".join(sentences).split()
+    rng.shuffle(words)
+    return [" ".join(words)]
+
+
+EDITS = {'light': light_edit, 'heavy': heavy_edit, 'shuffled': shuffle}
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024])
+    parser.add_argument("--sm-max-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = _vocabulary(rng)
+
+    print(f"{'edit':<10}{'size':>8}{'spans':>8}{'diff ms':>10}{'ratio':>8}{'SM ms':>10}{'SM ratio':>10}")
+    for size in sorted(args.sizes):
+        original_sentences = _document(rng, vocabulary, size)
+        original = " ".join(original_sentences)
+        for name, edit in EDITS.items():
+            edited = " ".join(edit(rng, vocabulary, original_sentences))
+            diff, diff_time = _timed(lambda: diff_texts(original, edited))
+            if size <= args.sm_max_size:
+                sm_ratio, sm_time = _timed(lambda: SequenceMatcher(None, original, edited).ratio())
+                sm = f"{sm_time * 1000:>10.1f}{sm_ratio:>10.3f}"
+            else:
+                sm = f"{'skipped':>10}{'':>10}"
+            print(f"{name:<10}{size // 1024:>7}K{len(diff.spans):>8}{diff_time * 1000:>10.1f}{diff.ratio:>8.3f}{sm}")
+
+
+if __name__ == "__main__":
+    main()
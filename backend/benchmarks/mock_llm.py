@@ -0,0 +1,287 @@
+"""
+Mock LLM provider for offline load and latency tests.
+
+Serves the Anthropic Messages API (POST /v1/messages) and the OpenAI Chat
+Completions API (POST /v1/chat/completions) wire formats, buffered or
+streamed (``"stream": true``). Every reply is a deterministic echo rewrite
+of the prompt's text (a few wordy phrases shortened), so a run can be
+repeated and compared. A reply waits ``--latency`` before its first token,
+then produces ``--tokens-per-second``. A share of requests gets a 429
+(``--rate-limit-rate``) or an overloaded error (``--error-rate``) instead.
+GET /mock/stats counts what was served.
+
+Point the backend at it with
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8090 OPENAI_BASE_URL=http://127.0.0.1:8090
+    CLAUDE_API_KEY=mock OPENAI_API_KEY=mock
+or, inside a benchmark, ``with serve(MockLLMConfig(...)) as url: use_mock(url)``.
+
+Latency specs (milliseconds): ``fixed:300``, ``uniform:100,500``,
+``normal:300,50``, ``lognormal:300,0.5`` (median, sigma), ``exp:300`` (mean).
+
+Usage:
+    python -m backend.benchmarks.mock_llm [--port 8090] [--latency lognormal:300,0.5] [--tokens-per-second 60] [--error-rate 0.02] [--rate-limit-rate 0.05] [--seed 1]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Shortened by the echo rewrite, so a reply differs from its prompt the way a rewrite would
+ECHO_REWRITES = [
+    (re.compile(r"\bin order to\b", re.I), "to"),
+    (re.compile(r"\bdue to the fact that\b", re.I), "because"),
+    (re.compile(r"\butiliz(?:e|ation of)\b", re.I), "use"),
+    (re.compile(r"\bfacilitate\b", re.I), "help"),
+    (re.compile(r"\bat this point in time\b", re.I), "now"),
+    (re.compile(r"\bvery\s+", re.I), ""),
+]
+
+# The AIRewriter prompt wraps the text to rewrite in these markers
+ORIGINAL_MARKER = "Original text:"
+REWRITTEN_MARKER = "Rewritten text:"
+
+
+@dataclass
+class MockLLMConfig:
+    """How the mock behaves; rates are probabilities per request"""
+    latency: str = "fixed:200"       # time to first token, see the module docstring
+    tokens_per_second: float = 60.0  # 0 sends the reply all at once
+    error_rate: float = 0.0          # overloaded: 529 (Anthropic) / 500 (OpenAI)
+    rate_limit_rate: float = 0.0     # 429 with a retry-after header
+    retry_after: int = 1
+    seed: Optional[int] = None
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Seconds drawn from a latency spec"""
+    kind, _, args = spec.partition(":")
+    numbers = [float(value) for value in args.split(",") if value]
+    ms = [number / 1000 for number in numbers]
+    if kind == "fixed":
+        return lambda: ms[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(ms[0], ms[1])
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(ms[0], ms[1]))
+    if kind == "lognormal":
+        return lambda: ms[0] * rng.lognormvariate(0.0, numbers[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1 / ms[0]) if ms[0] else 0.0
+    raise ValueError(f"unknown latency spec: {spec}")
+
+
+def echo_rewrite(prompt: str) -> str:
+    """The text to rewrite, with the wordy phrases shortened"""
+    text = prompt
+    if ORIGINAL_MARKER in text:
+        text = text.split(ORIGINAL_MARKER, 1)[1].split(REWRITTEN_MARKER, 1)[0]
+    text = " ".join(text.split())
+    for pattern, replacement in ECHO_REWRITES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def tokens_of(text: str) -> List[str]:
+    """One token per word, with the space before it"""
+    return re.findall(r"\s*\S+", text)
+
+
+def create_app(config: Optional[MockLLMConfig] = None) -> FastAPI:
+    """A mock provider app; one app keeps one random stream and one set of stats"""
+    config = config or MockLLMConfig()
+    rng = random.Random(config.seed)
+    first_token = latency_sampler(config.latency, rng)
+    stats = Counter()
+    app = FastAPI(title="Mock LLM provider")
+
+    def fault(api: str) -> Optional[JSONResponse]:
+        """An injected error response, or None to answer normally"""
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats[f"{api}_rate_limited"] += 1
+            message = "Mock rate limit exceeded"
+            body = ({'type': 'error', 'error': {'type': 'rate_limit_error', 'message': message}} if api == "anthropic"
+                    else {'error': {'message': message, 'type': 'requests', 'code': 'rate_limit_exceeded'}})
+            return JSONResponse(body, status_code=429, headers={'retry-after': str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats[f"{api}_errors"] += 1
+            message = "Mock provider overloaded"
+            if api == "anthropic":
+                return JSONResponse({'type': 'error', 'error': {'type': 'overloaded_error', 'message': message}},
+                                    status_code=529)
+            return JSONResponse({'error': {'message': message, 'type': 'server_error', 'code': None}},
+                                status_code=500)
+        return None
+
+    def reply(messages: List[dict], max_tokens: int):
+        """(tokens, input_tokens, stop) for the last user message"""
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        if isinstance(prompt, list):
+            prompt = " ".join(block.get("text", "") for block in prompt)
+        tokens = tokens_of(echo_rewrite(prompt))
+        stop = len(tokens) > max_tokens
+        input_tokens = sum(len(tokens_of(str(m.get("content", "")))) for m in messages)
+        return tokens[:max_tokens], input_tokens, stop
+
+    async def produce(tokens: List[str]) -> AsyncIterator[str]:
+        """The tokens, paced by the configured token rate, after the first-token latency"""
+        await asyncio.sleep(first_token())
+        pause = 1 / config.tokens_per_second if config.tokens_per_second else 0.0
+        for index, token in enumerate(tokens):
+            if index and pause:
+                await asyncio.sleep(pause)
+            yield token
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        stats["anthropic_requests"] += 1
+        error = fault("anthropic")
+        if error:
+            return error
+        messages = list(body.get("messages", []))
+        if body.get("system"):
+            messages.insert(0, {'role': 'system', 'content': body["system"]})
+        tokens, input_tokens, truncated = reply(messages, int(body.get("max_tokens", 1024)))
+        stop_reason = "max_tokens" if truncated else "end_turn"
+        message_id = f"msg_mock_{stats['anthropic_requests']}"
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            text = "".join([token async for token in produce(tokens)])
+            return {
+                'id': message_id, 'type': 'message', 'role': 'assistant', 'model': model,
+                'content': [{'type': 'text', 'text': text}],
+                'stop_reason': stop_reason, 'stop_sequence': None,
+                'usage': {'input_tokens': input_tokens, 'output_tokens': len(tokens)},
+            }
+
+        def event(kind: str, data: dict) -> str:
+            return f"event: {kind}\ndata: {json.dumps(dict(data, type=kind))}\n\n"
+
+        async def stream():
+            yield event("message_start", {'message': {
+                'id': message_id, 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+                'stop_reason': None, 'stop_sequence': None,
+                'usage': {'input_tokens': input_tokens, 'output_tokens': 1},
+            }})
+            yield event("content_block_start", {'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+            async for token in produce(tokens):
+                yield event("content_block_delta", {'index': 0, 'delta': {'type': 'text_delta', 'text': token}})
+            yield event("content_block_stop", {'index': 0})
+            yield event("message_delta", {'delta': {'stop_reason': stop_reason, 'stop_sequence': None},
+                                          'usage': {'output_tokens': len(tokens)}})
+            yield event("message_stop", {})
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["openai_requests"] += 1
+        error = fault("openai")
+        if error:
+            return error
+        tokens, input_tokens, truncated = reply(body.get("messages", []), int(body.get("max_tokens") or 4096))
+        finish_reason = "length" if truncated else "stop"
+        completion_id = f"chatcmpl-mock-{stats['openai_requests']}"
+        model = body.get("model", "mock")
+        created = int(time.time())
+
+        if not body.get("stream"):
+            text = "".join([token async for token in produce(tokens)])
+            return {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                             'finish_reason': finish_reason}],
+                'usage': {'prompt_tokens': input_tokens, 'completion_tokens': len(tokens),
+                          'total_tokens': input_tokens + len(tokens)},
+            }
+
+        def chunk(delta: dict, finish: Optional[str] = None) -> str:
+            data = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}]}
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def stream():
+            yield chunk({'role': 'assistant', 'content': ''})
+            async for token in produce(tokens):
+                yield chunk({'content': token})
+            yield chunk({}, finish_reason)
+            if body.get("stream_options", {}).get("include_usage"):
+                data = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                        'choices': [], 'usage': {'prompt_tokens': input_tokens, 'completion_tokens': len(tokens),
+                                                 'total_tokens': input_tokens + len(tokens)}}
+                yield f"data: {json.dumps(data)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return dict(stats)
+
+    return app
+
+
+@contextlib.contextmanager
+def serve(config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1") -> Iterator[str]:
+    """Run the mock on a free port in a background thread; yields its base URL"""
+    sock = socket.socket()
+    sock.bind((host, 0))
+    server = uvicorn.Server(uvicorn.Config(create_app(config), log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.01)
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+def use_mock(base_url: str):
+    """Point this process's LLM clients (the provider router, and so /claude and AIRewriter) at a mock"""
+    from backend.config import ANTHROPIC_MODELS, OPENAI_MODELS
+    from backend.services.llm_router import AnthropicProvider, OpenAIProvider, llm_router
+
+    llm_router.set_providers(
+        [AnthropicProvider(model.strip(), "mock", base_url) for model in ANTHROPIC_MODELS.split(",") if model.strip()]
+        + [OpenAIProvider(model.strip(), "mock", base_url) for model in OPENAI_MODELS.split(",") if model.strip()]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="fixed:200")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = MockLLMConfig(args.latency, args.tokens_per_second, args.error_rate, args.rate_limit_rate,
+                           args.retry_after, args.seed)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,33 @@
-import httpx
-import os
-from dotenv import load_dotenv
+from typing import AsyncIterator, Optional
 
-load_dotenv()
+from backend.services.llm_router import NoProviderAvailable, llm_router
 
-CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+# /claude passes prompts through as they are: no system prompt, short replies
+MAX_TOKENS = 512
 
-async def call_claude(prompt: str) -> str:
-    if not CLAUDE_API_KEY:
-        return "Claude API key missing."
+class ClaudeError(str):
+    """Failure text returned (or yielded) in place of a reply
 
-    url = "https://api.anthropic.com/v1/messages"
-    headers = {
-        "x-api-key": CLAUDE_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json"
-    }
-    payload = {
-        "model": "claude-3-opus-20240229",
-        "max_tokens": 512,
-        "temperature": 0.7,
-        "messages": [{"role": "user", "content": prompt}]
-    }
+    Still a plain string for callers that just show it; routes check for it
+    to answer with an error instead of a reply.
+    """
 
-    async with httpx.AsyncClient() as client:
-        try:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            return r.json()["content"][0]["text"]
-        except Exception as e:
-            return f"Error: {str(e)}"
+async def call_claude(prompt: str, usage: Optional[dict] = None) -> str:
+    """The reply from the provider router (Claude first when untried), within its request deadline"""
+    try:
+        return await llm_router.complete(prompt, "", max_tokens=MAX_TOKENS, usage=usage)
+    except NoProviderAvailable as e:
+        return ClaudeError(f"Error: {str(e)}")
+
+async def stream_claude(prompt: str, usage: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield the reply in the chunks the routed provider streams it in
+
+    ``usage`` gets input_tokens and output_tokens as the provider reports
+    them. Failures are yielded as ClaudeError text, like call_claude returns
+    them, and end the stream.
+    """
+    try:
+        async for chunk in llm_router.stream(prompt, "", max_tokens=MAX_TOKENS, usage=usage):
+            yield chunk
+    except NoProviderAvailable as e:
+        yield ClaudeError(f"Error: {str(e)}")
@@ -0,0 +1,100 @@
+import os
+
+from dotenv import load_dotenv
+
+# Read .env before any setting below (and the API keys read elsewhere) is looked up
+load_dotenv()
+
+# Directory for SQLite stores and other local state (mount a volume here in prod)
+DATA_DIR = os.getenv("LOGIVAULT_DATA_DIR", "data")
+
+# Session tokens: secret shared with the web app's server that issues them, and their default lifetime
+AUTH_SECRET = os.getenv("AUTH_SECRET", "")
+AUTH_TOKEN_TTL = float(os.getenv("AUTH_TOKEN_TTL", str(7 * 86400)))
+
+# Plan store: cache sync / event retry tick, and how long a worker holds a Stripe event it is applying
+PLAN_DB_PATH = os.getenv("PLAN_DB_PATH", os.path.join(DATA_DIR, "plans.db"))
+PLAN_SYNC_INTERVAL = float(os.getenv("PLAN_SYNC_INTERVAL", "5"))
+PLAN_EVENT_LEASE = float(os.getenv("PLAN_EVENT_LEASE", "60"))
+
+# Rewrite scheduler: worker processes running rewrites in parallel, and max queue wait before a job jumps the fair order
+REWRITE_WORKERS = int(os.getenv("REWRITE_WORKERS", str(os.cpu_count() or 2)))
+REWRITE_MAX_WAIT = float(os.getenv("REWRITE_MAX_WAIT", "30"))
+
+# Longest a rule-based rewrite may search for a request's target_readability / target_length_ratio
+REWRITE_SEARCH_BUDGET = float(os.getenv("REWRITE_SEARCH_BUDGET", "0.5"))
+
+# LLM provider routing: request deadline, breaker threshold and cool-down, EWMA smoothing factor
+LLM_REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "12"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+LLM_EWMA_ALPHA = float(os.getenv("LLM_EWMA_ALPHA", "0.2"))
+
+# LLM provider endpoints and the models routed to (comma-separated); a provider needs its API key
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+ANTHROPIC_MODELS = os.getenv("ANTHROPIC_MODELS", "claude-3-opus-20240229")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com")
+OPENAI_MODELS = os.getenv("OPENAI_MODELS", "gpt-3.5-turbo")
+
+# /api/optimize/stream: documents in flight per stream and the longest NDJSON line accepted (bytes)
+OPTIMIZE_STREAM_IN_FLIGHT = int(os.getenv("OPTIMIZE_STREAM_IN_FLIGHT", "16"))
+OPTIMIZE_STREAM_MAX_LINE = int(os.getenv("OPTIMIZE_STREAM_MAX_LINE", str(10 * 1024 * 1024)))
+
+# Durable job queue behind /api/jobs: documents per job, finished-job retention, worker lease and claim attempts
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "jobs.db"))
+JOB_MAX_DOCUMENTS = int(os.getenv("JOB_MAX_DOCUMENTS", "1000"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "86400"))
+JOB_LEASE = float(os.getenv("JOB_LEASE", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Job worker processes each API process starts (0: run `python -m backend.services.job_worker` yourself),
+# jobs each worker runs at once, idle poll interval, completion webhook timeout and the comma-separated
+# webhook hosts exempt from the public-address check (see utils/webhooks.py)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_WEBHOOK_TIMEOUT = float(os.getenv("JOB_WEBHOOK_TIMEOUT", "10"))
+JOB_WEBHOOK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+# Usage metering: counters are flushed to this store, and every worker's usage read back, every
+# USAGE_FLUSH_INTERVAL seconds; at most USAGE_CACHE_SIZE users' totals are kept in memory
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", os.path.join(DATA_DIR, "usage.db"))
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+USAGE_CACHE_SIZE = int(os.getenv("USAGE_CACHE_SIZE", "100000"))
+
+# Idempotency-Key replay window and cache bound
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+# Certification batching: max seconds to hold a batch open and max leaves per Merkle root
+CERT_BATCH_WINDOW = float(os.getenv("CERT_BATCH_WINDOW", "0.05"))
+CERT_BATCH_MAX = int(os.getenv("CERT_BATCH_MAX", "1000"))
+
+# Issued certifications and the verification cache in front of the registry
+CERT_DB_PATH = os.getenv("CERT_DB_PATH", os.path.join(DATA_DIR, "certifications.db"))
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "50000"))
+VERIFY_BLOOM_CAPACITY = int(os.getenv("VERIFY_BLOOM_CAPACITY", "1000000"))
+VERIFY_BLOOM_ERROR_RATE = float(os.getenv("VERIFY_BLOOM_ERROR_RATE", "0.001"))
+
+# Certification backend and asynchronous pipeline: certifications in flight per process, and how long a
+# worker's claim on a pending certification lasts without renewal
+CERTIFIER_BACKEND = os.getenv("CERTIFIER_BACKEND", "local")
+CERT_PIPELINE_CONCURRENCY = int(os.getenv("CERT_PIPELINE_CONCURRENCY", "1000"))
+CERT_PIPELINE_LEASE = float(os.getenv("CERT_PIPELINE_LEASE", "60"))
+CERT_STATUS_PUSH_TIMEOUT = float(os.getenv("CERT_STATUS_PUSH_TIMEOUT", "60"))
+
+# Response compression: smallest body worth compressing (bytes), gzip level and brotli quality
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Cache-Control of the precomputed responses: catalogs (/api/modes, /api/sample/*) and probes (/, /healthz)
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=86400")
+PROBE_CACHE_CONTROL = os.getenv("PROBE_CACHE_CONTROL", "no-cache")
+
+# /api/analyze: largest text accepted and the bounds of its response cache
+ANALYZE_MAX_CHARS = int(os.getenv("ANALYZE_MAX_CHARS", "200000"))
+ANALYZE_CACHE_SIZE = int(os.getenv("ANALYZE_CACHE_SIZE", "1024"))
+ANALYZE_CACHE_BYTES = int(os.getenv("ANALYZE_CACHE_BYTES", str(64 * 1024 * 1024)))
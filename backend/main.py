@@ -1,11 +1,30 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from backend.claude_api import call_claude
-from backend.routes.optimization import router as optimization_router
+from fastapi.responses import StreamingResponse
+from backend.config import PROBE_CACHE_CONTROL
+from backend.claude_api import ClaudeError, call_claude, stream_claude
+from backend.routes.optimization import router as optimization_router, close_optirewrite
+from backend.routes.analysis import router as analysis_router
 from backend.routes.certnode_integration import router as certnode_router
+from backend.routes.jobs import router as jobs_router
+from backend.routes.stripe_webhook import router as stripe_router
+from backend.services.usage_meter import usage_meter, flush_periodically, llm_tokens_used
+from backend.utils.auth import get_user_id
+from backend.utils.compression import CompressionMiddleware
+from backend.utils.duplex import HTTPMiddleware
+from backend.utils.formatter import EditorialStream
+from backend.utils.idempotency import idempotency_middleware
+from backend.utils.quota import quota_middleware
+from backend.utils.responses import FastJSONResponse, PrecomputedJSON
+import asyncio
+import json
+import logging
 import os
+import time
 
-app = FastAPI(title="LogiVault API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="LogiVault API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,27 +46,116 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-plan quota enforcement and remaining-quota headers
+app.add_middleware(HTTPMiddleware, dispatch=quota_middleware)
+
+# Registered last so it runs first: replayed retries skip quota checks and metering
+app.add_middleware(HTTPMiddleware, dispatch=idempotency_middleware)
+
+# Outermost, so it sees final bodies; cached and replayed responses arrive already compressed
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(optimization_router)
+app.include_router(analysis_router)
 app.include_router(certnode_router)
+app.include_router(jobs_router)
+app.include_router(stripe_router)
+
+_usage_flush_task = None
+
+@app.on_event("startup")
+async def start_usage_flush():
+    global _usage_flush_task
+    _usage_flush_task = asyncio.create_task(flush_periodically())
+
+@app.on_event("shutdown")
+async def stop_usage_flush():
+    if _usage_flush_task:
+        _usage_flush_task.cancel()
+    await asyncio.to_thread(usage_meter.flush)
+
+@app.on_event("shutdown")
+async def stop_rewrite_workers():
+    await asyncio.to_thread(close_optirewrite)
+
+# Probed constantly by uptime checks: encoded once, revalidated by ETag
+ROOT_RESPONSE = PrecomputedJSON({"message": "LogiVault API is running", "version": "1.0.0"}, PROBE_CACHE_CONTROL)
+HEALTHZ_RESPONSE = PrecomputedJSON({"status": "ok"}, PROBE_CACHE_CONTROL)
 
 @app.get("/")
-def root():
-    return {"message": "LogiVault API is running", "version": "1.0.0"}
+def root(request: Request):
+    return ROOT_RESPONSE.response(request)
 
 @app.get("/healthz")
-def healthz():
-    return {"status": "ok"}
+def healthz(request: Request):
+    return HEALTHZ_RESPONSE.response(request)
 
 @app.post("/claude")
 async def claude(request: Request):
+    """Claude's reply to a prompt; ``"stream": true`` (or Accept: text/event-stream) streams it as SSE"""
     body = await request.json()
     prompt = body.get("prompt", "")
     if not prompt:
         return {"error": "No prompt provided."}
-    response = await call_claude(prompt)
+    if body.get("stream") or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(_claude_events(prompt, get_user_id(request)), media_type="text/event-stream")
+    usage = {}
+    response = await call_claude(prompt, usage=usage)
+    if isinstance(response, ClaudeError):
+        return {"error": response}
+    usage_meter.record(
+        get_user_id(request),
+        input_words=len(prompt.split()),
+        output_words=len(response.split()),
+        llm_tokens=llm_tokens_used(usage, prompt, response),
+    )
     return {"response": response}
 
+async def _claude_events(prompt: str, user_id: str):
+    """
+    "token" events carrying the reply cleaned up with format_editorial, one
+    per completed sentence run, then a "done" event with time to first token
+    and token counts. A failed call ends with an "error" event instead. Usage
+    is metered even if the client hangs up early.
+    """
+    usage = {}
+    editorial = EditorialStream()
+    chunks = []
+    started = time.perf_counter()
+    first_token = None
+    try:
+        async for chunk in stream_claude(prompt, usage=usage):
+            if isinstance(chunk, ClaudeError):
+                yield f"event: error\ndata: {json.dumps({'error': chunk})}\n\n"
+                return
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            chunks.append(chunk)
+            text = editorial.feed(chunk)
+            if text:
+                yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+        text = editorial.finish()
+        if text:
+            yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+        done = {
+            'time_to_first_token': round(first_token, 4) if first_token is not None else None,
+            'total_time': round(time.perf_counter() - started, 4),
+            'input_tokens': usage.get('input_tokens'),
+            'output_tokens': usage.get('output_tokens'),
+        }
+        logger.info(f"/claude stream: first token {done['time_to_first_token']}s, "
+                    f"{done['output_tokens']} tokens in {done['total_time']}s")
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+    finally:
+        response = "".join(chunks)
+        usage_meter.record(
+            user_id,
+            input_words=len(prompt.split()),
+            output_words=len(response.split()),
+            llm_tokens=llm_tokens_used(usage, prompt, response),
+        )
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,122 @@
+"""
+Response models for the optimize and analyze routes.
+
+Routes declare these as ``response_model`` so FastAPI validates and
+serializes the payload in pydantic-core instead of walking it with
+``jsonable_encoder``. Optional fields default to None and the routes set
+``response_model_exclude_none``, so a response only carries the keys the
+handler filled in.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+class OptimizationSummary(BaseModel):
+    mode: str
+    intensity: str
+    strategies_applied: List[str]
+    confidence_score: float
+    quality_tier: str
+    processing_time: float
+
+
+class StrategyCostReport(BaseModel):
+    """Cost of one strategy in this rewrite; see OptiRewrite_optimized.StrategyCost"""
+    runs: int
+    skips: int
+    seconds: float
+    characters_changed: int
+
+
+class TargetSearchReport(BaseModel):
+    """Outcome of the search for requested targets; see OptiRewrite_optimized.TargetSearch"""
+    intensity: str
+    readability: float
+    length_ratio: float
+    targets_met: bool
+    candidates: int
+    seconds: float
+
+
+class OptimizationMetrics(BaseModel):
+    original_length: int
+    optimized_length: int
+    length_change_percent: float
+    word_count_original: int
+    word_count_optimized: int
+    estimated_value: float
+    strategy_costs: Optional[Dict[str, StrategyCostReport]] = None
+    target_search: Optional[TargetSearchReport] = None
+
+
+class TextPatch(BaseModel):
+    """Edit ops against the submitted content; see backend.utils.patch"""
+    base_length: int
+    result_length: int
+    ops: List[Tuple[int, int, str]]
+
+
+class OptimizeResponse(BaseModel):
+    success: bool
+    error: Optional[str] = None
+    optimization_id: Optional[str] = None
+    response_format: Optional[str] = None
+    patch: Optional[TextPatch] = None
+    original_content: Optional[str] = None
+    optimized_content: Optional[str] = None
+    optimization_summary: Optional[OptimizationSummary] = None
+    metrics: Optional[OptimizationMetrics] = None
+    quality_scores: Optional[Dict[str, float]] = None
+    recommendations: Optional[List[str]] = None
+    timestamp: Optional[str] = None
+
+
+class EditorialMetrics(BaseModel):
+    """compute_metrics output for the legacy Claude endpoint"""
+    clarity: int
+    brevity: float
+    engagement: int
+    timeSavedHours: float
+    moneySaved: float
+
+
+class ClaudeOptimizeResponse(BaseModel):
+    optimizedText: str
+    metrics: EditorialMetrics
+    timestamp: str
+
+
+class TextAnalysis(BaseModel):
+    """TextAnalyzer.analyze_text output"""
+    text_length: int
+    sentence_count: int
+    word_count: int
+    avg_sentence_length: float
+    readability_score: float
+    complexity_score: float
+    tone_analysis: Dict[str, float]
+    style_consistency: float
+    improvement_opportunities: List[str]
+    recommended_strategies: List[str]
+
+
+class SentenceIssue(BaseModel):
+    type: str
+    start: int
+    end: int
+
+
+class SentenceAnnotation(BaseModel):
+    start: int
+    end: int
+    word_count: int
+    issues: List[SentenceIssue]
+
+
+class AnalyzeResponse(BaseModel):
+    success: bool
+    error: Optional[str] = None
+    analysis: Optional[TextAnalysis] = None
+    sentences: Optional[List[SentenceAnnotation]] = None
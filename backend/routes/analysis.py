@@ -0,0 +1,177 @@
+import asyncio
+from dataclasses import asdict
+
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
+
+from backend.config import ANALYZE_MAX_CHARS
+from backend.models import AnalyzeResponse
+from backend.routes import optimization
+from backend.services.analysis_cache import AnalysisCache
+from backend.utils.compression import EncodedBody
+from backend.utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Encoded and compressed responses by text digest; the editor re-sends unchanged text often
+analysis_cache = AnalysisCache()
+
+def _analysis_dict(analysis) -> dict:
+    """RewriteAnalysis as JSON-ready data"""
+    data = asdict(analysis)
+    # A set upstream, so sort for a stable body
+    data['recommended_strategies'] = sorted(
+        optimization.STRATEGY_NAMES[s] for s in data['recommended_strategies']
+    )
+    return data
+
+def _open_document(analyzer, content: str):
+    """(document, analysis dict) for a new editor session; runs in a worker thread"""
+    document = analyzer.open_document(content)
+    return document, _analysis_dict(document.analysis())
+
+def _edit_document(document, ops):
+    """(splices, analysis dict) after applying ``ops``; runs in a worker thread"""
+    splices = document.apply(ops)
+    return splices, _analysis_dict(document.analysis())
+
+def _analysis_body(content: str) -> EncodedBody:
+    """Encoded and compressed /api/analyze response for ``content``"""
+    analyzer = optimization.optirewrite_engine.text_analyzer
+    return EncodedBody(FastJSONResponse({
+        'success': True,
+        'analysis': _analysis_dict(analyzer.analyze_text(content)),
+        'sentences': analyzer.annotate_sentences(content),
+    }).body)
+
+# Hits return the cached body as-is, so AnalyzeResponse documents the shape rather than validating it
+@router.post("/api/analyze", response_model=AnalyzeResponse, response_model_exclude_none=True)
+async def analyze_content(request: Request):
+    """Analysis and per-sentence annotations without rewriting, for live editor linting
+
+    Meant to be called on every debounced keystroke: repeated texts are served
+    from an in-memory cache of encoded responses (``X-Analysis-Cache: hit``),
+    compressed copies included.
+    """
+    data = await request.json()
+    content = data.get('content') if isinstance(data, dict) else None
+
+    if not isinstance(content, str):
+        return {
+            'success': False,
+            'error': 'No content provided'
+        }
+
+    if len(content) > ANALYZE_MAX_CHARS:
+        return {
+            'success': False,
+            'error': f'Content too long to analyze ({len(content)} characters, max {ANALYZE_MAX_CHARS})'
+        }
+
+    if not optimization.optirewrite_engine:
+        return {
+            'success': False,
+            'error': 'OptiRewrite engine not available'
+        }
+
+    key = analysis_cache.key(content)
+    body = analysis_cache.get(key)
+    status = 'hit'
+    if body is None:
+        # Long texts take a while to analyze; keep the event loop free for other keystrokes
+        body = await asyncio.to_thread(_analysis_body, content)
+        analysis_cache.put(key, body)
+        status = 'miss'
+
+    encoding, encoded = body.select(request.headers.get("accept-encoding"))
+    return Response(encoded, media_type="application/json",
+                    headers={'X-Analysis-Cache': status, **body.headers(encoding)})
+
+@router.websocket("/api/analyze/session")
+async def analyze_session(websocket: WebSocket):
+    """Incremental analysis of one document over an editing session
+
+    Client messages:
+      {"type": "open", "content": str}
+      {"type": "edit", "version": int, "ops": [[start, end, text], ...]}
+    Ops use the /api/optimize patch format against the current version.
+
+    Server messages:
+      {"type": "snapshot", "version", "analysis", "segments": [{"length", "sentences"}]}
+      {"type": "delta", "version", "analysis": changed keys only, "splices": [{"index", "remove", "insert"}]}
+      {"type": "error", "error", "version"}
+    Segments tile the document in order; sentence offsets are relative to
+    their segment. Apply splices in the order given. Only the segments an
+    edit touches are re-analyzed.
+    """
+    await websocket.accept()
+    if not optimization.optirewrite_engine:
+        await websocket.send_json({'type': 'error', 'error': 'OptiRewrite engine not available', 'version': None})
+        await websocket.close()
+        return
+
+    analyzer = optimization.optirewrite_engine.text_analyzer
+    document = None
+    analysis = {}
+
+    async def send_error(error):
+        await websocket.send_json({
+            'type': 'error',
+            'error': error,
+            'version': document.version if document else None
+        })
+
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await send_error('Messages must be JSON')
+                continue
+            kind = message.get('type') if isinstance(message, dict) else None
+
+            if kind == 'open':
+                content = message.get('content', '')
+                if not isinstance(content, str) or len(content) > ANALYZE_MAX_CHARS:
+                    await send_error(f'Content must be text of at most {ANALYZE_MAX_CHARS} characters')
+                    continue
+                # A whole document is scanned and scored here; keep the event loop free meanwhile
+                document, analysis = await asyncio.to_thread(_open_document, analyzer, content)
+                await websocket.send_json({
+                    'type': 'snapshot',
+                    'version': document.version,
+                    'analysis': analysis,
+                    'segments': [document.segment_payload(segment) for segment in document.segments],
+                })
+
+            elif kind == 'edit':
+                if document is None:
+                    await send_error('Send "open" before editing')
+                    continue
+                if message.get('version') != document.version:
+                    await send_error(f"Edit is for version {message.get('version')}, document is at {document.version}")
+                    continue
+                ops = message.get('ops')
+                try:
+                    growth = sum(len(text) - (end - start) for start, end, text in ops)
+                    if document.text_length + growth > ANALYZE_MAX_CHARS:
+                        raise ValueError(f'Document would exceed {ANALYZE_MAX_CHARS} characters')
+                    # Usually a few segments, but one edit may replace the whole document
+                    splices, updated = await asyncio.to_thread(_edit_document, document, ops)
+                except (TypeError, ValueError) as e:
+                    await send_error(f'Invalid edit: {e}')
+                    continue
+                changed = {key: value for key, value in updated.items() if analysis.get(key) != value}
+                analysis = updated
+                await websocket.send_json({
+                    'type': 'delta',
+                    'version': document.version,
+                    'analysis': changed,
+                    'splices': splices,
+                })
+
+            else:
+                await send_error(f'Unknown message type: {kind}')
+
+    except WebSocketDisconnect:
+        pass
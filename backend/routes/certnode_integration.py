@@ -4,25 +4,49 @@ Provides audit-grade intelligence with trust-locked certification
 """
 
 from fastapi import APIRouter, Request
-import sys
-import os
+from fastapi.responses import StreamingResponse
 import asyncio
 from datetime import datetime, timezone
 import hashlib
 import json
+import time
 
-# Add integration module to path
-sys.path.append('/home/ubuntu')
-from logivault_certnode_integration import LogiVaultCertNodeAPI
+from backend.config import CERT_STATUS_PUSH_TIMEOUT
+from backend.routes import optimization
+from backend.services.certification_pipeline import CertificationPipeline
+from backend.services.certification_store import PENDING, certification_store
+from backend.services.certifier import certification_level, get_certifier
+from backend.services.verification_cache import VerificationCache
+from backend.utils.auth import get_user_id
 
 router = APIRouter()
 
-# Global integration API
-certnode_api = LogiVaultCertNodeAPI()
+# Certification backend (local Merkle ledger unless CERTIFIER_BACKEND says otherwise)
+certifier = get_certifier()
+
+# Certification runs off the request path; responses carry a pending ICS id
+certification_pipeline = CertificationPipeline(certifier, certification_store)
+
+# Bloom filter + LRU in front of registry lookups
+verification_cache = VerificationCache(certification_store, certifier.verify, authoritative=certifier.ids_in_store)
+
+MAX_BATCH_VERIFY = 10000
+
+@router.on_event("startup")
+async def start_certification():
+    count = await asyncio.to_thread(verification_cache.rebuild)
+    print(f"✅ Verification cache loaded {count} ICS ids")
+    claimed = await certification_pipeline.start()
+    if claimed:
+        print(f"✅ Took over {claimed} pending certifications")
+
+@router.on_event("shutdown")
+async def stop_certification():
+    await certification_pipeline.stop()
 
 @router.post("/api/optimize-and-certify")
 async def optimize_and_certify_content(request: Request):
-    """Optimize content with LogiVault and certify with CertNode for audit-grade intelligence"""
+    """Optimize content with LogiVault and queue CertNode certification for audit-grade intelligence"""
     
     try:
         data = await request.json()
@@ -41,64 +65,92 @@ async def optimize_and_certify_content(request: Request):
                 'error': 'Empty content cannot be optimized and certified'
             }
         
+        if not optimization.optirewrite_engine:
+            return {
+                'success': False,
+                'error': 'OptiRewrite engine not available'
+            }
+        
         # Get optimization parameters
         mode = data.get('mode', 'engagement')
         intensity = data.get('intensity', 'moderate')
         
-        # Run LogiVault optimization with CertNode certification
-        result = await certnode_api.optimize_and_certify(content)
-        
-        if result['success']:
-            # Format response for LogiVault frontend
-            response = {
-                'success': True,
-                'optimization_id': result['certification']['ics_id'],
-                'original_content': result['original_content'],
-                'optimized_content': result['optimized_content'],
-                'optimization_summary': {
-                    'mode': mode,
-                    'intensity': intensity,
-                    'strategies_applied': result['optimization_metadata']['strategies_applied'],
-                    'confidence_score': result['optimization_metadata']['confidence_score'],
-                    'processing_time': 0.003  # From integration test
-                },
-                'metrics': {
-                    'original_length': result['optimization_metadata']['original_length'],
-                    'optimized_length': result['optimization_metadata']['optimized_length'],
-                    'length_change_percent': round(
-                        ((result['optimization_metadata']['optimized_length'] - 
-                          result['optimization_metadata']['original_length']) / 
-                         result['optimization_metadata']['original_length']) * 100, 1
-                    ),
-                    'word_count_original': len(result['original_content'].split()),
-                    'word_count_optimized': len(result['optimized_content'].split())
-                },
-                'certification': {
-                    'ics_id': result['ics_id'],
-                    'trust_locked': result['trust_locked'],
-                    'audit_grade': result['audit_grade'],
-                    'certification_level': result['certification']['certification']['certification_level'],
-                    'content_hash': result['certification']['certification']['content_hash'],
-                    'timestamp': result['certification']['certification']['timestamp'],
-                    'verifier_system': 'CertNode-LogiVault-v1.0'
-                },
-                'audit_trail': {
-                    'immutable_signature': result['ics_id'],
-                    'vault_registered': True,
-                    'ledger_recorded': True,
-                    'verification_url': f"https://certnode.io/verify.html?ics={result['ics_id']}"
-                },
-                'quality_tier': _get_quality_tier(result['optimization_metadata']['confidence_score']),
-                'estimated_value': _calculate_estimated_value(result),
-                'timestamp': datetime.now(timezone.utc).isoformat()
-            }
-            
-            return response
-        else:
-            return {
-                'success': False,
-                'error': result['error']
-            }
+        config = optimization.RewriteConfig(
+            mode=optimization.MODE_MAP.get(mode, optimization.RewriteMode.ENGAGEMENT),
+            intensity=optimization.INTENSITY_MAP.get(intensity, optimization.RewriteIntensity.MODERATE),
+            target_audience=data.get('target_audience', 'general'),
+            preserve_meaning=True,
+            fields=['confidence_score']
+        )
+        
+        # Run LogiVault optimization
+        user_id = get_user_id(request)
+        start_time = time.time()
+        result = await optimization.run_rewrite(user_id, content, config)
+        processing_time = time.time() - start_time
+        optimization.record_rewrite_usage(user_id, content, result)
+        
+        # Queue certification; the ICS id is returned now and certified in the background
+        optimized_content = result.rewritten_text
+        content_hash = hashlib.sha256(optimized_content.encode()).hexdigest()
+        score = result.confidence_score * 100
+        level = certification_level(score)
+        ics_id = await certification_pipeline.submit(content_hash, score, {
+            'certification_level': level,
+            'mode': mode,
+            'intensity': intensity,
+        })
+        verification_cache.add(ics_id)
+        
+        trust_locked = score >= 80
+        audit_grade = score >= 90
+        original_length = len(content)
+        optimized_length = len(optimized_content)
+        
+        return {
+            'success': True,
+            'optimization_id': ics_id,
+            'original_content': content,
+            'optimized_content': optimized_content,
+            'optimization_summary': {
+                'mode': mode,
+                'intensity': intensity,
+                'strategies_applied': [s.value for s in result.strategies_applied],
+                'confidence_score': result.confidence_score,
+                'processing_time': processing_time
+            },
+            'metrics': {
+                'original_length': original_length,
+                'optimized_length': optimized_length,
+                'length_change_percent': round(
+                    ((optimized_length - original_length) / original_length) * 100, 1
+                ),
+                'word_count_original': len(content.split()),
+                'word_count_optimized': len(optimized_content.split())
+            },
+            'certification': {
+                'ics_id': ics_id,
+                'status': PENDING,
+                'trust_locked': trust_locked,
+                'audit_grade': audit_grade,
+                'certification_level': level,
+                'content_hash': content_hash,
+                'timestamp': None,
+                'verifier_system': 'CertNode-LogiVault-v1.0'
+            },
+            'audit_trail': {
+                'immutable_signature': ics_id,
+                'vault_registered': False,
+                'ledger_recorded': False,
+                'status_url': f"/api/certifications/{ics_id}",
+                'verification_url': certifier.verification_url(ics_id)
+            },
+            'quality_tier': _get_quality_tier(result.confidence_score),
+            'estimated_value': _calculate_estimated_value(
+                original_length, result.confidence_score, trust_locked, audit_grade
+            ),
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
         
     except Exception as e:
         return {
@@ -106,33 +158,121 @@ async def optimize_and_certify_content(request: Request):
             'error': f'Optimization and certification failed: {str(e)}'
         }
 
+@router.get("/api/certifications/{ics_id}")
+async def get_certification(ics_id: str):
+    """Poll the status of a certification (pending, certified or failed)"""
+    
+    record = await asyncio.to_thread(certification_store.get, ics_id)
+    if not record:
+        return {
+            'success': False,
+            'error': 'Unknown ICS id'
+        }
+    
+    return {
+        'success': True,
+        'ics_id': ics_id,
+        'status': record['status'],
+        'certification': record
+    }
+
+@router.get("/api/certifications/{ics_id}/events")
+async def stream_certification_status(ics_id: str):
+    """Push the certification result as a server-sent event once it is final"""
+    
+    async def events():
+        deadline = time.monotonic() + CERT_STATUS_PUSH_TIMEOUT
+        record = await asyncio.to_thread(certification_store.get, ics_id)
+        while record and record['status'] == PENDING and time.monotonic() < deadline:
+            yield f"event: status\ndata: {json.dumps({'ics_id': ics_id, 'status': PENDING})}\n\n"
+            # Finished here -> woken immediately; finished by another worker -> seen on re-read
+            record = await certification_pipeline.wait_for(ics_id, timeout=1.0)
+            if record is None:
+                record = await asyncio.to_thread(certification_store.get, ics_id)
+        if not record:
+            payload = {'ics_id': ics_id, 'status': 'unknown'}
+        else:
+            payload = {'ics_id': ics_id, 'status': record['status'], 'certification': record}
+        yield f"event: status\ndata: {json.dumps(payload)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @router.get("/api/verify-certification/{ics_id}")
 async def verify_certification(ics_id: str):
     """Verify a CertNode certification by ICS ID"""
     
     try:
-        verification = certnode_api.certnode.verify_certification(ics_id)
+        verification = await asyncio.to_thread(verification_cache.verify, ics_id)
+        return _verification_response(verification)
+            
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Verification failed: {str(e)}'
+        }
+
+@router.post("/api/verify-certifications")
+async def verify_certifications_batch(request: Request):
+    """Verify many ICS IDs in one call (for auditors)"""
+    
+    try:
+        data = await request.json()
+        ics_ids = data.get('ics_ids') if data else None
         
-        if verification:
+        if not ics_ids or not isinstance(ics_ids, list):
             return {
-                'success': True,
-                'verified': True,
-                'certification': verification,
-                'trust_status': 'active',
-                'audit_grade': verification.get('certification_level') == 'audit_grade'
+                'success': False,
+                'error': 'No ics_ids provided'
             }
-        else:
+        
+        if len(ics_ids) > MAX_BATCH_VERIFY:
             return {
-                'success': True,
-                'verified': False,
-                'error': 'Certification not found in CertNode registry'
+                'success': False,
+                'error': f'At most {MAX_BATCH_VERIFY} ics_ids per request'
             }
-            
+        
+        # Cache hits and Bloom rejections are cheap; run the rest off the event loop
+        verifications = await asyncio.to_thread(
+            lambda: [verification_cache.verify(str(ics_id)) for ics_id in ics_ids]
+        )
+        
+        results = []
+        for ics_id, verification in zip(ics_ids, verifications):
+            entry = _verification_response(verification)
+            entry.pop('success')
+            entry['ics_id'] = ics_id
+            results.append(entry)
+        
+        verified_count = sum(1 for v in verifications if v)
+        return {
+            'success': True,
+            'total': len(results),
+            'verified_count': verified_count,
+            'unverified_count': len(results) - verified_count,
+            'results': results
+        }
+        
     except Exception as e:
         return {
             'success': False,
-            'error': f'Verification failed: {str(e)}'
+            'error': f'Batch verification failed: {str(e)}'
+        }
+
+def _verification_response(verification: dict) -> dict:
+    """Shape a registry verification record for the API"""
+    if verification:
+        return {
+            'success': True,
+            'verified': True,
+            'certification': verification,
+            'trust_status': 'active',
+            'audit_grade': verification.get('certification_level') == 'audit_grade'
         }
+    return {
+        'success': True,
+        'verified': False,
+        'error': 'Certification not found in CertNode registry'
+    }
 
 @router.get("/api/certification-status")
 async def get_certification_status():
@@ -172,12 +312,13 @@ def _get_quality_tier(confidence_score: float) -> str:
     else:
         return "UNVERIFIED"
 
-def _calculate_estimated_value(result: dict) -> float:
+def _calculate_estimated_value(original_length: int, confidence_score: float,
+                               trust_locked: bool, audit_grade: bool) -> float:
     """Calculate estimated value based on optimization and certification"""
-    base_value = max(2.0, len(result['original_content']) / 50)
-    confidence_multiplier = result['optimization_metadata']['confidence_score']
-    certification_bonus = 2.0 if result['trust_locked'] else 1.0
-    audit_grade_bonus = 3.0 if result['audit_grade'] else 1.0
+    base_value = max(2.0, original_length / 50)
+    confidence_multiplier = confidence_score
+    certification_bonus = 2.0 if trust_locked else 1.0
+    audit_grade_bonus = 3.0 if audit_grade else 1.0
     
     return round(base_value * confidence_multiplier * certification_bonus * audit_grade_bonus, 2)
 
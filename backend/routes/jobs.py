@@ -0,0 +1,100 @@
+"""
+Asynchronous rewrite jobs for documents too large (or too many) for /api/optimize.
+
+``POST /api/jobs`` takes one /api/optimize request body, or ``documents``: a
+list of them. It queues them durably and answers 202 with a job id at once.
+Worker processes run the job. ``GET /api/jobs/{id}`` reports status and
+progress, and once the job is done it returns one /api/optimize response
+per document, kept for JOB_RETENTION seconds. An optional ``webhook_url``
+receives the same body when the job finishes; it must resolve to a public
+address (see utils/webhooks.py). A job is refused with 429 up front when its
+documents need more requests or input words than the caller's plan has
+left this month.
+"""
+
+import asyncio
+import subprocess
+import sys
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from backend.config import JOB_MAX_DOCUMENTS, JOB_WORKERS
+from backend.services.job_store import job_store
+from backend.services.job_worker import public_job
+from backend.utils.auth import get_user_id
+from backend.utils.quota import load_quota, quota_short_response
+from backend.utils.webhooks import check_webhook_url
+
+router = APIRouter()
+
+# Worker processes started by this API process
+_workers = []
+
+@router.on_event("startup")
+async def start_job_workers():
+    for _ in range(JOB_WORKERS):
+        _workers.append(subprocess.Popen([sys.executable, "-m", "backend.services.job_worker"]))
+
+@router.on_event("shutdown")
+async def stop_job_workers():
+    # SIGTERM lets each worker finish the job it holds; anything unfinished is re-run after its lease expires
+    for worker in _workers:
+        worker.terminate()
+    for worker in _workers:
+        await asyncio.to_thread(worker.wait)
+    _workers.clear()
+
+def _parse_job(data):
+    """(documents, webhook_url) from a job request; raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    documents = data.get('documents')
+    if documents is None:
+        documents = [{name: value for name, value in data.items() if name != 'webhook_url'}]
+    if not isinstance(documents, list) or not documents:
+        raise ValueError("documents must be a non-empty list")
+    if len(documents) > JOB_MAX_DOCUMENTS:
+        raise ValueError(f"At most {JOB_MAX_DOCUMENTS} documents per job")
+    for index, document in enumerate(documents):
+        if not isinstance(document, dict) or not isinstance(document.get('content'), str):
+            raise ValueError(f"documents[{index}] needs a content string")
+    webhook_url = data.get('webhook_url')
+    if webhook_url is not None and not isinstance(webhook_url, str):
+        raise ValueError("webhook_url must be an http(s) URL")
+    return documents, webhook_url
+
+@router.post("/api/jobs", status_code=202)
+async def create_job(request: Request):
+    """Queue a rewrite (or a batch of them) and return its job id"""
+    try:
+        documents, webhook_url = _parse_job(await request.json())
+        if webhook_url is not None:
+            await asyncio.to_thread(check_webhook_url, webhook_url)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={'success': False, 'error': str(e)})
+
+    user_id = get_user_id(request)
+    short = quota_short_response(user_id, await load_quota(user_id), {
+        'requests': len(documents),
+        'input_words': sum(len(document['content'].split()) for document in documents),
+    })
+    if short:
+        return short
+
+    job_id = await asyncio.to_thread(job_store.enqueue, user_id, documents, webhook_url)
+    return {
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'documents': len(documents),
+        'status_url': f"/api/jobs/{job_id}"
+    }
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Status, progress and (when finished) results of one of the caller's jobs"""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None or job['user_id'] != get_user_id(request):
+        return JSONResponse(status_code=404, content={'success': False, 'error': 'Job not found'})
+    return dict(public_job(job), success=True)
@@ -1,9 +1,30 @@
 import sys
 import os
 import asyncio
+import json
 import time
 from datetime import datetime
 from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from starlette.requests import ClientDisconnect
+
+from backend.claude_api import ClaudeError
+from backend.config import (
+    CATALOG_CACHE_CONTROL, OPTIMIZE_STREAM_IN_FLIGHT, OPTIMIZE_STREAM_MAX_LINE, REWRITE_SEARCH_BUDGET,
+)
+from backend.models import ClaudeOptimizeResponse, OptimizeResponse
+from backend.services.plan_store import get_user_plan
+from backend.services.rewrite_scheduler import RewriteScheduler
+from backend.services.usage_meter import usage_meter, llm_tokens_used, estimate_tokens
+from backend.utils.auth import get_user_id
+from backend.utils.claude import call_claude
+from backend.utils.duplex import DuplexStreamingResponse
+from backend.utils.formatter import format_editorial
+from backend.utils.metrics import compute_metrics
+from backend.utils.ndjson import ndjson_lines
+from backend.utils.patch import build_patch
+from backend.utils.quota import load_quota, quota_exceeded_error, quota_exceeded_response, quota_headers
+from backend.utils.responses import PrecomputedJSON
 
 router = APIRouter()
 
@@ -11,23 +32,29 @@ router = APIRouter()
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from OptiRewrite_optimized import OptiRewriteEngine, RewriteConfig, RewriteMode, RewriteIntensity
+    from OptiRewrite_optimized import (
+        OptiRewriteEngine, RewriteConfig, RewriteMode, RewriteIntensity, RewriteStrategy, QualityMetric,
+        rewrite_in_worker
+    )
     OPTIREWRITE_AVAILABLE = True
     print("✅ OptiRewrite engine loaded successfully")
 except ImportError as e:
     OPTIREWRITE_AVAILABLE = False
     print(f"❌ OptiRewrite not available: {e}")
 
-# Global OptiRewrite engine
+# Global OptiRewrite engine (analysis and LLM rewrites; rule-based rewrites run in the scheduler's workers)
 optirewrite_engine = None
 
+# Plan-weighted fair queue and worker processes in front of the engine
+rewrite_scheduler = RewriteScheduler()
+
 def init_optirewrite():
     """Initialize OptiRewrite engine"""
     global optirewrite_engine
     
     if OPTIREWRITE_AVAILABLE:
         try:
-            optirewrite_engine = OptiRewriteEngine()
+            optirewrite_engine = OptiRewriteEngine(shard_workers=0)
             print("✅ OptiRewrite engine initialized")
             return True
         except Exception as e:
@@ -35,38 +62,167 @@ def init_optirewrite():
             return False
     return False
 
+def close_optirewrite():
+    """Stop the rewrite worker processes"""
+    rewrite_scheduler.close()
+    if optirewrite_engine:
+        optirewrite_engine.close()
+
+def record_rewrite_usage(user_id: str, content: str, result) -> None:
+    """Meter a rewrite; complete rewrites go through the LLM when one is configured"""
+    llm_tokens = 0
+    if result.config.intensity == RewriteIntensity.COMPLETE and optirewrite_engine.ai_rewriter.client:
+        llm_tokens = estimate_tokens(content) + estimate_tokens(result.rewritten_text)
+    usage_meter.record(
+        user_id,
+        input_words=len(content.split()),
+        output_words=len(result.rewritten_text.split()),
+        llm_tokens=llm_tokens,
+    )
+
+async def run_rewrite(user_id: str, content: str, config: 'RewriteConfig'):
+    """Rewrite ``content`` for ``user_id``, queued fairly against other users by plan weight"""
+    plan = get_user_plan(user_id)
+    if config.intensity == RewriteIntensity.COMPLETE and optirewrite_engine.ai_rewriter.client:
+        # LLM rewrites mostly wait on the provider: keep them on the loop, on the shared router
+        return await rewrite_scheduler.submit(user_id, plan, len(content), optirewrite_engine.rewrite, content, config)
+    return await rewrite_scheduler.submit(user_id, plan, len(content), rewrite_in_worker, content, config)
+
 # Initialize OptiRewrite on module load
 init_optirewrite()
 
-@router.post("/api/claudeOptimize")
+if OPTIREWRITE_AVAILABLE:
+    # Map request string values to engine enums
+    MODE_MAP = {
+        'balanced': RewriteMode.BALANCED,
+        'clarity': RewriteMode.CLARITY,
+        'engagement': RewriteMode.ENGAGEMENT,
+        'conciseness': RewriteMode.CONCISENESS,
+        'formality': RewriteMode.FORMALITY,
+        'creativity': RewriteMode.CREATIVITY,
+        'technical': RewriteMode.TECHNICAL,
+        'persuasive': RewriteMode.PERSUASIVE,
+        'academic': RewriteMode.ACADEMIC,
+        'conversational': RewriteMode.CONVERSATIONAL
+    }
+
+    INTENSITY_MAP = {
+        'light': RewriteIntensity.LIGHT,
+        'moderate': RewriteIntensity.MODERATE,
+        'heavy': RewriteIntensity.HEAVY,
+        'complete': RewriteIntensity.COMPLETE
+    }
+
+    # Enum -> wire name, built once instead of reading .value per response
+    STRATEGY_NAMES = {strategy: strategy.value for strategy in RewriteStrategy}
+    QUALITY_METRIC_NAMES = {metric: metric.value for metric in QualityMetric}
+
+# Response shapes for /api/optimize: full texts, or a patch against the submitted content
+RESPONSE_FORMATS = ('full', 'patch')
+
+# Optional sections of an /api/optimize response, selectable with "fields"
+OPTIONAL_SECTIONS = ('optimization_summary', 'metrics', 'quality_scores', 'recommendations')
+PATCH_DEFAULT_SECTIONS = ('optimization_summary', 'metrics')
+
+# Engine result components (RewriteConfig.fields) each optional section is built from
+SECTION_RESULT_FIELDS = {
+    'optimization_summary': ('confidence_score',),
+    'metrics': ('confidence_score',),
+    'quality_scores': ('quality_scores',),
+    'recommendations': ('recommendations',),
+}
+
+def _parse_fields(fields, default):
+    """Requested optional sections as a tuple; accepts a list or a comma-separated string"""
+    if fields is None:
+        return default
+    if isinstance(fields, str):
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in OPTIONAL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(map(str, unknown))} (available: {', '.join(OPTIONAL_SECTIONS)})")
+    return tuple(name for name in OPTIONAL_SECTIONS if name in fields)
+
+def _parse_targets(data):
+    """RewriteConfig target fields from a request; the search budget is capped by REWRITE_SEARCH_BUDGET"""
+    targets = {}
+    for name, low, high in (('target_readability', 0.0, 1.0), ('target_length_ratio', 0.0, None)):
+        value = data.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < low or (high is not None and value > high):
+            bounds = f"between {low:g} and {high:g}" if high is not None else f"a number of at least {low:g}"
+            raise ValueError(f"{name} must be {bounds}")
+        targets[name] = float(value)
+    budget = data.get('search_budget')
+    if budget is not None and (isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget < 0):
+        raise ValueError("search_budget must be a non-negative number of seconds")
+    if targets:
+        targets['search_budget'] = REWRITE_SEARCH_BUDGET if budget is None else min(float(budget), REWRITE_SEARCH_BUDGET)
+    return targets
+
+@router.post("/api/claudeOptimize", response_model=ClaudeOptimizeResponse)
 async def optimize_content(request: Request):
     """Legacy Claude optimization endpoint"""
     prompt = (await request.json()).get("prompt")
 
-    raw_output = await call_claude(prompt)
+    usage = {}
+    raw_output = await call_claude(prompt, usage=usage)
+    if isinstance(raw_output, ClaudeError):
+        return JSONResponse(status_code=502, content={'error': raw_output})
     optimized_text = format_editorial(raw_output)
     metrics = compute_metrics(prompt, optimized_text)
 
+    usage_meter.record(
+        get_user_id(request),
+        input_words=len(prompt.split()),
+        output_words=len(optimized_text.split()),
+        llm_tokens=llm_tokens_used(usage, prompt, raw_output),
+    )
+
     return {
         "optimizedText": optimized_text,
         "metrics": metrics,
         "timestamp": datetime.utcnow().isoformat()
     }
 
-@router.post("/api/optimize")
+@router.post("/api/optimize", response_model=OptimizeResponse, response_model_exclude_none=True)
 async def optimize_with_optirewrite(request: Request):
-    """New OptiRewrite optimization endpoint"""
+    """New OptiRewrite optimization endpoint
     
+    ``response_format: "patch"`` returns edit ops against the submitted content
+    instead of both texts; ``fields`` picks the optional sections to include.
+    The engine skips the scoring work behind sections left out, so
+    ``fields: []`` is the cheapest text-only request. ``target_readability``
+    (0-1) and ``target_length_ratio`` (rewritten / original words) make a
+    rule-based rewrite search for a result that meets them, for at most
+    ``search_budget`` seconds.
+    """
     try:
         data = await request.json()
-        
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Optimization failed: {str(e)}'
+        }
+    return await optimize_document(data, get_user_id(request))
+
+async def optimize_document(data, user_id: str, meter: bool = True):
+    """The /api/optimize response for one request body; also run by job workers
+
+    ``meter=False`` runs it without recording usage, for a job document an
+    earlier attempt already metered.
+    """
+    
+    try:
         if not data or 'content' not in data:
             return {
                 'success': False,
                 'error': 'No content provided'
             }
         
-        content = data['content'].strip()
+        submitted = data['content']
+        content = submitted.strip()
         
         if not content:
             return {
@@ -74,6 +230,23 @@ async def optimize_with_optirewrite(request: Request):
                 'error': 'Empty content provided'
             }
         
+        response_format = data.get('response_format', 'full')
+        if response_format not in RESPONSE_FORMATS:
+            return {
+                'success': False,
+                'error': f"Unknown response_format: {response_format} (available: {', '.join(RESPONSE_FORMATS)})"
+            }
+        
+        try:
+            default_fields = PATCH_DEFAULT_SECTIONS if response_format == 'patch' else OPTIONAL_SECTIONS
+            fields = _parse_fields(data.get('fields'), default_fields)
+            targets = _parse_targets(data)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
         if not optirewrite_engine:
             return {
                 'success': False,
@@ -85,89 +258,115 @@ async def optimize_with_optirewrite(request: Request):
         intensity = data.get('intensity', 'moderate')
         target_audience = data.get('target_audience', 'general')
         
-        # Map string values to enums
-        mode_map = {
-            'balanced': RewriteMode.BALANCED,
-            'clarity': RewriteMode.CLARITY,
-            'engagement': RewriteMode.ENGAGEMENT,
-            'conciseness': RewriteMode.CONCISENESS,
-            'formality': RewriteMode.FORMALITY,
-            'creativity': RewriteMode.CREATIVITY,
-            'technical': RewriteMode.TECHNICAL,
-            'persuasive': RewriteMode.PERSUASIVE,
-            'academic': RewriteMode.ACADEMIC,
-            'conversational': RewriteMode.CONVERSATIONAL
-        }
-        
-        intensity_map = {
-            'light': RewriteIntensity.LIGHT,
-            'moderate': RewriteIntensity.MODERATE,
-            'heavy': RewriteIntensity.HEAVY,
-            'complete': RewriteIntensity.COMPLETE
-        }
+        rewrite_mode = MODE_MAP.get(mode, RewriteMode.ENGAGEMENT)
+        rewrite_intensity = INTENSITY_MAP.get(intensity, RewriteIntensity.MODERATE)
         
-        rewrite_mode = mode_map.get(mode, RewriteMode.ENGAGEMENT)
-        rewrite_intensity = intensity_map.get(intensity, RewriteIntensity.MODERATE)
+        # Only compute the result components the requested sections use
+        result_fields = {name for section in fields for name in SECTION_RESULT_FIELDS[section]}
+        if response_format == 'patch' and submitted == content:
+            result_fields.add('change_summary')
         
         # Create configuration
         config = RewriteConfig(
             mode=rewrite_mode,
             intensity=rewrite_intensity,
             target_audience=target_audience,
-            preserve_meaning=True
+            preserve_meaning=True,
+            fields=sorted(result_fields),
+            **targets
         )
         
         # Run optimization
         start_time = time.time()
-        result = await optirewrite_engine.rewrite(content, config)
+        result = await run_rewrite(user_id, content, config)
         processing_time = time.time() - start_time
         
+        if meter:
+            record_rewrite_usage(user_id, content, result)
+        
         # Calculate improvement metrics
         original_length = len(content)
         optimized_length = len(result.rewritten_text)
         length_change = ((optimized_length - original_length) / original_length) * 100
         
-        # Calculate estimated value based on improvement
-        base_value = max(1.0, len(content) / 100)  # Base value from content length
-        confidence_multiplier = result.confidence_score
-        strategy_bonus = len(result.strategies_applied) * 0.5
-        estimated_value = base_value * confidence_multiplier * (1 + strategy_bonus)
+        # Value and tier need the confidence score, which is only computed for the sections that show them
+        if result.confidence_score is not None:
+            # Calculate estimated value based on improvement
+            base_value = max(1.0, len(content) / 100)  # Base value from content length
+            confidence_multiplier = result.confidence_score
+            strategy_bonus = len(result.strategies_applied) * 0.5
+            estimated_value = base_value * confidence_multiplier * (1 + strategy_bonus)
+            
+            # Quality tier based on confidence
+            if result.confidence_score >= 0.8:
+                quality_tier = "MASTERY"
+            elif result.confidence_score >= 0.6:
+                quality_tier = "PROFESSIONAL"
+            elif result.confidence_score >= 0.4:
+                quality_tier = "COMPETENT"
+            else:
+                quality_tier = "REMEDIAL"
+        
+        response = {
+            'success': True,
+            'optimization_id': result.rewrite_id
+        }
         
-        # Quality tier based on confidence
-        if result.confidence_score >= 0.8:
-            quality_tier = "MASTERY"
-        elif result.confidence_score >= 0.6:
-            quality_tier = "PROFESSIONAL"
-        elif result.confidence_score >= 0.4:
-            quality_tier = "COMPETENT"
+        if response_format == 'patch':
+            # Offsets are into the content as submitted; reuse the engine's diff when nothing was trimmed
+            spans = result.change_summary.get('change_spans') if submitted == content else None
+            response['response_format'] = 'patch'
+            response['patch'] = build_patch(submitted, result.rewritten_text, spans)
         else:
-            quality_tier = "REMEDIAL"
+            response['original_content'] = content
+            response['optimized_content'] = result.rewritten_text
         
-        return {
-            'success': True,
-            'optimization_id': result.rewrite_id,
-            'original_content': content,
-            'optimized_content': result.rewritten_text,
-            'optimization_summary': {
+        if 'optimization_summary' in fields:
+            response['optimization_summary'] = {
                 'mode': mode,
                 'intensity': intensity,
-                'strategies_applied': [s.value for s in result.strategies_applied],
+                'strategies_applied': [STRATEGY_NAMES[s] for s in result.strategies_applied],
                 'confidence_score': result.confidence_score,
                 'quality_tier': quality_tier,
                 'processing_time': processing_time
-            },
-            'metrics': {
+            }
+        if 'metrics' in fields:
+            response['metrics'] = {
                 'original_length': original_length,
                 'optimized_length': optimized_length,
                 'length_change_percent': round(length_change, 1),
                 'word_count_original': len(content.split()),
                 'word_count_optimized': len(result.rewritten_text.split()),
-                'estimated_value': round(estimated_value, 2)
-            },
-            'quality_scores': result.quality_scores if hasattr(result, 'quality_scores') else {},
-            'recommendations': result.recommendations if hasattr(result, 'recommendations') else [],
-            'timestamp': datetime.utcnow().isoformat()
-        }
+                'estimated_value': round(estimated_value, 2),
+                'strategy_costs': {
+                    STRATEGY_NAMES[strategy]: {
+                        'runs': cost.runs,
+                        'skips': cost.skips,
+                        'seconds': round(cost.seconds, 6),
+                        'characters_changed': cost.characters_changed
+                    }
+                    for strategy, cost in result.strategy_costs.items()
+                }
+            }
+            if result.target_search is not None:
+                search = result.target_search
+                response['metrics']['target_search'] = {
+                    'intensity': search.intensity.value,
+                    'readability': round(search.readability, 4),
+                    'length_ratio': round(search.length_ratio, 4),
+                    'targets_met': search.targets_met,
+                    'candidates': search.candidates,
+                    'seconds': round(search.seconds, 6)
+                }
+        if 'quality_scores' in fields:
+            response['quality_scores'] = {
+                QUALITY_METRIC_NAMES[metric]: score for metric, score in result.quality_scores.items()
+            }
+        if 'recommendations' in fields:
+            response['recommendations'] = result.recommendations
+        
+        response['timestamp'] = datetime.utcnow().isoformat()
+        return response
         
     except Exception as e:
         print(f"❌ Optimization error: {e}")
@@ -179,138 +378,222 @@ async def optimize_with_optirewrite(request: Request):
             'error': f'Optimization failed: {str(e)}'
         }
 
-@router.get("/api/sample/{sample_type}")
-async def get_sample_content(sample_type: str):
-    """Get sample content for testing"""
+@router.post("/api/optimize/stream")
+async def optimize_stream(request: Request):
+    """/api/optimize for a stream of documents
+    
+    The request body is NDJSON with one /api/optimize request body per line.
+    The response is NDJSON with one /api/optimize response per document,
+    sent as soon as that document is done. Responses therefore arrive out of
+    input order, each tagged with ``index``, the document's position among
+    the non-blank input lines. A final ``{"done": true, "documents": n}``
+    closes the stream. The server reads at most OPTIMIZE_STREAM_IN_FLIGHT
+    documents ahead of the responses the client has taken, so memory stays
+    flat however many rows are piped through.
     
-    samples = {
-        'blog_post': {
-            'title': 'Blog Post Sample',
-            'content': """
+    Quota is checked before each document. Once the plan's quota is spent,
+    that document gets the quota error instead of a result, no further lines
+    are read, and the final line is ``{"done": true, "documents": n,
+    "quota_exceeded": true}`` with n the documents answered.
+    """
+    user_id = get_user_id(request)
+    plan = await load_quota(user_id)
+    exceeded = quota_exceeded_response(user_id, plan)
+    if exceeded:
+        return exceeded
+    return DuplexStreamingResponse(
+        _optimize_stream(request, user_id, plan),
+        media_type="application/x-ndjson",
+        headers=quota_headers(user_id, plan),
+    )
+
+async def _optimize_stream(request: Request, user_id: str, plan: str):
+    """Result lines for the documents in the request body, in completion order"""
+    slots = asyncio.Semaphore(OPTIMIZE_STREAM_IN_FLIGHT)
+    results = asyncio.Queue()
+    tasks = set()
+    quota_spent = asyncio.Event()
+    
+    async def optimize_line(index, line):
+        quota_error = quota_exceeded_error(user_id, plan)
+        if quota_error:
+            quota_spent.set()
+            result = {'success': False, 'error': quota_error}
+        elif line is None:
+            result = {'success': False, 'error': f'Line longer than {OPTIMIZE_STREAM_MAX_LINE} bytes'}
+        else:
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                result = {'success': False, 'error': f'Invalid JSON: {e}'}
+            else:
+                result = await optimize_document(data, user_id)
+        results.put_nowait(json.dumps({'index': index, **result}) + "\n")
+    
+    async def feed():
+        count = 0
+        try:
+            async for line in ndjson_lines(request.stream(), OPTIMIZE_STREAM_MAX_LINE):
+                # Stop reading (and so let the client's sends back up) while the in-flight window is full
+                await slots.acquire()
+                if quota_spent.is_set():
+                    break
+                task = asyncio.create_task(optimize_line(count, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                count += 1
+            if tasks:
+                await asyncio.wait(set(tasks))
+            done = {'done': True, 'documents': count}
+            if quota_spent.is_set():
+                done['quota_exceeded'] = True
+            results.put_nowait(json.dumps(done) + "\n")
+        except ClientDisconnect:
+            pass
+        finally:
+            results.put_nowait(None)
+    
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            line = await results.get()
+            if line is None:
+                break
+            yield line
+            # The client has taken this result: one more document may be read
+            slots.release()
+    finally:
+        feeder.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+SAMPLES = {
+    'blog_post': {
+        'title': 'Blog Post Sample',
+        'content': """
             Artificial intelligence is changing the world. AI has many applications in different industries. 
             Companies are using AI to improve their processes. This technology offers benefits but also presents challenges.
             Organizations need to consider the implications of AI implementation. The future of AI looks promising.
             """.strip()
-        },
-        'business_report': {
-            'title': 'Business Report Sample',
-            'content': """
+    },
+    'business_report': {
+        'title': 'Business Report Sample',
+        'content': """
             Our quarterly analysis shows significant growth in key metrics. Revenue increased by 15% compared to last quarter.
             Customer satisfaction scores improved across all departments. The marketing team exceeded their targets.
             We recommend continuing current strategies while exploring new opportunities for expansion.
             """.strip()
-        },
-        'educational_content': {
-            'title': 'Educational Content Sample',
-            'content': """
+    },
+    'educational_content': {
+        'title': 'Educational Content Sample',
+        'content': """
             Climate change is a global issue that affects everyone. Rising temperatures cause various environmental problems.
             Scientists study weather patterns to understand these changes. Governments and organizations work together to find solutions.
             Individual actions can also make a difference in addressing climate change.
             """.strip()
-        },
-        'technical_document': {
-            'title': 'Technical Document Sample',
-            'content': """
+    },
+    'technical_document': {
+        'title': 'Technical Document Sample',
+        'content': """
             The system architecture consists of multiple components working together. The database stores user information securely.
             API endpoints handle requests from the frontend application. Load balancing ensures optimal performance under high traffic.
             Regular monitoring and maintenance keep the system running smoothly.
             """.strip()
-        }
     }
-    
-    if sample_type not in samples:
-        return {
-            'success': False,
-            'error': 'Invalid sample type'
-        }
-    
-    return {
-        'success': True,
-        'sample': samples[sample_type]
+}
+
+MODES = {
+    'balanced': {
+        'name': 'Balanced',
+        'description': 'Balance all optimization factors',
+        'best_for': 'General content improvement'
+    },
+    'clarity': {
+        'name': 'Clarity',
+        'description': 'Focus on clarity and readability',
+        'best_for': 'Complex or technical content'
+    },
+    'engagement': {
+        'name': 'Engagement',
+        'description': 'Enhance reader engagement',
+        'best_for': 'Marketing and blog content'
+    },
+    'conciseness': {
+        'name': 'Conciseness',
+        'description': 'Make content more concise',
+        'best_for': 'Executive summaries and reports'
+    },
+    'formality': {
+        'name': 'Formality',
+        'description': 'Adjust formality level',
+        'best_for': 'Business and academic writing'
+    },
+    'creativity': {
+        'name': 'Creativity',
+        'description': 'Enhance creative expression',
+        'best_for': 'Creative writing and storytelling'
+    },
+    'technical': {
+        'name': 'Technical',
+        'description': 'Optimize for technical accuracy',
+        'best_for': 'Technical documentation'
+    },
+    'persuasive': {
+        'name': 'Persuasive',
+        'description': 'Enhance persuasive power',
+        'best_for': 'Sales and marketing content'
+    },
+    'academic': {
+        'name': 'Academic',
+        'description': 'Academic writing style',
+        'best_for': 'Research papers and essays'
+    },
+    'conversational': {
+        'name': 'Conversational',
+        'description': 'Casual, conversational tone',
+        'best_for': 'Social media and informal content'
+    }
+}
+
+INTENSITIES = {
+    'light': {
+        'name': 'Light',
+        'description': 'Minimal changes, preserve original style',
+        'change_level': '10-20%'
+    },
+    'moderate': {
+        'name': 'Moderate',
+        'description': 'Balanced optimization',
+        'change_level': '20-40%'
+    },
+    'heavy': {
+        'name': 'Heavy',
+        'description': 'Significant improvements',
+        'change_level': '40-60%'
+    },
+    'complete': {
+        'name': 'Complete',
+        'description': 'Complete rewrite while preserving meaning',
+        'change_level': '60-80%'
     }
+}
+
+# Constant catalog responses, encoded once
+SAMPLE_RESPONSES = {
+    sample_type: PrecomputedJSON({'success': True, 'sample': sample}, CATALOG_CACHE_CONTROL)
+    for sample_type, sample in SAMPLES.items()
+}
+# Only real catalog entries get the long public lifetime; a misspelt name is a 404 nobody keeps
+INVALID_SAMPLE_RESPONSE = PrecomputedJSON({'success': False, 'error': 'Invalid sample type'}, "no-store",
+                                          status_code=404)
+MODES_RESPONSE = PrecomputedJSON({'success': True, 'modes': MODES, 'intensities': INTENSITIES}, CATALOG_CACHE_CONTROL)
+
+@router.get("/api/sample/{sample_type}")
+async def get_sample_content(sample_type: str, request: Request):
+    """Get sample content for testing"""
+    return SAMPLE_RESPONSES.get(sample_type, INVALID_SAMPLE_RESPONSE).response(request)
 
 @router.get("/api/modes")
-async def get_optimization_modes():
+async def get_optimization_modes(request: Request):
     """Get available optimization modes"""
-    
-    modes = {
-        'balanced': {
-            'name': 'Balanced',
-            'description': 'Balance all optimization factors',
-            'best_for': 'General content improvement'
-        },
-        'clarity': {
-            'name': 'Clarity',
-            'description': 'Focus on clarity and readability',
-            'best_for': 'Complex or technical content'
-        },
-        'engagement': {
-            'name': 'Engagement',
-            'description': 'Enhance reader engagement',
-            'best_for': 'Marketing and blog content'
-        },
-        'conciseness': {
-            'name': 'Conciseness',
-            'description': 'Make content more concise',
-            'best_for': 'Executive summaries and reports'
-        },
-        'formality': {
-            'name': 'Formality',
-            'description': 'Adjust formality level',
-            'best_for': 'Business and academic writing'
-        },
-        'creativity': {
-            'name': 'Creativity',
-            'description': 'Enhance creative expression',
-            'best_for': 'Creative writing and storytelling'
-        },
-        'technical': {
-            'name': 'Technical',
-            'description': 'Optimize for technical accuracy',
-            'best_for': 'Technical documentation'
-        },
-        'persuasive': {
-            'name': 'Persuasive',
-            'description': 'Enhance persuasive power',
-            'best_for': 'Sales and marketing content'
-        },
-        'academic': {
-            'name': 'Academic',
-            'description': 'Academic writing style',
-            'best_for': 'Research papers and essays'
-        },
-        'conversational': {
-            'name': 'Conversational',
-            'description': 'Casual, conversational tone',
-            'best_for': 'Social media and informal content'
-        }
-    }
-    
-    intensities = {
-        'light': {
-            'name': 'Light',
-            'description': 'Minimal changes, preserve original style',
-            'change_level': '10-20%'
-        },
-        'moderate': {
-            'name': 'Moderate',
-            'description': 'Balanced optimization',
-            'change_level': '20-40%'
-        },
-        'heavy': {
-            'name': 'Heavy',
-            'description': 'Significant improvements',
-            'change_level': '40-60%'
-        },
-        'complete': {
-            'name': 'Complete',
-            'description': 'Complete rewrite while preserving meaning',
-            'change_level': '60-80%'
-        }
-    }
-    
-    return {
-        'success': True,
-        'modes': modes,
-        'intensities': intensities
-    }
\ No newline at end of file
+    return MODES_RESPONSE.response(request)
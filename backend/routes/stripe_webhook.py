@@ -1,13 +1,25 @@
 from fastapi import APIRouter, Request, Header
-import stripe
+import asyncio
+import logging
 import os
+import socket
+import stripe
+
+from backend.config import PLAN_SYNC_INTERVAL
+from backend.services.plan_store import PROCESSED, STALE, plan_store
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 endpoint_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
 
-# Store user plan data — swap with real DB later
-user_plans = {}
+# Identifies this process's claims on pending events
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Set by the webhook so a new event is applied without waiting for the next tick
+_plan_events = None
+_background_tasks = []
 
 @router.post("/api/stripe/webhook")
 async def stripe_webhook(request: Request, stripe_signature: str = Header(None)):
@@ -21,9 +33,62 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None))
 
     if event["type"] == "customer.subscription.updated":
         sub = event["data"]["object"]
-        user_id = sub["metadata"].get("userId", "anon")
-        plan = sub["items"]["data"][0]["price"]["nickname"]  # "Free", "Pro", etc.
-        user_plans[user_id] = plan
-        print(f"✅ Stripe plan updated for {user_id}: {plan}")
-    
-    return { "status": "ok" }
\ No newline at end of file
+        update = {
+            "user_id": sub["metadata"].get("userId", "anon"),
+            "plan": sub["items"]["data"][0]["price"]["nickname"],  # "Free", "Pro", etc.
+        }
+        # Record before acknowledging so a crash can't lose it; redeliveries are dropped
+        is_new = await asyncio.to_thread(
+            plan_store.record_event, event["id"], event["type"], update, event.get("created")
+        )
+        if not is_new:
+            return { "status": "duplicate" }
+        if _plan_events is not None:
+            _plan_events.set()
+
+    return { "status": "ok" }
+
+def apply_plan_updates(store=plan_store, worker: str = WORKER_ID) -> int:
+    """Claim pending plan updates and apply them; failures are released for the next pass"""
+    applied = 0
+    for event_id, update, created in store.claim_events(worker):
+        try:
+            status = store.apply_event(event_id, update["user_id"], update["plan"], created, worker)
+        except Exception as e:
+            logger.exception(f"Failed to apply plan update {event_id}; retrying on the next tick")
+            store.release_event(event_id, worker, str(e))
+            continue
+        if status == PROCESSED:
+            applied += 1
+            logger.info(f"Stripe plan updated for {update['user_id']}: {update['plan']}")
+        elif status == STALE:
+            logger.info(f"Skipped plan update {event_id}: {update['user_id']}'s plan was set by a newer event")
+    return applied
+
+async def _plan_worker():
+    """Apply pending plan updates (new ones, retries, and ones a dead worker held), then sync the cache"""
+    while True:
+        try:
+            await asyncio.wait_for(_plan_events.wait(), PLAN_SYNC_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _plan_events.clear()
+        try:
+            await asyncio.to_thread(apply_plan_updates)
+            await asyncio.to_thread(plan_store.sync)
+        except Exception:
+            logger.exception("Plan update pass failed")
+
+@router.on_event("startup")
+async def start_plan_workers():
+    global _plan_events
+    _plan_events = asyncio.Event()
+    _plan_events.set()
+    await asyncio.to_thread(plan_store.sync)
+    _background_tasks.append(asyncio.create_task(_plan_worker()))
+
+@router.on_event("shutdown")
+async def stop_plan_workers():
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
@@ -0,0 +1,60 @@
+"""
+LRU cache of encoded /api/analyze responses.
+
+The editor sends the whole text on every debounced keystroke, so the same
+text comes back often: undo, pauses, re-focusing, several open tabs. Entries
+are keyed by a blake2b digest of the text and hold the encoded JSON body
+with its compressed copies, so a hit costs one hash and one dict lookup. The
+cache is bounded by entry count and by total bytes, compressed copies
+included, whichever is reached first.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import ANALYZE_CACHE_BYTES, ANALYZE_CACHE_SIZE
+from backend.utils.compression import EncodedBody
+
+
+class AnalysisCache:
+    """Text digest -> encoded (and compressed) analysis response, least recently used evicted first"""
+
+    def __init__(self, max_entries: int = ANALYZE_CACHE_SIZE, max_bytes: int = ANALYZE_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._bodies: "OrderedDict[bytes, EncodedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[EncodedBody]:
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is None:
+                self.stats['misses'] += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.stats['hits'] += 1
+            return body
+
+    def put(self, key: bytes, body: EncodedBody) -> None:
+        if body.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._bodies.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous.size
+            self._bodies[key] = body
+            self.size_bytes += body.size
+            while len(self._bodies) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self.size_bytes -= evicted.size
+
+    def __len__(self) -> int:
+        return len(self._bodies)
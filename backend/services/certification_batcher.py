@@ -0,0 +1,85 @@
+"""
+Batched certification: one ledger registration per Merkle root.
+
+Content hashes submitted within a short window (or until the batch is full)
+become the leaves of one Merkle tree. Only the root is handed to the
+certifier's ``register_root``; each caller gets back a receipt with the root,
+the registration and an inclusion proof it can check offline with
+``merkle.verify_inclusion``.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.config import CERT_BATCH_MAX, CERT_BATCH_WINDOW
+from backend.services.merkle import build_tree, inclusion_proof, merkle_root
+
+# register_root(root_hex, leaf_count) -> registration record
+RootRegistrar = Callable[[str, int], Awaitable[Dict[str, Any]]]
+
+
+class CertificationBatcher:
+    """Collects content hashes and registers them as Merkle batches"""
+
+    def __init__(self, register_root: RootRegistrar,
+                 window: float = CERT_BATCH_WINDOW, max_batch: int = CERT_BATCH_MAX):
+        self.register_root = register_root
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+
+    async def certify(self, content_hash: str) -> Dict[str, Any]:
+        """Wait for the batch containing ``content_hash`` to be registered"""
+        bytes.fromhex(content_hash)  # reject malformed hashes before they poison a batch
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content_hash, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+        return await future
+
+    async def drain(self) -> None:
+        """Register whatever is pending now and wait for in-progress batches"""
+        if self._pending:
+            self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        hashes = [content_hash for content_hash, _ in batch]
+        try:
+            levels = build_tree(hashes)
+            root = merkle_root(levels)
+            registration = await self.register_root(root, len(hashes))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (content_hash, future) in enumerate(batch):
+            if future.done():
+                continue  # caller gave up
+            future.set_result({
+                'content_hash': content_hash,
+                'merkle_root': root,
+                'leaf_index': index,
+                'batch_size': len(hashes),
+                'proof': inclusion_proof(levels, index),
+                'registration': registration,
+            })
@@ -0,0 +1,138 @@
+"""
+Asynchronous certification stage.
+
+``submit`` records a pending certification and returns its ICS id straight
+away; the optimize response never waits on the ledger. Background tasks hand
+queued items to the certifier (many at once, so the Merkle batcher can group
+them) and write the outcome back to the store. Callers can poll the store or
+``wait_for`` a result, which the status push endpoint uses.
+
+Each pending row is leased to the worker that queued it, and the lease is
+renewed while the row waits. ``start``, and then a sweep every third of a
+lease, claims pending rows nobody holds: those left by a restart or by a
+worker that died. So every pending certification is run by exactly one live
+worker.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend.config import CERT_PIPELINE_CONCURRENCY
+from backend.services.certification_store import CERTIFIED, FAILED, PENDING, CertificationStore
+from backend.services.certifier import Certifier
+
+logger = logging.getLogger(__name__)
+
+
+class CertificationPipeline:
+    """Queue of pending certifications drained by background tasks"""
+
+    def __init__(self, certifier: Certifier, store: CertificationStore,
+                 concurrency: int = CERT_PIPELINE_CONCURRENCY, worker: Optional[str] = None):
+        self.certifier = certifier
+        self.store = store
+        self.concurrency = concurrency
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+
+    async def start(self) -> int:
+        """Start consuming; returns how many unclaimed pending items were taken over"""
+        self._queue = asyncio.Queue()
+        claimed = await self._claim()
+        self._consumer = asyncio.create_task(self._consume())
+        self._sweeper = asyncio.create_task(self._sweep())
+        return claimed
+
+    async def stop(self) -> None:
+        for task in (self._consumer, self._sweeper):
+            if task:
+                task.cancel()
+        self._consumer = self._sweeper = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, content_hash: str, score: float, metadata: Dict[str, Any]) -> str:
+        """Record a pending certification and queue it; returns the ICS id"""
+        ics_id = f"ICS-{uuid.uuid4().hex}"
+        record = dict(metadata, ics_id=ics_id, content_hash=content_hash, score=score)
+        # Not started: leave it unclaimed for whichever worker sweeps first
+        worker = self.worker if self._queue is not None else None
+        await asyncio.to_thread(self.store.record, ics_id, content_hash, record, PENDING, worker)
+        if self._queue is not None:
+            self._queue.put_nowait((ics_id, content_hash, score))
+        return ics_id
+
+    async def wait_for(self, ics_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Resolve when this process finishes ``ics_id``; None on timeout or if the outcome wasn't stored"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(ics_id, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(ics_id)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[ics_id]
+
+    async def _claim(self) -> int:
+        claimed = await asyncio.to_thread(self.store.claim_pending, self.worker)
+        for ics_id, content_hash, record in claimed:
+            self._queue.put_nowait((ics_id, content_hash, record.get('score', 0.0)))
+        return len(claimed)
+
+    async def _sweep(self) -> None:
+        """Keep this worker's leases alive and take over rows whose worker died"""
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_claims, self.worker)
+                claimed = await self._claim()
+                if claimed:
+                    logger.info(f"Took over {claimed} pending certifications")
+            except Exception:
+                logger.exception("Certification lease sweep failed")
+
+    async def _consume(self) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            item = await self._queue.get()
+            await slots.acquire()
+            task = asyncio.create_task(self._certify(*item))
+            self._in_flight.add(task)
+            task.add_done_callback(lambda t: (self._in_flight.discard(t), slots.release()))
+
+    async def _certify(self, ics_id: str, content_hash: str, score: float) -> None:
+        # None for waiters if the outcome couldn't be stored: they re-read the store instead
+        final = None
+        try:
+            try:
+                record = await self.certifier.certify(ics_id, content_hash, score)
+                status = CERTIFIED
+            except Exception as e:
+                logger.warning(f"Certification failed for {ics_id}: {e}")
+                record = {'ics_id': ics_id, 'content_hash': content_hash, 'score': score, 'error': str(e)}
+                status = FAILED
+
+            await asyncio.to_thread(self.store.update, ics_id, record, status)
+            final = dict(record, status=status)
+        except Exception:
+            # The row is still pending and leased to this worker; run it again shortly
+            logger.exception(f"Could not store the certification outcome for {ics_id}")
+            asyncio.get_running_loop().call_later(
+                self.store.lease / 3, self._queue.put_nowait, (ics_id, content_hash, score)
+            )
+        finally:
+            for future in self._waiters.pop(ics_id, []):
+                if not future.done():
+                    future.set_result(final)
@@ -0,0 +1,212 @@
+"""
+Local record of every certification issued through this API.
+
+It is the source of truth for "which ICS ids exist": the verification cache
+rebuilds its Bloom filter from here at startup and catches up on ids written
+by other workers using the ``seq`` watermark. Certifications start out
+``pending`` and move to ``certified`` (or ``failed``) when the asynchronous
+pipeline finishes them. A pending row is leased to the worker certifying it
+(``claimed_by``/``lease_until``, renewed while it works), so only one worker
+certifies it, and a dead worker's rows go to the next claim. Ids issued by an external registry before it was
+tracked here are imported as ``registered`` rows holding only the id, and
+``registry_backfill`` records that the import is complete (see
+``verification_cache``). The ``ledger`` table holds one entry per registered
+Merkle root for the local certifier.
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import CERT_DB_PATH, CERT_PIPELINE_LEASE
+from backend.services.sqlite_store import SQLiteStore
+
+PENDING = "pending"
+CERTIFIED = "certified"
+FAILED = "failed"
+REGISTERED = "registered"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certifications (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ics_id TEXT NOT NULL UNIQUE,
+    content_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    record TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    claimed_by TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_certifications_status ON certifications(status);
+CREATE TABLE IF NOT EXISTS registry_backfill (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    completed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    entry INTEGER PRIMARY KEY AUTOINCREMENT,
+    merkle_root TEXT NOT NULL,
+    leaf_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class CertificationStore(SQLiteStore):
+    """SQLite table of issued certifications keyed by ICS id"""
+
+    SCHEMA = _SCHEMA
+    COLUMNS = (
+        ("certifications", "claimed_by", "TEXT"),
+        ("certifications", "lease_until", "REAL"),
+    )
+
+    def __init__(self, path: str = CERT_DB_PATH, lease: float = CERT_PIPELINE_LEASE):
+        super().__init__(path)
+        self.lease = lease
+
+    def record(self, ics_id: str, content_hash: str, record: Dict[str, Any],
+               status: str = CERTIFIED, worker: Optional[str] = None) -> None:
+        """Insert a certification; a pending one recorded with ``worker`` starts out leased to it"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO certifications "
+                "(ics_id, content_hash, status, record, created_at, updated_at, claimed_by, lease_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ics_id, content_hash, status, json.dumps(record), now, now,
+                 worker, now + self.lease if worker else None),
+            )
+        finally:
+            conn.close()
+
+    def update(self, ics_id: str, record: Dict[str, Any], status: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE certifications SET status = ?, record = ?, updated_at = ?, "
+                "claimed_by = NULL, lease_until = NULL WHERE ics_id = ?",
+                (status, json.dumps(record), time.time(), ics_id),
+            )
+        finally:
+            conn.close()
+
+    def get(self, ics_id: str) -> Optional[Dict[str, Any]]:
+        """Stored record with its ``status``, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT status, record FROM certifications WHERE ics_id = ?", (ics_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        record = json.loads(row[1])
+        record['status'] = row[0]
+        return record
+
+    def claim_pending(self, worker: str, limit: int = 1000) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Lease pending certifications nobody holds (or whose lease ran out) to ``worker``, oldest first
+
+        Returns (ics_id, content_hash, record) for each.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT ics_id, content_hash, record FROM certifications "
+                "WHERE status = ? AND (claimed_by IS NULL OR lease_until < ?) ORDER BY seq LIMIT ?",
+                (PENDING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE certifications SET claimed_by = ?, lease_until = ? WHERE ics_id = ?",
+                [(worker, now + self.lease, ics_id) for ics_id, _, _ in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return [(ics_id, content_hash, json.loads(record)) for ics_id, content_hash, record in rows]
+
+    def renew_claims(self, worker: str) -> int:
+        """Extend the lease on every pending certification ``worker`` holds; returns how many"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE certifications SET lease_until = ? WHERE claimed_by = ? AND status = ?",
+                (time.time() + self.lease, worker, PENDING),
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def ids_since(self, seq: int) -> Tuple[List[str], int]:
+        """ICS ids recorded after ``seq``, plus the new watermark"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT seq, ics_id FROM certifications WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return [], seq
+        return [ics_id for _, ics_id in rows], rows[-1][0]
+
+    def import_registered(self, ics_ids: Iterable[str]) -> int:
+        """Record ids that exist in the external registry; returns how many were new"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO certifications "
+                "(ics_id, content_hash, status, record, created_at, updated_at) "
+                "VALUES (?, '', ?, ?, ?, ?)",
+                ((ics_id, REGISTERED, json.dumps({'ics_id': ics_id}), now, now) for ics_id in ics_ids),
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+            return added
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def mark_backfilled(self) -> None:
+        """Every external registry id is now in the store"""
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR REPLACE INTO registry_backfill (id, completed_at) VALUES (1, ?)", (time.time(),))
+        finally:
+            conn.close()
+
+    def backfilled(self) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM registry_backfill").fetchone() is not None
+        finally:
+            conn.close()
+
+    def append_ledger(self, merkle_root: str, leaf_count: int) -> int:
+        """Register a Merkle root; returns its ledger entry number"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO ledger (merkle_root, leaf_count, created_at) VALUES (?, ?, ?)",
+                (merkle_root, leaf_count, time.time()),
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+
+# Shared store for this process
+certification_store = CertificationStore()
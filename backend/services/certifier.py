@@ -0,0 +1,106 @@
+"""
+Certifier backends.
+
+A certifier turns a content hash and a quality score into a certification
+record and can verify an ICS id later. ``LocalCertifier`` needs nothing but
+the local certification store: content hashes are registered in Merkle
+batches (one ledger entry per root) and every record carries the inclusion
+proof, so it can be checked offline. Other registries plug in by subclassing
+``Certifier`` and adding themselves to ``CERTIFIERS``.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from backend.config import CERTIFIER_BACKEND
+from backend.services.certification_batcher import CertificationBatcher
+from backend.services.certification_store import CERTIFIED, CertificationStore, certification_store
+
+VERIFIER_SYSTEM = "CertNode-LogiVault-v1.0"
+
+# (minimum score, level), highest first; matches /api/certification-status
+CERTIFICATION_LEVELS = [
+    (90, "audit_grade"),
+    (80, "trust_locked"),
+    (70, "verified"),
+    (60, "basic"),
+    (0, "unverified"),
+]
+
+
+def certification_level(score: float) -> str:
+    for minimum, level in CERTIFICATION_LEVELS:
+        if score >= minimum:
+            return level
+    return "unverified"
+
+
+class Certifier(ABC):
+    """Interface for certification backends"""
+
+    name = "base"
+
+    # True when every id ``verify`` can confirm is recorded in the certification store,
+    # so the verification cache's Bloom filter may reject ids the store doesn't have
+    ids_in_store = False
+
+    @abstractmethod
+    async def certify(self, ics_id: str, content_hash: str, score: float) -> Dict[str, Any]:
+        """Certify a content hash under ``ics_id``; returns the certification record"""
+
+    @abstractmethod
+    def verify(self, ics_id: str) -> Optional[Dict[str, Any]]:
+        """Certification record for ``ics_id`` if it is certified, else None"""
+
+    def verification_url(self, ics_id: str) -> str:
+        """Where anyone can check the certification; registries with a public page override this"""
+        return f"/api/verify-certification/{ics_id}"
+
+
+class LocalCertifier(Certifier):
+    """Merkle-batched certifier backed by the local SQLite ledger"""
+
+    name = "local"
+    ids_in_store = True
+
+    def __init__(self, store: CertificationStore = certification_store):
+        self.store = store
+        self.batcher = CertificationBatcher(self._register_root)
+
+    async def _register_root(self, merkle_root: str, leaf_count: int) -> Dict[str, Any]:
+        entry = await asyncio.to_thread(self.store.append_ledger, merkle_root, leaf_count)
+        return {'ledger': self.name, 'ledger_entry': entry}
+
+    async def certify(self, ics_id: str, content_hash: str, score: float) -> Dict[str, Any]:
+        receipt = await self.batcher.certify(content_hash)
+        return {
+            'ics_id': ics_id,
+            'content_hash': content_hash,
+            'score': round(score, 1),
+            'certification_level': certification_level(score),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'verifier_system': VERIFIER_SYSTEM,
+            'merkle_root': receipt['merkle_root'],
+            'leaf_index': receipt['leaf_index'],
+            'proof': receipt['proof'],
+            'ledger_entry': receipt['registration']['ledger_entry'],
+        }
+
+    def verify(self, ics_id: str) -> Optional[Dict[str, Any]]:
+        record = self.store.get(ics_id)
+        if record and record['status'] == CERTIFIED:
+            return record
+        return None
+
+
+CERTIFIERS = {
+    LocalCertifier.name: LocalCertifier,
+}
+
+
+def get_certifier(name: str = CERTIFIER_BACKEND) -> Certifier:
+    if name not in CERTIFIERS:
+        raise ValueError(f"Unknown certifier backend: {name} (available: {', '.join(CERTIFIERS)})")
+    return CERTIFIERS[name]()
@@ -0,0 +1,235 @@
+"""
+Durable queue of rewrite jobs behind /api/jobs.
+
+A job is one or more /api/optimize request bodies, enqueued with a single
+INSERT, so accepting work costs the same however much is already queued.
+Worker processes (``backend.services.job_worker``) claim the oldest queued
+job with a lease. While a worker holds the lease it reports progress, which
+also renews the lease, and it finishes the job by storing the results. A
+job whose lease runs out, because its worker died, goes back to the next
+claim, up to ``max_attempts`` claims in all. The rerun starts from the first
+document, but ``metered`` remembers how many documents an earlier attempt
+finished, so their usage isn't counted twice. Finished jobs are kept for
+``retention`` seconds and then purged.
+"""
+
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend.config import JOB_DB_PATH, JOB_LEASE, JOB_MAX_ATTEMPTS, JOB_RETENTION
+from backend.services.sqlite_store import SQLiteStore
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    documents TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    results TEXT,
+    error TEXT,
+    webhook_url TEXT,
+    webhook_status TEXT,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    metered INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, seq);
+CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_at);
+"""
+
+
+class JobStore(SQLiteStore):
+    """SQLite job queue with leased claims"""
+
+    SCHEMA = _SCHEMA
+    COLUMNS = (("jobs", "metered", "INTEGER NOT NULL DEFAULT 0"),)
+
+    def __init__(self, path: str = JOB_DB_PATH, lease: float = JOB_LEASE,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, retention: float = JOB_RETENTION):
+        super().__init__(path)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    def enqueue(self, user_id: str, documents: List[Dict[str, Any]],
+                webhook_url: Optional[str] = None) -> str:
+        """Queue documents as one job; returns the job id"""
+        job_id = f"job_{uuid.uuid4().hex}"
+        kind = "rewrite" if len(documents) == 1 else "batch"
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (job_id, user_id, kind, status, documents, total, webhook_url, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, kind, QUEUED, json.dumps(documents), len(documents), webhook_url, time.time()),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, progress and (once finished) results; None if unknown or past retention"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT job_id, user_id, kind, status, total, done, results, error, webhook_url, "
+                "webhook_status, attempts, created_at, started_at, finished_at, expires_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row or (row[14] is not None and row[14] <= time.time()):
+            return None
+        (job_id, user_id, kind, status, total, done, results, error, webhook_url,
+         webhook_status, attempts, created_at, started_at, finished_at, expires_at) = row
+        return {
+            'job_id': job_id, 'user_id': user_id, 'kind': kind, 'status': status,
+            'progress': {'done': done, 'total': total},
+            'results': json.loads(results) if results is not None else None,
+            'error': error,
+            'webhook': {'url': webhook_url, 'status': webhook_status} if webhook_url else None,
+            'attempts': attempts,
+            'created_at': created_at, 'started_at': started_at,
+            'finished_at': finished_at, 'expires_at': expires_at,
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs per status"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job to ``worker``: queued, or running with an expired lease"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                row = conn.execute(
+                    "SELECT job_id, user_id, documents, webhook_url, attempts, started_at, metered FROM jobs "
+                    "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY seq LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, user_id, documents, webhook_url, attempts, started_at, metered = row
+                if attempts >= self.max_attempts:
+                    # Its workers kept dying on it; stop handing it out
+                    self._finish(conn, job_id, FAILED, None,
+                                 f"abandoned after {attempts} attempts", now)
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "done = 0, started_at = ? WHERE job_id = ?",
+                    (RUNNING, worker, now + self.lease, started_at or now, job_id),
+                )
+                conn.execute("COMMIT")
+                return {'job_id': job_id, 'user_id': user_id, 'documents': json.loads(documents),
+                        'webhook_url': webhook_url, 'attempt': attempts + 1, 'metered': metered}
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def progress(self, job_id: str, worker: str, done: int) -> bool:
+        """Record documents done (and metered) and renew the lease; False if ``worker`` no longer holds the job"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET done = ?, metered = MAX(metered, ?), lease_until = ? "
+                "WHERE job_id = ? AND worker = ? AND status = ?",
+                (done, done, time.time() + self.lease, job_id, worker, RUNNING),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def renew(self, job_id: str, worker: str) -> bool:
+        """Extend the lease; False if ``worker`` no longer holds the job"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND worker = ? AND status = ?",
+                (time.time() + self.lease, job_id, worker, RUNNING),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def finish(self, job_id: str, worker: str, results: Optional[List[Dict[str, Any]]],
+               error: Optional[str] = None) -> bool:
+        """Store the outcome; False (and nothing stored) if ``worker`` lost the lease meanwhile"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            owner = conn.execute(
+                "SELECT 1 FROM jobs WHERE job_id = ? AND worker = ? AND status = ?", (job_id, worker, RUNNING)
+            ).fetchone()
+            if owner:
+                self._finish(conn, job_id, FAILED if error else SUCCEEDED, results, error, time.time())
+            conn.execute("COMMIT")
+            return owner is not None
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, conn, job_id: str, status: str, results, error: Optional[str], now: float) -> None:
+        # The input documents aren't needed any more; only the results are kept for the retention period
+        conn.execute(
+            "UPDATE jobs SET status = ?, results = ?, error = ?, done = COALESCE(?, done), documents = '[]', "
+            "lease_until = NULL, finished_at = ?, expires_at = ? WHERE job_id = ?",
+            (status, json.dumps(results) if results is not None else None, error,
+             len(results) if results is not None else None, now, now + self.retention, job_id),
+        )
+
+    def set_webhook_status(self, job_id: str, status: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET webhook_status = ? WHERE job_id = ?", (status, job_id))
+        finally:
+            conn.close()
+
+    def purge(self) -> int:
+        """Delete finished jobs past their retention; returns how many"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),))
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+# Shared store for this process
+job_store = JobStore()
@@ -0,0 +1,171 @@
+"""
+Worker process for the /api/jobs queue.
+
+Each worker claims jobs from the shared JobStore, runs their documents one
+by one through the same code path as /api/optimize, and reports progress
+after every document. While a document is running, a heartbeat keeps the
+lease alive. If the worker dies, its lease expires and another worker
+re-runs the job from the start, without metering the documents the dead
+worker already reported.
+
+When the job names a ``webhook_url``, the finished job (what
+``GET /api/jobs/{id}`` returns) is POSTed to it, with a few retries. The
+URL's host is checked again first (see utils/webhooks.py). Idle
+workers also purge jobs past their retention.
+
+The API starts JOB_WORKERS of these per process. For dedicated worker
+machines, set JOB_WORKERS=0 on the API and run
+
+    python -m backend.services.job_worker [--concurrency 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from backend.config import JOB_POLL_INTERVAL, JOB_WEBHOOK_TIMEOUT, JOB_WORKER_CONCURRENCY
+from backend.services.job_store import JobStore, job_store
+from backend.utils.webhooks import check_webhook_url
+
+logger = logging.getLogger(__name__)
+
+# Seconds between purges of expired jobs
+PURGE_INTERVAL = 60.0
+
+# Webhook delivery attempts and the delay before the first retry (doubles each time)
+WEBHOOK_ATTEMPTS = 3
+WEBHOOK_BACKOFF = 1.0
+
+# (request body, user id, whether to meter its usage) -> /api/optimize response
+DocumentRunner = Callable[[Dict[str, Any], str, bool], Awaitable[Dict[str, Any]]]
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored job as the API and webhooks present it"""
+    return {name: value for name, value in job.items() if name != 'user_id'}
+
+
+class JobWorker:
+    """Claims jobs and runs them, ``concurrency`` at a time"""
+
+    def __init__(self, run_document: DocumentRunner, store: JobStore = job_store,
+                 concurrency: int = JOB_WORKER_CONCURRENCY, poll_interval: float = JOB_POLL_INTERVAL,
+                 name: Optional[str] = None):
+        self.run_document = run_document
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._last_purge = 0.0
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Work until ``stop`` is set; jobs already claimed are finished first"""
+        await asyncio.gather(*(self._loop(stop, slot) for slot in range(self.concurrency)))
+
+    async def _loop(self, stop: asyncio.Event, slot: int) -> None:
+        while not stop.is_set():
+            if await self.run_one(f"{self.name}/{slot}"):
+                continue
+            if time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+                self._last_purge = time.monotonic()
+                await asyncio.to_thread(self.store.purge)
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_one(self, worker: Optional[str] = None) -> bool:
+        """Claim and run one job; False when none is waiting"""
+        worker = worker or self.name
+        job = await asyncio.to_thread(self.store.claim, worker)
+        if job is None:
+            return False
+
+        heartbeat = asyncio.create_task(self._heartbeat(job['job_id'], worker))
+        try:
+            results = []
+            for index, document in enumerate(job['documents']):
+                results.append(await self._run_document(document, job['user_id'], index >= job['metered']))
+                if not await asyncio.to_thread(self.store.progress, job['job_id'], worker, index + 1):
+                    logger.warning(f"Lost the lease on {job['job_id']}; another worker has it")
+                    return True
+        finally:
+            heartbeat.cancel()
+
+        if await asyncio.to_thread(self.store.finish, job['job_id'], worker, results) and job['webhook_url']:
+            await self._deliver(job['job_id'], job['webhook_url'])
+        return True
+
+    async def _run_document(self, document: Dict[str, Any], user_id: str, meter: bool) -> Dict[str, Any]:
+        try:
+            return await self.run_document(document, user_id, meter)
+        except Exception as e:
+            logger.exception("Job document failed")
+            return {'success': False, 'error': f'Optimization failed: {str(e)}'}
+
+    async def _heartbeat(self, job_id: str, worker: str) -> None:
+        """Renew the lease while a long document runs"""
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            if not await asyncio.to_thread(self.store.renew, job_id, worker):
+                return
+
+    async def _deliver(self, job_id: str, url: str) -> None:
+        try:
+            await asyncio.to_thread(check_webhook_url, url)
+        except ValueError as e:
+            await asyncio.to_thread(self.store.set_webhook_status, job_id, f"refused: {e}")
+            return
+        job = await asyncio.to_thread(self.store.get, job_id)
+        body = public_job(job)
+        status = "failed"
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(WEBHOOK_BACKOFF * 2 ** (attempt - 1))
+            try:
+                async with httpx.AsyncClient(timeout=JOB_WEBHOOK_TIMEOUT) as client:
+                    response = await client.post(url, json=body)
+                if response.status_code < 300:
+                    status = "delivered"
+                    break
+                status = f"failed: HTTP {response.status_code}"
+            except Exception as e:
+                status = f"failed: {type(e).__name__}: {e}"
+        await asyncio.to_thread(self.store.set_webhook_status, job_id, status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    # Loads the engine, as the API does
+    from backend.routes.optimization import close_optirewrite, optimize_document
+    from backend.services.usage_meter import flush_periodically, usage_meter
+
+    async def serve():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        flush = asyncio.create_task(flush_periodically())
+        try:
+            await JobWorker(optimize_document, concurrency=args.concurrency).run(stop)
+        finally:
+            flush.cancel()
+            await asyncio.to_thread(usage_meter.flush)
+            await asyncio.to_thread(close_optirewrite)
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
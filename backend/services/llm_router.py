@@ -0,0 +1,405 @@
+"""
+Latency-aware routing across LLM providers, with a circuit breaker per route.
+
+A route is one provider and model. The router keeps an exponentially
+weighted moving average (EWMA) of each route's attempt latency and error
+rate and tries routes in order of expected time to an answer:
+
+    expected = ewma_latency / max(MIN_SUCCESS_RATE, 1 - ewma_error_rate)
+
+Untried routes go first, in configured order. Everything happens inside one
+request deadline, for buffered (``complete``) and streamed (``stream``)
+replies alike:
+- an attempt is cancelled once it has used its share of what is left, so a
+  hanging provider can't eat the time the next route needs
+- a route that recently took longer than what is left is skipped
+- when no route answers in time, ``complete`` raises NoProviderAvailable
+  and the caller falls back (AIRewriter to its rule-based rewrite)
+
+A route's breaker opens after ``failure_threshold`` consecutive failures, and
+an open route gets no traffic. After ``reset_timeout`` the next request
+probes it first (half-open); the probe's outcome closes or re-opens it.
+"""
+
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from backend.config import (
+    ANTHROPIC_BASE_URL,
+    ANTHROPIC_MODELS,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET,
+    LLM_EWMA_ALPHA,
+    LLM_REQUEST_DEADLINE,
+    OPENAI_BASE_URL,
+    OPENAI_MODELS,
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Floor on the success rate in the expected-latency score, so a failing route ranks last instead of infinitely
+MIN_SUCCESS_RATE = 0.05
+
+# With more routes to try, an attempt gets this share of the remaining deadline ...
+ATTEMPT_SHARE = 0.5
+# ... or this many times the route's usual latency, if that is more
+ATTEMPT_LATENCY_SLACK = 3.0
+
+# Marks the end of a streamed reply in ProviderRouter.stream's chunk queue
+_END = object()
+
+
+class NoProviderAvailable(Exception):
+    """No route answered within the request deadline"""
+
+
+class LLMProvider(ABC):
+    """A provider and model behind one wire format"""
+    name = "provider"
+
+    def __init__(self, model: str, api_key: str, base_url: str,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport
+
+    @abstractmethod
+    async def complete(self, prompt: str, system: str, max_tokens: int,
+                       usage: Optional[dict], timeout: float) -> str:
+        """Reply text; ``usage`` gets input_tokens and output_tokens"""
+
+    async def stream(self, prompt: str, system: str, max_tokens: int,
+                     usage: Optional[dict], timeout: float) -> AsyncIterator[str]:
+        """Reply text in the chunks the provider streams it in; by default the whole reply as one chunk"""
+        yield await self.complete(prompt, system, max_tokens, usage, timeout)
+
+    async def _post(self, path: str, payload: dict, headers: Dict[str, str], timeout: float) -> dict:
+        async with httpx.AsyncClient(timeout=timeout, transport=self.transport) as client:
+            response = await client.post(self.base_url + path, json=payload, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+    async def _events(self, path: str, payload: dict, headers: Dict[str, str], timeout: float) -> AsyncIterator[dict]:
+        """The JSON data of each server-sent event in a streamed response"""
+        async with httpx.AsyncClient(timeout=timeout, transport=self.transport) as client:
+            async with client.stream("POST", self.base_url + path, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    yield json.loads(data)
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic Messages API"""
+    name = "anthropic"
+
+    async def complete(self, prompt, system, max_tokens, usage, timeout):
+        data = await self._post("/v1/messages", self._payload(prompt, system, max_tokens), self._headers(), timeout)
+        if usage is not None:
+            usage.update(data.get("usage", {}))
+        return data["content"][0]["text"]
+
+    async def stream(self, prompt, system, max_tokens, usage, timeout):
+        payload = dict(self._payload(prompt, system, max_tokens), stream=True)
+        async for event in self._events("/v1/messages", payload, self._headers(), timeout):
+            kind = event.get("type")
+            if kind == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                yield event["delta"]["text"]
+            elif kind == "message_start" and usage is not None:
+                usage.update(event["message"].get("usage", {}))
+            elif kind == "message_delta" and usage is not None:
+                usage.update(event.get("usage", {}))
+            elif kind == "error":
+                raise RuntimeError(event["error"].get("message", "stream error"))
+
+    def _payload(self, prompt: str, system: str, max_tokens: int) -> dict:
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            payload["system"] = system
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI Chat Completions API"""
+    name = "openai"
+
+    async def complete(self, prompt, system, max_tokens, usage, timeout):
+        data = await self._post("/v1/chat/completions", self._payload(prompt, system, max_tokens),
+                                self._headers(), timeout)
+        if usage is not None:
+            self._usage(usage, data.get("usage", {}))
+        return data["choices"][0]["message"]["content"]
+
+    async def stream(self, prompt, system, max_tokens, usage, timeout):
+        payload = dict(self._payload(prompt, system, max_tokens), stream=True, stream_options={"include_usage": True})
+        async for event in self._events("/v1/chat/completions", payload, self._headers(), timeout):
+            if event.get("error"):
+                raise RuntimeError(event["error"].get("message", "stream error"))
+            if event.get("usage") and usage is not None:
+                self._usage(usage, event["usage"])
+            for choice in event.get("choices", []):
+                text = choice.get("delta", {}).get("content")
+                if text:
+                    yield text
+
+    def _payload(self, prompt: str, system: str, max_tokens: int) -> dict:
+        messages = [{"role": "system", "content": system}] if system else []
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "messages": messages + [{"role": "user", "content": prompt}],
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    @staticmethod
+    def _usage(usage: dict, reported: dict) -> None:
+        usage.update(input_tokens=reported.get("prompt_tokens", 0),
+                     output_tokens=reported.get("completion_tokens", 0))
+
+
+@dataclass
+class Route:
+    """Health of one provider and model"""
+    provider: LLMProvider
+    latency: Optional[float] = None  # EWMA seconds per attempt, failed ones included
+    error_rate: float = 0.0          # EWMA of 1 for a failed attempt, 0 for a successful one
+    failures: int = 0                # consecutive
+    state: str = CLOSED
+    opened_at: float = 0.0
+    last_attempt: float = 0.0
+    probing: bool = False            # a half-open probe is in flight
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider.name}/{self.provider.model}"
+
+
+class ProviderRouter:
+    """Sends each prompt to the healthiest provider route that can answer within the deadline"""
+
+    def __init__(self, providers: List[LLMProvider], deadline: float = LLM_REQUEST_DEADLINE,
+                 failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET,
+                 alpha: float = LLM_EWMA_ALPHA):
+        self.routes = [Route(provider) for provider in providers]
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alpha = alpha
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def set_providers(self, providers: List[LLMProvider]):
+        """Route to these providers from now on; their health starts over"""
+        self.routes = [Route(provider) for provider in providers]
+
+    async def complete(self, prompt: str, system: str, max_tokens: int = 1000,
+                       usage: Optional[dict] = None, deadline: Optional[float] = None) -> str:
+        """Reply from the first route to answer; raises NoProviderAvailable once the deadline is spent"""
+        started = time.monotonic()
+        budget = self.deadline if deadline is None else deadline
+        candidates = self._ranked(started)
+        errors = []
+
+        for position, route in enumerate(candidates):
+            now = time.monotonic()
+            remaining = budget - (now - started)
+            if remaining <= 0:
+                break
+            timeout = self._attempt_timeout(route, now, remaining, position == len(candidates) - 1, errors)
+            if timeout is None:
+                continue
+            route.last_attempt = now
+            try:
+                reply = await asyncio.wait_for(
+                    route.provider.complete(prompt, system, max_tokens, usage, timeout), timeout
+                )
+            except asyncio.CancelledError:
+                route.probing = False
+                raise
+            except asyncio.TimeoutError:
+                self._record(route, time.monotonic() - now, ok=False)
+                errors.append(f"{route.name}: no answer within {timeout:.2f}s")
+                continue
+            except Exception as e:
+                self._record(route, time.monotonic() - now, ok=False)
+                errors.append(f"{route.name}: {type(e).__name__}: {e}")
+                continue
+            self._record(route, time.monotonic() - now, ok=True)
+            return reply
+
+        raise NoProviderAvailable("; ".join(errors) or "no LLM provider available")
+
+    async def stream(self, prompt: str, system: str, max_tokens: int = 1000,
+                     usage: Optional[dict] = None, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Reply chunks from the first route to start answering.
+
+        Routes are picked, skipped and timed out as in ``complete`` until one
+        sends its first chunk. That route then has the rest of the deadline
+        to finish: a reply can't switch routes halfway, so a failure or the
+        deadline running out after that raises NoProviderAvailable. The
+        route is recorded as failed either way.
+        """
+        started = time.monotonic()
+        budget = self.deadline if deadline is None else deadline
+        candidates = self._ranked(started)
+        errors = []
+
+        for position, route in enumerate(candidates):
+            now = time.monotonic()
+            remaining = budget - (now - started)
+            if remaining <= 0:
+                break
+            timeout = self._attempt_timeout(route, now, remaining, position == len(candidates) - 1, errors)
+            if timeout is None:
+                continue
+            route.last_attempt = now
+
+            # The provider's stream runs in its own task, so a deadline can cancel it between chunks
+            chunks: asyncio.Queue = asyncio.Queue()
+            pump = asyncio.ensure_future(self._pump(
+                route.provider.stream(prompt, system, max_tokens, usage, remaining), chunks
+            ))
+            streamed = False
+            try:
+                while True:
+                    wait = timeout if not streamed else budget - (time.monotonic() - started)
+                    chunk = await asyncio.wait_for(chunks.get(), max(0.0, wait))
+                    if chunk is _END:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    streamed = True
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                route.probing = False
+                raise
+            except asyncio.TimeoutError:
+                self._record(route, time.monotonic() - now, ok=False)
+                if streamed:
+                    raise NoProviderAvailable(f"{route.name}: reply not finished within the {budget:.2f}s deadline")
+                errors.append(f"{route.name}: no answer within {timeout:.2f}s")
+                continue
+            except Exception as e:
+                self._record(route, time.monotonic() - now, ok=False)
+                if streamed:
+                    raise NoProviderAvailable(f"{route.name}: {type(e).__name__}: {e}") from e
+                errors.append(f"{route.name}: {type(e).__name__}: {e}")
+                continue
+            finally:
+                pump.cancel()
+            self._record(route, time.monotonic() - now, ok=True)
+            return
+
+        raise NoProviderAvailable("; ".join(errors) or "no LLM provider available")
+
+    @staticmethod
+    async def _pump(chunks: AsyncIterator[str], queue: asyncio.Queue) -> None:
+        """Move a provider's chunks to ``queue``, then _END or the exception that ended them"""
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+            queue.put_nowait(_END)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    def _attempt_timeout(self, route: Route, now: float, remaining: float, last: bool,
+                         errors: List[str]) -> Optional[float]:
+        """How long an attempt on ``route`` may take, or None to skip it (noting why in ``errors``)"""
+        if not self._admit(route, now):
+            return None
+        if (route.latency is not None and route.latency > remaining and not route.probing
+                and now - route.last_attempt < self.reset_timeout):
+            errors.append(f"{route.name}: usually slower than the {remaining:.2f}s left")
+            return None
+        if last:
+            return remaining
+        share = remaining * ATTEMPT_SHARE
+        return min(remaining, max(share, ATTEMPT_LATENCY_SLACK * (route.latency or 0.0)))
+
+    def snapshot(self) -> List[dict]:
+        """Route health, best first"""
+        return [
+            {'route': route.name, 'state': route.state, 'latency': route.latency,
+             'error_rate': route.error_rate, 'failures': route.failures}
+            for route in self._ranked(time.monotonic())
+        ]
+
+    def _ranked(self, now: float) -> List[Route]:
+        """Routes due for a half-open probe first, then by expected latency (stable: untried in configured order)"""
+        def order(route: Route):
+            due = ((route.state == HALF_OPEN and not route.probing)
+                   or (route.state == OPEN and now - route.opened_at >= self.reset_timeout))
+            return (not due, self._expected_latency(route))
+        return sorted(self.routes, key=order)
+
+    def _expected_latency(self, route: Route) -> float:
+        if route.latency is None:
+            return 0.0
+        return route.latency / max(MIN_SUCCESS_RATE, 1.0 - route.error_rate)
+
+    def _admit(self, route: Route, now: float) -> bool:
+        """Whether the breaker lets a request through; claims the probe when half-open"""
+        if route.state == OPEN and now - route.opened_at >= self.reset_timeout:
+            route.state = HALF_OPEN
+        if route.state == HALF_OPEN:
+            if route.probing:
+                return False
+            route.probing = True
+        return route.state != OPEN
+
+    def _record(self, route: Route, seconds: float, ok: bool):
+        alpha = self.alpha
+        route.latency = seconds if route.latency is None else (1 - alpha) * route.latency + alpha * seconds
+        route.error_rate = (1 - alpha) * route.error_rate + alpha * (0.0 if ok else 1.0)
+        route.probing = False
+        if ok:
+            route.failures = 0
+            route.state = CLOSED
+        else:
+            route.failures += 1
+            if route.state == HALF_OPEN or route.failures >= self.failure_threshold:
+                route.state = OPEN
+                route.opened_at = time.monotonic()
+
+
+def providers_from_env(anthropic_key: Optional[str] = None, openai_key: Optional[str] = None) -> List[LLMProvider]:
+    """A route per configured model of every provider that has an API key"""
+    anthropic_key = anthropic_key or os.getenv("CLAUDE_API_KEY")
+    openai_key = openai_key or os.getenv("OPENAI_API_KEY")
+    providers: List[LLMProvider] = []
+    if anthropic_key:
+        providers += [AnthropicProvider(model.strip(), anthropic_key, ANTHROPIC_BASE_URL)
+                      for model in ANTHROPIC_MODELS.split(",") if model.strip()]
+    if openai_key:
+        providers += [OpenAIProvider(model.strip(), openai_key, OPENAI_BASE_URL)
+                      for model in OPENAI_MODELS.split(",") if model.strip()]
+    return providers
+
+
+# Shared by every caller so they all see the same route health
+llm_router = ProviderRouter(providers_from_env())
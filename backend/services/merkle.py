@@ -0,0 +1,75 @@
+"""
+Merkle trees over content hashes, with offline-verifiable inclusion proofs.
+
+Hashing follows RFC 6962: leaves are ``sha256(0x00 || content_hash)`` and
+interior nodes ``sha256(0x01 || left || right)``, so a leaf can never be
+passed off as an interior node. A node without a sibling is promoted to the
+next level unchanged rather than duplicated.
+
+A proof is a list of ``[sibling_hex, side]`` steps from leaf to root, where
+``side`` says whether the sibling sits on the left ("L") or right ("R").
+"""
+
+import hashlib
+from typing import List, Tuple
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+ProofStep = Tuple[str, str]
+
+
+def leaf_hash(content_hash: str) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(content_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_tree(content_hashes: List[str]) -> List[List[bytes]]:
+    """All tree levels, leaves first; the last level holds only the root"""
+    if not content_hashes:
+        raise ValueError("Cannot build a Merkle tree with no leaves")
+
+    levels = [[leaf_hash(h) for h in content_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(levels: List[List[bytes]]) -> str:
+    return levels[-1][0].hex()
+
+
+def inclusion_proof(levels: List[List[bytes]], index: int) -> List[ProofStep]:
+    """Sibling path for leaf ``index``"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            side = "L" if sibling < index else "R"
+            proof.append((level[sibling].hex(), side))
+        index //= 2
+    return proof
+
+
+def verify_inclusion(content_hash: str, proof: List[ProofStep], root: str) -> bool:
+    """Check a proof without access to the tree or the ledger"""
+    try:
+        node = leaf_hash(content_hash)
+        for sibling_hex, side in proof:
+            sibling = bytes.fromhex(sibling_hex)
+            if side == "L":
+                node = node_hash(sibling, node)
+            elif side == "R":
+                node = node_hash(node, sibling)
+            else:
+                return False
+    except ValueError:
+        return False
+    return node.hex() == root
@@ -0,0 +1,285 @@
+"""
+Durable Stripe plan store shared by every API worker.
+
+Plans are persisted in SQLite (WAL mode, so uvicorn workers on the same
+volume can read while one of them writes) and mirrored into an in-process
+dict. ``get_plan`` is a single dict lookup once a user has been seen; a miss
+reads through to the database once. Writes made by other workers are picked
+up by ``sync()``, which pulls every row whose ``version`` is newer than the
+last one this process saw.
+
+Webhook events are recorded before they are acknowledged, keyed by the
+Stripe event id, so redeliveries are dropped. A worker claims pending
+events with a lease before applying them, so no two workers apply the same
+event. An event that fails to apply is released and retried on the next
+tick; one whose worker died is retried once its lease runs out. Stripe
+doesn't deliver events in order, so each plan keeps the ``created`` time of
+the event that set it. An older event that arrives later is marked stale
+and not applied.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import PLAN_DB_PATH, PLAN_EVENT_LEASE
+from backend.services.sqlite_store import SQLiteStore
+
+DEFAULT_PLAN = "Free"
+CACHE_MAX_ENTRIES = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_plans (
+    user_id TEXT PRIMARY KEY,
+    plan TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    event_created INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_user_plans_version ON user_plans(version);
+CREATE TABLE IF NOT EXISTS stripe_events (
+    event_id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    received_at REAL NOT NULL,
+    processed_at REAL,
+    created INTEGER,
+    claimed_by TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_stripe_events_status ON stripe_events(status);
+"""
+
+PENDING = "pending"
+PROCESSED = "processed"
+# Older than the event that set the user's current plan
+STALE = "stale"
+
+
+class PlanStore(SQLiteStore):
+    """SQLite-backed plan store with an in-process read-through cache"""
+
+    SCHEMA = _SCHEMA
+    COLUMNS = (
+        ("user_plans", "event_created", "INTEGER"),
+        ("stripe_events", "created", "INTEGER"),
+        ("stripe_events", "claimed_by", "TEXT"),
+        ("stripe_events", "lease_until", "REAL"),
+        ("stripe_events", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+        ("stripe_events", "error", "TEXT"),
+    )
+
+    def __init__(self, path: str = PLAN_DB_PATH, lease: float = PLAN_EVENT_LEASE):
+        super().__init__(path)
+        self.lease = lease
+        self._plans: Dict[str, str] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_plan(self, user_id: str) -> str:
+        """Return the user's plan; one dict access once the user is cached"""
+        plan = self._plans.get(user_id)
+        if plan is None:
+            plan = self._read_through(user_id)
+        return plan
+
+    def is_cached(self, user_id: str) -> bool:
+        return user_id in self._plans
+
+    def _read_through(self, user_id: str) -> str:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT plan FROM user_plans WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        plan = row[0] if row else DEFAULT_PLAN
+        with self._lock:
+            if len(self._plans) >= CACHE_MAX_ENTRIES:
+                self._plans.clear()
+            # Don't clobber a newer value that sync() stored meanwhile
+            plan = self._plans.setdefault(user_id, plan)
+        return plan
+
+    def sync(self) -> int:
+        """Apply plan changes written by any worker since the last sync"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT user_id, plan, version FROM user_plans "
+                "WHERE version > ? ORDER BY version",
+                (self._version,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for user_id, plan, version in rows:
+                if user_id in self._plans:
+                    self._plans[user_id] = plan
+                self._version = max(self._version, version)
+        return len(rows)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user (or everyone) from the in-process cache"""
+        with self._lock:
+            if user_id is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(user_id, None)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set_plan(self, user_id: str, plan: str) -> None:
+        """Persist a plan change and update the local cache"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._upsert_plan(conn, user_id, plan)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._plans[user_id] = plan
+
+    def _upsert_plan(self, conn: sqlite3.Connection, user_id: str, plan: str,
+                     event_created: Optional[int] = None) -> None:
+        (version,) = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM user_plans").fetchone()
+        conn.execute(
+            "INSERT INTO user_plans (user_id, plan, version, updated_at, event_created) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET plan = excluded.plan, "
+            "version = excluded.version, updated_at = excluded.updated_at, "
+            "event_created = COALESCE(excluded.event_created, user_plans.event_created)",
+            (user_id, plan, version, time.time(), event_created),
+        )
+
+    # ------------------------------------------------------------------
+    # Webhook events
+    # ------------------------------------------------------------------
+
+    def record_event(self, event_id: str, event_type: str, payload: dict,
+                     created: Optional[int] = None) -> bool:
+        """Record a webhook event (``created`` is Stripe's event time); False if the event id was already seen"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO stripe_events (event_id, event_type, payload, received_at, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event_id, event_type, json.dumps(payload), time.time(), created),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def claim_events(self, worker: str, limit: int = 100) -> List[Tuple[str, dict, Optional[int]]]:
+        """Lease pending events nobody holds (or whose lease ran out) to ``worker``, oldest first"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT event_id, payload, created FROM stripe_events "
+                "WHERE status = ? AND (claimed_by IS NULL OR lease_until < ?) "
+                "ORDER BY created, received_at LIMIT ?",
+                (PENDING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE stripe_events SET claimed_by = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE event_id = ?",
+                [(worker, now + self.lease, event_id) for event_id, _, _ in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return [(event_id, json.loads(payload), created) for event_id, payload, created in rows]
+
+    def apply_event(self, event_id: str, user_id: str, plan: str,
+                    created: Optional[int] = None, worker: Optional[str] = None) -> Optional[str]:
+        """
+        Apply a recorded plan update and mark its event done, atomically.
+
+        Returns PROCESSED, or STALE if the user's plan was set by a newer
+        event (the plan is left alone), or None if ``worker`` no longer
+        holds the event.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            held = conn.execute(
+                "SELECT 1 FROM stripe_events WHERE event_id = ? AND status = ? AND "
+                "(? IS NULL OR (claimed_by = ? AND lease_until >= ?))",
+                (event_id, PENDING, worker, worker, now),
+            ).fetchone()
+            if not held:
+                conn.execute("COMMIT")
+                return None
+            row = conn.execute("SELECT event_created FROM user_plans WHERE user_id = ?", (user_id,)).fetchone()
+            status = STALE if created is not None and row and row[0] is not None and created < row[0] else PROCESSED
+            if status == PROCESSED:
+                self._upsert_plan(conn, user_id, plan, created)
+            conn.execute(
+                "UPDATE stripe_events SET status = ?, processed_at = ?, error = NULL WHERE event_id = ?",
+                (status, now, event_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if status == PROCESSED:
+            with self._lock:
+                self._plans[user_id] = plan
+        return status
+
+    def release_event(self, event_id: str, worker: str, error: str) -> None:
+        """Hand a claimed event back after a failed apply, so the next claim retries it"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE stripe_events SET claimed_by = NULL, lease_until = NULL, error = ? "
+                "WHERE event_id = ? AND claimed_by = ? AND status = ?",
+                (error, event_id, worker, PENDING),
+            )
+        finally:
+            conn.close()
+
+    def event_status(self, event_id: str) -> Optional[str]:
+        """PENDING, PROCESSED or STALE; None if the event was never recorded"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT status FROM stripe_events WHERE event_id = ?", (event_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+
+# Shared store for this process
+plan_store = PlanStore()
+
+
+def get_user_plan(user_id: str) -> str:
+    """Hot-path plan lookup"""
+    return plan_store.get_plan(user_id)
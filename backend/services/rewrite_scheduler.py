@@ -0,0 +1,276 @@
+"""
+Plan-weighted fair scheduling for rewrite jobs.
+
+Every user gets their own FIFO queue. Queues are served with start-time fair
+queuing: a job's start tag is ``max(virtual_time, user's previous finish tag)``
+and its finish tag adds ``cost / weight``, where cost is the document size and
+weight comes from the user's Stripe plan. A free user who submits a 5 MB
+document therefore pushes back only their own next job, not everyone else's.
+
+Two guards sit on top of the fair order:
+- per-user concurrency caps (also by plan), so one user can't hold every worker
+- starvation protection: a job that has waited longer than ``max_wait`` is
+  dispatched next regardless of its tag
+
+Only the queue lives on the event loop. Dispatched jobs run in a pool of
+``max_workers`` processes, so ``REWRITE_WORKERS`` is how many rewrites run in
+parallel and a long one holds a single worker, not the loop.
+"""
+
+import asyncio
+import heapq
+import itertools
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.config import REWRITE_MAX_WAIT, REWRITE_WORKERS
+
+PLAN_WEIGHTS = {
+    "Free": 1.0,
+    "Starter": 2.0,
+    "Pro": 4.0,
+    "Business": 8.0,
+    "Enterprise": 16.0,
+}
+
+PLAN_CONCURRENCY = {
+    "Free": 1,
+    "Starter": 1,
+    "Pro": 2,
+    "Business": 4,
+    "Enterprise": 8,
+}
+
+# Idle users' finish tags are swept once this many users are remembered (and the count doubled since)
+FORGET_IDLE_AFTER = 1024
+
+DEFAULT_WEIGHT = PLAN_WEIGHTS["Free"]
+DEFAULT_CONCURRENCY = PLAN_CONCURRENCY["Free"]
+
+
+@dataclass
+class Job:
+    """A unit of work waiting in a user's queue"""
+    user_id: str
+    plan: str
+    cost: float
+    enqueued_at: float
+    payload: Any = None
+    start_tag: float = 0.0
+    finish_tag: float = 0.0
+    dispatched: bool = field(default=False, repr=False)
+
+
+class FairQueue:
+    """
+    Synchronous core of the scheduler: per-user queues, tags and caps.
+
+    Kept free of asyncio so the simulation benchmark can drive it with a
+    virtual clock.
+    """
+
+    def __init__(self, max_wait: float = REWRITE_MAX_WAIT):
+        self.max_wait = max_wait
+        self.virtual_time = 0.0
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._running: Dict[str, int] = {}
+        self._caps: Dict[str, int] = {}
+        # (head start tag, seq, user_id) for every user with queued work
+        self._heads: List[Tuple[float, int, str]] = []
+        # All jobs in arrival order, for starvation checks (lazy deletion)
+        self._arrivals: Deque[Job] = deque()
+        self._seq = itertools.count()
+        self._size = 0
+        self._sweep_at = FORGET_IDLE_AFTER
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, job: Job) -> None:
+        weight = PLAN_WEIGHTS.get(job.plan, DEFAULT_WEIGHT)
+        job.start_tag = max(self.virtual_time, self._last_finish.get(job.user_id, 0.0))
+        job.finish_tag = job.start_tag + job.cost / weight
+        self._last_finish[job.user_id] = job.finish_tag
+        self._caps[job.user_id] = PLAN_CONCURRENCY.get(job.plan, DEFAULT_CONCURRENCY)
+        if len(self._last_finish) >= self._sweep_at:
+            self._forget_idle()
+
+        queue = self._queues.get(job.user_id)
+        if queue is None:
+            queue = self._queues[job.user_id] = deque()
+        queue.append(job)
+        if len(queue) == 1:
+            heapq.heappush(self._heads, (job.start_tag, next(self._seq), job.user_id))
+        self._arrivals.append(job)
+        self._size += 1
+
+    def pop(self, now: float) -> Optional[Job]:
+        """Next job to run, or None if nothing is eligible"""
+        job = self._pop_starved(now)
+        if job is None:
+            job = self._pop_fair()
+            if job is not None:
+                self.virtual_time = max(self.virtual_time, job.start_tag)
+        if job is not None:
+            self._running[job.user_id] = self._running.get(job.user_id, 0) + 1
+        return job
+
+    def release(self, job: Job) -> None:
+        """Mark a dispatched job finished, freeing its user's concurrency slot"""
+        running = self._running.get(job.user_id, 0) - 1
+        if running > 0:
+            self._running[job.user_id] = running
+        else:
+            self._running.pop(job.user_id, None)
+            if not self._size and not self._running:
+                # Nothing queued or running anywhere: past finish tags can't matter to anyone
+                self._last_finish.clear()
+                self._caps.clear()
+            elif job.user_id not in self._queues:
+                # Idle user: nothing to remember beyond the global virtual time
+                if self._last_finish.get(job.user_id, 0.0) <= self.virtual_time:
+                    self._last_finish.pop(job.user_id, None)
+                    self._caps.pop(job.user_id, None)
+            else:
+                queue = self._queues[job.user_id]
+                heapq.heappush(self._heads, (queue[0].start_tag, next(self._seq), job.user_id))
+
+    def _forget_idle(self) -> None:
+        """Drop users with nothing queued or running whose finish tag the virtual time has passed"""
+        for user_id, finish in list(self._last_finish.items()):
+            if finish <= self.virtual_time and user_id not in self._queues and user_id not in self._running:
+                del self._last_finish[user_id]
+                self._caps.pop(user_id, None)
+        self._sweep_at = max(FORGET_IDLE_AFTER, 2 * len(self._last_finish))
+
+    def _at_cap(self, user_id: str) -> bool:
+        return self._running.get(user_id, 0) >= self._caps.get(user_id, DEFAULT_CONCURRENCY)
+
+    def _pop_starved(self, now: float) -> Optional[Job]:
+        arrivals = self._arrivals
+        while arrivals and arrivals[0].dispatched:
+            arrivals.popleft()
+        if not arrivals:
+            return None
+        oldest = arrivals[0]
+        if now - oldest.enqueued_at < self.max_wait or self._at_cap(oldest.user_id):
+            return None
+        # Per-user order is arrival order, so the oldest job heads its queue
+        return self._take_head(oldest.user_id)
+
+    def _pop_fair(self) -> Optional[Job]:
+        while self._heads:
+            start_tag, _, user_id = heapq.heappop(self._heads)
+            queue = self._queues.get(user_id)
+            if not queue or queue[0].start_tag != start_tag:
+                continue  # stale entry
+            if self._at_cap(user_id):
+                continue  # re-entered by release() once a slot frees up
+            return self._take_head(user_id)
+        return None
+
+    def _take_head(self, user_id: str) -> Job:
+        queue = self._queues[user_id]
+        job = queue.popleft()
+        job.dispatched = True
+        self._size -= 1
+        if queue:
+            # Any older heap entry for this user is now stale
+            heapq.heappush(self._heads, (queue[0].start_tag, next(self._seq), user_id))
+        else:
+            del self._queues[user_id]
+        return job
+
+
+class RewriteScheduler:
+    """Runs submitted jobs on a bounded worker pool in plan-weighted fair order"""
+
+    def __init__(self, max_workers: int = REWRITE_WORKERS, max_wait: float = REWRITE_MAX_WAIT,
+                 executor: Optional[Executor] = None):
+        """``executor`` runs the jobs; by default a pool of ``max_workers`` processes, started on first use"""
+        self.max_workers = max_workers
+        self._queue = FairQueue(max_wait=max_wait)
+        self._active = 0
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def submit(self, user_id: str, plan: str, cost: float, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Queue ``fn(*args)`` for ``user_id`` and wait for its result.
+
+        ``fn`` and its arguments go to a worker process, so they must pickle.
+        A coroutine function is awaited on the event loop instead: only for
+        jobs that mostly wait on I/O, such as LLM rewrites.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.push(Job(
+            user_id=user_id,
+            plan=plan,
+            cost=max(1.0, cost),
+            enqueued_at=time.monotonic(),
+            payload=(fn, args, future),
+        ))
+        self._dispatch()
+        return await future
+
+    def close(self) -> None:
+        """Shut down the worker processes, if this scheduler started them"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _dispatch(self) -> None:
+        while self._active < self.max_workers:
+            job = self._queue.pop(time.monotonic())
+            if job is None:
+                return
+            fn, args, future = job.payload
+            if future.done():
+                # Caller went away while queued
+                self._queue.release(job)
+                continue
+            self._active += 1
+            asyncio.create_task(self._run(job, fn, args, future))
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            # spawn, not fork: the parent runs an event loop and other threads
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    async def _run(self, job: Job, fn: Callable[..., Any], args: tuple, future: asyncio.Future) -> None:
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args)
+            else:
+                pool = self._pool()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+                except BrokenProcessPool:
+                    # A worker died; the next job starts a fresh pool
+                    if self._owns_executor and self._executor is pool:
+                        self._executor = None
+                    raise
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._active -= 1
+            self._queue.release(job)
+            self._dispatch()
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+
+class SQLiteStore:
+    """
+    Base for the local SQLite stores.
+
+    Connections are opened per operation (cheap for SQLite, and safe to use
+    from ``asyncio.to_thread``). The database file, its directory and the
+    subclass's ``SCHEMA`` are created on first use. WAL mode lets several
+    uvicorn workers read while one writes. Columns added to a table after it
+    first shipped go in both ``SCHEMA`` and ``COLUMNS``; older databases get
+    them with ALTER TABLE on first use. Indexes over such columns go in
+    ``INDEXES``, which runs after the columns are added.
+    """
+
+    SCHEMA = ""
+    # (table, column, declaration) for columns added after the table shipped
+    COLUMNS = ()
+    INDEXES = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._add_columns(conn)
+            conn.executescript(self.INDEXES)
+            self._initialized = True
+        return conn
+
+    def _add_columns(self, conn: sqlite3.Connection) -> None:
+        for table, column, declaration in self.COLUMNS:
+            if column in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                continue
+            try:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            except sqlite3.OperationalError as e:
+                # Another worker added it first
+                if "duplicate column" not in str(e):
+                    raise
@@ -0,0 +1,270 @@
+"""
+Per-user usage metering and plan quotas.
+
+Counters (requests, input words, output words, LLM tokens) are kept per user
+for the current UTC month. Each process holds running totals for its most
+recently seen users (an LRU of ``max_users``), so quota checks are a dict
+lookup plus a few comparisons. A user's first lookup reads the database;
+request handlers do that through ``utils.quota.load_quota``, off the event
+loop. Increments also go into a pending buffer that a background task
+flushes to SQLite in one transaction. Every write bumps the row's
+``version``, and on each flush tick ``sync`` re-reads the rows changed since
+the last tick, so usage recorded by other API workers and job workers
+reaches the quota checks within one interval.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import USAGE_CACHE_SIZE, USAGE_DB_PATH, USAGE_FLUSH_INTERVAL
+from backend.services.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("requests", "input_words", "output_words", "llm_tokens")
+REQUESTS, INPUT_WORDS, OUTPUT_WORDS, LLM_TOKENS = range(len(COUNTERS))
+
+# Monthly limits per plan; None means unlimited
+PLAN_QUOTAS = {
+    "Free": {"requests": 200, "input_words": 50_000, "llm_tokens": 100_000},
+    "Starter": {"requests": 2_000, "input_words": 500_000, "llm_tokens": 1_000_000},
+    "Pro": {"requests": 20_000, "input_words": 5_000_000, "llm_tokens": 10_000_000},
+    "Business": {"requests": 100_000, "input_words": 25_000_000, "llm_tokens": 50_000_000},
+    "Enterprise": {"requests": None, "input_words": None, "llm_tokens": None},
+}
+
+# (counter index, limit) pairs so checks don't touch the nested dicts
+_QUOTA_CHECKS = {
+    plan: tuple(
+        (COUNTERS.index(name), limit) for name, limit in quotas.items() if limit is not None
+    )
+    for plan, quotas in PLAN_QUOTAS.items()
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    input_words INTEGER NOT NULL DEFAULT 0,
+    output_words INTEGER NOT NULL DEFAULT 0,
+    llm_tokens INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, period)
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_usage_version ON usage(version);
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for providers that don't report usage (~4 chars/token)"""
+    return (len(text) + 3) // 4
+
+
+def llm_tokens_used(usage: dict, prompt: str, output: str) -> int:
+    """Provider-reported tokens for a call, falling back to an estimate"""
+    reported = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+    return reported or estimate_tokens(prompt) + estimate_tokens(output)
+
+
+def _current_period(now: float) -> Tuple[str, float]:
+    """('YYYY-MM', timestamp when the next period starts)"""
+    dt = datetime.fromtimestamp(now, tz=timezone.utc)
+    if dt.month == 12:
+        next_start = datetime(dt.year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        next_start = datetime(dt.year, dt.month + 1, 1, tzinfo=timezone.utc)
+    return dt.strftime("%Y-%m"), next_start.timestamp()
+
+
+class UsageMeter(SQLiteStore):
+    """In-process usage counters with batched SQLite flushes"""
+
+    SCHEMA = _SCHEMA
+    COLUMNS = (("usage", "version", "INTEGER NOT NULL DEFAULT 0"),)
+    INDEXES = _INDEXES
+
+    def __init__(self, path: str = USAGE_DB_PATH, max_users: int = USAGE_CACHE_SIZE):
+        super().__init__(path)
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._period, self._period_end = _current_period(time.time())
+        # user_id -> totals for the current period (flushed + pending), least recently used first
+        self._totals: "OrderedDict[str, List[int]]" = OrderedDict()
+        # Highest row version folded into _totals; users loaded later read their rows directly
+        self._version = self._max_version()
+        # (period, user_id) -> increments not yet written
+        self._pending: Dict[Tuple[str, str], List[int]] = {}
+
+    def _max_version(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COALESCE(MAX(version), 0) FROM usage").fetchone()[0]
+        finally:
+            conn.close()
+
+    @property
+    def period_end(self) -> float:
+        return self._period_end
+
+    def _roll_period(self) -> None:
+        if time.time() >= self._period_end:
+            with self._lock:
+                self._period, self._period_end = _current_period(time.time())
+                self._totals.clear()
+
+    def _load(self, user_id: str) -> List[int]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT requests, input_words, output_words, llm_tokens FROM usage "
+                "WHERE user_id = ? AND period = ?",
+                (user_id, self._period),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        with self._lock:
+            totals = self._totals.get(user_id)
+            if totals is None:
+                totals = list(row) if row else [0, 0, 0, 0]
+                pending = self._pending.get((self._period, user_id))
+                if pending:
+                    totals = [t + p for t, p in zip(totals, pending)]
+                self._totals[user_id] = totals
+                # Evicted users keep their pending increments, and get them back on reload
+                while len(self._totals) > self.max_users:
+                    self._totals.popitem(last=False)
+        return totals
+
+    def is_loaded(self, user_id: str) -> bool:
+        return user_id in self._totals
+
+    def totals(self, user_id: str) -> List[int]:
+        """Current-period totals, indexed like COUNTERS; reads the database if the user isn't loaded"""
+        self._roll_period()
+        with self._lock:
+            totals = self._totals.get(user_id)
+            if totals is not None:
+                self._totals.move_to_end(user_id)
+        if totals is None:
+            totals = self._load(user_id)
+        return totals
+
+    def exceeded(self, user_id: str, plan: str) -> Optional[str]:
+        """Name of the first exhausted quota, or None if the user may proceed"""
+        totals = self.totals(user_id)
+        for index, limit in _QUOTA_CHECKS.get(plan, _QUOTA_CHECKS["Free"]):
+            if totals[index] >= limit:
+                return COUNTERS[index]
+        return None
+
+    def remaining(self, user_id: str, plan: str) -> Dict[str, Optional[int]]:
+        """Remaining allowance per limited counter (None = unlimited)"""
+        totals = self.totals(user_id)
+        quotas = PLAN_QUOTAS.get(plan, PLAN_QUOTAS["Free"])
+        return {
+            name: None if limit is None else max(0, limit - totals[COUNTERS.index(name)])
+            for name, limit in quotas.items()
+        }
+
+    def record(self, user_id: str, requests: int = 1, input_words: int = 0,
+               output_words: int = 0, llm_tokens: int = 0) -> None:
+        """Add usage for a finished request"""
+        self.totals(user_id)
+        delta = (requests, input_words, output_words, llm_tokens)
+        with self._lock:
+            key = (self._period, user_id)
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = [0, 0, 0, 0]
+            totals = self._totals.get(user_id)
+            for i, value in enumerate(delta):
+                pending[i] += value
+                if totals is not None:
+                    totals[i] += value
+
+    def flush(self) -> int:
+        """Write pending increments in one transaction, then ``sync``; returns rows written"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            self.sync()
+            return 0
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            (version,) = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM usage").fetchone()
+            conn.executemany(
+                "INSERT INTO usage (user_id, period, requests, input_words, output_words, llm_tokens, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id, period) DO UPDATE SET "
+                "requests = requests + excluded.requests, "
+                "input_words = input_words + excluded.input_words, "
+                "output_words = output_words + excluded.output_words, "
+                "llm_tokens = llm_tokens + excluded.llm_tokens, "
+                "version = excluded.version",
+                [(user_id, period, *counts, version) for (period, user_id), counts in batch.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            # Put the batch back so the next flush retries it
+            with self._lock:
+                for key, counts in batch.items():
+                    pending = self._pending.setdefault(key, [0, 0, 0, 0])
+                    for i, value in enumerate(counts):
+                        pending[i] += value
+            raise
+        finally:
+            conn.close()
+
+        self.sync()
+        return len(batch)
+
+    def sync(self) -> int:
+        """Fold in rows any process wrote since the last sync, for the users held in memory"""
+        self._roll_period()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT user_id, period, requests, input_words, output_words, llm_tokens, version FROM usage "
+                "WHERE version > ? ORDER BY version",
+                (self._version,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for user_id, period, *stored, version in rows:
+                self._version = max(self._version, version)
+                if period != self._period or user_id not in self._totals:
+                    continue
+                pending = self._pending.get((self._period, user_id))
+                if pending:
+                    stored = [s + p for s, p in zip(stored, pending)]
+                self._totals[user_id] = stored
+        return len(rows)
+
+
+# Shared meter for this process
+usage_meter = UsageMeter()
+
+
+async def flush_periodically(interval: float = USAGE_FLUSH_INTERVAL) -> None:
+    """Background task: flush pending counters every ``interval`` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(usage_meter.flush)
+        except Exception:
+            logger.exception("Usage flush failed")
@@ -0,0 +1,186 @@
+"""
+Cached certification verification.
+
+Two layers sit in front of the registry lookup:
+- a Bloom filter over every ICS id in the certification store, so ids that
+  were never issued (bot probes, typos) are rejected without a registry call
+- an LRU of positive verification results for the popular, publicly shared ids
+
+The Bloom filter has no false negatives for ids it has seen. Ids issued by
+other workers reach it through ``catch_up()``, which a filter miss triggers
+at most once per ``catch_up_interval`` so probes can't turn into a query storm.
+
+The filter only knows the certification store. With a certifier whose
+registry holds ids the store never saw (``Certifier.ids_in_store`` False),
+the cache isn't ``authoritative``: filter misses still go to the registry
+lookup. That lasts until those ids have been backfilled into the store with
+
+    python -m backend.services.verification_cache registry-ids.txt [more.txt ...]
+
+(one ICS id per line, ``-`` for stdin). Running workers notice the finished
+backfill on their next catch-up.
+"""
+
+import argparse
+import hashlib
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from backend.config import VERIFY_BLOOM_CAPACITY, VERIFY_BLOOM_ERROR_RATE, VERIFY_CACHE_SIZE
+from backend.services.certification_store import CertificationStore, certification_store
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class VerificationCache:
+    """Bloom-filtered, LRU-cached wrapper around a registry lookup"""
+
+    def __init__(self, store: CertificationStore,
+                 lookup: Callable[[str], Optional[Dict[str, Any]]],
+                 cache_size: int = VERIFY_CACHE_SIZE,
+                 bloom_capacity: int = VERIFY_BLOOM_CAPACITY,
+                 bloom_error_rate: float = VERIFY_BLOOM_ERROR_RATE,
+                 catch_up_interval: float = 1.0,
+                 authoritative: bool = True):
+        self.store = store
+        self.lookup = lookup
+        self.cache_size = cache_size
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.catch_up_interval = catch_up_interval
+        # Whether a filter miss means the id doesn't exist; see the module docstring
+        self.authoritative = authoritative
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        self._seq = 0
+        self._last_catch_up = 0.0
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0}
+
+    def rebuild(self) -> int:
+        """Reload every known ICS id from the store into a fresh filter"""
+        self._check_backfill()
+        ids, seq = self.store.ids_since(0)
+        capacity = max(self.bloom_capacity, 2 * len(ids))
+        bloom = BloomFilter(capacity, self.bloom_error_rate)
+        for ics_id in ids:
+            bloom.add(ics_id)
+        with self._lock:
+            self._bloom = bloom
+            self._seq = seq
+            self._last_catch_up = time.monotonic()
+        return len(ids)
+
+    def catch_up(self) -> int:
+        """Add ids recorded (by any worker) since the last rebuild or catch-up"""
+        self._check_backfill()
+        ids, seq = self.store.ids_since(self._seq)
+        with self._lock:
+            self._seq = max(self._seq, seq)
+            self._last_catch_up = time.monotonic()
+        self._add_all(ids)
+        return len(ids)
+
+    def _check_backfill(self) -> None:
+        # Checked before the ids are read: the import commits before the flag is set, so the ids come with it
+        if not self.authoritative and self.store.backfilled():
+            self.authoritative = True
+
+    def add(self, ics_id: str) -> None:
+        """Register a freshly issued ICS id"""
+        self._add_all([ics_id])
+
+    def _add_all(self, ids: Iterable[str]) -> None:
+        rebuild = False
+        with self._lock:
+            for ics_id in ids:
+                self._bloom.add(ics_id)
+            rebuild = self._bloom.count > self._bloom.capacity
+        if rebuild:
+            # Past capacity the false-positive rate climbs; resize from the store
+            self.rebuild()
+
+    def might_exist(self, ics_id: str) -> bool:
+        if ics_id in self._bloom:
+            return True
+        if time.monotonic() - self._last_catch_up >= self.catch_up_interval:
+            self.catch_up()
+            return ics_id in self._bloom
+        return False
+
+    def verify(self, ics_id: str) -> Optional[Dict[str, Any]]:
+        """Verification record for ``ics_id``, or None if it doesn't exist"""
+        with self._lock:
+            cached = self._results.get(ics_id)
+            if cached is not None:
+                self._results.move_to_end(ics_id)
+                self.stats['hits'] += 1
+                return cached
+
+        if not self.might_exist(ics_id) and self.authoritative:
+            self.stats['rejected'] += 1
+            return None
+
+        self.stats['misses'] += 1
+        result = self.lookup(ics_id)
+        if result:
+            with self._lock:
+                self._results[ics_id] = result
+                if len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        return result
+
+
+def _read_ids(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        source = sys.stdin if path == "-" else open(path)
+        try:
+            for line in source:
+                if line.strip():
+                    yield line.strip()
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill external registry ICS ids into the certification store")
+    parser.add_argument("paths", nargs="+", help="files of ICS ids, one per line ('-' for stdin)")
+    args = parser.parse_args()
+    added = certification_store.import_registered(_read_ids(args.paths))
+    certification_store.mark_backfilled()
+    print(f"Imported {added} new ICS ids; verification filters are now authoritative")
+
+
+if __name__ == "__main__":
+    main()
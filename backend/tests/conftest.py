@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+import pytest
+
+# Keep the SQLite stores that route modules open at import out of the repo's data dir
+os.environ.setdefault("LOGIVAULT_DATA_DIR", tempfile.mkdtemp(prefix="logivault-tests-"))
+
+# Tests drive job workers in-process instead of the API spawning worker processes
+os.environ.setdefault("JOB_WORKERS", "0")
+
+# Lets tests sign session tokens for whichever user they act as
+os.environ.setdefault("AUTH_SECRET", "test-secret")
+
+
+@pytest.fixture
+def auth_headers():
+    """``auth_headers(user_id)``: request headers that authenticate as that user"""
+    from backend.utils.auth import issue_token
+    return lambda user_id: {'Authorization': f"Bearer {issue_token(user_id)}"}
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.OptiRewrite_optimized import LONG_SENTENCE_WORDS, TextAnalyzer, scan_text
+from backend.routes import analysis, optimization
+from backend.tests.test_text_scan import _fuzz_texts
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(analysis.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_annotations_agree_with_the_scan():
+    analyzer = TextAnalyzer()
+    for text in _fuzz_texts(2000, seed=17):
+        scan = scan_text(text)
+        sentences = analyzer.annotate_sentences(text)
+        assert [text[s['start']:s['end']].rstrip('.!?').strip() for s in sentences] == list(scan.sentences)
+        issues = [issue for s in sentences for issue in s['issues']]
+        for feature, issue_type in [('passive_voice', 'passive_voice'), ('hedge_words', 'hedge_word')]:
+            assert sum(issue['type'] == issue_type for issue in issues) == scan.complexity_counts[feature], text
+
+
+def test_long_sentences_are_flagged():
+    text = "Short one. " + " ".join(["word"] * (LONG_SENTENCE_WORDS + 1)) + "."
+    short, long = TextAnalyzer().annotate_sentences(text)
+    assert short['issues'] == []
+    assert long['issues'][0] == {'type': 'long_sentence', 'start': long['start'], 'end': len(text)}
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_repeated_text_is_served_from_cache(client):
+    request = {'content': 'The draft was reviewed by the editor. It seems rather long.'}
+    first = client.post("/api/analyze", json=request)
+    second = client.post("/api/analyze", json=request)
+
+    assert first.headers['X-Analysis-Cache'] == 'miss'
+    assert second.headers['X-Analysis-Cache'] == 'hit'
+    assert first.content == second.content
+    body = first.json()
+    assert body['analysis']['sentence_count'] == 2
+    assert [issue['type'] for issue in body['sentences'][0]['issues']] == ['passive_voice']
+
+
+def test_rejects_oversized_content(client, monkeypatch):
+    monkeypatch.setattr(analysis, 'ANALYZE_MAX_CHARS', 10)
+    response = client.post("/api/analyze", json={'content': 'x' * 11}).json()
+    assert not response['success'] and 'too long' in response['error']
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from backend.services.certification_batcher import CertificationBatcher
+from backend.services.merkle import build_tree, inclusion_proof, merkle_root, verify_inclusion
+
+
+def _hash(i):
+    return hashlib.sha256(f"document {i}".encode()).hexdigest()
+
+
+class StandInCertifier:
+    """Local ledger that records every root it is asked to register"""
+
+    def __init__(self, fail=False):
+        self.roots = []
+        self.fail = fail
+
+    async def register_root(self, root, leaf_count):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("ledger unavailable")
+        self.roots.append((root, leaf_count))
+        return {'ledger_entry': len(self.roots), 'root': root}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 8, 33])
+def test_every_leaf_proves_against_root(size):
+    hashes = [_hash(i) for i in range(size)]
+    levels = build_tree(hashes)
+    root = merkle_root(levels)
+    for index, content_hash in enumerate(hashes):
+        assert verify_inclusion(content_hash, inclusion_proof(levels, index), root)
+
+
+def test_proof_rejects_other_content_and_tampered_steps():
+    hashes = [_hash(i) for i in range(5)]
+    levels = build_tree(hashes)
+    root = merkle_root(levels)
+    proof = inclusion_proof(levels, 2)
+
+    assert not verify_inclusion(_hash(99), proof, root)
+    tampered = [(sibling, "L" if side == "R" else "R") for sibling, side in proof]
+    assert not verify_inclusion(hashes[2], tampered, root)
+    assert not verify_inclusion(hashes[2], proof[:-1], root)
+
+
+def test_concurrent_certifications_share_one_registration():
+    certifier = StandInCertifier()
+    batcher = CertificationBatcher(certifier.register_root, window=0.01, max_batch=1000)
+    hashes = [_hash(i) for i in range(250)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.certify(h) for h in hashes))
+
+    receipts = asyncio.run(run())
+
+    assert certifier.roots == [(receipts[0]['merkle_root'], 250)]
+    for content_hash, receipt in zip(hashes, receipts):
+        assert receipt['content_hash'] == content_hash
+        assert receipt['registration']['ledger_entry'] == 1
+        assert verify_inclusion(content_hash, receipt['proof'], receipt['merkle_root'])
+
+
+def test_full_batch_registers_without_waiting_for_window():
+    certifier = StandInCertifier()
+    batcher = CertificationBatcher(certifier.register_root, window=60, max_batch=4)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.certify(_hash(i)) for i in range(8))), timeout=5
+        )
+
+    receipts = asyncio.run(run())
+
+    assert [count for _, count in certifier.roots] == [4, 4]
+    assert {r['merkle_root'] for r in receipts} == {root for root, _ in certifier.roots}
+
+
+def test_registration_failure_reaches_every_caller():
+    batcher = CertificationBatcher(StandInCertifier(fail=True).register_root, window=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.certify(_hash(i)) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
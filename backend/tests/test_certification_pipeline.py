@@ -0,0 +1,170 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.certification_pipeline import CertificationPipeline
+from backend.services.certification_store import CERTIFIED, FAILED, PENDING, CertificationStore, certification_store
+from backend.services.certifier import Certifier, LocalCertifier
+from backend.services.merkle import verify_inclusion
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CertificationStore(str(tmp_path / "certifications.db"))
+
+
+class RecordingCertifier(Certifier):
+    name = "recording"
+
+    def __init__(self, fail=False):
+        self.certified = []
+        self.fail = fail
+
+    async def certify(self, ics_id, content_hash, score):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("registry unavailable")
+        self.certified.append(ics_id)
+        return {'ics_id': ics_id, 'content_hash': content_hash, 'score': score}
+
+    def verify(self, ics_id):
+        return None
+
+
+def test_certifier_is_abstract():
+    with pytest.raises(TypeError):
+        Certifier()
+
+
+def test_local_certifier_records_a_checkable_proof(store):
+    async def run():
+        certifier = LocalCertifier(store)
+        return certifier, await asyncio.gather(*(certifier.certify(f"ICS-{n}", f"{n:064x}", 95) for n in range(3)))
+
+    certifier, records = asyncio.run(run())
+    for n, record in enumerate(records):
+        assert record['certification_level'] == "audit_grade"
+        assert verify_inclusion(f"{n:064x}", record['proof'], record['merkle_root'])
+    # Certified together, so one ledger entry covers all three
+    assert len({record['ledger_entry'] for record in records}) == 1
+
+    store.record("ICS-0", "0" * 64, records[0], PENDING)
+    assert certifier.verify("ICS-0") is None
+    store.update("ICS-0", records[0], CERTIFIED)
+    assert certifier.verify("ICS-0")['merkle_root'] == records[0]['merkle_root']
+    assert certifier.verification_url("ICS-0") == "/api/verify-certification/ICS-0"
+
+
+def test_submitted_certifications_are_finished_in_the_background(store):
+    async def run():
+        certifier = RecordingCertifier()
+        pipeline = CertificationPipeline(certifier, store, worker="w")
+        await pipeline.start()
+        ics_id = await pipeline.submit("hash", 91.0, {'mode': 'clarity'})
+        record = await pipeline.wait_for(ics_id, timeout=5)
+        await pipeline.stop()
+        return ics_id, record
+
+    ics_id, record = asyncio.run(run())
+    assert record['status'] == CERTIFIED and record['ics_id'] == ics_id
+    assert store.get(ics_id)['status'] == CERTIFIED
+
+
+def test_a_failed_certification_is_stored_as_failed(store):
+    async def run():
+        pipeline = CertificationPipeline(RecordingCertifier(fail=True), store, worker="w")
+        await pipeline.start()
+        ics_id = await pipeline.submit("hash", 50.0, {})
+        record = await pipeline.wait_for(ics_id, timeout=5)
+        await pipeline.stop()
+        return ics_id, record
+
+    ics_id, record = asyncio.run(run())
+    assert record['status'] == FAILED and "registry unavailable" in record['error']
+    assert store.get(ics_id)['status'] == FAILED
+
+
+def test_waiters_resolve_when_the_outcome_cannot_be_stored(store, monkeypatch):
+    def broken_update(*args):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(store, "update", broken_update)
+
+    async def run():
+        pipeline = CertificationPipeline(RecordingCertifier(), store, worker="w")
+        await pipeline.start()
+        ics_id = await pipeline.submit("hash", 90.0, {})
+        waited = asyncio.get_running_loop().time()
+        record = await pipeline.wait_for(ics_id, timeout=5)
+        waited = asyncio.get_running_loop().time() - waited
+        await pipeline.stop()
+        return ics_id, record, waited
+
+    ics_id, record, waited = asyncio.run(run())
+    assert record is None and waited < 1
+    assert store.get(ics_id)['status'] == PENDING
+
+
+def test_each_pending_row_is_claimed_by_one_worker(tmp_path):
+    store = CertificationStore(str(tmp_path / "certifications.db"), lease=0.05)
+    for n in range(3):
+        store.record(f"ICS-{n}", "hash", {'score': 90.0}, PENDING)
+
+    assert [ics_id for ics_id, _, _ in store.claim_pending("a")] == ["ICS-0", "ICS-1", "ICS-2"]
+    assert store.claim_pending("b") == []
+    assert store.renew_claims("a") == 3
+    asyncio.run(asyncio.sleep(0.06))
+    # a stopped renewing: its rows go to the next worker that sweeps
+    assert len(store.claim_pending("b")) == 3
+
+
+def test_start_takes_over_only_unclaimed_rows(store):
+    store.record("ICS-orphan", "hash", {'score': 80.0}, PENDING)
+    store.record("ICS-held", "hash", {'score': 80.0}, PENDING, worker="live-worker")
+
+    async def run():
+        certifier = RecordingCertifier()
+        pipeline = CertificationPipeline(certifier, store, worker="w")
+        assert await pipeline.start() == 1
+        await pipeline.wait_for("ICS-orphan", timeout=5)
+        await pipeline.stop()
+        return certifier.certified
+
+    assert asyncio.run(run()) == ["ICS-orphan"]
+    assert store.get("ICS-held")['status'] == PENDING
+
+
+def _events(text):
+    return [json.loads(line[len("data: "):]) for line in text.splitlines() if line.startswith("data: ")]
+
+
+def test_certification_status_routes():
+    certification_store.record("ICS-route-done", "hash", {'ics_id': "ICS-route-done", 'score': 92.0}, CERTIFIED)
+    with TestClient(app) as client:
+        done = client.get("/api/certifications/ICS-route-done").json()
+        unknown = client.get("/api/certifications/ICS-nope").json()
+        pushed = _events(client.get("/api/certifications/ICS-route-done/events").text)
+        unknown_pushed = _events(client.get("/api/certifications/ICS-nope/events").text)
+
+    assert done['success'] and done['status'] == CERTIFIED and done['certification']['score'] == 92.0
+    assert unknown == {'success': False, 'error': 'Unknown ICS id'}
+    assert pushed == [{'ics_id': "ICS-route-done", 'status': CERTIFIED,
+                       'certification': done['certification']}]
+    assert unknown_pushed == [{'ics_id': "ICS-nope", 'status': 'unknown'}]
+
+
+def test_events_push_the_result_another_worker_stores():
+    certification_store.record("ICS-route-later", "hash", {'ics_id': "ICS-route-later"}, PENDING,
+                               worker="another-worker")
+    finish = threading.Timer(0.2, certification_store.update,
+                             ("ICS-route-later", {'ics_id': "ICS-route-later", 'score': 85.0}, CERTIFIED))
+    with TestClient(app) as client:
+        finish.start()
+        pushed = _events(client.get("/api/certifications/ICS-route-later/events").text)
+    finish.join()
+
+    assert pushed[0] == {'ics_id': "ICS-route-later", 'status': PENDING}
+    assert pushed[-1]['status'] == CERTIFIED and pushed[-1]['certification']['score'] == 85.0
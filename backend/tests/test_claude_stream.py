@@ -0,0 +1,85 @@
+import json
+import random
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.llm_router import CLOSED, AnthropicProvider, llm_router
+from backend.utils.formatter import EditorialStream, format_editorial
+
+PIECES = ["hello", "world", ".", "!", "?", " .", " ,", " :", ";", "Rewritten:", "Here's an improved version:",
+          "\n", "  ", "\t", "a.b", "...", "?!"]
+
+REPLY = ["Here's an improved version: the plan", " is", " ready .", " We ship", " on Monday!", "  Rewritten:",
+         " questions", " welcome"]
+
+
+def test_editorial_stream_matches_format_editorial():
+    rng = random.Random(1)
+    for _ in range(3000):
+        text = "".join(rng.choice(PIECES) + rng.choice(["", " ", "\n"]) for _ in range(rng.randint(0, 15)))
+        stream = EditorialStream()
+        pieces = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 6)
+            pieces.append(stream.feed(text[position:position + size]))
+            position += size
+        pieces.append(stream.finish())
+        assert "".join(pieces) == format_editorial(text), repr(text)
+
+
+def _anthropic_stream(request):
+    assert json.loads(request.content)["stream"] is True
+    events = [{'type': 'message_start', 'message': {'usage': {'input_tokens': 7, 'output_tokens': 1}}}]
+    events += [{'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': text}}
+               for text in REPLY]
+    events += [{'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': 11}},
+               {'type': 'message_stop'}]
+    body = "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events)
+    return httpx.Response(200, text=body, headers={'content-type': 'text/event-stream'})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(llm_router, "routes", llm_router.routes)
+    llm_router.set_providers([AnthropicProvider("claude-test", "test-key", "http://anthropic.test",
+                                                transport=httpx.MockTransport(_anthropic_stream))])
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_claude_streams_cleaned_sentences(client):
+    response = client.post("/claude", json={'prompt': 'Tidy this up', 'stream': True})
+    assert response.headers['content-type'].startswith("text/event-stream")
+    events = _events(response.text)
+
+    tokens = [data['text'] for name, data in events if name == 'token']
+    assert len(tokens) > 1
+    assert "".join(tokens) == format_editorial("".join(REPLY)) == "the plan is ready. We ship on Monday!  questions welcome"
+
+    name, done = events[-1]
+    assert name == 'done' and done['input_tokens'] == 7 and done['output_tokens'] == 11
+    assert 0 <= done['time_to_first_token'] <= done['total_time']
+
+    # Routed: the stream counts toward the route's health like a buffered reply
+    route = llm_router.routes[0]
+    assert route.state == CLOSED and route.latency is not None and route.failures == 0
+
+
+def test_retried_stream_is_replayed(client):
+    headers = {'Idempotency-Key': 'stream-1'}
+    first = client.post("/claude", json={'prompt': 'Tidy this up', 'stream': True}, headers=headers)
+    again = client.post("/claude", json={'prompt': 'Tidy this up', 'stream': True}, headers=headers)
+    assert again.headers.get('idempotent-replayed') == 'true'
+    assert again.text == first.text and again.headers['content-type'].startswith("text/event-stream")
@@ -0,0 +1,107 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes import optimization
+from backend.utils import compression
+from backend.utils.compression import BROTLI_AVAILABLE, CompressionMiddleware, EncodedBody, negotiate
+
+WORDY = "The utilization of this methodology will facilitate the implementation of the new process. " * 20
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br" if BROTLI_AVAILABLE else "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP ; q=0.8", "gzip"),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def _raw_app(body, media_type="application/json", chunks=1):
+    raw = FastAPI()
+
+    @raw.get("/")
+    def answer():
+        if chunks == 1:
+            return Response(body, media_type=media_type)
+        step = len(body) // chunks + 1
+
+        async def parts():
+            for start in range(0, len(body), step):
+                yield body[start:start + step]
+        return StreamingResponse(parts(), media_type=media_type)
+
+    raw.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(raw)
+
+
+def test_bodies_over_the_threshold_are_compressed():
+    body = json.dumps({'text': WORDY}).encode()
+    for chunks in (1, 4):
+        response = _raw_app(body, chunks=chunks).get("/", headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['content-encoding'] == "gzip" and response.headers['vary'] == "Accept-Encoding"
+        assert int(response.headers['content-length']) < len(body) and response.content == body
+
+    small = _raw_app(b'{"ok": true}').get("/", headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+    identity = _raw_app(body).get("/", headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in identity.headers and identity.content == body
+
+
+def test_streams_pass_through_uncompressed():
+    body = b"data: x\n\n" * 100
+    response = _raw_app(body, media_type="text/event-stream", chunks=4).get("/", headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers and response.content == body
+
+
+def test_encoded_body_keeps_a_copy_per_coding():
+    body = EncodedBody(WORDY.encode(), min_size=100)
+    assert gzip.decompress(body.encoded['gzip']) == body.raw
+    assert body.size == len(body.raw) + sum(map(len, body.encoded.values()))
+    assert body.select("gzip") == ("gzip", body.encoded['gzip'])
+    assert body.select(None) == (None, body.raw)
+    assert body.headers("gzip") == {'vary': "Accept-Encoding", 'content-encoding': "gzip"}
+    assert EncodedBody(b"{}", min_size=100).headers(None) == {}
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_cache_hits_skip_encoding_and_compression(monkeypatch):
+    request = {'content': WORDY + " It seems rather long."}
+    with TestClient(app) as client:
+        first = client.post("/api/analyze", json=request, headers={'Accept-Encoding': 'gzip'})
+        assert first.headers['x-analysis-cache'] == 'miss' and first.headers['content-encoding'] == "gzip"
+
+        calls = []
+        monkeypatch.setattr(compression, "compress", lambda *args: calls.append(args))
+        for accept in ("gzip", "identity"):
+            hit = client.post("/api/analyze", json=request, headers={'Accept-Encoding': accept})
+            assert hit.headers['x-analysis-cache'] == 'hit' and hit.json() == first.json()
+        assert hit.headers.get('content-encoding') is None
+        assert calls == []
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_idempotent_replays_are_compressed_once(monkeypatch, auth_headers):
+    headers = {'Idempotency-Key': 'compressed-replay', **auth_headers('compression-user')}
+    with TestClient(app) as client:
+        first = client.post("/api/optimize", json={'content': WORDY},
+                            headers={**headers, 'Accept-Encoding': 'gzip'})
+        assert first.headers['content-encoding'] == "gzip"
+
+        monkeypatch.setattr(compression, "compress", lambda *args: pytest.fail("recompressed a replay"))
+        replay = client.post("/api/optimize", json={'content': WORDY}, headers={**headers, 'Accept-Encoding': 'gzip'})
+        plain = client.post("/api/optimize", json={'content': WORDY}, headers={**headers, 'Accept-Encoding': 'identity'})
+    assert replay.headers['idempotent-replayed'] == "true" and replay.headers['content-encoding'] == "gzip"
+    assert 'content-encoding' not in plain.headers
+    assert replay.json() == plain.json() == first.json()
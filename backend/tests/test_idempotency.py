@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.llm_router import AnthropicProvider, llm_router
+from backend.utils.duplex import HTTPMiddleware
+from backend.utils.idempotency import idempotency_cache, idempotency_middleware
+
+
+@pytest.fixture
+def counted():
+    """An app whose /api/optimize counts its runs and answers as the body asks"""
+    raw = FastAPI()
+    runs = []
+
+    @raw.post("/api/optimize")
+    async def answer(request: Request):
+        data = await request.json()
+        runs.append(data)
+        if data.get('status'):
+            return JSONResponse(status_code=data['status'], content={'run': len(runs)})
+        if data.get('fail'):
+            return {'success': False, 'error': 'failed', 'run': len(runs)}
+        return {'success': True, 'run': len(runs), 'echo': data}
+
+    raw.add_middleware(HTTPMiddleware, dispatch=idempotency_middleware)
+    return TestClient(raw), runs
+
+
+def test_a_retry_is_replayed(counted):
+    client, runs = counted
+    headers = {'Idempotency-Key': 'replay'}
+    first = client.post("/api/optimize", json={'content': 'a'}, headers=headers)
+    again = client.post("/api/optimize", json={'content': 'a'}, headers=headers)
+    assert again.json() == first.json() == {'success': True, 'run': 1, 'echo': {'content': 'a'}}
+    assert again.headers['idempotent-replayed'] == "true" and len(runs) == 1
+
+
+def test_reusing_a_key_with_another_body_is_rejected(counted):
+    client, runs = counted
+    headers = {'Idempotency-Key': 'reused'}
+    client.post("/api/optimize", json={'content': 'a'}, headers=headers)
+    other = client.post("/api/optimize", json={'content': 'b'}, headers=headers)
+    assert other.status_code == 422 and "different request body" in other.json()['error']
+    assert len(runs) == 1
+
+
+@pytest.mark.parametrize("body", [{'status': 429}, {'status': 400}, {'status': 503}, {'fail': True}])
+def test_failures_are_not_stored(counted, body):
+    client, runs = counted
+    headers = {'Idempotency-Key': f"failure-{sorted(body.items())}"}
+    first = client.post("/api/optimize", json=body, headers=headers)
+    again = client.post("/api/optimize", json=body, headers=headers)
+    assert len(runs) == 2 and 'idempotent-replayed' not in again.headers
+    assert again.json()['run'] == first.json()['run'] + 1
+
+
+def test_a_failed_claude_reply_is_an_error_and_not_stored(monkeypatch):
+    calls = []
+
+    def unavailable(request):
+        calls.append(request)
+        return httpx.Response(529, json={'type': 'error'})
+
+    monkeypatch.setattr(llm_router, "routes", llm_router.routes)
+    llm_router.set_providers([AnthropicProvider("claude-test", "test-key", "http://anthropic.test",
+                                                transport=httpx.MockTransport(unavailable))])
+    headers = {'Idempotency-Key': 'claude-down'}
+    with TestClient(app) as client:
+        first = client.post("/claude", json={'prompt': 'Tidy this up'}, headers=headers)
+        again = client.post("/claude", json={'prompt': 'Tidy this up'}, headers=headers)
+        streamed = client.post("/claude", json={'prompt': 'Tidy this up', 'stream': True},
+                               headers={'Idempotency-Key': 'claude-stream-down'})
+    assert first.json()['error'].startswith("Error: ") and 'response' not in first.json()
+    assert 'idempotent-replayed' not in again.headers and len(calls) == 3
+    assert streamed.text.startswith("event: error\n")
+
+
+def test_a_stream_cancelled_before_it_starts_releases_its_key():
+    async def run():
+        messages = [{'type': 'http.request', 'body': b'{"prompt": "x"}', 'more_body': False}]
+
+        async def receive():
+            # The body, then a client that has already hung up
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            await asyncio.sleep(1)
+
+        async def never_iterated():
+            yield b"event: token\n\n"
+
+        async def call_next(request):
+            await request.body()
+            return StreamingResponse(never_iterated(), media_type="text/event-stream")
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/claude', 'headers': [(b'idempotency-key', b'cancelled')],
+                 'query_string': b''}
+        response = await idempotency_middleware(Request(scope, receive), call_next)
+        key = ('anon', '/claude', 'cancelled')
+        done = idempotency_cache.inflight[key][0]
+        await response(scope, receive, send)
+        return key, done
+
+    key, done = asyncio.run(run())
+    assert key not in idempotency_cache.inflight and done.done()
@@ -0,0 +1,163 @@
+import math
+import random
+import statistics
+import time
+from dataclasses import asdict
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import backend.OptiRewrite_optimized as engine_module
+from backend.OptiRewrite_optimized import TextAnalyzer
+from backend.routes import analysis, optimization
+from backend.tests.test_text_scan import SEPARATORS, VOCABULARY
+
+
+def _random_text(rng, words):
+    return "".join(rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(words))
+
+
+def _random_ops(rng, text):
+    ops = []
+    position = 0
+    for _ in range(rng.randint(1, 3)):
+        if position > len(text):
+            break
+        start = rng.randint(position, len(text))
+        end = rng.randint(start, min(len(text), start + rng.randint(0, 12)))
+        ops.append([start, end, _random_text(rng, rng.randint(0, 3))])
+        position = end + 1
+    return ops
+
+
+def _assert_same_analysis(incremental, full):
+    for key, value in asdict(full).items():
+        other = getattr(incremental, key)
+        if key == 'recommended_strategies':
+            assert set(other) == set(value)
+        elif key == 'tone_analysis':
+            assert all(math.isclose(other[tone], value[tone], abs_tol=1e-9) for tone in value)
+        elif isinstance(value, float):
+            assert math.isclose(other, value, abs_tol=1e-9), key
+        else:
+            assert other == value, key
+
+
+def _absolute_sentences(segments):
+    sentences = []
+    offset = 0
+    for segment in segments:
+        for sentence in segment['sentences']:
+            sentences.append(dict(
+                sentence,
+                start=sentence['start'] + offset,
+                end=sentence['end'] + offset,
+                issues=[dict(issue, start=issue['start'] + offset, end=issue['end'] + offset)
+                        for issue in sentence['issues']],
+            ))
+        offset += segment['length']
+    return sentences
+
+
+def test_incremental_analysis_matches_full_analysis():
+    rng = random.Random(3)
+    analyzer = TextAnalyzer()
+    for _ in range(150):
+        text = _random_text(rng, rng.randint(0, 30))
+        document = analyzer.open_document(text)
+        for _ in range(8):
+            ops = _random_ops(rng, text)
+            for start, end, inserted in reversed(ops):
+                text = text[:start] + inserted + text[end:]
+            document.apply(ops)
+
+            assert document.text == text
+            _assert_same_analysis(document.analysis(), analyzer.analyze_text(text))
+            segments = [document.segment_payload(segment) for segment in document.segments]
+            assert _absolute_sentences(segments) == analyzer.annotate_sentences(text)
+
+
+def test_edits_across_block_boundaries(monkeypatch):
+    # Tiny blocks, so edits span several of them and blocks keep splitting
+    monkeypatch.setattr(engine_module, "SEGMENT_BLOCK", 2)
+    rng = random.Random(11)
+    analyzer = TextAnalyzer()
+    for _ in range(30):
+        text = " ".join(rng.choice(["One.", "Two words!", "Three more words?"]) for _ in range(rng.randint(0, 40)))
+        document = analyzer.open_document(text)
+        for _ in range(20):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, min(len(text), start + rng.choice([0, 5, 60])))
+            inserted = rng.choice(["", "x", "New sentence. ", "A. B. C. D. E. "])
+            document.apply([[start, end, inserted]])
+            text = text[:start] + inserted + text[end:]
+
+            assert document.text == text and document.text_length == len(text)
+            _assert_same_analysis(document.analysis(), analyzer.analyze_text(text))
+            segments = [document.segment_payload(segment) for segment in document.segments]
+            assert _absolute_sentences(segments) == analyzer.annotate_sentences(text)
+
+
+def test_edit_cost_does_not_grow_with_the_segments_after_it():
+    analyzer = TextAnalyzer()
+    # The document repeats one sentence: scan each distinct segment once, so opening a long one is quick
+    features = {}
+    scan = analyzer._segment_features
+    analyzer._segment_features = lambda piece: features.get(piece) or features.setdefault(piece, scan(piece))
+
+    def edit_seconds(sentences):
+        document = analyzer.open_document("One sentence here. " * sentences)
+        times = []
+        for n in range(200):
+            started = time.perf_counter()
+            document.apply([[19 * 5, 19 * 5, "x" if n % 2 else "Another one. "]])
+            times.append(time.perf_counter() - started)
+        return statistics.median(times)
+
+    small, large = edit_seconds(200), edit_seconds(100_000)
+    # 500 times as many segments after the edit; rebuilding their offsets per edit is hundreds of times slower
+    assert large < small * 4
+
+
+def test_edit_only_rescans_nearby_segments():
+    analyzer = TextAnalyzer()
+    document = analyzer.open_document("One sentence here. " * 500)
+    (splice,) = document.apply([[19 * 250, 19 * 250, "It was written by me. "]])
+    assert splice['remove'] <= 3 and len(splice['insert']) <= 4
+
+
+def test_rejects_overlapping_ops():
+    document = TextAnalyzer().open_document("Some text here.")
+    with pytest.raises(ValueError):
+        document.apply([[5, 9, "x"], [6, 7, "y"]])
+    assert document.version == 0 and document.text == "Some text here."
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_websocket_session_streams_deltas():
+    app = FastAPI()
+    app.include_router(analysis.router)
+    client = TestClient(app)
+
+    text = "The plan was approved by the board. We start on Monday."
+    with client.websocket_connect("/api/analyze/session") as websocket:
+        websocket.send_json({'type': 'open', 'content': text})
+        snapshot = websocket.receive_json()
+        assert snapshot['type'] == 'snapshot' and snapshot['version'] == 0
+        segments = snapshot['segments']
+
+        websocket.send_json({'type': 'edit', 'version': 0, 'ops': [[len(text), len(text), " It seems rather late."]]})
+        delta = websocket.receive_json()
+        assert delta['type'] == 'delta' and delta['version'] == 1
+        assert delta['analysis']['sentence_count'] == 3
+        assert 'text_length' in delta['analysis'] and 'improvement_opportunities' not in delta['analysis']
+        for splice in delta['splices']:
+            segments[splice['index']:splice['index'] + splice['remove']] = splice['insert']
+
+        text += " It seems rather late."
+        assert _absolute_sentences(segments) == TextAnalyzer().annotate_sentences(text)
+
+        websocket.send_json({'type': 'edit', 'version': 0, 'ops': []})
+        stale = websocket.receive_json()
+        assert stale['type'] == 'error' and stale['version'] == 1
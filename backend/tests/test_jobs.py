@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+import types
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes.optimization import optimize_document
+from backend.services import job_worker
+from backend.services.job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore, job_store
+from backend.services.job_worker import JobWorker
+from backend.services.usage_meter import PLAN_QUOTAS, usage_meter
+from backend.utils import webhooks
+
+WORDY = "The utilization of this methodology will facilitate the implementation of the new process."
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _work(store=job_store, runner=optimize_document):
+    return asyncio.run(JobWorker(runner, store=store).run_one())
+
+
+def test_job_runs_like_optimize(client, auth_headers):
+    body = {'content': WORDY, 'mode': 'clarity', 'fields': []}
+    created = client.post("/api/jobs", json=body, headers=auth_headers('job-user'))
+    assert created.status_code == 202
+    job_id = created.json()['job_id']
+
+    queued = client.get(f"/api/jobs/{job_id}", headers=auth_headers('job-user')).json()
+    assert queued['status'] == QUEUED and queued['progress'] == {'done': 0, 'total': 1}
+    assert queued['kind'] == 'rewrite' and queued['results'] is None
+
+    assert _work()
+    job = client.get(f"/api/jobs/{job_id}", headers=auth_headers('job-user')).json()
+    direct = client.post("/api/optimize", json=body).json()
+    assert job['status'] == SUCCEEDED and job['progress'] == {'done': 1, 'total': 1}
+    assert job['results'][0].keys() == direct.keys() and job['results'][0]['original_content'] == WORDY
+
+    # Only the owner sees it
+    assert client.get(f"/api/jobs/{job_id}", headers=auth_headers('someone-else')).status_code == 404
+
+
+def test_batch_reports_each_document(client):
+    documents = [{'content': WORDY, 'fields': []}, {'content': '   '}, {'content': WORDY, 'response_format': 'nope'}]
+    job_id = client.post("/api/jobs", json={'documents': documents}).json()['job_id']
+    assert _work()
+
+    job = client.get(f"/api/jobs/{job_id}").json()
+    assert job['kind'] == 'batch' and job['status'] == SUCCEEDED and job['progress']['done'] == 3
+    assert [result['success'] for result in job['results']] == [True, False, False]
+    assert job['results'][1]['error'] == 'Empty content provided'
+
+
+@pytest.mark.parametrize("body, error", [
+    ({'documents': []}, "non-empty"),
+    ({'documents': [{'content': 3}]}, "documents[0]"),
+    ({'content': WORDY, 'webhook_url': 'ftp://example.com'}, "webhook_url"),
+    ({'content': WORDY, 'webhook_url': 'http://127.0.0.1:8000/hook'}, "not a public address"),
+    ({'content': WORDY, 'webhook_url': 'http://169.254.169.254/latest/meta-data'}, "not a public address"),
+    ({'content': WORDY, 'webhook_url': 'http://10.0.0.7/hook'}, "not a public address"),
+    ({'content': WORDY, 'webhook_url': 'http://[::ffff:192.168.1.1]/hook'}, "not a public address"),
+])
+def test_bad_job_requests(client, body, error):
+    response = client.post("/api/jobs", json=body)
+    assert response.status_code == 400 and error in response.json()['error']
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), lease=0.05, max_attempts=2)
+    job_id = store.enqueue("u", [{'content': WORDY}])
+
+    assert store.claim("dead-worker")['attempt'] == 1
+    assert store.claim("other") is None
+    time.sleep(0.06)
+
+    # The dead worker's lease ran out: the job goes to the next claim, and the old holder can't finish it
+    assert store.claim("live-worker")['attempt'] == 2
+    assert not store.finish(job_id, "dead-worker", [{'stale': True}])
+    assert store.finish(job_id, "live-worker", [{'ok': True}])
+    assert store.get(job_id)['results'] == [{'ok': True}]
+
+
+def test_job_abandoned_after_max_attempts(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), lease=0.0, max_attempts=2)
+    job_id = store.enqueue("u", [{'content': WORDY}])
+    assert store.claim("a") and store.get(job_id)['status'] == RUNNING
+    assert store.claim("b")
+    assert store.claim("c") is None
+    job = store.get(job_id)
+    assert job['status'] == FAILED and "2 attempts" in job['error']
+
+
+def test_finished_jobs_expire(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), retention=0.05)
+    job_id = store.enqueue("u", [{'content': WORDY}])
+    assert _work(store, lambda document, user_id, meter: asyncio.sleep(0, {'success': True}))
+    assert store.get(job_id)['status'] == SUCCEEDED
+    time.sleep(0.06)
+    assert store.get(job_id) is None
+    assert store.purge() == 1
+
+
+def test_webhook_gets_the_finished_job(tmp_path, monkeypatch):
+    deliveries = []
+
+    def handler(request):
+        deliveries.append(json.loads(request.content))
+        return httpx.Response(500 if len(deliveries) == 1 else 204)
+
+    monkeypatch.setattr(webhooks, "_resolve", lambda host, port: ["93.184.215.14"])
+    monkeypatch.setattr(job_worker, "WEBHOOK_BACKOFF", 0.0)
+    monkeypatch.setattr(job_worker, "httpx", types.SimpleNamespace(
+        AsyncClient=lambda **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler), **kwargs)
+    ))
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.enqueue("u", [{'content': WORDY}], webhook_url="https://example.com/hook")
+    assert _work(store, lambda document, user_id, meter: asyncio.sleep(0, {'success': True, 'n': len(document)}))
+
+    # The first attempt got a 500 and was retried
+    assert len(deliveries) == 2
+    assert deliveries[-1]['job_id'] == job_id and deliveries[-1]['results'] == [{'success': True, 'n': 1}]
+    assert 'user_id' not in deliveries[-1]
+    assert store.get(job_id)['webhook'] == {'url': "https://example.com/hook", 'status': "delivered"}
+
+
+def test_webhook_host_is_checked_again_before_delivery(tmp_path, monkeypatch):
+    # The host resolved publicly when the job was accepted, and privately by the time it finished
+    monkeypatch.setattr(webhooks, "_resolve", lambda host, port: ["10.0.0.7"])
+    monkeypatch.setattr(job_worker, "httpx", None)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.enqueue("u", [{'content': WORDY}], webhook_url="https://example.com/hook")
+    assert _work(store, lambda document, user_id, meter: asyncio.sleep(0, {'success': True}))
+    assert store.get(job_id)['webhook']['status'].startswith("refused: ")
+
+
+def test_jobs_larger_than_the_remaining_quota_are_refused(client, auth_headers):
+    usage_meter.record("nearly-spent", requests=PLAN_QUOTAS["Free"]["requests"] - 2)
+    documents = [{'content': WORDY}] * 3
+    refused = client.post("/api/jobs", json={'documents': documents}, headers=auth_headers("nearly-spent"))
+    assert refused.status_code == 429
+    assert refused.json()['error'] == "This needs 3 requests but the Free plan has 2 left this month"
+    accepted = client.post("/api/jobs", json={'documents': documents[:2]}, headers=auth_headers("nearly-spent"))
+    assert accepted.status_code == 202
+
+
+def test_a_reclaimed_job_does_not_meter_documents_twice(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), lease=0.05)
+    job_id = store.enqueue("u", [{'content': WORDY}] * 3)
+
+    # The first worker reports two documents, then dies
+    assert store.claim("dead-worker")['metered'] == 0
+    assert store.progress(job_id, "dead-worker", 2)
+    time.sleep(0.06)
+
+    metered = []
+
+    async def runner(document, user_id, meter):
+        metered.append(meter)
+        return {'success': True}
+    assert _work(store, runner)
+    assert metered == [False, False, True]
+    assert store.get(job_id)['status'] == SUCCEEDED
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from backend.OptiRewrite_optimized import AIRewriter, RewriteConfig, RewriteIntensity
+from backend.services.llm_router import (
+    CLOSED, HALF_OPEN, OPEN, AnthropicProvider, LLMProvider, NoProviderAvailable, OpenAIProvider, ProviderRouter,
+)
+
+
+class ScriptedProvider(LLMProvider):
+    """Plays back a script of (seconds, outcome) per call; outcome "fail" raises, "hang" never answers"""
+
+    def __init__(self, name, script, default=(0.0, "ok")):
+        super().__init__(model=name, api_key="test", base_url="http://mock")
+        self.script = list(script)
+        self.default = default
+        self.calls = 0
+
+    async def complete(self, prompt, system, max_tokens, usage, timeout):
+        self.calls += 1
+        seconds, outcome = self.script.pop(0) if self.script else self.default
+        if outcome == "hang":
+            await asyncio.Event().wait()
+        await asyncio.sleep(seconds)
+        if outcome == "fail":
+            raise RuntimeError(f"{self.model} failed")
+        return f"{self.model}: {prompt}"
+
+
+def _ask(router, times=1, **kwargs):
+    async def run():
+        return [await router.complete("hello", "system", **kwargs) for _ in range(times)]
+    return asyncio.run(run())
+
+
+def test_routes_to_the_faster_provider():
+    slow = ScriptedProvider("slow", [], default=(0.05, "ok"))
+    fast = ScriptedProvider("fast", [], default=(0.005, "ok"))
+    router = ProviderRouter([slow, fast], deadline=2)
+
+    # Both untried: configured order first, then the faster one takes the traffic
+    replies = _ask(router, times=8)
+    assert replies[0] == "slow: hello"
+    assert replies[-1] == "fast: hello"
+    assert slow.calls == 1 and fast.calls == 7
+
+
+def test_failures_open_the_breaker_and_a_probe_closes_it():
+    flaky = ScriptedProvider("flaky", [(0, "fail")] * 3)
+    backup = ScriptedProvider("backup", [], default=(0.01, "ok"))
+    router = ProviderRouter([flaky, backup], deadline=2, failure_threshold=3, reset_timeout=0.05)
+
+    # Keep the flaky route preferred so every request tries it until its breaker opens
+    for _ in range(3):
+        flaky_route = router.routes[0]
+        flaky_route.latency, flaky_route.error_rate = None, 0.0
+        assert _ask(router) == ["backup: hello"]
+    assert router.routes[0].state == OPEN and flaky.calls == 3
+
+    # Open: no traffic, however good its numbers look
+    router.routes[0].error_rate = 0.0
+    assert _ask(router) == ["backup: hello"] and flaky.calls == 3
+
+    # After the cool-down the next request probes it first; success closes the breaker
+    time.sleep(0.06)
+    assert _ask(router) == ["flaky: hello"]
+    assert router.routes[0].state == CLOSED and router.routes[0].failures == 0
+
+
+def test_failed_probe_reopens_the_breaker():
+    flaky = ScriptedProvider("flaky", [(0, "fail")] * 2)
+    backup = ScriptedProvider("backup", [])
+    router = ProviderRouter([flaky, backup], deadline=2, failure_threshold=1, reset_timeout=0.05)
+
+    _ask(router)
+    assert router.routes[0].state == OPEN
+    time.sleep(0.06)
+    assert router._admit(router.routes[0], time.monotonic()) and router.routes[0].state == HALF_OPEN
+    # Only one probe at a time
+    assert not router._admit(router.routes[0], time.monotonic())
+    router.routes[0].probing = False
+
+    assert _ask(router) == ["backup: hello"]
+    assert router.routes[0].state == OPEN and flaky.calls == 2
+
+
+def test_hanging_provider_leaves_time_for_the_next_route():
+    stuck = ScriptedProvider("stuck", [], default=(0, "hang"))
+    backup = ScriptedProvider("backup", [], default=(0.01, "ok"))
+    router = ProviderRouter([stuck, backup], deadline=0.4)
+
+    started = time.monotonic()
+    assert _ask(router) == ["backup: hello"]
+    # The stuck route got half the deadline, not all of it
+    assert time.monotonic() - started < 0.35
+    assert router.routes[0].error_rate > 0
+
+
+def test_no_provider_in_time_raises_and_ai_rewriter_falls_back():
+    stuck = ScriptedProvider("stuck", [], default=(0, "hang"))
+    broken = ScriptedProvider("broken", [], default=(0, "fail"))
+    router = ProviderRouter([stuck, broken], deadline=0.1)
+
+    started = time.monotonic()
+    with pytest.raises(NoProviderAvailable) as error:
+        _ask(router)
+    assert time.monotonic() - started < 0.2
+    assert "stuck" in str(error.value) and "broken" in str(error.value)
+
+    rewriter = AIRewriter(router=router)
+    config = RewriteConfig(intensity=RewriteIntensity.COMPLETE)
+    text = "The utilization of this methodology will facilitate the implementation."
+    rewritten = asyncio.run(rewriter.ai_rewrite(text, config))
+    assert rewritten and not rewritten.startswith(("stuck", "broken"))
+
+
+def test_ai_rewriter_without_providers_is_not_available():
+    assert AIRewriter(router=ProviderRouter([])).client is None
+
+
+def test_provider_wire_formats():
+    seen = {}
+
+    def handler(request):
+        body = json.loads(request.content)
+        seen[request.url.path] = (request.headers, body)
+        if request.url.path == "/v1/messages":
+            return httpx.Response(200, json={'content': [{'type': 'text', 'text': 'from claude'}],
+                                             'usage': {'input_tokens': 3, 'output_tokens': 2}})
+        return httpx.Response(200, json={'choices': [{'message': {'role': 'assistant', 'content': 'from gpt'}}],
+                                         'usage': {'prompt_tokens': 4, 'completion_tokens': 5}})
+
+    transport = httpx.MockTransport(handler)
+    anthropic = AnthropicProvider("claude-test", "a-key", "http://mock/", transport=transport)
+    openai = OpenAIProvider("gpt-test", "o-key", "http://mock", transport=transport)
+
+    usage = {}
+    assert asyncio.run(anthropic.complete("hi", "be brief", 50, usage, 1)) == "from claude"
+    assert usage == {'input_tokens': 3, 'output_tokens': 2}
+    headers, body = seen["/v1/messages"]
+    assert headers['x-api-key'] == "a-key" and body['system'] == "be brief" and body['model'] == "claude-test"
+
+    usage = {}
+    assert asyncio.run(openai.complete("hi", "be brief", 50, usage, 1)) == "from gpt"
+    assert usage == {'input_tokens': 4, 'output_tokens': 5}
+    headers, body = seen["/v1/chat/completions"]
+    assert headers['authorization'] == "Bearer o-key"
+    assert body['messages'][0] == {'role': 'system', 'content': 'be brief'}
+
+
+class DrippingProvider(ScriptedProvider):
+    """Streams its reply a word at a time, ``pause`` seconds apart"""
+
+    def __init__(self, name, pause, script=()):
+        super().__init__(name, script)
+        self.pause = pause
+
+    async def stream(self, prompt, system, max_tokens, usage, timeout):
+        reply = await self.complete(prompt, system, max_tokens, usage, timeout)
+        for word in reply.split():
+            yield word + " "
+            await asyncio.sleep(self.pause)
+
+
+def _stream(router, **kwargs):
+    async def run():
+        return [chunk async for chunk in router.stream("hello there", "system", **kwargs)]
+    return asyncio.run(run())
+
+
+def test_stream_falls_over_until_a_route_starts_answering():
+    stuck = ScriptedProvider("stuck", [], default=(0, "hang"))
+    broken = ScriptedProvider("broken", [], default=(0, "fail"))
+    backup = DrippingProvider("backup", pause=0)
+    router = ProviderRouter([stuck, broken, backup], deadline=1)
+
+    assert "".join(_stream(router)) == "backup: hello there "
+    states = {route.name: route for route in router.routes}
+    assert states["provider/stuck"].error_rate > 0 and states["provider/broken"].failures == 1
+    assert states["provider/backup"].failures == 0 and states["provider/backup"].latency is not None
+
+
+def test_stream_that_overruns_the_deadline_raises_and_counts_as_a_failure():
+    slow = DrippingProvider("slow", pause=0.2)
+    backup = DrippingProvider("backup", pause=0)
+    router = ProviderRouter([slow, backup], deadline=0.3)
+
+    chunks = []
+
+    async def run():
+        async for chunk in router.stream("one two three four", "system"):
+            chunks.append(chunk)
+
+    started = time.monotonic()
+    with pytest.raises(NoProviderAvailable):
+        asyncio.run(run())
+    # The reply started on the slow route, so it isn't restarted on another one
+    assert chunks[0] == "slow: " and backup.calls == 0
+    assert time.monotonic() - started < 0.45
+    assert router.routes[0].failures == 1
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import claude_api
+from backend.benchmarks.mock_llm import MockLLMConfig, create_app, echo_rewrite, latency_sampler, serve, use_mock
+from backend.OptiRewrite_optimized import AIRewriter, RewriteConfig, RewriteIntensity
+from backend.services.llm_router import AnthropicProvider, OpenAIProvider, llm_router
+
+FAST = MockLLMConfig(latency="fixed:0", tokens_per_second=0, seed=1)
+TEXT = "We will utilize the new tool in order to facilitate the very slow review."
+
+
+def test_echo_rewrite_is_deterministic_and_reads_the_rewriter_prompt():
+    prompt = AIRewriter()._create_rewrite_prompt(TEXT, RewriteConfig())
+    assert echo_rewrite(prompt) == echo_rewrite(prompt) == "We will use the new tool to help the slow review."
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert latency_sampler("fixed:250", rng)() == 0.25
+    assert all(0.1 <= latency_sampler("uniform:100,200", rng)() <= 0.2 for _ in range(100))
+    assert all(latency_sampler(spec, rng)() >= 0 for spec in ("normal:10,50", "lognormal:300,0.5", "exp:300")
+               for _ in range(100))
+    with pytest.raises(ValueError):
+        latency_sampler("pareto:1", rng)
+
+
+def test_router_providers_speak_both_formats():
+    transport = httpx.ASGITransport(app=create_app(FAST))
+    for provider in (AnthropicProvider("claude-mock", "mock", "http://mock", transport=transport),
+                     OpenAIProvider("gpt-mock", "mock", "http://mock", transport=transport)):
+        usage = {}
+        assert asyncio.run(provider.complete(TEXT, "Edit this.", 100, usage, 5)) == echo_rewrite(TEXT)
+        assert usage['output_tokens'] == len(echo_rewrite(TEXT).split()) and usage['input_tokens'] > 0
+
+
+def test_max_tokens_truncates():
+    client = TestClient(create_app(FAST))
+    body = client.post("/v1/messages", json={'model': 'm', 'max_tokens': 3, 'messages': [
+        {'role': 'user', 'content': TEXT}]}).json()
+    assert body['content'][0]['text'] == "We will use" and body['stop_reason'] == "max_tokens"
+    body = client.post("/v1/chat/completions", json={'model': 'm', 'max_tokens': 3, 'messages': [
+        {'role': 'user', 'content': TEXT}]}).json()
+    assert body['choices'][0]['finish_reason'] == "length"
+
+
+def test_openai_stream():
+    client = TestClient(create_app(FAST))
+    response = client.post("/v1/chat/completions", json={'model': 'm', 'stream': True, 'messages': [
+        {'role': 'user', 'content': TEXT}]})
+    lines = [line[len("data: "):] for line in response.text.split("\n") if line.startswith("data: ")]
+    assert lines[-1] == "[DONE]"
+    chunks = [json.loads(line)['choices'][0] for line in lines[:-1]]
+    assert "".join(chunk['delta'].get('content', '') for chunk in chunks) == echo_rewrite(TEXT)
+    assert chunks[-1]['finish_reason'] == "stop"
+
+
+def test_injected_errors():
+    client = TestClient(create_app(MockLLMConfig(latency="fixed:0", rate_limit_rate=1.0, retry_after=7)))
+    response = client.post("/v1/messages", json={'messages': [{'role': 'user', 'content': TEXT}]})
+    assert response.status_code == 429 and response.headers['retry-after'] == "7"
+    assert response.json()['error']['type'] == "rate_limit_error"
+
+    client = TestClient(create_app(MockLLMConfig(latency="fixed:0", error_rate=1.0)))
+    assert client.post("/v1/messages", json={'messages': []}).status_code == 529
+    assert client.post("/v1/chat/completions", json={'messages': []}).status_code == 500
+    assert client.get("/mock/stats").json() == {
+        'anthropic_requests': 1, 'anthropic_errors': 1, 'openai_requests': 1, 'openai_errors': 1}
+
+
+@pytest.fixture
+def mocked_backend(monkeypatch):
+    monkeypatch.setattr(llm_router, "routes", llm_router.routes)
+    with serve(MockLLMConfig(latency="fixed:5", tokens_per_second=2000, seed=1)) as url:
+        use_mock(url)
+        yield url
+
+
+def test_backend_clients_against_a_served_mock(mocked_backend):
+    async def run():
+        usage = {}
+        chunks = [chunk async for chunk in claude_api.stream_claude(TEXT, usage=usage)]
+        rewritten = await AIRewriter().ai_rewrite(TEXT, RewriteConfig(intensity=RewriteIntensity.COMPLETE))
+        return chunks, usage, rewritten
+
+    chunks, usage, rewritten = asyncio.run(run())
+    assert len(chunks) > 1 and "".join(chunks) == echo_rewrite(TEXT)
+    assert usage['output_tokens'] == len(chunks)
+    assert rewritten == echo_rewrite(TEXT)
+
+
+def test_openai_provider_streams_with_usage():
+    provider = OpenAIProvider("gpt-test", "mock", "http://mock", transport=httpx.ASGITransport(app=create_app(FAST)))
+
+    async def run():
+        usage = {}
+        chunks = [chunk async for chunk in provider.stream(TEXT, "", 100, usage, 5)]
+        return chunks, usage
+
+    chunks, usage = asyncio.run(run())
+    assert len(chunks) > 1 and "".join(chunks) == echo_rewrite(TEXT)
+    assert usage['output_tokens'] == len(chunks) and usage['input_tokens'] > 0
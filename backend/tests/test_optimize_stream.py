@@ -0,0 +1,147 @@
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes import optimization
+from backend.services.usage_meter import PLAN_QUOTAS, usage_meter
+from backend.utils.ndjson import ndjson_lines
+
+WORDY = "The utilization of this methodology will facilitate the implementation of the new process."
+
+
+def _lines(chunks, max_line):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in ndjson_lines(source(), max_line)]
+    return asyncio.run(collect())
+
+
+def test_ndjson_lines_across_chunk_boundaries():
+    rng = random.Random(3)
+    lines = [b'{"n": %d}' % n + b" " * rng.randint(0, 30) for n in range(200)]
+    body = b"\n\n".join(lines) + b"\n   \n" + b'{"last": true}'
+    for _ in range(50):
+        cuts = sorted(rng.sample(range(1, len(body)), 40))
+        chunks = [body[start:end] for start, end in zip([0] + cuts, cuts + [len(body)])]
+        assert _lines(chunks, 1000) == lines + [b'{"last": true}']
+
+
+def test_ndjson_lines_skips_long_lines():
+    body = [b'{"a": 1}\n' + b"x" * 30, b"y" * 30 + b"\n", b'{"b": 2}\n', b"z" * 50 + b'\n{"c": 3}']
+    assert _lines(body, 40) == [b'{"a": 1}', None, b'{"b": 2}', None, b'{"c": 3}']
+
+
+def _results(text):
+    rows = [json.loads(line) for line in text.splitlines()]
+    assert rows[-1]['done'] is True
+    return rows[:-1], rows[-1]['documents']
+
+
+def test_stream_answers_every_document():
+    documents = [json.dumps({'content': WORDY, 'fields': []}), "not json", json.dumps({'content': '  '}),
+                 "", json.dumps({'content': WORDY, 'response_format': 'patch'})]
+    with TestClient(app) as client:
+        response = client.post("/api/optimize/stream", content="\n".join(documents).encode(),
+                               headers={'Content-Type': 'application/x-ndjson'})
+    assert response.headers['content-type'] == "application/x-ndjson"
+    assert 'x-quota-plan' in response.headers
+    results, count = _results(response.text)
+
+    by_index = {row['index']: row for row in results}
+    assert count == 4 and sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[0]['success'] and by_index[0]['original_content'] == WORDY
+    assert by_index[1]['error'].startswith("Invalid JSON")
+    assert by_index[2]['error'] == "Empty content provided"
+    assert by_index[3]['response_format'] == "patch"
+
+
+def test_results_come_in_completion_order_within_the_in_flight_bound(monkeypatch):
+    running = []
+    peak = []
+
+    async def fake_optimize(data, user_id):
+        running.append(data['n'])
+        peak.append(len(running))
+        await asyncio.sleep(data['delay'])
+        running.remove(data['n'])
+        return {'success': True, 'n': data['n']}
+
+    monkeypatch.setattr(optimization, "optimize_document", fake_optimize)
+    monkeypatch.setattr(optimization, "OPTIMIZE_STREAM_IN_FLIGHT", 3)
+    body = "\n".join(json.dumps({'n': n, 'delay': 0.05 if n == 0 else 0.0}) for n in range(20))
+    with TestClient(app) as client:
+        results, count = _results(client.post("/api/optimize/stream", content=body.encode()).text)
+
+    assert count == 20 and max(peak) == 3
+    assert sorted(row['index'] for row in results) == list(range(20))
+    assert all(row['index'] == row['n'] for row in results)
+    # The slow first document doesn't hold back the ones behind it
+    assert results[0]['index'] != 0
+
+
+def test_stream_stops_once_the_quota_is_spent(monkeypatch, auth_headers):
+    async def fake_optimize(data, user_id):
+        usage_meter.record(user_id)
+        return {'success': True}
+
+    monkeypatch.setattr(optimization, "optimize_document", fake_optimize)
+    monkeypatch.setattr(optimization, "OPTIMIZE_STREAM_IN_FLIGHT", 1)
+    usage_meter.record("stream-quota-user", requests=PLAN_QUOTAS["Free"]["requests"] - 2)
+    body = "\n".join(json.dumps({'content': WORDY}) for _ in range(10))
+    with TestClient(app) as client:
+        response = client.post("/api/optimize/stream", content=body.encode(), headers=auth_headers("stream-quota-user"))
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [row['success'] for row in rows[:-1]] == [True, True, False]
+    assert rows[2]['error'] == "Monthly requests quota exceeded for the Free plan"
+    assert rows[-1] == {'done': True, 'documents': 3, 'quota_exceeded': True}
+
+
+@pytest.fixture
+def served_app():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield sock.getsockname()
+    server.should_exit = True
+    thread.join(timeout=5)
+    sock.close()
+
+
+def test_results_stream_back_while_the_body_is_still_being_sent(served_app):
+    """Each line is only sent after the previous result came back, so this deadlocks unless truly duplex"""
+    async def lockstep():
+        reader, writer = await asyncio.open_connection(*served_app)
+        writer.write(b"POST /api/optimize/stream HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n"
+                     b"Content-Type: application/x-ndjson\r\n\r\n")
+        received = b""
+        for index in range(3):
+            line = json.dumps({'content': WORDY, 'fields': []}).encode() + b"\n"
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            await writer.drain()
+            while b'"index": %d' % index not in received:
+                received += await asyncio.wait_for(reader.read(65536), 10)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        while b'"done": true' not in received:
+            received += await asyncio.wait_for(reader.read(65536), 10)
+        writer.close()
+        return received
+
+    received = asyncio.run(lockstep())
+    assert received.startswith(b"HTTP/1.1 200") and b'"documents": 3' in received
@@ -0,0 +1,72 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routes import optimization
+from backend.services.rewrite_scheduler import RewriteScheduler
+from backend.utils.patch import apply_patch, build_patch
+
+WORDS = "the a quick brown fox jumps over lazy dog , . ! data was processed by systems é 🙂".split()
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(optimization.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_build_and_apply_round_trip():
+    rng = random.Random(4)
+    for _ in range(1000):
+        original = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+        rewritten = " ".join(w for w in original.split() if rng.random() > 0.2) + rng.choice(["", " 🙂", " new."])
+        assert apply_patch(original, build_patch(original, rewritten)) == rewritten
+
+
+def test_apply_rejects_wrong_base():
+    patch = build_patch("one two three", "one 2 three")
+    with pytest.raises(ValueError):
+        apply_patch("one two three four", patch)
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+@pytest.mark.parametrize("content", [
+    # Surrounding whitespace is trimmed, so the patch is diffed afresh
+    "  The utilization of this methodology will facilitate the implementation. "
+    "It was completed by the team. We need to utilize numerous resources.\n",
+    # Already trimmed, so the patch reuses the engine's change spans
+    "The utilization of this methodology will facilitate the implementation. "
+    "It was completed by the team. We need to utilize numerous resources.",
+])
+def test_optimize_patch_response_round_trips(client, content, monkeypatch):
+    # Rewrite in this process so both runs see the seeded random state
+    monkeypatch.setattr(optimization, "rewrite_scheduler", RewriteScheduler(executor=ThreadPoolExecutor(1)))
+    request = {'content': content, 'mode': 'clarity', 'intensity': 'heavy'}
+
+    random.seed(1234)
+    full = client.post("/api/optimize", json=request).json()
+    random.seed(1234)
+    patched = client.post("/api/optimize", json=dict(request, response_format='patch')).json()
+
+    assert patched['success'] and patched['response_format'] == 'patch'
+    assert 'optimized_content' not in patched and 'original_content' not in patched
+    assert apply_patch(content, patched['patch']) == full['optimized_content']
+    assert set(patched) >= {'optimization_summary', 'metrics'}
+    assert 'quality_scores' not in patched
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_optimize_field_selector(client):
+    response = client.post("/api/optimize", json={
+        'content': 'Short text to optimize.', 'fields': 'metrics,recommendations'
+    }).json()
+    assert 'metrics' in response and 'recommendations' in response
+    assert 'quality_scores' not in response and 'optimization_summary' not in response
+
+    error = client.post("/api/optimize", json={'content': 'x', 'fields': ['bogus']}).json()
+    assert not error['success'] and 'bogus' in error['error']
@@ -0,0 +1,105 @@
+import sqlite3
+import time
+
+import pytest
+
+from backend.routes.stripe_webhook import apply_plan_updates
+from backend.services.plan_store import PENDING, PROCESSED, STALE, PlanStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlanStore(str(tmp_path / "plans.db"))
+
+
+def _record(store, event_id, user_id, plan, created):
+    return store.record_event(event_id, "customer.subscription.updated",
+                              {'user_id': user_id, 'plan': plan}, created)
+
+
+def test_redelivered_events_are_dropped(store):
+    assert _record(store, "evt_1", "u", "Pro", 100)
+    assert not _record(store, "evt_1", "u", "Pro", 100)
+    assert apply_plan_updates(store, "w") == 1
+    assert store.get_plan("u") == "Pro" and store.event_status("evt_1") == PROCESSED
+
+
+def test_an_older_event_arriving_late_is_skipped(store):
+    _record(store, "evt_new", "u", "Business", 200)
+    assert apply_plan_updates(store, "w") == 1
+    _record(store, "evt_old", "u", "Pro", 100)
+    assert apply_plan_updates(store, "w") == 0
+
+    assert store.event_status("evt_old") == STALE
+    assert store.get_plan("u") == "Business"
+    store.invalidate()
+    assert store.get_plan("u") == "Business"
+
+
+def test_events_are_applied_oldest_first(store):
+    _record(store, "evt_b", "u", "Business", 200)
+    _record(store, "evt_a", "u", "Pro", 100)
+    assert apply_plan_updates(store, "w") == 2
+    assert store.get_plan("u") == "Business"
+
+
+def test_a_claimed_event_belongs_to_one_worker(store):
+    _record(store, "evt_1", "u", "Pro", 100)
+    assert [event_id for event_id, _, _ in store.claim_events("a")] == ["evt_1"]
+    assert store.claim_events("b") == []
+    # b never held it, so it can't apply it either
+    assert store.apply_event("evt_1", "u", "Pro", 100, worker="b") is None
+    assert store.apply_event("evt_1", "u", "Pro", 100, worker="a") == PROCESSED
+
+
+def test_a_dead_workers_events_are_replayed_after_the_lease(tmp_path):
+    store = PlanStore(str(tmp_path / "plans.db"), lease=0.05)
+    _record(store, "evt_1", "u", "Pro", 100)
+    assert store.claim_events("dead")
+    assert apply_plan_updates(store, "live") == 0
+    time.sleep(0.06)
+    assert apply_plan_updates(store, "live") == 1
+    assert store.get_plan("u") == "Pro"
+
+
+def test_failed_updates_are_retried_on_the_next_pass(store, monkeypatch):
+    _record(store, "evt_1", "u", "Pro", 100)
+    real_apply = store.apply_event
+    monkeypatch.setattr(store, "apply_event", lambda *args: (_ for _ in ()).throw(sqlite3.OperationalError("locked")))
+    assert apply_plan_updates(store, "w") == 0
+    assert store.event_status("evt_1") == PENDING
+
+    monkeypatch.setattr(store, "apply_event", real_apply)
+    assert apply_plan_updates(store, "w") == 1
+    assert store.get_plan("u") == "Pro"
+
+
+def test_sync_picks_up_other_workers_writes(tmp_path):
+    path = str(tmp_path / "plans.db")
+    mine, theirs = PlanStore(path), PlanStore(path)
+    assert mine.get_plan("u") == "Free"
+
+    theirs.set_plan("u", "Pro")
+    theirs.set_plan("someone-else", "Business")
+    assert mine.get_plan("u") == "Free"
+    assert mine.sync() == 2
+    assert mine.get_plan("u") == "Pro" and mine.get_plan("someone-else") == "Business"
+    assert mine.sync() == 0
+
+
+def test_older_databases_get_the_new_columns(tmp_path):
+    path = str(tmp_path / "plans.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE user_plans (user_id TEXT PRIMARY KEY, plan TEXT NOT NULL, version INTEGER NOT NULL, "
+        "updated_at REAL NOT NULL);"
+        "CREATE TABLE stripe_events (event_id TEXT PRIMARY KEY, event_type TEXT NOT NULL, payload TEXT NOT NULL, "
+        "status TEXT NOT NULL DEFAULT 'pending', received_at REAL NOT NULL, processed_at REAL);"
+        "INSERT INTO stripe_events (event_id, event_type, payload, received_at) "
+        "VALUES ('evt_0', 'customer.subscription.updated', '{\"user_id\": \"u\", \"plan\": \"Pro\"}', 0);"
+    )
+    conn.close()
+
+    store = PlanStore(path)
+    assert apply_plan_updates(store, "w") == 1
+    assert store.get_plan("u") == "Pro"
@@ -0,0 +1,89 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes import optimization
+from backend.utils.responses import FastJSONResponse
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(optimization.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_full_response_keeps_its_keys(client):
+    response = client.post("/api/optimize", json={
+        'content': 'The report was reviewed by the committee. We need to utilize numerous resources.'
+    }).json()
+
+    # Unset optional fields are dropped, so the payload matches the hand-built dict it replaced
+    assert list(response) == [
+        'success', 'optimization_id', 'original_content', 'optimized_content',
+        'optimization_summary', 'metrics', 'quality_scores', 'recommendations', 'timestamp',
+    ]
+    assert set(response['quality_scores']) == set(optimization.QUALITY_METRIC_NAMES.values())
+    assert all(name in optimization.STRATEGY_NAMES.values()
+               for name in response['optimization_summary']['strategies_applied'])
+    assert set(response['metrics']['strategy_costs']) == set(response['optimization_summary']['strategies_applied'])
+
+
+def test_error_response_is_just_success_and_error(client):
+    assert client.post("/api/optimize", json={'content': '   '}).json() == {
+        'success': False, 'error': 'Empty content provided'
+    }
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_text_only_request(client):
+    response = client.post("/api/optimize", json={'content': 'It was approved by the board.', 'fields': []}).json()
+    assert list(response) == ['success', 'optimization_id', 'original_content', 'optimized_content', 'timestamp']
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_targets_are_searched_and_reported(client):
+    response = client.post("/api/optimize", json={
+        'content': 'In order to win we cannot utilize it. Due to the fact that we won, the team is very happy.',
+        'target_length_ratio': 0.9, 'search_budget': 60, 'fields': ['metrics'],
+    }).json()
+    search = response['metrics']['target_search']
+    assert search['candidates'] >= 1 and search['seconds'] <= 60
+    assert search['targets_met'] == (abs(search['length_ratio'] - 0.9) <= 0.05)
+
+    assert client.post("/api/optimize", json={'content': 'Some text.', 'target_readability': 3}).json() == {
+        'success': False, 'error': 'target_readability must be between 0 and 1'
+    }
+
+
+@pytest.mark.parametrize("path", ["/api/modes", "/api/sample/blog_post", "/", "/healthz"])
+def test_precomputed_routes_revalidate_by_etag(path):
+    with TestClient(app) as client:
+        first = client.get(path)
+        etag = first.headers['etag']
+        assert first.status_code == 200 and first.headers['cache-control']
+        # Shared caches may keep these, so no per-user quota headers
+        assert 'x-quota-plan' not in first.headers
+        assert client.get(path).content == first.content and client.get(path).headers['etag'] == etag
+
+        for if_none_match in (etag, f'"other", W/{etag}', "*"):
+            cached = client.get(path, headers={'If-None-Match': if_none_match})
+            assert cached.status_code == 304 and cached.content == b"" and cached.headers['etag'] == etag
+        assert client.get(path, headers={'If-None-Match': '"other"'}).content == first.content
+
+
+def test_catalogs_are_long_lived_and_probes_revalidate():
+    with TestClient(app) as client:
+        assert "max-age=86400" in client.get("/api/modes").headers['cache-control']
+        assert client.get("/api/sample/blog_post").json()['sample']['title'] == 'Blog Post Sample'
+        assert client.get("/healthz").headers['cache-control'] == "no-cache"
+
+        # An unknown sample is a 404 that no cache keeps or revalidates
+        for headers in ({}, {'If-None-Match': '*'}):
+            missing = client.get("/api/sample/nope", headers=headers)
+            assert missing.status_code == 404 and missing.headers['cache-control'] == "no-store"
+            assert 'etag' not in missing.headers
+            assert missing.json() == {'success': False, 'error': 'Invalid sample type'}
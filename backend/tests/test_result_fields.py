@@ -0,0 +1,37 @@
+import asyncio
+import random
+
+import pytest
+
+from backend.OptiRewrite_optimized import RESULT_FIELDS, OptiRewriteEngine, RewriteConfig, expand_result_fields
+
+TEXT = "The report was reviewed by the committee. It is important to note that we need to utilize numerous resources."
+
+
+def _rewrite(engine, fields):
+    random.seed(21)
+    return asyncio.run(engine.rewrite(TEXT, RewriteConfig(fields=fields)))
+
+
+def test_text_only_skips_every_component():
+    result = _rewrite(OptiRewriteEngine(), [])
+    assert result.rewritten_text
+    assert all(getattr(result, name) is None for name in RESULT_FIELDS)
+
+
+def test_dependencies_are_computed_with_the_field():
+    assert expand_result_fields(['confidence_score']) == {'confidence_score', 'quality_scores', 'improvement_metrics'}
+    result = _rewrite(OptiRewriteEngine(), ['confidence_score'])
+    assert result.confidence_score is not None and result.quality_scores is not None
+    assert result.change_summary is None and result.recommendations is None
+
+    with pytest.raises(ValueError):
+        expand_result_fields(['bogus'])
+
+
+def test_completed_result_matches_a_full_rewrite():
+    engine = OptiRewriteEngine()
+    full = _rewrite(engine, None)
+    partial = engine.complete_result(_rewrite(engine, []))
+    for name in RESULT_FIELDS:
+        assert getattr(partial, name) == getattr(full, name), name
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.requests import Request
+
+from backend.services.rewrite_scheduler import (
+    FORGET_IDLE_AFTER, PLAN_CONCURRENCY, FairQueue, Job, RewriteScheduler
+)
+from backend.utils.auth import get_user_id
+
+
+def _job(user_id, plan="Free", cost=1.0, at=0.0, name=None):
+    return Job(user_id=user_id, plan=plan, cost=cost, enqueued_at=at, payload=name)
+
+
+def _drain(queue, now=0.0):
+    """Pop and release until nothing is eligible, returning payloads in dispatch order"""
+    order = []
+    while True:
+        job = queue.pop(now)
+        if job is None:
+            return order
+        order.append(job.payload)
+        queue.release(job)
+
+
+def test_start_tags_interleave_users_by_weight():
+    queue = FairQueue(max_wait=1e9)
+    for n in range(4):
+        queue.push(_job("free", "Free", cost=10, name=f"free{n}"))
+        queue.push(_job("pro", "Pro", cost=10, name=f"pro{n}"))
+
+    # Pro's weight is 4x Free's, so its tags advance a quarter as fast
+    assert [job.start_tag for job in queue._queues["pro"]] == [0.0, 2.5, 5.0, 7.5]
+    assert [job.start_tag for job in queue._queues["free"]] == [0.0, 10.0, 20.0, 30.0]
+    assert _drain(queue) == ["free0", "pro0", "pro1", "pro2", "pro3", "free1", "free2", "free3"]
+
+
+def test_a_large_document_only_delays_its_own_user():
+    queue = FairQueue(max_wait=1e9)
+    queue.push(_job("big", cost=5_000_000, name="huge"))
+    queue.push(_job("big", cost=10, name="big-next"))
+    for n in range(3):
+        queue.push(_job(f"small{n}", cost=10, name=f"small{n}"))
+    order = _drain(queue)
+    assert order.index("big-next") == len(order) - 1
+    assert order[:4] == ["huge", "small0", "small1", "small2"]
+
+
+def test_per_user_cap_holds_back_further_jobs():
+    queue = FairQueue(max_wait=1e9)
+    for n in range(3):
+        queue.push(_job("free", "Free", name=f"free{n}"))
+        queue.push(_job("biz", "Business", name=f"biz{n}"))
+
+    running = []
+    while (job := queue.pop(0.0)) is not None:
+        running.append(job)
+    # One slot for Free, every Business job fits under its cap
+    assert sorted(job.payload for job in running) == ["biz0", "biz1", "biz2", "free0"]
+    assert PLAN_CONCURRENCY["Business"] >= 3 and len(queue) == 2
+
+    queue.release(next(job for job in running if job.user_id == "free"))
+    assert queue.pop(0.0).payload == "free1"
+    assert queue.pop(0.0) is None
+
+
+def test_a_starved_job_jumps_the_fair_order():
+    queue = FairQueue(max_wait=30)
+    queue.push(_job("heavy", "Free", cost=1000, at=0.0, name="old"))
+    queue.push(_job("heavy", "Free", cost=1000, at=0.0, name="old-next"))
+    for n in range(5):
+        queue.push(_job(f"light{n}", "Enterprise", cost=1, at=0.0, name=f"light{n}"))
+
+    first = queue.pop(0.0)
+    queue.release(first)
+    assert first.payload == "old"
+    # Before max_wait the fair order puts the heavy user's second job last...
+    assert queue.pop(10.0).payload == "light0"
+    # ...past it, the oldest waiting job goes next regardless of its tag
+    assert queue.pop(31.0).payload == "old-next"
+
+
+def test_a_starved_job_still_respects_its_users_cap():
+    queue = FairQueue(max_wait=30)
+    queue.push(_job("u", at=0.0, name="running"))
+    queue.push(_job("u", at=0.0, name="waiting"))
+    queue.push(_job("other", at=40.0, name="other"))
+    assert queue.pop(0.0).payload == "running"
+    assert queue.pop(100.0).payload == "other"
+    assert queue.pop(100.0) is None
+
+
+def test_idle_users_are_forgotten():
+    queue = FairQueue()
+    for n in range(10):
+        queue.push(_job(f"user{n}", cost=1))
+        queue.release(queue.pop(0.0))
+    assert queue._last_finish == {} and queue._caps == {}
+
+    # Under constant load, users the virtual time has passed are swept
+    queue.push(_job("always-busy"))
+    assert queue.pop(0.0).user_id == "always-busy"
+    for n in range(10 * FORGET_IDLE_AFTER):
+        queue.push(_job("steady", cost=1))
+        queue.push(_job(f"user{n}", cost=1))
+        queue.release(queue.pop(0.0))
+        queue.release(queue.pop(0.0))
+    assert len(queue._last_finish) <= 2 * FORGET_IDLE_AFTER
+    assert set(queue._caps) == set(queue._last_finish)
+
+
+def test_scheduler_bounds_concurrency_off_the_loop():
+    async def run():
+        scheduler = RewriteScheduler(max_workers=2, executor=ThreadPoolExecutor(4))
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work(n):
+            with lock:
+                active.append(n)
+                peak.append(len(active))
+            time.sleep(0.05)  # blocks its worker, not the loop
+            with lock:
+                active.remove(n)
+            return n
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        results = await asyncio.gather(*(scheduler.submit(f"user{n}", "Business", 1, work, n) for n in range(6)))
+        ticker.cancel()
+        return results, max(peak), ticks
+
+    results, peak, ticks = asyncio.run(run())
+    assert results == list(range(6)) and peak == 2
+    assert ticks > 10
+
+
+def test_coroutine_jobs_run_on_the_loop():
+    async def run():
+        scheduler = RewriteScheduler(max_workers=1, executor=ThreadPoolExecutor(1))
+
+        async def work(n):
+            await asyncio.sleep(0)
+            return threading.get_ident(), n
+
+        return await scheduler.submit("u", "Free", 1, work, 3), threading.get_ident()
+
+    (thread, n), loop_thread = asyncio.run(run())
+    assert thread == loop_thread and n == 3
+
+
+def test_jobs_run_in_worker_processes_by_default():
+    async def run():
+        scheduler = RewriteScheduler(max_workers=2)
+        try:
+            return await asyncio.gather(*(scheduler.submit(f"user{n}", "Free", 1, os.getpid) for n in range(2)))
+        finally:
+            scheduler.close()
+
+    assert os.getpid() not in asyncio.run(run())
+
+
+def _anonymous_request(host, authorization=b"Bearer not-a-session-token"):
+    return Request({'type': 'http', 'method': 'POST', 'path': '/api/optimize', 'query_string': b'',
+                    'headers': [(b'authorization', authorization)], 'client': (host, 5000)})
+
+
+def test_anonymous_clients_get_their_own_lanes():
+    first, second = get_user_id(_anonymous_request("203.0.113.1")), get_user_id(_anonymous_request("203.0.113.2"))
+    assert first != second and get_user_id(_anonymous_request("203.0.113.1")) == first
+
+    queue = FairQueue(max_wait=1e9)
+    for n in range(2):
+        queue.push(_job(first, "Free", name=f"first{n}"))
+        queue.push(_job(second, "Free", name=f"second{n}"))
+    # Free allows one rewrite per user at a time, and each client is its own user
+    assert PLAN_CONCURRENCY["Free"] == 1
+    assert {queue.pop(0.0).payload, queue.pop(0.0).payload} == {"first0", "second0"}
+    assert queue.pop(0.0) is None
@@ -0,0 +1,36 @@
+import asyncio
+import pickle
+
+import pytest
+
+from backend.OptiRewrite_optimized import (
+    ImprovementMetrics,
+    OptiRewriteEngine,
+    QualityMetric,
+    QualityScores,
+)
+
+
+def test_quality_scores_read_like_a_dict():
+    scores = QualityScores({QualityMetric.CLARITY: 0.5, QualityMetric.READABILITY: 0.25})
+    assert list(scores) == list(QualityMetric)
+    assert scores[QualityMetric.CLARITY] == 0.5
+    assert scores.get(QualityMetric.COHERENCE) == 0.0
+    assert scores.get('clarity', -1) == -1
+    assert dict(scores) == {metric: scores[metric] for metric in QualityMetric}
+    assert scores == dict(scores)
+    assert pickle.loads(pickle.dumps(scores)) == scores
+
+    with pytest.raises(KeyError):
+        scores['clarity'] = 1.0
+
+
+def test_results_are_slotted_and_array_backed():
+    result = asyncio.run(OptiRewriteEngine().rewrite("The report was reviewed by the committee."))
+    assert not hasattr(result, '__dict__')
+    assert isinstance(result.quality_scores, QualityScores)
+    assert isinstance(result.improvement_metrics, ImprovementMetrics)
+    assert len(result.improvement_metrics.vector) == len(ImprovementMetrics.KEYS)
+    assert result.improvement_metrics['overall_quality_score'] == pytest.approx(
+        sum(result.quality_scores.values()) / len(QualityMetric)
+    )
@@ -0,0 +1,86 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+import backend.OptiRewrite_optimized as engine_module
+from backend.OptiRewrite_optimized import OptiRewriteEngine, RewriteConfig, RewriteIntensity, RewriteMode, split_shards
+
+SENTENCES = [
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and it was approved by the board.",
+    "However, your team is there, and their results were somewhat disappointing?",
+    "Data was processed by the system at the end of the day!",
+    "Ok.",
+]
+
+
+def _document(rng, paragraphs):
+    return "\n\n".join(
+        " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 8))) + rng.choice(["", " We did it"])
+        for _ in range(paragraphs)
+    )
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(engine_module, 'SHARD_MIN_CHARS', 500)
+    monkeypatch.setattr(engine_module, 'SHARD_TARGET_CHARS', 300)
+
+
+def _assert_scored_like_joined_text(engine, text, config, result):
+    quality = engine.quality_assessor.assess_quality(text, result.rewritten_text, config)
+    improvements = engine._calculate_improvements(text, result.rewritten_text, result.quality_scores)
+    for metric, score in quality.items():
+        assert math.isclose(result.quality_scores[metric], score, abs_tol=1e-9), metric
+    for name, value in improvements.items():
+        assert math.isclose(result.improvement_metrics[name], value, abs_tol=1e-9), name
+
+
+def test_shards_are_whole_paragraphs():
+    text = _document(random.Random(1), 40)
+    shards = split_shards(text, target_chars=300)
+    assert len(shards) > 1 and "".join(shards) == text
+    for shard in shards[:-1]:
+        assert len(shard) >= 300 and shard.rstrip()[-1] in '.!?' and shard.endswith("\n\n")
+
+    # A paragraph that ends mid-sentence is not a cut
+    assert split_shards("First part\n\nsecond part.", target_chars=1) == ["First part\n\nsecond part."]
+
+
+def test_sharded_scores_match_the_joined_text(small_shards):
+    rng = random.Random(2)
+    engine = OptiRewriteEngine(shard_workers=0)
+    calls = []
+    rewrite_shard = engine._rewrite_shard
+    engine._rewrite_shard = lambda *args: calls.append(args) or rewrite_shard(*args)
+
+    for mode in RewriteMode:
+        text = _document(rng, 30)
+        config = RewriteConfig(mode=mode, intensity=rng.choice(list(RewriteIntensity)), forbidden_words=['board'])
+        result = asyncio.run(engine.rewrite(text, config))
+        assert "board" not in result.rewritten_text and "\n" not in result.rewritten_text
+        _assert_scored_like_joined_text(engine, text, config, result)
+    assert len(calls) > len(RewriteMode)
+
+
+def test_required_keywords_fall_back_to_scoring_the_text(small_shards):
+    engine = OptiRewriteEngine(shard_workers=0)
+    text = _document(random.Random(3), 30)
+    config = RewriteConfig(required_keywords=['synergy'])
+    result = asyncio.run(engine.rewrite(text, config))
+    assert 'synergy' in result.rewritten_text
+    _assert_scored_like_joined_text(engine, text, config, result)
+
+
+def test_shards_run_in_worker_processes(small_shards):
+    engine = OptiRewriteEngine(shard_workers=2)
+    try:
+        text = _document(random.Random(4), 30)
+        config = RewriteConfig(fields=['confidence_score'])
+        result = asyncio.run(engine.rewrite(text, config))
+        assert engine._shard_pool is not None
+        _assert_scored_like_joined_text(engine, text, config, result)
+    finally:
+        engine.close()
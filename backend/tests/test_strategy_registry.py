@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+from backend.OptiRewrite_optimized import (
+    STRATEGY_REGISTRY, OptiRewriteEngine, RewriteConfig, RewriteIntensity, RewriteMode, RewriteStrategy,
+    RewritingStrategies, StrategyCost, TextAnalyzer, changed_characters,
+)
+
+PHRASES = [
+    "The report was reviewed by the committee", "we cannot utilize it", "in order to win",
+    "It is very unique", "the data is not ready", "Plain words here", "due to the fact that we won't",
+    "They do not commence", "numerous people", "Dogs run fast",
+]
+
+
+def _texts(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield " ".join(rng.choice(PHRASES) + rng.choice([".", ",", "!", ""]) for _ in range(rng.randint(0, 6)))
+
+
+def test_unimplemented_strategies_are_dropped_and_the_rest_ordered():
+    engine = OptiRewriteEngine(shard_workers=0)
+    analysis = TextAnalyzer().analyze_text("It was approved by the board. " * 20)
+    for mode in RewriteMode:
+        strategies = engine._determine_strategies(analysis, RewriteConfig(mode=mode))
+        assert strategies == [strategy for strategy in STRATEGY_REGISTRY if strategy in strategies]
+        assert RewriteStrategy.STYLE_CONSISTENCY not in strategies
+
+
+def test_triggers_only_rule_out_no_ops():
+    strategies = RewritingStrategies()
+    for text in _texts(500, seed=1):
+        for mode in (RewriteMode.FORMALITY, RewriteMode.CONVERSATIONAL):
+            config = RewriteConfig(mode=mode, intensity=RewriteIntensity.HEAVY)
+            for spec in STRATEGY_REGISTRY.values():
+                if spec.trigger is not None and not spec.trigger(strategies, text, config):
+                    assert spec.apply(strategies, text, config) == text, (spec.strategy, text)
+
+
+def test_fused_sentence_pass_matches_applying_each_strategy():
+    engine = OptiRewriteEngine(shard_workers=0)
+    config = RewriteConfig(intensity=RewriteIntensity.LIGHT)
+    fused = [RewriteStrategy.SENTENCE_RESTRUCTURE, RewriteStrategy.ENGAGEMENT_BOOST]
+    for text in _texts(200, seed=2):
+        random.seed(7)
+        expected = engine.strategies.apply_engagement_boost(
+            engine.strategies.apply_sentence_restructure(text, config.intensity), config.intensity
+        )
+        random.seed(7)
+        costs = {}
+        assert engine._apply_strategies(text, fused, config, costs) == expected
+        assert set(costs) == set(fused) and all(cost.runs == 1 for cost in costs.values())
+
+
+def test_costs_are_reported_and_accumulated():
+    engine = OptiRewriteEngine(shard_workers=0)
+    config = RewriteConfig(mode=RewriteMode.CONVERSATIONAL)
+    result = asyncio.run(engine.rewrite("We cannot utilize numerous tools. Plain words here.", config))
+
+    assert set(result.strategy_costs) == set(result.strategies_applied)
+    tone = result.strategy_costs[RewriteStrategy.TONE_ADJUSTMENT]
+    assert tone.runs == 1 and tone.characters_changed == changed_characters("cannot", "can't") and tone.seconds > 0
+
+    asyncio.run(engine.rewrite("Plain words here.", config))
+    stats = engine.strategy_stats[STRATEGY_REGISTRY[RewriteStrategy.TONE_ADJUSTMENT].stats_key(config)]
+    assert (stats.runs, stats.skips, stats.trigger_checks) == (1, 1, 2)
+
+
+def test_triggers_are_checked_while_they_pay_off():
+    assert StrategyCost(runs=1).worth_triggering()  # still warming up
+    # Rarely a no-op: the check costs more than the runs it saves
+    assert not StrategyCost(runs=20, no_ops=1, seconds=0.2, trigger_checks=20, trigger_seconds=0.05).worth_triggering()
+    # Usually a no-op and expensive to run
+    assert StrategyCost(runs=5, skips=15, seconds=0.6, trigger_checks=20, trigger_seconds=0.1).worth_triggering()
+
+
+def test_changed_characters():
+    assert changed_characters("same", "same") == 0
+    assert changed_characters("we cannot go", "we can't go") == 2
+    assert changed_characters("abc", "abcdef") == 3
+    assert changed_characters("", "xy") == 2
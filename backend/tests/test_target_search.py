@@ -0,0 +1,85 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+import backend.OptiRewrite_optimized as engine_module
+from backend.OptiRewrite_optimized import (
+    STRATEGY_REGISTRY, OptiRewriteEngine, RewriteConfig, TargetSearcher, strategy_passes,
+)
+
+WORDY = " ".join([
+    "The utilization of this methodology will facilitate the implementation of the new process.",
+    "The report was reviewed by the committee and we cannot approve it in order to save time.",
+    "Due to the fact that the results were very good, the team is not worried.",
+    "Our team met on Monday to plan the next release of the product.",
+] * 10)
+
+
+@pytest.fixture
+def unbounded(monkeypatch):
+    monkeypatch.setattr(engine_module, 'SEARCH_BUDGET_MULTIPLE', 1000)
+
+
+def _searcher(engine, config):
+    return TargetSearcher(engine, WORDY, len(WORDY.split()), config, {})
+
+
+def test_candidates_are_measured_like_the_whole_text(unbounded):
+    engine = OptiRewriteEngine(shard_workers=0)
+    config = RewriteConfig(target_readability=1.0, target_length_ratio=0.5, search_budget=60)
+    searcher = _searcher(engine, config)
+    searcher.run(list(STRATEGY_REGISTRY))
+    assert len(searcher._candidates) > 10
+    for candidate in searcher._candidates.values():
+        analysis = engine.text_analyzer.analyze_text(candidate.text)
+        assert math.isclose(candidate.readability, analysis.readability_score, abs_tol=1e-12)
+        assert candidate.length_ratio == analysis.word_count / len(WORDY.split())
+
+
+def test_search_stops_once_the_targets_are_met(unbounded):
+    engine = OptiRewriteEngine(shard_workers=0)
+    result = asyncio.run(engine.rewrite(WORDY, RewriteConfig(target_length_ratio=0.85, search_budget=60)))
+    search = result.target_search
+    assert search.targets_met and abs(search.length_ratio - 0.85) <= 0.05
+    assert search.length_ratio == len(result.rewritten_text.split()) / len(WORDY.split())
+    assert set(result.strategy_costs) <= set(STRATEGY_REGISTRY)
+
+    # Met by the plain rewrite's pipeline: nothing else is tried
+    random.seed(5)
+    plain = asyncio.run(engine.rewrite(WORDY, RewriteConfig()))
+    readability = engine.text_analyzer.analyze_text(plain.rewritten_text).readability_score
+    random.seed(5)
+    searched = asyncio.run(engine.rewrite(WORDY, RewriteConfig(target_readability=readability)))
+    assert searched.target_search.candidates == 1 and searched.rewritten_text == plain.rewritten_text
+    assert searched.strategies_applied == plain.strategies_applied
+
+
+def test_budget_bounds_the_search():
+    engine = OptiRewriteEngine(shard_workers=0)
+    config = RewriteConfig(target_readability=1.0, search_budget=0)
+    result = asyncio.run(engine.rewrite(WORDY, config))
+    assert result.target_search.candidates == 1 and not result.target_search.targets_met
+
+
+def test_prefixes_are_rewritten_once(unbounded):
+    engine = OptiRewriteEngine(shard_workers=0)
+    passes = []
+    apply_pass = engine._apply_pass
+    engine._apply_pass = lambda *args: passes.append(args[1]) or apply_pass(*args)
+
+    searcher = _searcher(engine, RewriteConfig(target_readability=1.0, target_length_ratio=0.5, search_budget=60))
+    searcher.run(list(STRATEGY_REGISTRY))
+    without_memo = sum(len(strategy_passes(strategies)) for _, strategies in searcher._candidates)
+    assert len(passes) == len(searcher._prefixes) < without_memo
+
+    # Sentence passes after a changed prefix only rewrite the sentences that changed
+    sentence_passes = sum(1 for specs in passes if specs[0].unit == 'sentence')
+    sentences = WORDY.count('.')
+    assert sum(map(len, searcher._sentences.values())) < sentence_passes * sentences
+
+    # Stats are kept per intensity a pass ran at
+    intensities = {intensity for intensity, _ in searcher._candidates}
+    assert len(intensities) > 1
+    assert {key[-1] for key in engine.strategy_stats if 'intensity' in STRATEGY_REGISTRY[key[0]].reads} <= intensities
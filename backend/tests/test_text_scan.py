@@ -0,0 +1,112 @@
+import random
+import re
+import time
+
+import pytest
+
+from backend.OptiRewrite_optimized import (
+    CONFUSABLE_WORDS,
+    RewritingStrategies,
+    TextAnalyzer,
+    _ScanCache,
+    _scan_cache,
+    repeats_on_a_line,
+    scan_text,
+)
+
+# The regex rules the single-pass scan replaced
+REFERENCE_PATTERNS = {
+    'passive_voice': re.compile(r'\b(was|were|been|being)\s+\w+ed\b', re.IGNORECASE),
+    'complex_sentences': re.compile(r'[,;:]\s*\w+'),
+    'long_words': re.compile(r'\b\w{8,}\b'),
+    'technical_terms': re.compile(r'\b[A-Z]{2,}\b|\b\w*[0-9]+\w*\b'),
+    'nominalizations': re.compile(r'\b\w+(tion|sion|ment|ness|ity|ism)\b', re.IGNORECASE),
+    'hedge_words': re.compile(r'\b(somewhat|rather|quite|fairly|relatively|possibly)\b', re.IGNORECASE),
+}
+
+REFERENCE_CONFUSABLES = [
+    r"\b(there|their|they're)\b.*\b(there|their|they're)\b",
+    r"\b(your|you're)\b.*\b(your|you're)\b",
+]
+
+REFERENCE_PASSIVE = [
+    (r'(\w+)\s+was\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1'),
+    (r'(\w+)\s+were\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1'),
+    (r'(\w+)\s+is\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2s \1'),
+    (r'(\w+)\s+are\s+(\w+ed)\s+by\s+(\w+)', r'\3 \2 \1'),
+]
+
+VOCABULARY = [
+    "was", "WAS", "were", "been", "being", "is", "are", "by", "fixed", "ED", "ed",
+    "tion", "nation", "Tension", "ism", "ity", "city", "NASA", "AB", "A", "x9", "9",
+    "naïve", "quite", "Rather", "their", "there", "they're", "your", "you're",
+    "comment", "kindness", "documentation",
+]
+SEPARATORS = [" ", "  ", "\n", "\t", ", ", ";", ":", " , ", ".", "!", "?", "...", "'", "-", ""]
+
+
+def _fuzz_texts(count, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(
+            rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 14))
+        )
+
+
+def _reference_syllables(text):
+    total = 0
+    for word in re.findall(r'\b\w+\b', text.lower()):
+        syllables = max(1, len(re.findall(r'[aeiouy]+', word)))
+        if word.endswith('e') and syllables > 1:
+            syllables -= 1
+        total += syllables
+    return total
+
+
+def test_scan_counts_match_reference_regexes():
+    for text in _fuzz_texts(3000):
+        scan = scan_text(text)
+        for feature, pattern in REFERENCE_PATTERNS.items():
+            assert scan.complexity_counts[feature] == len(pattern.findall(text)), (feature, text)
+        assert scan.syllables == _reference_syllables(text), text
+        assert list(scan.pieces) == re.split(r'[.!?]+', text)
+
+
+def test_scan_cache_is_bounded_by_text_size(monkeypatch):
+    cache = _ScanCache(max_entries=4, max_chars=100)
+    for n in range(3):
+        cache.put(f"{n}" * 40, scan_text("x"))
+    # 120 chars is over the budget, so the oldest went
+    assert cache.get("0" * 40) is None and cache.get("1" * 40) is not None
+    cache.put("big" * 40, scan_text("x"))
+    assert cache.get("big" * 40) is None and cache.get("2" * 40) is not None
+
+    scan_text.cache_clear()
+    monkeypatch.setattr(_scan_cache, "max_chars", 1000)
+    text = "Word. " * 200
+    assert scan_text(text) is not scan_text(text)
+    assert scan_text("Short text.") is scan_text("Short text.")
+
+
+def test_confusable_check_matches_reference_search():
+    for text in _fuzz_texts(3000, seed=11):
+        for pattern, reference in zip(CONFUSABLE_WORDS, REFERENCE_CONFUSABLES):
+            assert repeats_on_a_line(pattern, text) == bool(re.search(reference, text, re.IGNORECASE)), text
+
+
+def test_anchored_passive_rewrites_match_reference():
+    strategies = RewritingStrategies()
+    for text in _fuzz_texts(3000, seed=13):
+        expected = text
+        for pattern, replacement in REFERENCE_PASSIVE:
+            expected = re.sub(pattern, replacement, expected, flags=re.IGNORECASE)
+        assert strategies._convert_passive_to_active(text) == expected, text
+
+
+@pytest.mark.parametrize("text", ['a' * 200_000, 'Go. ' * 50_000])
+def test_pathological_inputs_stay_fast(text):
+    # Both took minutes before the rules were made linear
+    started = time.perf_counter()
+    RewritingStrategies()._convert_passive_to_active(text)
+    TextAnalyzer().analyze_text(text)
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,76 @@
+import random
+from difflib import SequenceMatcher
+
+from backend.utils.textdiff import diff_texts, match_sequences, similarity_ratio
+
+WORDS = "the a quick brown fox jumps over lazy dog , . ! data was processed by systems".split()
+
+
+def _edited_pairs(count, seed=5):
+    rng = random.Random(seed)
+    for _ in range(count):
+        original = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 40)))
+        words = original.split(" ")
+        for _ in range(rng.randint(0, 6)):
+            roll = rng.random()
+            if words and roll < 0.3:
+                words.pop(rng.randrange(len(words)))
+            elif roll < 0.6:
+                words.insert(rng.randint(0, len(words)), rng.choice(WORDS))
+            elif words:
+                words[rng.randrange(len(words))] = rng.choice(WORDS) + "x"
+        yield original, " ".join(words)
+
+
+def _apply(original, rewritten, spans):
+    parts = []
+    position = 0
+    for span in spans:
+        assert span.a_start >= position
+        parts.append(original[position:span.a_start])
+        parts.append(rewritten[span.b_start:span.b_end])
+        position = span.a_end
+    parts.append(original[position:])
+    return "".join(parts)
+
+
+def test_spans_rebuild_the_rewritten_text():
+    for original, rewritten in _edited_pairs(2000):
+        diff = diff_texts(original, rewritten)
+        assert _apply(original, rewritten, diff.spans) == rewritten
+        unchanged = len(original) - sum(span.a_end - span.a_start for span in diff.spans)
+        assert unchanged == diff.matched_chars
+
+
+def test_span_ops():
+    diff = diff_texts("keep this word", "keep that word please")
+    assert {span.op for span in diff.spans} <= {'replace', 'insert', 'delete'}
+    assert diff_texts("same text", "same text").spans == []
+    assert [span.op for span in diff_texts("", "new").spans] == ['insert']
+    assert [span.op for span in diff_texts("old", "").spans] == ['delete']
+
+
+def test_matches_are_a_common_subsequence():
+    rng = random.Random(9)
+    for _ in range(1000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 30)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 30)))
+        pairs = match_sequences(a, b)
+        assert all(a[i] == b[j] for i, j in pairs)
+        assert all(p[0] < q[0] and p[1] < q[1] for p, q in zip(pairs, pairs[1:]))
+
+
+def test_ratio_tracks_sequence_matcher_on_short_text():
+    deviations = [
+        abs(similarity_ratio(a, b) - SequenceMatcher(None, a, b).ratio())
+        for a, b in _edited_pairs(500, seed=8) if len(a) < 150
+    ]
+    assert sum(deviations) / len(deviations) < 0.02
+    assert similarity_ratio("", "") == 1.0
+
+
+def test_repetitive_text_still_anchors():
+    # No token is unique here; n-gram anchors must keep the ratio meaningful
+    original = " ".join(["alpha beta gamma"] * 20000)
+    rewritten = original.replace("gamma", "delta", 5)
+    assert similarity_ratio(original, rewritten) > 0.99
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes import optimization
+from backend.services.usage_meter import PLAN_QUOTAS, UsageMeter, usage_meter
+from backend.utils import quota
+
+
+def test_usage_is_counted_and_flushed(tmp_path):
+    meter = UsageMeter(str(tmp_path / "usage.db"))
+    meter.record("u", input_words=10)
+    meter.record("u", input_words=5, llm_tokens=7)
+    assert meter.totals("u") == [2, 15, 0, 7]
+    assert meter.flush() == 1
+
+    reopened = UsageMeter(str(tmp_path / "usage.db"))
+    assert reopened.totals("u") == [2, 15, 0, 7]
+
+
+def test_flush_picks_up_other_workers_usage(tmp_path):
+    path = str(tmp_path / "usage.db")
+    mine, theirs = UsageMeter(path), UsageMeter(path)
+    assert mine.totals("u") == [0, 0, 0, 0]
+
+    theirs.record("u", input_words=100)
+    theirs.flush()
+    # Nothing pending here, but the tick still reads the other worker's rows
+    assert mine.flush() == 0
+    assert mine.totals("u") == [1, 100, 0, 0]
+
+    mine.record("u")
+    theirs.record("u")
+    theirs.flush()
+    mine.flush()
+    assert mine.totals("u") == [3, 100, 0, 0]
+
+
+def test_the_cache_is_bounded_and_keeps_pending_usage(tmp_path):
+    meter = UsageMeter(str(tmp_path / "usage.db"), max_users=3)
+    for n in range(10):
+        meter.record(f"user{n}", input_words=n)
+    assert len(meter._totals) == 3
+    assert not meter.is_loaded("user0")
+    # An evicted user's unflushed usage comes back with them
+    assert meter.totals("user0") == [1, 0, 0, 0]
+    assert meter.totals("user9") == [1, 9, 0, 0]
+
+
+def test_quota_state_is_loaded_off_the_event_loop(monkeypatch):
+    threads = []
+    load = quota._load_quota
+    monkeypatch.setattr(quota, "_load_quota", lambda user_id: threads.append(threading.get_ident()) or load(user_id))
+
+    async def run():
+        assert await quota.load_quota("off-loop-user") == "Free"
+        assert await quota.load_quota("off-loop-user") == "Free"
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 1 and threads[0] != loop_thread
+
+
+def test_spent_quota_gets_a_429(auth_headers):
+    limit = PLAN_QUOTAS["Free"]["requests"]
+    usage_meter.record("spent-user", requests=limit)
+    headers = auth_headers("spent-user")
+    with TestClient(app) as client:
+        rejected = client.post("/api/optimize", json={'content': "Some text."}, headers=headers)
+        assert rejected.status_code == 429
+        assert rejected.json()['error'] == "Monthly requests quota exceeded for the Free plan"
+        assert rejected.headers['x-quota-remaining-requests'] == "0"
+
+        # Unmetered routes still answer, and report the quota
+        analyzed = client.post("/api/analyze", json={'content': "Some text."}, headers=headers)
+        assert analyzed.status_code == 200 and analyzed.headers['x-quota-plan'] == "Free"
+
+
+def test_responses_report_remaining_quota(auth_headers):
+    usage_meter.record("counted-user", input_words=1000)
+    with TestClient(app) as client:
+        response = client.post("/api/analyze", json={'content': "Some text."}, headers=auth_headers("counted-user"))
+    limits = PLAN_QUOTAS["Free"]
+    assert response.headers['x-quota-remaining-requests'] == str(limits["requests"] - 1)
+    assert response.headers['x-quota-remaining-input-words'] == str(limits["input_words"] - 1000)
+
+
+def test_anonymous_clients_have_separate_quotas():
+    limit = PLAN_QUOTAS["Free"]["requests"]
+    usage_meter.record("anon:198.51.100.1", requests=limit)
+
+    async def post(host, path):
+        transport = httpx.ASGITransport(app=app, client=(host, 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json={'content': "Some text."})
+
+    async def run():
+        spent = await post("198.51.100.1", "/api/optimize")
+        other = await post("198.51.100.2", "/api/analyze")
+        return spent, other
+
+    spent, other = asyncio.run(run())
+    assert spent.status_code == 429
+    assert other.status_code == 200 and other.headers['x-quota-remaining-requests'] == str(limit)
+
+
+@pytest.mark.skipif(not optimization.OPTIREWRITE_AVAILABLE, reason="OptiRewrite engine not available")
+def test_optimize_and_certify_is_metered(auth_headers):
+    headers = auth_headers("certify-user")
+    content = "The report was reviewed by the committee and it was approved by the board."
+    with TestClient(app) as client:
+        response = client.post("/api/optimize-and-certify", json={'content': content}, headers=headers)
+        assert response.json()['success']
+        requests, input_words, _, _ = usage_meter.totals("certify-user")
+        assert requests == 1 and input_words == len(content.split())
+
+        usage_meter.record("certify-user", requests=PLAN_QUOTAS["Free"]["requests"])
+        assert client.post("/api/optimize-and-certify", json={'content': content}, headers=headers).status_code == 429
@@ -0,0 +1,90 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routes import certnode_integration
+from backend.services.certification_store import CERTIFIED, CertificationStore
+from backend.services.verification_cache import BloomFilter, VerificationCache
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CertificationStore(str(tmp_path / "certifications.db"))
+
+
+def _issue(store, ics_id):
+    store.record(ics_id, "hash", {'ics_id': ics_id, 'certification_level': 'audit_grade'}, CERTIFIED)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    added = [f"ICS-{n}" for n in range(1000)]
+    for ics_id in added:
+        bloom.add(ics_id)
+    assert all(ics_id in bloom for ics_id in added)
+    false_positives = sum(f"other-{n}" in bloom for n in range(10000))
+    assert false_positives < 300 and bloom.count == 1000
+
+
+def test_unknown_ids_never_reach_the_registry(store):
+    lookups = []
+    _issue(store, "ICS-known")
+    cache = VerificationCache(store, lambda ics_id: lookups.append(ics_id) or store.get(ics_id),
+                              catch_up_interval=60)
+    cache.rebuild()
+    assert cache.verify("ICS-probe") is None
+    assert cache.verify("ICS-known")['ics_id'] == "ICS-known"
+    assert lookups == ["ICS-known"] and cache.stats['rejected'] == 1
+
+
+def test_repeat_lookups_come_from_the_lru(store):
+    lookups = []
+    for n in range(3):
+        _issue(store, f"ICS-{n}")
+    cache = VerificationCache(store, lambda ics_id: lookups.append(ics_id) or store.get(ics_id), cache_size=2)
+    cache.rebuild()
+    for ics_id in ("ICS-0", "ICS-1", "ICS-0", "ICS-2", "ICS-0", "ICS-1"):
+        cache.verify(ics_id)
+    # ICS-1 was least recently used when ICS-2 came in
+    assert lookups == ["ICS-0", "ICS-1", "ICS-2", "ICS-1"]
+    assert cache.stats['hits'] == 2 and list(cache._results) == ["ICS-0", "ICS-1"]
+
+
+def test_ids_issued_by_other_workers_are_caught_up(store):
+    cache = VerificationCache(store, store.get, catch_up_interval=0)
+    cache.rebuild()
+    _issue(store, "ICS-elsewhere")
+    assert cache.verify("ICS-elsewhere")['ics_id'] == "ICS-elsewhere"
+
+
+def test_registry_ids_fall_through_until_backfilled(store):
+    registry = {"ICS-external": {'ics_id': "ICS-external"}}
+    cache = VerificationCache(store, registry.get, catch_up_interval=0, authoritative=False)
+    cache.rebuild()
+    assert cache.verify("ICS-external") == registry["ICS-external"]
+    assert cache.verify("ICS-probe") is None and cache.stats['rejected'] == 0
+
+    assert store.import_registered(["ICS-external", "ICS-external", "ICS-other"]) == 2
+    store.mark_backfilled()
+    assert cache.verify("ICS-probe") is None
+    assert cache.authoritative and cache.stats['rejected'] == 1
+    assert cache.verify("ICS-other") is None and cache.stats['rejected'] == 1
+
+
+def test_batch_verification(monkeypatch, store):
+    _issue(store, "ICS-batch")
+    cache = VerificationCache(store, store.get)
+    cache.rebuild()
+    monkeypatch.setattr(certnode_integration, "verification_cache", cache)
+    with TestClient(app) as client:
+        response = client.post("/api/verify-certifications", json={'ics_ids': ["ICS-batch", "ICS-missing"]}).json()
+        single = client.get("/api/verify-certification/ICS-batch").json()
+        too_many = client.post("/api/verify-certifications", json={'ics_ids': ["x"] * 10001}).json()
+        empty = client.post("/api/verify-certifications", json={'ics_ids': []}).json()
+
+    assert response['total'] == 2 and response['verified_count'] == 1 and response['unverified_count'] == 1
+    assert [result['verified'] for result in response['results']] == [True, False]
+    assert response['results'][0]['audit_grade'] and response['results'][1]['ics_id'] == "ICS-missing"
+    assert single['verified'] and single['certification']['ics_id'] == "ICS-batch"
+    assert not too_many['success'] and "10000" in too_many['error']
+    assert empty == {'success': False, 'error': 'No ics_ids provided'}
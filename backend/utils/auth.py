@@ -0,0 +1,87 @@
+"""
+Caller identity from a signed session token.
+
+The web app's server issues a token after login and the browser sends it as
+``Authorization: Bearer <token>``. A token is
+``<user id, base64url>.<expiry, unix seconds>.<HMAC-SHA256 of the first two
+parts, base64url>``, signed with the AUTH_SECRET both servers share. The
+user id matches the userId set in Stripe subscription metadata. Plans,
+quotas, idempotency keys and job ownership all hang off this id, so a
+client-chosen header is never trusted for it. A missing, malformed, expired
+or forged token makes the caller anonymous. Without AUTH_SECRET every
+caller is anonymous.
+
+Anonymous callers are told apart by client address, as
+``anon:<address>``. Each one gets its own free quota and its own lane in
+the rewrite queue, instead of all of them sharing one. Behind a proxy,
+run uvicorn with ``--proxy-headers`` so the address is the client's and not
+the proxy's.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from backend.config import AUTH_SECRET, AUTH_TOKEN_TTL
+
+ANONYMOUS_USER = "anon"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(message: str, secret: str) -> str:
+    return _b64(hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id: str, ttl: float = AUTH_TOKEN_TTL, secret: str = AUTH_SECRET) -> str:
+    """Session token for ``user_id``; the web app's server does the same with the shared secret"""
+    if not secret:
+        raise RuntimeError("AUTH_SECRET is not set")
+    message = f"{_b64(user_id.encode())}.{int(time.time() + ttl)}"
+    return f"{message}.{_sign(message, secret)}"
+
+
+def verify_token(token: str, secret: str = AUTH_SECRET) -> Optional[str]:
+    """The user id a token was issued for, or None if it is malformed, forged or expired"""
+    if not secret:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    encoded_user, expires, signature = parts
+    if not hmac.compare_digest(signature, _sign(f"{encoded_user}.{expires}", secret)):
+        return None
+    try:
+        if int(expires) < time.time():
+            return None
+        return _unb64(encoded_user).decode() or None
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def anonymous_id(request: HTTPConnection) -> str:
+    """Id for a caller without a valid session token, one per client address"""
+    if request.client is None or not request.client.host:
+        return ANONYMOUS_USER
+    return f"{ANONYMOUS_USER}:{request.client.host}"
+
+
+def get_user_id(request: HTTPConnection) -> str:
+    """Identify the caller by their session token; by client address without a valid one"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = verify_token(token.strip())
+        if user_id:
+            return user_id
+    return anonymous_id(request)
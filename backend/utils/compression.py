@@ -0,0 +1,148 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+CompressionMiddleware compresses response bodies of at least
+COMPRESS_MIN_SIZE bytes with brotli or gzip, whichever the client prefers
+(brotli on a tie). Brotli is optional: without the ``brotli`` package only
+gzip is offered. A response that already has a Content-Encoding passes
+through untouched. That lets a cache keep an EncodedBody (the raw bytes plus
+a compressed copy per coding) and answer a hit with no JSON encoding or
+compression at all. Event streams and NDJSON streams are passed on chunk by
+chunk and never compressed, because their clients need each chunk as soon
+as it is sent.
+"""
+
+import gzip
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.config import BROTLI_QUALITY, COMPRESS_MIN_SIZE, GZIP_LEVEL
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Codings we answer with, most preferred first
+ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+# Streamed as produced; buffering them to compress would hold results back
+STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The coding with the highest q-value among ENCODINGS, or None for the raw body"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output, and so any ETag over it, stable
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class EncodedBody:
+    """A cached response body with its compressed copies, made once when it is stored"""
+
+    __slots__ = ("raw", "encoded")
+
+    def __init__(self, raw: bytes, min_size: int = COMPRESS_MIN_SIZE):
+        self.raw = raw
+        self.encoded: Dict[str, bytes] = (
+            {encoding: compress(raw, encoding) for encoding in ENCODINGS} if len(raw) >= min_size else {}
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.raw) + sum(len(body) for body in self.encoded.values())
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """(coding, bytes) to send a client with this Accept-Encoding; coding None is the raw body"""
+        encoding = negotiate(accept_encoding)
+        if encoding in self.encoded:
+            return encoding, self.encoded[encoding]
+        return None, self.raw
+
+    def headers(self, encoding: Optional[str]) -> Dict[str, str]:
+        """Headers for the bytes ``select`` chose"""
+        headers = {'vary': "Accept-Encoding"} if self.encoded else {}
+        if encoding:
+            headers['content-encoding'] = encoding
+        return headers
+
+
+class CompressionMiddleware:
+    """Compress whole response bodies for clients that accept it; register it last, so it runs outermost"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    """``send`` for one response: buffers its body, then compresses it if it is big enough"""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.chunks = []
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers or headers.get("content-type", "").startswith(STREAMING_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        self.chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+        body = b"".join(self.chunks)
+        if len(body) >= self.minimum_size:
+            body = compress(body, self.encoding)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body})
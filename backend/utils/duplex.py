@@ -0,0 +1,42 @@
+"""
+Full-duplex HTTP: reading the request body while the response streams.
+
+Starlette's StreamingResponse, and the BaseHTTPMiddleware behind
+``@app.middleware("http")``, both call ``receive()`` while the response is
+being sent, to notice a client that hung up. On a route that is still
+reading its request body at that point, those calls take body chunks away
+from it. Routes in DUPLEX_PATHS therefore answer with a
+DuplexStreamingResponse, which leaves ``receive`` to the route. The app's
+http middlewares are registered as HTTPMiddleware, which hands these paths
+straight to the app. Such a route applies quota checks itself.
+HTTPMiddleware passes precomputed constant responses through as well; see
+utils.responses.
+"""
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from backend.utils.responses import is_precomputed_path
+
+# Routes that stream a response while still reading their request body
+DUPLEX_PATHS = {"/api/optimize/stream"}
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that never reads ``receive``; the body iterator owns the request stream"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class HTTPMiddleware(BaseHTTPMiddleware):
+    """``@app.middleware("http")`` that lets DUPLEX_PATHS and precomputed responses through untouched"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and (scope["path"] in DUPLEX_PATHS or is_precomputed_path(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -1,17 +1,60 @@
 import re
 
+# Sentence punctuation with whitespace after it: text up to here can be cleaned up for good
+SENTENCE_BREAK = re.compile(r"[.!?]\s")
+
 def format_editorial(text: str) -> str:
     # Normalize whitespace
     text = re.sub(r"\s+", " ", text.strip())
+    return _drop_quirks(_capitalize(_tidy_punctuation(text))).strip()
 
+def _tidy_punctuation(text: str) -> str:
     # Smart punctuation
     text = text.replace(" .", ".").replace(" ,", ",")
-    text = text.replace(" :", ":").replace(" ;", ";")
+    return text.replace(" :", ":").replace(" ;", ";")
 
+def _capitalize(text: str) -> str:
     # Capitalize first letter
     if text and text[0].islower():
         text = text[0].upper() + text[1:]
+    return text
 
+def _drop_quirks(text: str) -> str:
     # Fix common AI quirks
-    text = text.replace("Here's an improved version:", "").replace("Rewritten:", "")
-    return text.strip()
\ No newline at end of file
+    return text.replace("Here's an improved version:", "").replace("Rewritten:", "")
+
+class EditorialStream:
+    """format_editorial for text that arrives in chunks
+
+    ``feed`` returns the cleaned-up text up to the last sentence break seen
+    so far, and ``finish`` the rest. Every edit format_editorial makes stays
+    within a sentence or touches the whitespace before one, so the pieces
+    concatenate to format_editorial of the whole text.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        self._pending += chunk
+        cut = 0
+        for match in SENTENCE_BREAK.finditer(self._pending):
+            cut = match.start() + 1
+        if not cut:
+            return ""
+        piece, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._format(piece)
+
+    def finish(self) -> str:
+        piece, self._pending = self._pending, ""
+        return self._format(piece).rstrip()
+
+    def _format(self, piece: str) -> str:
+        # Whitespace between sentences starts the next piece and collapses to one space there
+        text = _tidy_punctuation(re.sub(r"\s+", " ", piece))
+        if self._started:
+            return _drop_quirks(text)
+        text = _capitalize(text.lstrip())
+        self._started = bool(text)
+        return _drop_quirks(text).lstrip()
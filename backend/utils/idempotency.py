@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from backend.config import IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL
+from backend.utils.auth import get_user_id
+from backend.utils.compression import EncodedBody
+
+# POST routes where a retried request would repeat a full pipeline or LLM charge
+IDEMPOTENT_PATHS = {"/claude", "/api/optimize", "/api/claudeOptimize", "/api/jobs",
+                    "/api/optimize-and-certify"}
+
+# Recomputed when a stored response is replayed
+_SKIPPED_HEADERS = {"content-length", "transfer-encoding"}
+
+
+class StoredResponse:
+    """Fully buffered response, compressed once, that can be replayed any number of times"""
+
+    __slots__ = ("status_code", "body", "headers", "fingerprint")
+
+    def __init__(self, status_code: int, body: bytes, headers: Dict[str, str], fingerprint: str):
+        self.status_code = status_code
+        self.body = EncodedBody(body)
+        self.headers = headers
+        # Hash of the request body the response answered
+        self.fingerprint = fingerprint
+
+    def to_response(self, replayed: bool, accept_encoding: Optional[str] = None) -> Response:
+        encoding, body = self.body.select(accept_encoding)
+        headers = dict(self.headers, **self.body.headers(encoding))
+        if replayed:
+            headers["Idempotent-Replayed"] = "true"
+        return Response(content=body, status_code=self.status_code, headers=headers)
+
+
+class IdempotencyCache:
+    """Completed responses (with TTL) and in-flight requests, keyed per user"""
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._completed: "OrderedDict[Tuple[str, str, str], Tuple[float, StoredResponse]]" = OrderedDict()
+        # key -> (resolves when the original finishes, its request body fingerprint)
+        self.inflight: Dict[Tuple[str, str, str], Tuple[asyncio.Future, str]] = {}
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[StoredResponse]:
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        expires_at, stored = entry
+        if expires_at < time.monotonic():
+            del self._completed[key]
+            return None
+        return stored
+
+    def put(self, key: Tuple[str, str, str], stored: StoredResponse) -> None:
+        self._completed[key] = (time.monotonic() + self.ttl, stored)
+        self._completed.move_to_end(key)
+        # Insertion order == expiry order, so the oldest entries go first
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+
+idempotency_cache = IdempotencyCache()
+
+
+class _ReleasingStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases its in-flight entry however it ends
+
+    The body generator releases it too, but an async generator's ``finally``
+    never runs if the response is cancelled before the first chunk is pulled.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+async def idempotency_middleware(request: Request, call_next):
+    """
+    Collapse retries that carry the same Idempotency-Key.
+
+    While the first request is running, repeats wait for it; afterwards they
+    get the stored response until the TTL expires. A repeat whose body
+    differs from the original's is a client bug, answered with 422. Only
+    successes are stored: a 2xx whose body doesn't report an error (see
+    ``_succeeded``). A retry after anything else runs again.
+    """
+    idempotency_key = request.headers.get("idempotency-key")
+    if not idempotency_key or request.method != "POST" or request.url.path not in IDEMPOTENT_PATHS:
+        return await call_next(request)
+
+    key = (get_user_id(request), request.url.path, idempotency_key)
+    fingerprint = hashlib.sha256(await _read_body(request)).hexdigest()
+    while True:
+        stored = idempotency_cache.get(key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                return _key_reused()
+            return stored.to_response(replayed=True, accept_encoding=request.headers.get("accept-encoding"))
+        inflight = idempotency_cache.inflight.get(key)
+        if inflight is None:
+            break
+        running, running_fingerprint = inflight
+        if running_fingerprint != fingerprint:
+            return _key_reused()
+        # Resolves when the original finishes (or fails, in which case we run it ourselves)
+        await asyncio.shield(running)
+
+    done = asyncio.get_running_loop().create_future()
+    idempotency_cache.inflight[key] = (done, fingerprint)
+    streaming = False
+    try:
+        response = await call_next(request)
+        headers = {k: v for k, v in response.headers.items() if k not in _SKIPPED_HEADERS}
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            # Pass events on as they come; the stream is stored (and waiters released) once it ends
+            streaming = True
+            return _ReleasingStreamingResponse(
+                _store_as_it_streams(key, done, response, headers, fingerprint),
+                lambda: _release(key, done),
+                status_code=response.status_code,
+                headers=headers,
+            )
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        stored = StoredResponse(status_code=response.status_code, body=body, headers=headers, fingerprint=fingerprint)
+        if _succeeded(response.status_code, headers, body):
+            idempotency_cache.put(key, stored)
+        return stored.to_response(replayed=False, accept_encoding=request.headers.get("accept-encoding"))
+    finally:
+        if not streaming:
+            _release(key, done)
+
+
+async def _store_as_it_streams(key, done, response, headers, fingerprint):
+    """Relay a streamed response, storing it only if it ran to the end"""
+    chunks = []
+    try:
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            yield chunk
+        body = b"".join(chunks)
+        if _succeeded(response.status_code, headers, body):
+            idempotency_cache.put(key, StoredResponse(response.status_code, body, headers, fingerprint))
+    finally:
+        _release(key, done)
+
+
+async def _read_body(request: Request) -> bytes:
+    """The request body, read here and still handed to the route"""
+    body = await request.body()
+    receive = request.receive
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    # call_next reads the body through request.receive
+    request._receive = replay
+    return body
+
+
+def _succeeded(status_code: int, headers: Dict[str, str], body: bytes) -> bool:
+    """A 2xx whose body doesn't report an error: a JSON ``error`` or ``success: false``, or an SSE error event"""
+    if not 200 <= status_code < 300:
+        return False
+    content_type = headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        return not (isinstance(payload, dict) and ('error' in payload or payload.get('success') is False))
+    if content_type.startswith("text/event-stream"):
+        return b"event: error\n" not in body
+    return True
+
+
+def _key_reused() -> JSONResponse:
+    return JSONResponse(
+        status_code=422,
+        content={'success': False, 'error': 'Idempotency-Key was already used with a different request body'},
+    )
+
+
+def _release(key, done):
+    """Let waiters go; safe to call more than once"""
+    inflight = idempotency_cache.inflight.get(key)
+    if inflight is not None and inflight[0] is done:
+        del idempotency_cache.inflight[key]
+    if not done.done():
+        done.set_result(None)
@@ -1,8 +1,8 @@
-from difflib import SequenceMatcher
+from backend.utils.textdiff import similarity_ratio
 
 def compute_metrics(original: str, optimized: str) -> dict:
     def similarity(a, b):
-        return round(SequenceMatcher(None, a, b).ratio() * 100)
+        return round(similarity_ratio(a, b) * 100)
 
     def word_count(text):
         return len(text.split())
@@ -0,0 +1,32 @@
+from typing import AsyncIterator, Optional
+
+
+async def ndjson_lines(chunks: AsyncIterator[bytes], max_line: int) -> AsyncIterator[Optional[bytes]]:
+    """Non-blank lines of a newline-delimited byte stream, as they complete
+
+    Holds at most one line (``max_line`` bytes) at a time. A longer line is
+    skipped up to its newline and yields None in its place, so the caller
+    can report it and carry on with the next one.
+    """
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while start < len(chunk):
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end < 0 else chunk[start:end]
+            if not skipping:
+                buffer += piece
+                if len(buffer) > max_line:
+                    buffer.clear()
+                    skipping = True
+                    yield None
+            if end < 0:
+                break
+            if not skipping and buffer.strip():
+                yield bytes(buffer)
+            buffer.clear()
+            skipping = False
+            start = end + 1
+    if not skipping and buffer.strip():
+        yield bytes(buffer)
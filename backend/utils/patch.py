@@ -0,0 +1,48 @@
+"""
+Compact edit patches for optimize responses.
+
+A patch is ``{"base_length", "result_length", "ops"}``. Each op is
+``[start, end, text]``, meaning original[start:end] is replaced by ``text``.
+Ops are sorted and don't overlap. Offsets count Unicode code points, the
+same as Python string indexes. JavaScript clients must index
+``Array.from(text)``, not UTF-16 units.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.utils.textdiff import ChangeSpan, diff_texts
+
+
+def build_patch(original: str, rewritten: str,
+                spans: Optional[Iterable[ChangeSpan]] = None) -> Dict[str, Any]:
+    """Patch turning ``original`` into ``rewritten``; pass ``spans`` to reuse an existing diff"""
+    if spans is None:
+        spans = diff_texts(original, rewritten).spans
+    return {
+        'base_length': len(original),
+        'result_length': len(rewritten),
+        'ops': [[span.a_start, span.a_end, rewritten[span.b_start:span.b_end]] for span in spans],
+    }
+
+
+def apply_patch(original: str, patch: Dict[str, Any]) -> str:
+    """Rebuild the rewritten text from the original and a patch"""
+    if len(original) != patch['base_length']:
+        raise ValueError(
+            f"Patch is for a {patch['base_length']}-character original, got {len(original)}"
+        )
+
+    parts: List[str] = []
+    position = 0
+    for start, end, text in patch['ops']:
+        if start < position or end < start or end > len(original):
+            raise ValueError(f"Invalid patch op at [{start}, {end}]")
+        parts.append(original[position:start])
+        parts.append(text)
+        position = end
+    parts.append(original[position:])
+
+    result = "".join(parts)
+    if len(result) != patch['result_length']:
+        raise ValueError("Patched text length does not match the patch")
+    return result
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from backend.services.plan_store import get_user_plan, plan_store
+from backend.services.usage_meter import usage_meter
+from backend.utils.auth import get_user_id
+
+# Routes that spend rewrite or LLM budget (duplex routes, see utils/duplex.py, check quota themselves)
+METERED_PATHS = {"/claude", "/api/optimize", "/api/claudeOptimize", "/api/jobs",
+                 "/api/optimize-and-certify"}
+
+async def load_quota(user_id: str) -> str:
+    """The caller's plan, with it and their usage totals read into memory off the event loop
+
+    After this the plan lookup and quota checks for the caller are in-memory,
+    so synchronous helpers below can be called from async code.
+    """
+    if plan_store.is_cached(user_id) and usage_meter.is_loaded(user_id):
+        return get_user_plan(user_id)
+    return await asyncio.to_thread(_load_quota, user_id)
+
+def _load_quota(user_id: str) -> str:
+    usage_meter.totals(user_id)
+    return get_user_plan(user_id)
+
+def quota_headers(user_id: str, plan: str) -> dict:
+    """Remaining-quota headers for the caller's plan"""
+    headers = {
+        "X-Quota-Plan": plan,
+        "X-Quota-Reset": str(int(usage_meter.period_end)),
+    }
+    for name, remaining in usage_meter.remaining(user_id, plan).items():
+        header = "X-Quota-Remaining-" + name.replace("_", "-").title()
+        headers[header] = "unlimited" if remaining is None else str(remaining)
+    return headers
+
+def quota_exceeded_error(user_id: str, plan: str) -> Optional[str]:
+    """The error message for a caller whose plan quota is spent, else None"""
+    exhausted = usage_meter.exceeded(user_id, plan)
+    if not exhausted:
+        return None
+    return f"Monthly {exhausted.replace('_', ' ')} quota exceeded for the {plan} plan"
+
+def quota_exceeded_response(user_id: str, plan: str) -> Optional[JSONResponse]:
+    """The 429 for a caller whose plan quota is spent, else None"""
+    error = quota_exceeded_error(user_id, plan)
+    if not error:
+        return None
+    return JSONResponse(
+        status_code=429,
+        content={
+            'success': False,
+            'error': error
+        },
+        headers=quota_headers(user_id, plan),
+    )
+
+def quota_short_response(user_id: str, plan: str, needed: Dict[str, int]) -> Optional[JSONResponse]:
+    """The 429 for work that needs more of a counter than the plan has left, else None"""
+    remaining = usage_meter.remaining(user_id, plan)
+    for name, amount in needed.items():
+        left = remaining.get(name)
+        if left is not None and amount > left:
+            return JSONResponse(
+                status_code=429,
+                content={
+                    'success': False,
+                    'error': f"This needs {amount} {name.replace('_', ' ')} but the {plan} plan "
+                             f"has {left} left this month"
+                },
+                headers=quota_headers(user_id, plan),
+            )
+    return None
+
+async def quota_middleware(request: Request, call_next):
+    """Reject metered calls once a plan quota is spent; report quota on every response"""
+    user_id = get_user_id(request)
+    plan = await load_quota(user_id)
+
+    if request.url.path in METERED_PATHS:
+        exceeded = quota_exceeded_response(user_id, plan)
+        if exceeded:
+            return exceeded
+
+    response = await call_next(request)
+    response.headers.update(quota_headers(user_id, plan))
+    return response
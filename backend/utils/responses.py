@@ -0,0 +1,77 @@
+"""
+Default JSON response class for the app, and precomputed constant responses.
+
+orjson encodes several times faster than the stdlib ``json`` module that
+``JSONResponse`` uses. It is optional: without it responses fall back to
+``JSONResponse`` and the output is the same compact JSON.
+
+Routes whose answer never changes while the process runs (the catalogs and
+the probes) serialize it once into a PrecomputedJSON. It carries a strong
+ETag over its bytes and answers a matching ``If-None-Match`` with a 304.
+Its compressed copies are made at the same time, each with its own ETag.
+The http middlewares pass PRECOMPUTED_PATHS straight through, so these
+responses carry no per-user headers and shared caches may keep them.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from backend.utils.compression import EncodedBody
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+FastJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+# Routes answered from a PrecomputedJSON (exact paths, then prefixes)
+PRECOMPUTED_PATHS = {"/", "/healthz", "/api/modes"}
+PRECOMPUTED_PREFIXES = ("/api/sample/",)
+
+
+def is_precomputed_path(path: str) -> bool:
+    return path in PRECOMPUTED_PATHS or path.startswith(PRECOMPUTED_PREFIXES)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison, as RFC 9110 asks for here)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class PrecomputedJSON:
+    """
+    A constant JSON payload encoded and compressed once, with its ETags and Cache-Control.
+
+    An error (``status_code`` other than 200) gets no ETag and is never
+    answered with a 304, since conditional requests only revalidate successes.
+    """
+
+    def __init__(self, content, cache_control: str, status_code: int = 200):
+        self.body = EncodedBody(FastJSONResponse(content).body)
+        self.etag = '"%s"' % hashlib.sha256(self.body.raw).hexdigest()[:32]
+        self.cache_control = cache_control
+        self.status_code = status_code
+
+    def response(self, request: Request) -> Response:
+        """The body in the client's preferred coding, or an empty 304 when the client already holds it"""
+        encoding, body = self.body.select(request.headers.get("accept-encoding"))
+        headers = {'cache-control': self.cache_control, **self.body.headers(encoding)}
+        if self.status_code != 200:
+            return Response(body, status_code=self.status_code, media_type="application/json", headers=headers)
+        # Strong ETags differ between codings of the same payload
+        etag = f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+        headers['etag'] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
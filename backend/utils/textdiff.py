@@ -0,0 +1,285 @@
+"""
+Token-level text diff.
+
+Texts are split into word, whitespace and punctuation tokens, so the tokens
+cover every character and the change spans partition both texts. Matching
+works like patience diff: common prefix and suffix are stripped, tokens that
+occur exactly once on both sides are anchored by a longest increasing
+subsequence, and the gaps between anchors are handled the same way
+recursively. When no single token is unique (long texts over a small
+vocabulary), unique runs of 4 or 16 tokens anchor instead. A gap with no
+anchors at all falls back to Myers' O(ND) diff, which gives up and reports
+the gap as replaced past ``MYERS_MAX_COST`` edits or once the per-diff
+``MYERS_BUDGET`` is spent. Nothing is O(N * M) like SequenceMatcher.
+
+Short replaced spans are then re-diffed per character so the similarity
+ratio stays close to ``difflib.SequenceMatcher.ratio()`` on prose. The
+character pass is capped per span and in total.
+"""
+
+import math
+import re
+import sys
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+|\s+|[^\w\s]')
+
+# Anchor widths tried in turn: single tokens, then token n-grams
+ANCHOR_WIDTHS = (1, 4, 16)
+
+# Gaps of up to this many tokens (both sides) go straight to Myers
+SMALL_GAP = 48
+
+# Edit budget for a Myers pass over a gap with no unique anchors
+MYERS_MAX_COST = 512
+
+# Myers steps per diff across all gaps
+MYERS_BUDGET = 2_000_000
+
+# Replaced spans up to this many characters per side are re-diffed per character
+CHAR_REFINE_SPAN = 256
+
+# Total characters re-diffed per character in one diff
+CHAR_REFINE_BUDGET = 65536
+
+
+class ChangeSpan(NamedTuple):
+    """One change: text[a_start:a_end] in the original became text[b_start:b_end]"""
+    op: str  # 'replace', 'delete' or 'insert'
+    a_start: int
+    a_end: int
+    b_start: int
+    b_end: int
+
+
+@dataclass(frozen=True)
+class TextDiff:
+    ratio: float              # 2 * matched characters / total characters, like SequenceMatcher
+    spans: List[ChangeSpan]
+    matched_chars: int
+
+
+def _lis(values: List[int]) -> List[int]:
+    """Indexes of a longest strictly increasing subsequence of ``values``"""
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(values)
+    for index, value in enumerate(values):
+        position = bisect_left(tails, value)
+        if position:
+            previous[index] = tail_index[position - 1]
+        if position == len(tails):
+            tails.append(value)
+            tail_index.append(index)
+        else:
+            tails[position] = value
+            tail_index[position] = index
+
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index != -1:
+        result.append(index)
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _myers(a: Sequence, b: Sequence, a_lo: int, a_hi: int, b_lo: int, b_hi: int,
+           max_cost: int) -> Tuple[Optional[List[Tuple[int, int]]], int]:
+    """Matched index pairs of a shortest edit script (None past ``max_cost`` edits) and the cost searched"""
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = min(n + m, max_cost)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+
+    for d in range(max_d + 1):
+        # Diagonals -d-1..d+1 are all the backtrack reads from this snapshot
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, a_lo, b_lo), d
+    return None, max_d
+
+
+def _backtrack(trace: List[List[int]], n: int, m: int, a_lo: int, b_lo: int) -> List[Tuple[int, int]]:
+    pairs = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        base = d + 1  # index of diagonal 0 in this snapshot
+        k = x - y
+        if k == -d or (k != d and v[base + k - 1] < v[base + k + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[base + previous_k]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            x -= 1
+            y -= 1
+            pairs.append((a_lo + x, b_lo + y))
+        x, y = previous_x, previous_y
+    pairs.reverse()
+    return pairs
+
+
+def _unique_anchors(a: Sequence, b: Sequence, a_lo: int, a_hi: int, b_lo: int, b_hi: int,
+                    width: int) -> List[Tuple[int, int]]:
+    """Non-overlapping, in-order starts of ``width``-grams that occur once on each side"""
+    if width == 1:
+        a_keys = a[a_lo:a_hi]
+        b_keys = b[b_lo:b_hi]
+    else:
+        a_keys = list(zip(*(a[a_lo + k:a_hi - width + 1 + k] for k in range(width))))
+        b_keys = list(zip(*(b[b_lo + k:b_hi - width + 1 + k] for k in range(width))))
+
+    a_counts = Counter(a_keys)
+    b_counts = Counter(b_keys)
+    b_unique = {key: b_lo + j for j, key in enumerate(b_keys) if b_counts[key] == 1}
+    candidates = [
+        (a_lo + i, b_unique[key]) for i, key in enumerate(a_keys)
+        if a_counts[key] == 1 and key in b_unique
+    ]
+
+    anchors = []
+    next_i = next_j = -1
+    for index in _lis([j for _, j in candidates]):
+        i, j = candidates[index]
+        if i >= next_i and j >= next_j:
+            anchors.append((i, j))
+            next_i, next_j = i + width, j + width
+    return anchors
+
+
+def match_sequences(a: Sequence, b: Sequence, max_cost: int = MYERS_MAX_COST,
+                    budget: int = MYERS_BUDGET) -> List[Tuple[int, int]]:
+    """Matched (i, j) index pairs between two sequences of hashable items, in order"""
+    pairs: List[Tuple[int, int]] = []
+    # Work items run left to right: ('region', a_lo, a_hi, b_lo, b_hi) or ('run', i, j, length)
+    stack: list = [('region', 0, len(a), 0, len(b))]
+
+    while stack:
+        item = stack.pop()
+        if item[0] == 'run':
+            _, i, j, length = item
+            pairs.extend((i + step, j + step) for step in range(length))
+            continue
+
+        _, a_lo, a_hi, b_lo, b_hi = item
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            pairs.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        suffix = 0
+        while a_lo < a_hi - suffix and b_lo < b_hi - suffix and a[a_hi - 1 - suffix] == b[b_hi - 1 - suffix]:
+            suffix += 1
+        if suffix:
+            stack.append(('run', a_hi - suffix, b_hi - suffix, suffix))
+            a_hi -= suffix
+            b_hi -= suffix
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        # Unique tokens first; if none, unique runs of tokens (common words repeat).
+        # Small gaps skip anchoring: Myers is cheaper than counting them.
+        small = (a_hi - a_lo) + (b_hi - b_lo) <= SMALL_GAP
+        for width in () if small else ANCHOR_WIDTHS:
+            anchors = _unique_anchors(a, b, a_lo, a_hi, b_lo, b_hi, width)
+            if anchors:
+                break
+        else:
+            # Myers costs about d^2 / 2 steps to search d edits; stop spending once the budget is gone
+            cost = min(max_cost, math.isqrt(2 * budget))
+            found, searched = _myers(a, b, a_lo, a_hi, b_lo, b_hi, cost)
+            budget = max(0, budget - searched * searched // 2)
+            pairs.extend(found or ())
+            continue
+
+        # Push right to left so regions and anchors pop in text order
+        next_a, next_b = a_hi, b_hi
+        for i, j in reversed(anchors):
+            stack.append(('region', i + width, next_a, j + width, next_b))
+            stack.append(('run', i, j, width))
+            next_a, next_b = i, j
+        stack.append(('region', a_lo, next_a, b_lo, next_b))
+
+    return pairs
+
+
+def _tokenize(text: str) -> Tuple[List[str], List[int]]:
+    """Tokens and their start offsets, with len(text) appended as a sentinel"""
+    # Interned so equal tokens compare by identity
+    tokens = list(map(sys.intern, TOKEN_PATTERN.findall(text)))
+    # The pattern matches every character, so tokens tile the text
+    starts = list(accumulate(map(len, tokens), initial=0))
+    return tokens, starts
+
+
+def _gaps(pairs: List[Tuple[int, int]], a_len: int, b_len: int):
+    """(a_lo, a_hi, b_lo, b_hi) for every unmatched stretch between matched pairs"""
+    previous_i = previous_j = -1
+    for i, j in pairs + [(a_len, b_len)]:
+        if i > previous_i + 1 or j > previous_j + 1:
+            yield previous_i + 1, i, previous_j + 1, j
+        previous_i, previous_j = i, j
+
+
+def _span(a_start: int, a_end: int, b_start: int, b_end: int) -> ChangeSpan:
+    if a_start == a_end:
+        op = 'insert'
+    elif b_start == b_end:
+        op = 'delete'
+    else:
+        op = 'replace'
+    return ChangeSpan(op, a_start, a_end, b_start, b_end)
+
+
+def diff_texts(a: str, b: str) -> TextDiff:
+    """Diff two texts; returns the similarity ratio and the change spans"""
+    a_tokens, a_starts = _tokenize(a)
+    b_tokens, b_starts = _tokenize(b)
+
+    pairs = match_sequences(a_tokens, b_tokens)
+    matched_chars = sum(len(a_tokens[i]) for i, _ in pairs)
+
+    spans = []
+    budget = CHAR_REFINE_BUDGET
+    for a_lo, a_hi, b_lo, b_hi in _gaps(pairs, len(a_tokens), len(b_tokens)):
+        a_start, a_end = a_starts[a_lo], a_starts[a_hi]
+        b_start, b_end = b_starts[b_lo], b_starts[b_hi]
+        a_size, b_size = a_end - a_start, b_end - b_start
+
+        if (a_size and b_size and a_size <= CHAR_REFINE_SPAN and b_size <= CHAR_REFINE_SPAN
+                and a_size + b_size <= budget):
+            budget -= a_size + b_size
+            a_text, b_text = a[a_start:a_end], b[b_start:b_end]
+            char_pairs = match_sequences(a_text, b_text)
+            matched_chars += len(char_pairs)
+            for lo_a, hi_a, lo_b, hi_b in _gaps(char_pairs, a_size, b_size):
+                spans.append(_span(a_start + lo_a, a_start + hi_a, b_start + lo_b, b_start + hi_b))
+        else:
+            spans.append(_span(a_start, a_end, b_start, b_end))
+
+    total = len(a) + len(b)
+    ratio = 2.0 * matched_chars / total if total else 1.0
+    return TextDiff(ratio=ratio, spans=spans, matched_chars=matched_chars)
+
+
+def similarity_ratio(a: str, b: str) -> float:
+    """Similarity in [0, 1]; a linear-time stand-in for SequenceMatcher.ratio()"""
+    return diff_texts(a, b).ratio
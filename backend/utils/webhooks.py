@@ -0,0 +1,46 @@
+"""
+Webhook URL checks.
+
+Job webhooks are POSTed from inside our network to a URL the caller chose,
+so a URL that resolves to a loopback, private, link-local or otherwise
+non-public address is refused. Otherwise a caller could reach internal
+services or cloud metadata endpoints. The host is resolved when the job is
+accepted, and again before each delivery, so a DNS record changed in
+between can't slip through. Hosts in JOB_WEBHOOK_ALLOWED_HOSTS (e.g. a
+receiver on the local network in development) skip the address check.
+"""
+
+import ipaddress
+import socket
+from typing import List
+from urllib.parse import urlparse
+
+from backend.config import JOB_WEBHOOK_ALLOWED_HOSTS
+
+
+def _resolve(host: str, port: int) -> List[str]:
+    return [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url: str) -> None:
+    """Raise ValueError unless ``url`` is http(s) and its host resolves only to public addresses; blocks on DNS"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("webhook_url must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if host in JOB_WEBHOOK_ALLOWED_HOSTS:
+        return
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = _resolve(host, port)
+    except (OSError, ValueError):
+        raise ValueError(f"webhook_url host {host} does not resolve")
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise ValueError(f"webhook_url host {host} is not a public address")
@@ -1,14 +1,43 @@
-import { useState } from 'react';
-import { submitPromptToClaude } from '../services/api';
+import { useEffect, useState } from 'react';
+import { analyzeText, submitPromptToClaude } from '../services/api';
 import { cleanResponse, formatEditorial } from '../services/optimization';
 import { logSession } from '../services/sessionLogger';
 import ResponseViewer from './ResponseViewer';
 
+const LINT_DEBOUNCE_MS = 300;
+
 export default function ClaudeEditor() {
   const [prompt, setPrompt] = useState('');
   const [result, setResult] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [lint, setLint] = useState(null);
+
+  // Live linting: analyze once typing pauses, dropping responses for stale text
+  useEffect(() => {
+    if (!prompt.trim()) {
+      setLint(null);
+      return undefined;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const response = await analyzeText(prompt, controller.signal);
+        if (response.success) {
+          setLint(response);
+        }
+      } catch (err) {
+        if (err.name !== 'AbortError') {
+          console.warn('[Analyze]', err.message);
+        }
+      }
+    }, LINT_DEBOUNCE_MS);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [prompt]);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -61,6 +90,15 @@ export default function ClaudeEditor() {
             placeholder="Enter your editorial request..."
           />
         </label>
+        {lint && (
+          <div style={{ marginTop: '0.5rem', fontSize: '0.875rem', color: '#555' }}>
+            Readability {Math.round(lint.analysis.readability_score * 100)}% ·{' '}
+            {lint.sentences.reduce((count, sentence) => count + sentence.issues.length, 0)} issues
+            {lint.analysis.improvement_opportunities.length > 0 && (
+              <> · {lint.analysis.improvement_opportunities.join(' · ')}</>
+            )}
+          </div>
+        )}
         <button
           disabled={loading || !prompt}
           style={{
@@ -6,6 +6,8 @@ async function sleep(ms) {
 
 export async function submitPromptToClaude(promptText, retries = 3, delay = 1000) {
   let lastError;
+  // Same key on every retry so the backend runs the prompt once
+  const idempotencyKey = crypto.randomUUID();
 
   for (let attempt = 1; attempt <= retries; attempt++) {
     try {
@@ -14,6 +16,7 @@ export async function submitPromptToClaude(promptText, retries = 3, delay = 1000
         headers: {
           'Content-Type': 'application/json',
           Authorization: `Bearer ${process.env.REACT_APP_CLAUDE_KEY}`,
+          'Idempotency-Key': idempotencyKey,
         },
         body: JSON.stringify({ prompt: promptText }),
       });
@@ -31,4 +34,20 @@ export async function submitPromptToClaude(promptText, retries = 3, delay = 1000
   }
 
   throw lastError;
-}
\ No newline at end of file
+}
+
+// Analysis and per-sentence annotations for live linting; repeated texts are served from cache
+export async function analyzeText(content, signal) {
+  const response = await fetch(`${API_URL}/api/analyze`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ content }),
+    signal,
+  });
+
+  if (!response.ok) {
+    throw new Error(`Analyze API Error: ${response.status}`);
+  }
+
+  return response.json();
+}
@@ -21,4 +21,24 @@ export function formatEditorial(content) {
     .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
     .replace(/\*(.*?)\*/g, '<em>$1</em>')
     .replace(/\n/g, '<br />');
-}
\ No newline at end of file
+}
+
+/**
+ * Applies a /api/optimize patch (response_format: "patch") to the submitted text.
+ * Offsets count code points, so index Array.from(text) rather than UTF-16 units.
+ */
+export function applyPatch(original, patch) {
+  const chars = Array.from(original);
+  if (chars.length !== patch.base_length) {
+    throw new Error(`Patch is for a ${patch.base_length}-character original, got ${chars.length}`);
+  }
+
+  const parts = [];
+  let position = 0;
+  for (const [start, end, text] of patch.ops) {
+    parts.push(chars.slice(position, start).join(''), text);
+    position = end;
+  }
+  parts.push(chars.slice(position).join(''));
+  return parts.join('');
+}